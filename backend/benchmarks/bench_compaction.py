@@ -0,0 +1,117 @@
+"""
+자막 압축 벤치마크 (생성된 자동 자막 / Whisper 텍스트)
+- 크기별 처리 시간, 처리량 (MB/s)
+- 압축률, 줄어든 추정 토큰 수
+- 선형성: 글자당 처리 시간이 크기에 따라 늘지 않는지 확인
+
+실행: python -m benchmarks.bench_compaction --sizes 100000,1000000,5000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.transcript_compaction import compact_lines, compact_text
+from services.prompt_budget import estimate_tokens
+
+
+WORDS = [
+    '오늘은', '머신러닝의', '기본', '개념을', '데이터를', '준비하는', '과정', '시험에', '자주', '나오는',
+    '손실', '함수를', '최소화하는', '예제를', '풀어', '보면서', '선형대수의', '고유값', '행렬', '벡터',
+    'gradient', 'descent', 'attention', 'token', 'layer', 'model', '확률', '분포', '평균', '분산',
+]
+ENDINGS = ['알아보겠습니다', '살펴볼게요', '기억해 두세요', '확인해 봅시다', '정리합니다']
+NOISE = ['[음악]', '[박수]', '[Music]', '♪', '[웃음]']
+FILLERS = ['음', '어', 'um', 'uh', '음...']
+LOOP = '감사합니다'
+
+
+def make_sentence(rng: random.Random) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 9))) + ' ' + rng.choice(ENDINGS)
+
+
+def make_subtitle_lines(rng: random.Random, target_chars: int):
+    """
+    롤링 자동 자막: 각 줄이 이전 줄 뒷부분 + 새 단어, 중간중간 잡음 태그 / 추임새 / 반복 루프
+    """
+    lines = []
+    size = 0
+    stream = []
+    while size < target_chars:
+        roll = rng.random()
+        if roll < 0.05:
+            line = rng.choice(NOISE)
+        elif roll < 0.08:
+            line = ' '.join([LOOP] * rng.randint(3, 8))
+        else:
+            new_words = make_sentence(rng).split()
+            if rng.random() < 0.2:
+                new_words.insert(rng.randint(0, len(new_words)), rng.choice(FILLERS))
+            # 이전 줄 마지막 몇 단어를 다시 포함 (자동 자막 특유의 겹침)
+            carry = stream[-rng.randint(0, 4):] if stream and rng.random() < 0.6 else []
+            stream = new_words
+            line = ' '.join(carry + new_words)
+        lines.append(line)
+        # 같은 줄이 두 번 나오는 경우
+        if rng.random() < 0.1:
+            lines.append(line)
+        size += len(line) + 1
+    return lines
+
+
+def make_whisper_text(rng: random.Random, target_chars: int) -> str:
+    """
+    Whisper 출력: 문장 단위, 가끔 같은 문장이 여러 번 반복되는 환각
+    """
+    parts = []
+    size = 0
+    while size < target_chars:
+        sentence = make_sentence(rng) + '.'
+        repeat = rng.randint(4, 10) if rng.random() < 0.05 else 1
+        for _ in range(repeat):
+            parts.append(sentence)
+            size += len(sentence) + 1
+    return ' '.join(parts)
+
+
+def run(sizes, seed: int) -> None:
+    rng = random.Random(seed)
+    print(f"{'source':<9} {'chars':>10} {'time':>9} {'MB/s':>7} {'µs/kchar':>9} {'ratio':>7} {'tokens':>19}")
+
+    for source in ('subtitle', 'whisper'):
+        per_char = []
+        for size in sizes:
+            if source == 'subtitle':
+                lines = make_subtitle_lines(rng, size)
+                raw = ' '.join(lines)
+                start = time.perf_counter()
+                text, stats = compact_lines(lines, 'subtitle')
+            else:
+                raw = make_whisper_text(rng, size)
+                start = time.perf_counter()
+                text, stats = compact_text(raw, 'whisper')
+            elapsed = time.perf_counter() - start
+
+            megabytes = len(raw.encode('utf-8')) / 1e6
+            per_char.append(elapsed / len(raw))
+            before, after = estimate_tokens(raw), estimate_tokens(text)
+            print(
+                f"{source:<9} {len(raw):>10} {elapsed:>8.3f}s {megabytes / elapsed:>7.1f} "
+                f"{per_char[-1] * 1e9:>9.1f} {stats.ratio:>7.1%} {before:>9}→{after:<9}"
+            )
+
+        # 가장 큰 입력의 글자당 시간이 가장 작은 입력의 2배를 넘으면 선형이 아님
+        growth = per_char[-1] / per_char[0]
+        verdict = 'OK (linear)' if growth < 2.0 else 'WARNING (super-linear)'
+        print(f"{source:<9} time/char growth {sizes[0]}→{sizes[-1]}: x{growth:.2f} {verdict}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='자막 압축 벤치마크')
+    parser.add_argument('--sizes', default='100000,1000000,5000000', help='입력 글자 수 (쉼표 구분)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run([int(size) for size in args.sizes.split(',')], args.seed)
@@ -0,0 +1,273 @@
+"""
+엔드 투 엔드 벤치마크 (오프라인)
+- yt-dlp / 자막 API / Gemini / Whisper / 웹 요청을 로컬 대역으로 교체 (benchmarks/fakes.py)
+- 픽스처 PDF / 오디오 / HTML 생성 (benchmarks/fixtures.py)
+- 저장소는 임시 디렉토리의 SQLite
+- 엔드포인트별로 동시성을 고정해서 요청 → 처리량, p50/p95/p99 지연, 최대 RSS
+
+실행: python -m benchmarks.bench_e2e --requests 100 --concurrency 8
+      python -m benchmarks.bench_e2e --output results.json --compare baseline.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fakes import FakeConfig, install_fakes
+from benchmarks.fixtures import build_fixtures
+
+ENDPOINTS = ['youtube_info', 'youtube_summarize', 'youtube_list', 'pdf_upload', 'web_summarize', 'search']
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def current_rss() -> int:
+    """
+    현재 RSS (bytes) - /proc 없으면 ru_maxrss로 대체
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+class RssSampler:
+    """
+    백그라운드 스레드에서 RSS를 주기적으로 읽어 최댓값 기록
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+
+def build_requests(fixtures, n_requests: int, repeat_ratio: float):
+    """
+    엔드포인트별 요청 생성 함수 (i번째 요청 → httpx 호출 인자)
+
+    repeat_ratio: 같은 영상/URL을 다시 요청하는 비율 (single-flight, 캐시 경로 측정)
+    """
+    hot = max(1, int(n_requests * (1 - repeat_ratio)))
+
+    # 엔드포인트마다 다른 영상 ID (single-flight 결과 파일을 엔드포인트끼리 공유하지 않도록)
+    def video_url(prefix, i):
+        return f"https://www.youtube.com/watch?v={prefix}{i % hot:06d}"
+
+    with open(fixtures['pdf'], 'rb') as f:
+        pdf_bytes = f.read()
+
+    return {
+        'youtube_info': lambda i: ('GET', '/api/youtube/info', {'params': {'video_url': video_url('info', i)}}),
+        'youtube_summarize': lambda i: ('POST', '/api/youtube/summarize', {
+            'json': {'video_url': video_url('summ', i), 'user_id': f"bench-user-{i % 10}"}
+        }),
+        'youtube_list': lambda i: ('GET', '/api/youtube/summaries', {
+            'params': {'user_id': f"bench-user-{i % 10}", 'limit': 20}
+        }),
+        'pdf_upload': lambda i: ('POST', '/api/pdf/upload', {
+            'files': {'file': (f"lecture-{i}.pdf", pdf_bytes, 'application/pdf')},
+            'data': {'user_id': f"bench-user-{i % 10}"},
+        }),
+        'web_summarize': lambda i: ('POST', '/api/web/summarize', {
+            'json': {'url': f"https://example.com/articles/{i % hot}", 'user_id': f"bench-user-{i % 10}"}
+        }),
+        'search': lambda i: ('POST', '/api/search', {
+            'json': {'query': ['머신러닝 강의', 'transformer attention', '최적화', 'gradient 예제'][i % 4],
+                     'user_id': f"bench-user-{i % 10}", 'limit': 10}
+        }),
+    }
+
+
+async def run_endpoint(client, make_request, n_requests: int, concurrency: int, warmup: int):
+    for i in range(warmup):
+        method, url, kwargs = make_request(n_requests + i)
+        await client.request(method, url, **kwargs)
+
+    latencies = []
+    errors = {}
+    next_index = iter(range(n_requests))
+
+    async def worker():
+        for i in next_index:
+            method, url, kwargs = make_request(i)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+    with RssSampler() as sampler:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        'requests': n_requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(n_requests / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'peak_rss_mb': round(sampler.peak / 1e6, 1),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+
+    workdir = tempfile.mkdtemp(prefix='supremenote-bench-')
+    fixtures = build_fixtures(os.path.join(workdir, 'fixtures'), pdf_pages=args.pdf_pages)
+
+    config = install_fakes(FakeConfig(
+        latency_scale=args.latency_scale,
+        subtitle_ratio=args.subtitle_ratio,
+        transcript_chars=args.transcript_chars,
+        audio_fixture=fixtures['audio'],
+        html_fixtures=fixtures['html'],
+    ))
+
+    # 상대 경로(uploads/, downloads/, data/)가 모두 임시 디렉토리에 생기도록
+    os.chdir(workdir)
+    os.environ.update({
+        'STORAGE_BACKEND': 'sqlite',
+        'SQLITE_PATH': os.path.join(workdir, 'data', 'bench.db'),
+        'SEARCH_INDEX_PATH': os.path.join(workdir, 'data', 'search_index.bin'),
+        'SINGLEFLIGHT_DIR': os.path.join(workdir, 'downloads', '.singleflight'),
+        'GEMINI_API_KEY': 'bench',
+    })
+
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log if not args.verbose else sys.stdout):
+        from main import app
+
+        requests_by_endpoint = build_requests(fixtures, args.requests, args.repeat_ratio)
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        await app.router.startup()
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+                # 백그라운드 warm-up이 끝난 뒤 측정
+                for _ in range(600):
+                    if (await client.get('/ready')).status_code == 200:
+                        break
+                    await asyncio.sleep(0.1)
+                for name in args.endpoints:
+                    results[name] = await run_endpoint(
+                        client, requests_by_endpoint[name], args.requests, args.concurrency, args.warmup
+                    )
+                    print(f"[BENCH] {name}: {results[name]}", file=sys.stderr)
+        finally:
+            await app.router.shutdown()
+            os.chdir(BACKEND_DIR)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'config': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'repeat_ratio': args.repeat_ratio,
+            'latency_scale': config.latency_scale,
+            'subtitle_ratio': config.subtitle_ratio,
+            'transcript_chars': config.transcript_chars,
+            'pdf_pages': args.pdf_pages,
+        },
+        'results': results,
+    }
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    header = f"{'endpoint':<20}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS MB':>9}{'errors':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, result in report['results'].items():
+        errors = sum(result['errors'].values())
+        print(f"{name:<20}{result['throughput_rps']:>9.1f}{result['p50_ms']:>10.1f}"
+              f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['peak_rss_mb']:>9.1f}{errors:>8}")
+
+        previous = (baseline or {}).get('results', {}).get(name)
+        if previous:
+            deltas = []
+            for key in ('throughput_rps', 'p50_ms', 'p99_ms', 'peak_rss_mb'):
+                if previous[key]:
+                    deltas.append(f"{key} {(result[key] - previous[key]) / previous[key] * 100:+.1f}%")
+            print(f"{'':<20}vs baseline: {', '.join(deltas)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='오프라인 엔드 투 엔드 벤치마크')
+    parser.add_argument('--requests', type=int, default=50, help='엔드포인트당 요청 수')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=2, help='측정 전 요청 수 (모델 로딩 등 제외)')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help=f"쉼표 구분 ({', '.join(ENDPOINTS)})")
+    parser.add_argument('--repeat-ratio', type=float, default=0.0, help='같은 영상/URL 재요청 비율')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='대역 지연 배율 (0이면 지연 없음)')
+    parser.add_argument('--subtitle-ratio', type=float, default=0.8, help='자막이 있는 영상 비율 (나머지는 Whisper)')
+    parser.add_argument('--transcript-chars', type=int, default=20000)
+    parser.add_argument('--pdf-pages', type=int, default=10)
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON')
+    parser.add_argument('--verbose', action='store_true', help='서비스 로그 출력')
+    args = parser.parse_args()
+
+    args.endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"알 수 없는 엔드포인트: {', '.join(sorted(unknown))}")
+
+    # --output/--compare 경로는 작업 디렉토리 이동 전에 절대 경로로
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    report = asyncio.run(run(args))
+    print_report(report, baseline)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {output}")
@@ -0,0 +1,127 @@
+"""
+검색 인덱스 벤치마크 (생성된 코퍼스)
+- 인덱스 빌드 시간
+- 메모리 사용량 (tracemalloc)
+- 쿼리 지연 시간 p50/p95/p99
+- 디스크 포맷 크기, 로드 시간
+
+실행: python -m benchmarks.bench_search --docs 20000 --queries 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.search_service import BM25Index
+
+
+KOREAN_WORDS = [
+    '머신러닝', '딥러닝', '강의', '요약', '데이터베이스', '인공지능', '알고리즘', '자료구조',
+    '미분', '적분', '선형대수', '확률', '통계', '경제학', '물리학', '화학', '생명과학',
+    '역사', '한국사', '프로그래밍', '파이썬', '자바스크립트', '네트워크', '운영체제',
+    '시험', '중간고사', '기말고사', '과제', '정리', '핵심', '개념', '예제', '문제풀이',
+]
+ENGLISH_WORDS = [
+    'transformer', 'attention', 'gradient', 'backprop', 'kubernetes', 'docker', 'react',
+    'fastapi', 'supabase', 'whisper', 'gemini', 'embedding', 'vector', 'index', 'lecture',
+]
+IDENTIFIERS = [
+    'get_video_info', 'extract_video_id', 'summarize_transcript', 'np.array', 'torch.nn',
+    'useEffect', 'async_client', 'bm25_score',
+]
+
+
+def make_document(rng: random.Random, length: int) -> str:
+    words = []
+    for _ in range(length):
+        roll = rng.random()
+        if roll < 0.7:
+            words.append(rng.choice(KOREAN_WORDS) + rng.choice(['', '은', '는', '을', '를', '의', '에서']))
+        elif roll < 0.95:
+            words.append(rng.choice(ENGLISH_WORDS))
+        else:
+            words.append(rng.choice(IDENTIFIERS))
+    return ' '.join(words)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(n_docs: int, n_queries: int, doc_len: int, seed: int) -> None:
+    rng = random.Random(seed)
+    corpus = [
+        (f"doc-{i}", make_document(rng, rng.randint(doc_len // 2, doc_len * 2)), f"user-{i % 50}")
+        for i in range(n_docs)
+    ]
+
+    def build() -> BM25Index:
+        index = BM25Index()
+        for content_id, text, user_id in corpus:
+            index.add_document(content_id, text, user_id=user_id, content_type='note')
+        return index
+
+    # 1. 빌드 (시간 측정과 메모리 측정은 분리 - tracemalloc 오버헤드 제외)
+    start = time.perf_counter()
+    index = build()
+    build_time = time.perf_counter() - start
+
+    tracemalloc.start()
+    traced = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del traced
+
+    # 2. 쿼리
+    queries = [
+        ' '.join(rng.choice(KOREAN_WORDS + ENGLISH_WORDS + IDENTIFIERS) for _ in range(rng.randint(1, 3)))
+        for _ in range(n_queries)
+    ]
+    latencies = []
+    for i, query in enumerate(queries):
+        user_filter = f"user-{i % 50}" if i % 2 else None
+        start = time.perf_counter()
+        index.search(query, limit=10, user_id=user_filter)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    # 3. 증분 삭제
+    start = time.perf_counter()
+    for content_id, _, _ in corpus[: n_docs // 10]:
+        index.remove_document(content_id)
+    delete_time = time.perf_counter() - start
+
+    # 4. 디스크 포맷
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'index.bin')
+        start = time.perf_counter()
+        size = index.save(path)
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        BM25Index.load(path)
+        load_time = time.perf_counter() - start
+
+    raw_bytes = sum(len(text.encode('utf-8')) for _, text, _ in corpus)
+
+    print(f"documents         : {n_docs} ({raw_bytes / 1e6:.1f} MB raw text)")
+    print(f"build time        : {build_time:.2f} s ({n_docs / build_time:.0f} docs/s)")
+    print(f"memory            : {current / 1e6:.1f} MB live, {peak / 1e6:.1f} MB peak")
+    print(f"query latency (ms): p50={percentile(latencies, 50):.2f} "
+          f"p95={percentile(latencies, 95):.2f} p99={percentile(latencies, 99):.2f}")
+    print(f"delete 10%        : {delete_time * 1000:.1f} ms")
+    print(f"on-disk size      : {size / 1e6:.2f} MB (save {save_time:.2f} s, load {load_time:.2f} s)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='BM25 검색 인덱스 벤치마크')
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--doc-len', type=int, default=200, help='문서당 평균 단어 수')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.docs, args.queries, args.doc_len, args.seed)
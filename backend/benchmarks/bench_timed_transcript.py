@@ -0,0 +1,95 @@
+"""
+시간 정보 자막 벤치마크 (TimedTranscript vs 세그먼트 dict 목록)
+- 메모리 사용량 (tracemalloc)
+- 시각 → 세그먼트 / 문구 → 시각 조회 지연
+- 직렬화 / 복원 시간
+
+실행: python -m benchmarks.bench_timed_transcript --hours 1,3,10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.timed_transcript import TimedTranscript
+from benchmarks.bench_compaction import make_sentence
+
+SEGMENT_SECONDS = 2.5
+
+
+def make_segments(rng: random.Random, hours: float):
+    count = int(hours * 3600 / SEGMENT_SECONDS)
+    return [
+        {'text': make_sentence(rng), 'start': round(i * SEGMENT_SECONDS, 2), 'duration': SEGMENT_SECONDS}
+        for i in range(count)
+    ]
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def run(hours: float, lookups: int, seed: int) -> None:
+    rng = random.Random(seed)
+    raw = make_segments(rng, hours)
+    # 원본(youtube_transcript_api 결과)을 문자열 복사본으로 만들어 dict 목록의 실제 크기 측정
+    payload = [(item['text'].encode('utf-8'), item['start'], item['duration']) for item in raw]
+    del raw
+
+    dicts, dict_bytes, _ = measure(lambda: [
+        {'text': text.decode('utf-8'), 'start': start, 'duration': duration} for text, start, duration in payload
+    ])
+    timed, timed_bytes, build_seconds = measure(lambda: TimedTranscript.from_segments(
+        (start, duration, text.decode('utf-8')) for text, start, duration in payload
+    ))
+
+    duration = timed.end_time
+    start = time.perf_counter()
+    for i in range(lookups):
+        timed.text_at(rng.random() * duration)
+    lookup_us = (time.perf_counter() - start) / lookups * 1e6
+
+    needles = [timed.segment(rng.randrange(len(timed)))[2][:20] for _ in range(100)]
+    start = time.perf_counter()
+    for needle in needles:
+        timed.locate(needle)
+    locate_ms = (time.perf_counter() - start) / len(needles) * 1000
+
+    start = time.perf_counter()
+    blob = timed.to_bytes()
+    restored = TimedTranscript.from_bytes(blob)
+    restored.text_at(duration / 2)
+    serialize_ms = (time.perf_counter() - start) * 1000
+
+    print(
+        f"{hours:>5.1f}h {len(timed):>7} segs | dicts {dict_bytes / 1e6:7.1f}MB  timed {timed_bytes / 1e6:6.1f}MB "
+        f"({dict_bytes / max(1, timed_bytes):4.1f}x) | build {build_seconds * 1000:6.0f}ms | "
+        f"text_at {lookup_us:5.2f}us | locate {locate_ms:6.2f}ms | bytes {len(blob) / 1e6:5.1f}MB "
+        f"round-trip {serialize_ms:5.1f}ms"
+    )
+    del dicts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hours', default='1,3,10', help="영상 길이 (시간, 쉼표 구분)")
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    for hours in (float(value) for value in args.hours.split(',')):
+        run(hours, args.lookups, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,422 @@
+"""
+벤치마크용 외부 서비스 대역 (네트워크 없이 실행)
+- yt_dlp, youtube_transcript_api, google.generativeai (+ caching), whisper → sys.modules에 가짜 모듈 등록
+- requests.get → 로컬 HTML 픽스처 반환
+
+지연 시간과 페이로드 크기는 FakeConfig로 조절 (time.sleep으로 블로킹 I/O 흉내)
+반드시 main / services 모듈을 import 하기 전에 install_fakes()를 호출해야 함
+"""
+from typing import Dict, List, Optional
+import hashlib
+import math
+import os
+import random
+import shutil
+import sys
+import time
+import types
+
+
+class FakeConfig:
+    """
+    대역 동작 설정 (지연 시간은 초 단위)
+    """
+
+    def __init__(
+        self,
+        latency_scale: float = 1.0,
+        ytdlp_info_latency: float = 0.25,
+        ytdlp_download_latency: float = 1.0,
+        transcript_list_latency: float = 0.15,
+        transcript_fetch_latency: float = 0.2,
+        gemini_base_latency: float = 0.8,
+        gemini_latency_per_1k_chars: float = 0.02,
+        embed_latency: float = 0.05,
+        whisper_load_latency: float = 1.5,
+        whisper_realtime_factor: float = 0.05,
+        http_latency: float = 0.15,
+        subtitle_ratio: float = 0.8,
+        transcript_chars: int = 20000,
+        video_duration: int = 600,
+        playlist_size: int = 20,
+        summary_chars: int = 1500,
+        embedding_dim: int = 768,
+        audio_fixture: Optional[str] = None,
+        html_fixtures: Optional[Dict[str, str]] = None,
+        seed: int = 42,
+    ):
+        self.latency_scale = latency_scale
+        self.ytdlp_info_latency = ytdlp_info_latency
+        self.ytdlp_download_latency = ytdlp_download_latency
+        self.transcript_list_latency = transcript_list_latency
+        self.transcript_fetch_latency = transcript_fetch_latency
+        self.gemini_base_latency = gemini_base_latency
+        self.gemini_latency_per_1k_chars = gemini_latency_per_1k_chars
+        self.embed_latency = embed_latency
+        self.whisper_load_latency = whisper_load_latency
+        self.whisper_realtime_factor = whisper_realtime_factor
+        self.http_latency = http_latency
+        self.subtitle_ratio = subtitle_ratio
+        self.transcript_chars = transcript_chars
+        self.video_duration = video_duration
+        self.playlist_size = playlist_size
+        self.summary_chars = summary_chars
+        self.embedding_dim = embedding_dim
+        self.audio_fixture = audio_fixture
+        self.html_fixtures = html_fixtures or {}
+        self.seed = seed
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0 and self.latency_scale > 0:
+            time.sleep(seconds * self.latency_scale)
+
+
+_config = FakeConfig()
+
+_WORDS = [
+    '머신러닝', '딥러닝', '강의', '데이터', '모델', '학습', '알고리즘', '최적화', '신경망', '예제',
+    'gradient', 'transformer', 'attention', 'python', 'fastapi', 'vector', 'index', 'lecture',
+]
+
+
+def _stable_int(value: str) -> int:
+    return int(hashlib.md5(value.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def fake_text(key: str, n_chars: int) -> str:
+    """
+    키마다 항상 같은 문장을 생성 (문장 부호 포함 → 세그먼트 분할 경로도 측정)
+    """
+    rng = random.Random(_stable_int(key))
+    words: List[str] = []
+    length = 0
+    while length < n_chars:
+        sentence = ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(6, 14))) + '.'
+        words.append(sentence)
+        length += len(sentence) + 1
+    return ' '.join(words)[:n_chars]
+
+
+def has_subtitles(video_id: str) -> bool:
+    return (_stable_int(video_id) % 1000) / 1000 < _config.subtitle_ratio
+
+
+# ----------------------------------------------------------------------
+# yt_dlp
+# ----------------------------------------------------------------------
+class _DownloadError(Exception):
+    pass
+
+
+class _DownloadCancelled(Exception):
+    pass
+
+
+class _FakeYoutubeDL:
+    def __init__(self, params: Optional[Dict] = None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url: str, download: bool = True) -> Dict:
+        from services.youtube_service import extract_video_id, is_collection_url
+
+        if self.params.get('extract_flat') and is_collection_url(url):
+            return self._extract_playlist(url)
+
+        video_id = extract_video_id(url)
+        if not video_id:
+            raise _DownloadError(f"Unsupported URL: {url}")
+
+        _config.sleep(_config.ytdlp_info_latency)
+        info = {
+            'id': video_id,
+            'title': f"벤치마크 영상 {video_id}",
+            'description': fake_text(f"desc:{video_id}", 300),
+            'duration': _config.video_duration,
+            'thumbnail': f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+            'uploader': 'bench-channel',
+            'view_count': _stable_int(video_id) % 100000,
+            'upload_date': '20240101',
+            'language': 'ko',
+            'ext': 'mp3',
+        }
+
+        if download:
+            # 진행 상황 hook을 조각마다 호출 (hook에서 예외를 던지면 다운로드 중단)
+            for step in range(10):
+                for hook in self.params.get('progress_hooks', []):
+                    hook({'status': 'downloading', 'downloaded_bytes': step * 1024})
+                _config.sleep(_config.ytdlp_download_latency / 10)
+            template = self.params.get('outtmpl', '%(id)s.%(ext)s')
+            target = template % {'id': video_id, 'ext': 'mp3'}
+            os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+            if _config.audio_fixture:
+                shutil.copyfile(_config.audio_fixture, target)
+            else:
+                with open(target, 'wb') as f:
+                    f.write(b'\0' * 1024)
+        return info
+
+
+    def _extract_playlist(self, url: str) -> Dict:
+        _config.sleep(_config.ytdlp_info_latency)
+        playlist_id = f"PL{_stable_int(url) % 10 ** 10:010d}"
+        size = min(_config.playlist_size, self.params.get('playlistend') or _config.playlist_size)
+        return {
+            'id': playlist_id,
+            'title': f"벤치마크 재생목록 {playlist_id}",
+            'uploader': 'bench-channel',
+            'entries': [
+                {
+                    'id': f"{playlist_id[-7:]}{i:04d}",
+                    'title': f"벤치마크 영상 {i}",
+                    'duration': _config.video_duration,
+                }
+                for i in range(size)
+            ],
+        }
+
+
+# ----------------------------------------------------------------------
+# youtube_transcript_api
+# ----------------------------------------------------------------------
+class _NoTranscriptFound(Exception):
+    pass
+
+
+class _TranscriptsDisabled(Exception):
+    pass
+
+
+class _FakeTranscript:
+    def __init__(self, video_id: str, language_code: str, is_generated: bool):
+        self.video_id = video_id
+        self.language_code = language_code
+        self.language = {'ko': 'Korean', 'en': 'English'}.get(language_code, language_code)
+        self.is_generated = is_generated
+
+    def fetch(self) -> List[Dict]:
+        _config.sleep(_config.transcript_fetch_latency)
+        text = fake_text(f"transcript:{self.video_id}", _config.transcript_chars)
+        # 약 80자 단위 자막 줄로 분할
+        step = max(1, len(text) // 80)
+        duration = _config.video_duration / step
+        return [
+            {'text': text[i * 80:(i + 1) * 80], 'start': round(i * duration, 2), 'duration': round(duration, 2)}
+            for i in range(math.ceil(len(text) / 80))
+        ]
+
+
+class _FakeTranscriptList:
+    def __init__(self, video_id: str):
+        self.video_id = video_id
+        self._transcripts = [_FakeTranscript(video_id, 'ko', True)] if has_subtitles(video_id) else []
+
+    def __iter__(self):
+        return iter(self._transcripts)
+
+    def _find(self, language_codes, generated: bool) -> _FakeTranscript:
+        for transcript in self._transcripts:
+            if transcript.language_code in language_codes and transcript.is_generated == generated:
+                return transcript
+        raise _NoTranscriptFound(self.video_id)
+
+    def find_generated_transcript(self, language_codes) -> _FakeTranscript:
+        return self._find(language_codes, True)
+
+    def find_manually_created_transcript(self, language_codes) -> _FakeTranscript:
+        return self._find(language_codes, False)
+
+    def find_transcript(self, language_codes) -> _FakeTranscript:
+        for transcript in self._transcripts:
+            if transcript.language_code in language_codes:
+                return transcript
+        raise _NoTranscriptFound(self.video_id)
+
+
+class _FakeYouTubeTranscriptApi:
+    @staticmethod
+    def list_transcripts(video_id: str) -> _FakeTranscriptList:
+        _config.sleep(_config.transcript_list_latency)
+        return _FakeTranscriptList(video_id)
+
+    @staticmethod
+    def get_transcript(video_id: str, languages=('en',)) -> List[Dict]:
+        return _FakeYouTubeTranscriptApi.list_transcripts(video_id).find_transcript(languages).fetch()
+
+
+# ----------------------------------------------------------------------
+# google.generativeai
+# ----------------------------------------------------------------------
+class _FakeResponse:
+    def __init__(self, text: str, prompt: str, cached_chars: int = 0):
+        self.text = text
+        # 실제 토크나이저와 다른 비율로 계산 (prompt_budget 보정 경로 측정용)
+        cached_tokens = cached_chars // 2
+        prompt_tokens = len(prompt) // 2 + cached_tokens
+        completion_tokens = len(text) // 2
+        self.usage_metadata = types.SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=completion_tokens,
+            cached_content_token_count=cached_tokens or None,
+            total_token_count=prompt_tokens + completion_tokens,
+        )
+
+
+class _FakeCachedContent:
+    """
+    google.generativeai.caching.CachedContent (context caching)
+    """
+
+    def __init__(self, model: str, contents: List[str], **kwargs):
+        self.name = f"cachedContents/{hashlib.md5(''.join(contents).encode('utf-8')).hexdigest()}"
+        self.model = model
+        self.contents = contents
+        self.deleted = False
+
+    @classmethod
+    def create(cls, model: str, contents: List[str], **kwargs) -> '_FakeCachedContent':
+        # 업로드는 자료 크기에 비례, 이후 호출에서는 자료 길이만큼의 지연이 없음
+        _config.sleep(_config.gemini_base_latency + sum(map(len, contents)) / 1000 * _config.gemini_latency_per_1k_chars)
+        return cls(model, contents, **kwargs)
+
+    def delete(self) -> None:
+        self.deleted = True
+
+
+class _FakeGenerativeModel:
+    def __init__(self, model_name: str = 'gemini-flash-latest', **kwargs):
+        self.model_name = model_name
+        self.cached_content: Optional[_FakeCachedContent] = None
+
+    @classmethod
+    def from_cached_content(cls, cached_content: _FakeCachedContent, **kwargs) -> '_FakeGenerativeModel':
+        model = cls(cached_content.model)
+        model.cached_content = cached_content
+        return model
+
+    def generate_content(self, prompt, **kwargs) -> _FakeResponse:
+        prompt = prompt if isinstance(prompt, str) else str(prompt)
+        _config.sleep(_config.gemini_base_latency + len(prompt) / 1000 * _config.gemini_latency_per_1k_chars)
+
+        cached_chars = sum(map(len, self.cached_content.contents)) if self.cached_content else 0
+        key = hashlib.md5(prompt.encode('utf-8')).hexdigest()
+        bullets = '\n'.join(f"- {fake_text(f'{key}:{i}', 60)}" for i in range(7))
+        body = fake_text(key, max(0, _config.summary_chars - len(bullets)))
+        return _FakeResponse(
+            f"## 📝 핵심 요약\n{body}\n\n## 💡 주요 포인트\n{bullets}\n\n## 🎯 결론\n벤치마크 응답입니다.",
+            prompt,
+            cached_chars,
+        )
+
+
+def _fake_configure(**kwargs) -> None:
+    pass
+
+
+def _fake_embed_content(model: str, content, task_type: Optional[str] = None, **kwargs) -> Dict:
+    _config.sleep(_config.embed_latency)
+    rng = random.Random(_stable_int(str(content)[:2000]))
+    vector = [rng.uniform(-1, 1) for _ in range(_config.embedding_dim)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return {'embedding': [v / norm for v in vector]}
+
+
+# ----------------------------------------------------------------------
+# whisper
+# ----------------------------------------------------------------------
+class _FakeWhisperModel:
+    def transcribe(self, audio_path: str, language: Optional[str] = None, **kwargs) -> Dict:
+        _config.sleep(_config.video_duration * _config.whisper_realtime_factor)
+        name = os.path.splitext(os.path.basename(audio_path))[0]
+        text = fake_text(f"whisper:{name}", _config.transcript_chars)
+        # 약 200자 단위 세그먼트 (실제 Whisper처럼 start / end 포함)
+        count = max(1, math.ceil(len(text) / 200))
+        step = _config.video_duration / count
+        segments = [
+            {'start': round(i * step, 2), 'end': round((i + 1) * step, 2), 'text': text[i * 200:(i + 1) * 200]}
+            for i in range(count)
+        ]
+        return {'text': text, 'language': language or 'ko', 'segments': segments}
+
+
+def _fake_load_model(name: str = 'tiny', **kwargs) -> _FakeWhisperModel:
+    _config.sleep(_config.whisper_load_latency)
+    return _FakeWhisperModel()
+
+
+# ----------------------------------------------------------------------
+# requests.get (웹 페이지)
+# ----------------------------------------------------------------------
+class _FakeHttpResponse:
+    def __init__(self, url: str, body: str, status_code: int = 200):
+        self.url = url
+        self.status_code = status_code
+        self.text = body
+        self.content = body.encode('utf-8')
+        self.encoding = 'utf-8'
+        self.apparent_encoding = 'utf-8'
+        self.headers = {'Content-Type': 'text/html; charset=utf-8'}
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}")
+
+
+def _fake_http_get(url: str, *args, **kwargs) -> _FakeHttpResponse:
+    _config.sleep(_config.http_latency)
+    fixtures = _config.html_fixtures
+    if not fixtures:
+        return _FakeHttpResponse(url, '', 404)
+    # URL → 픽스처 고정 매핑 (같은 URL은 항상 같은 페이지)
+    names = sorted(fixtures)
+    return _FakeHttpResponse(url, fixtures[names[_stable_int(url) % len(names)]])
+
+
+def install_fakes(config: Optional[FakeConfig] = None) -> FakeConfig:
+    """
+    가짜 모듈 등록 (이미 import된 실제 모듈도 덮어씀)
+    """
+    global _config
+    if config is not None:
+        _config = config
+
+    yt_dlp = types.ModuleType('yt_dlp')
+    yt_dlp.YoutubeDL = _FakeYoutubeDL
+    yt_dlp.utils = types.SimpleNamespace(DownloadError=_DownloadError, DownloadCancelled=_DownloadCancelled)
+    sys.modules['yt_dlp'] = yt_dlp
+
+    transcript_api = types.ModuleType('youtube_transcript_api')
+    transcript_api.YouTubeTranscriptApi = _FakeYouTubeTranscriptApi
+    transcript_api.NoTranscriptFound = _NoTranscriptFound
+    transcript_api.TranscriptsDisabled = _TranscriptsDisabled
+    sys.modules['youtube_transcript_api'] = transcript_api
+
+    genai = types.ModuleType('google.generativeai')
+    genai.configure = _fake_configure
+    genai.GenerativeModel = _FakeGenerativeModel
+    genai.embed_content = _fake_embed_content
+    caching = types.ModuleType('google.generativeai.caching')
+    caching.CachedContent = _FakeCachedContent
+    genai.caching = caching
+    google = sys.modules.get('google') or types.ModuleType('google')
+    google.generativeai = genai
+    sys.modules['google'] = google
+    sys.modules['google.generativeai'] = genai
+    sys.modules['google.generativeai.caching'] = caching
+
+    whisper = types.ModuleType('whisper')
+    whisper.load_model = _fake_load_model
+    sys.modules['whisper'] = whisper
+
+    # requests는 실제 패키지를 쓰고 네트워크 호출만 교체 (예외 타입 등은 그대로 유지)
+    import requests
+    requests.get = _fake_http_get
+
+    return _config
@@ -0,0 +1,160 @@
+"""
+벤치마크 픽스처 생성 (PDF, 오디오, HTML)
+- 바이너리 파일을 저장소에 넣지 않고 실행할 때마다 같은 내용으로 생성 (seed 고정)
+- PDF: 텍스트 레이어가 있는 최소 PDF (pdfplumber로 실제 파싱)
+- 오디오: 16kHz mono WAV (yt_dlp 대역이 다운로드 결과로 복사)
+- HTML: 본문 + 내비게이션/스크립트 잡음이 섞인 기사 페이지
+"""
+from typing import Dict, List
+import math
+import os
+import random
+import struct
+import wave
+
+_EN_WORDS = [
+    'learning', 'model', 'gradient', 'lecture', 'summary', 'network', 'vector', 'index',
+    'database', 'latency', 'throughput', 'memory', 'python', 'attention', 'transformer',
+    'example', 'theorem', 'proof', 'system', 'query', 'cache', 'batch', 'kernel',
+]
+_KO_WORDS = [
+    '머신러닝', '딥러닝', '강의', '요약', '데이터베이스', '알고리즘', '최적화', '신경망',
+    '검색', '인덱스', '지연', '처리량', '메모리', '예제', '개념', '정리',
+]
+
+
+def _sentences(rng: random.Random, words: List[str], n_chars: int) -> List[str]:
+    lines: List[str] = []
+    total = 0
+    while total < n_chars:
+        sentence = ' '.join(rng.choice(words) for _ in range(rng.randint(8, 14))).capitalize() + '.'
+        lines.append(sentence)
+        total += len(sentence) + 1
+    return lines
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(path: str, pages: int = 10, chars_per_page: int = 2500, seed: int = 1) -> str:
+    """
+    텍스트 PDF 생성 (Helvetica, 페이지당 약 chars_per_page 글자)
+    """
+    rng = random.Random(seed)
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(b'')  # 나중에 채움
+    pages_id = add(b'')
+    font_id = add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    page_ids = []
+    for _ in range(pages):
+        lines = []
+        for sentence in _sentences(rng, _EN_WORDS, chars_per_page):
+            # 한 줄 약 90자로 줄바꿈
+            while sentence:
+                lines.append(sentence[:90])
+                sentence = sentence[90:]
+        text_ops = ' '.join(f"({_pdf_escape(line)}) Tj T*" for line in lines[:55])
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {text_ops} ET".encode('latin-1')
+        content_id = add(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        page_ids.append(add(
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>' % (pages_id, font_id, content_id)
+        ))
+
+    kids = ' '.join(f"{page_id} 0 R" for page_id in page_ids).encode('ascii')
+    objects[pages_id - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_ids))
+    objects[catalog_id - 1] = b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id
+    info_id = add(b'<< /Title (Benchmark Lecture Notes) /Author (bench) /Producer (supremenote-bench) >>')
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+
+    xref_offset = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\n' % (len(objects) + 1, catalog_id, info_id)
+    out += b'startxref\n%d\n%%%%EOF\n' % xref_offset
+
+    with open(path, 'wb') as f:
+        f.write(out)
+    return path
+
+
+def make_wav(path: str, seconds: float = 30.0, sample_rate: int = 16000, seed: int = 1) -> str:
+    """
+    16kHz mono 16bit WAV (음성 대역 톤 + 약한 잡음)
+    """
+    rng = random.Random(seed)
+    n_samples = int(seconds * sample_rate)
+    frames = bytearray()
+    for i in range(n_samples):
+        t = i / sample_rate
+        value = 0.3 * math.sin(2 * math.pi * 220 * t) + 0.1 * math.sin(2 * math.pi * 660 * t) + rng.uniform(-0.02, 0.02)
+        frames += struct.pack('<h', int(max(-1.0, min(1.0, value)) * 32767))
+
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(bytes(frames))
+    return path
+
+
+def make_html(paragraphs: int = 30, seed: int = 1) -> str:
+    """
+    기사형 HTML (본문 article + 헤더/내비/스크립트 잡음)
+    """
+    rng = random.Random(seed)
+    body = '\n'.join(
+        f"<p>{' '.join(_sentences(rng, _KO_WORDS + _EN_WORDS, rng.randint(200, 600)))}</p>"
+        for _ in range(paragraphs)
+    )
+    nav = ''.join(f'<li><a href="/page/{i}">메뉴 {i}</a></li>' for i in range(40))
+    script = 'var tracking = {' + ','.join(f'"k{i}": {i}' for i in range(200)) + '};'
+    return f"""<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="utf-8">
+<title>벤치마크 기사 {seed}</title>
+<meta name="description" content="SupremeNote 벤치마크용 기사 페이지">
+<meta name="author" content="bench">
+<script>{script}</script>
+<style>body {{ font-family: sans-serif; }}</style>
+</head>
+<body>
+<header><nav><ul>{nav}</ul></nav></header>
+<main><article class="post-content">
+<h1>벤치마크 기사 {seed}</h1>
+{body}
+</article></main>
+<aside>관련 글 목록</aside>
+<footer>Copyright bench</footer>
+</body>
+</html>
+"""
+
+
+def build_fixtures(directory: str, pdf_pages: int = 10, audio_seconds: float = 30.0, html_pages: int = 5) -> Dict:
+    """
+    픽스처 일괄 생성
+
+    Returns:
+        {'pdf': 경로, 'audio': 경로, 'html': {이름: HTML}}
+    """
+    os.makedirs(directory, exist_ok=True)
+    return {
+        'pdf': make_pdf(os.path.join(directory, 'lecture.pdf'), pages=pdf_pages),
+        'audio': make_wav(os.path.join(directory, 'lecture.wav'), seconds=audio_seconds),
+        'html': {f"article-{i}": make_html(seed=i) for i in range(html_pages)},
+    }
@@ -1,8 +1,18 @@
 """
 SupremeNote Backend - FastAPI Main Application
 """
-from fastapi import FastAPI
+from contextlib import nullcontext
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, JSONResponse
+from services.metrics import HTTP_REQUEST_DURATION, render_metrics, CONTENT_TYPE
+from services.tracing import start_trace, parse_traceparent
+from services.responses import FastJSONResponse
+from services.compression import CompressionMiddleware
+from services import profiler
+import re
+import time
 from dotenv import load_dotenv
 import os
 
@@ -15,11 +25,12 @@ if ffmpeg_path not in os.environ['PATH']:
     os.environ['PATH'] = ffmpeg_path + os.pathsep + os.environ['PATH']
     print(f"[INFO] FFmpeg 경로 추가됨: {ffmpeg_path}")
 
-# Initialize FastAPI app
+# Initialize FastAPI app (기본 응답은 orjson 직렬화)
 app = FastAPI(
     title="SupremeNote API",
     description="AI-Powered Knowledge Management Platform",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS Configuration
@@ -34,8 +45,66 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Request-ID", "traceparent", "Retry-After", "ETag", "Last-Modified", "X-Profile-ID"],
 )
 
+# 응답 압축 (br / gzip, COMPRESS_MIN_BYTES 이상)
+app.add_middleware(CompressionMiddleware)
+
+# 요청 단위 trace + 지연 시간 메트릭 (라우트 템플릿 기준 → 레이블 수 제한)
+# correlation id: traceparent → X-Request-ID(32자리 hex) → 새로 생성, 응답 헤더로 돌려줌
+# 프로파일: 관리자 요청(X-Profile) 또는 PROFILE_SAMPLE_RATE → X-Profile-ID, /api/admin/profiles/{id}로 조회
+@app.middleware("http")
+async def telemetry_middleware(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    parent = parse_traceparent(request.headers.get('traceparent'))
+    request_id = request.headers.get('x-request-id', '')
+    trace_id, parent_id, sampled = parent or (
+        (request_id.lower(), None, None) if re.fullmatch(r'[0-9a-fA-F]{32}', request_id) else (None, None, None)
+    )
+
+    with start_trace(
+        f"{request.method} {request.url.path}",
+        trace_id=trace_id,
+        parent_id=parent_id,
+        sampled=sampled,
+        **{'http.method': request.method, 'http.target': request.url.path}
+    ) as span:
+        if request_id and request_id.lower() != span.trace_id:
+            span.set_attribute('http.request_id', request_id)
+        profile_reason = profiler.requested(request.headers, request.query_params)
+        profile = None
+        try:
+            with (
+                profiler.profile_request(span.name, profile_reason, span.trace_id) if profile_reason else nullcontext()
+            ) as profile:
+                response = await call_next(request)
+            status = response.status_code
+            response.headers['X-Request-ID'] = span.trace_id
+            response.headers['traceparent'] = span.traceparent
+            if profile:
+                response.headers['X-Profile-ID'] = profile.id
+            return response
+        finally:
+            route = getattr(request.scope.get('route'), 'path', 'unmatched')
+            span.name = f"{request.method} {route}"
+            span.set_attribute('http.route', route)
+            span.set_attribute('http.status_code', status)
+            if status >= 500:
+                span.status = 2
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=request.method,
+                route=route,
+                status=str(status)
+            )
+            if profile:
+                profile.label = span.name
+                span.set_attribute('profile.id', profile.id)
+                profiler.save_later(profile)
+
+
 # Health Check Endpoint
 @app.get("/")
 async def root():
@@ -49,11 +118,84 @@ async def root():
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness (warm-up 완료 여부) - /health는 프로세스 생존만 확인
+    admission: 파이프라인별 실행 / 대기 수 (로드밸런서가 혼잡도 판단용으로 사용)
+    parser_pool: 파싱 워커 수 / 강제 종료 횟수
+    prefetch: 미리보기 미리 받기 대기 / 실행 수
+    """
+    from services.warmup import readiness
+    from services.admission import controller
+    from services.parser_pool import parser_pool
+    from services.prefetch import prefetcher
+    ready, components = readiness()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "warming",
+            "components": components,
+            "admission": controller.stats(),
+            "parser_pool": parser_pool.stats(),
+            "prefetch": prefetcher.stats(),
+        }
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 메트릭 (텍스트 포맷)"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
 # 라우터 추가
-from routers import youtube, pdf, web
+from routers import youtube, pdf, web, search, chat, admin
 app.include_router(youtube.router, prefix="/api/youtube", tags=["YouTube"])
 app.include_router(pdf.router, prefix="/api/pdf", tags=["PDF"])
 app.include_router(web.router, prefix="/api/web", tags=["Web"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
+app.include_router(chat.router, prefix="/api/chat", tags=["Chat"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+
+
+@app.on_event("startup")
+async def startup_event():
+    # Supabase 저장소 (커넥션 풀 + write-behind 백그라운드 작업)
+    from services.repository import startup_repositories
+    await startup_repositories()
+
+    # 무거운 라이브러리 / 모델 / 커넥션 풀 미리 로드 (WARMUP_COMPONENTS)
+    from services.warmup import start_warmup
+    await start_warmup()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from services.warmup import stop_warmup
+    await stop_warmup()
+
+    # 일괄 수집 파이프라인 워커 정리
+    from services.bulk_ingest import shutdown_bulk_ingest
+    await shutdown_bulk_ingest()
+
+    # 미리 받기 작업 취소
+    from services.prefetch import shutdown_prefetch
+    await shutdown_prefetch()
+
+    # 파싱 워커 프로세스 종료
+    from services.parser_pool import shutdown_parser_pool
+    shutdown_parser_pool()
+
+    # 대기 중인 DB 쓰기 flush
+    from services.repository import shutdown_repositories
+    await shutdown_repositories()
+
+    # 검색 인덱스 최종 저장
+    from services.search_service import save_search_index
+    await run_in_threadpool(save_search_index, True)
+
+    # 남은 span / 로그 내보내기
+    from services.tracing import shutdown_tracing
+    shutdown_tracing()
 
 # TODO: 추가 라우터들
 # from routers import documents, ai
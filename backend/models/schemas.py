@@ -2,7 +2,7 @@
 Pydantic 스키마 정의
 """
 from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 
@@ -13,6 +13,21 @@ class YoutubeSummaryRequest(BaseModel):
     user_id: str = Field(..., description="사용자 ID")
 
 
+# 다시 요약 요청 (저장된 자막 + 구간 노트 재사용)
+class YoutubeResummarizeRequest(BaseModel):
+    custom_instruction: str = Field(..., min_length=1, description="새 요약 지시사항")
+    user_id: str = Field(..., description="사용자 ID")
+
+
+# 재생목록 / 채널 일괄 수집 요청
+class YoutubeBulkRequest(BaseModel):
+    source_url: str = Field(..., description="YouTube 재생목록 또는 채널 URL")
+    user_id: str = Field(..., description="사용자 ID")
+    custom_instruction: Optional[str] = Field(None, description="모든 영상에 적용할 요약 지시사항")
+    use_whisper: bool = Field(True, description="자막 없는 영상은 Whisper로 변환")
+    limit: Optional[int] = Field(None, ge=1, description="최대 영상 수 (BULK_MAX_ITEMS 이하)")
+
+
 # YouTube 요약 응답
 class YoutubeSummaryResponse(BaseModel):
     id: str
@@ -25,6 +40,7 @@ class YoutubeSummaryResponse(BaseModel):
     key_points: List[str]
     transcript: Optional[str]
     created_at: datetime
+    token_usage: Optional[Dict[str, Any]] = None  # 이번 요청의 Gemini 토큰 사용량
 
 
 # 비디오 정보
@@ -69,21 +85,46 @@ class NoteUpdate(BaseModel):
 class ChatRequest(BaseModel):
     content_id: str = Field(..., description="노트 또는 YouTube 요약 ID")
     content_type: str = Field(..., description="'note' 또는 'youtube'")
-    question: str = Field(..., description="사용자 질문")
+    question: str = Field(..., min_length=1, description="사용자 질문")
+    user_id: str = Field(..., description="사용자 ID")
+    conversation_id: Optional[str] = Field(None, description="후속 질문이면 이전 응답의 conversation_id")
 
 
 class ChatResponse(BaseModel):
     answer: str
     sources: Optional[List[str]] = None
+    conversation_id: Optional[str] = None
+    cached: bool = False  # 캐시된 답변 (같은 / 거의 같은 질문)
+    token_usage: Optional[Dict[str, Any]] = None
 
 
 # 검색 요청
 class SearchRequest(BaseModel):
     query: str
     content_type: Optional[str] = None  # 'note', 'youtube', 또는 None (전체)
+    user_id: Optional[str] = None
     limit: int = 10
 
 
+class SearchResult(BaseModel):
+    id: str
+    content_type: Optional[str] = None
+    score: float
+    bm25_rank: Optional[int] = None
+    vector_rank: Optional[int] = None
+    content: Optional[str] = None
+
+
+# 검색 인덱스 문서 (노트 추가/수정 시 색인)
+class SearchDocument(BaseModel):
+    content_id: str
+    content_type: str = Field('note', description="'note' 또는 'youtube'")
+    user_id: str
+    title: str = ''
+    content: str = ''
+    tags: List[str] = []
+
+
 # 상태 응답
 class HealthResponse(BaseModel):
     status: str
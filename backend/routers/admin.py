@@ -0,0 +1,45 @@
+"""
+관리자 API 라우터 (요청 프로파일 조회)
+- 모든 엔드포인트는 X-Admin-Token 헤더가 ADMIN_TOKEN과 같아야 함 (ADMIN_TOKEN이 없으면 404)
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from services import profiler
+from typing import Optional
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not profiler.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiler.is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+async def list_profiles(limit: int = Query(50, ge=1, le=500)):
+    """
+    최근 프로파일 목록 (최신순, 메타데이터만)
+    """
+    return {"profiles": await run_in_threadpool(profiler.list_profiles, limit)}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = Query('folded', pattern='^(folded|speedscope)$')):
+    """
+    프로파일 내려받기
+
+    - folded: 'frame;frame;frame count' 줄 (flamegraph.pl, inferno-flamegraph 입력)
+    - speedscope: https://www.speedscope.app 에 그대로 열 수 있는 JSON
+    """
+    folded = await run_in_threadpool(profiler.load_folded, profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다")
+    if format == 'speedscope':
+        return JSONResponse(content=profiler.to_speedscope(folded, profile_id))
+    return PlainTextResponse(
+        folded, headers={'Content-Disposition': f'attachment; filename="{profile_id}.folded"'}
+    )
@@ -0,0 +1,101 @@
+"""
+콘텐츠 채팅 API 라우터 (노트 / YouTube 요약에 대해 질문하기)
+"""
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from models.schemas import ChatRequest, ChatResponse
+from services.admission import admit, client_key
+from services.chat_session import ask
+from services.repository import get_repositories
+from services.transcript_store import content_hash, row_blob, unpack_segments
+from services.tracing import get_logger
+
+log = get_logger('routers.chat')
+
+router = APIRouter()
+
+
+async def _note_source(repositories, request: ChatRequest):
+    note = await repositories.notes.get(request.content_id)
+    if not note or note.get('user_id') != request.user_id:
+        raise HTTPException(status_code=404, detail="노트를 찾을 수 없습니다")
+
+    text = f"# {note.get('title') or ''}\n\n{note.get('content') or ''}"
+
+    async def load_content() -> str:
+        return text
+
+    # 노트는 수정될 수 있으므로 내용으로 버전 결정
+    return content_hash(text), load_content
+
+
+async def _youtube_source(repositories, request: ChatRequest):
+    summary = await repositories.summaries.get(
+        request.content_id, fields=['id', 'user_id', 'title', 'summary', 'transcript', 'created_at']
+    )
+    if not summary or summary.get('user_id') != request.user_id:
+        raise HTTPException(status_code=404, detail="요약을 찾을 수 없습니다")
+
+    # 자막 행은 요약보다 늦게 저장될 수 있음 → 자막 해시까지 버전에 포함 (압축 해제는 세션 준비 때만)
+    row = await repositories.transcripts.get(request.content_id)
+    version = f"{summary.get('created_at')}:{row.get('content_hash') if row else 'none'}"
+
+    async def load_content() -> str:
+        if row:
+            segments = await run_in_threadpool(unpack_segments, row_blob(row))
+            transcript = ' '.join(segments)
+        else:
+            transcript = summary.get('transcript') or ''
+        parts = [f"# {summary.get('title') or ''}", f"## 요약\n{summary.get('summary') or ''}"]
+        if transcript:
+            parts.append(f"## 자막\n{transcript}")
+        return '\n\n'.join(parts)
+
+    return version, load_content
+
+
+@router.post("", response_model=ChatResponse)
+async def chat(request: ChatRequest, http_request: Request):
+    """
+    노트 / YouTube 요약에 대해 질문하기
+
+    - 콘텐츠별 세션에서 준비된 컨텍스트 재사용 (긴 자료는 구간별 압축 노트, 가능하면 Gemini context cache)
+    - 같은 / 거의 같은 질문은 캐시된 답변으로 바로 응답 (cached=true)
+    - 후속 질문은 conversation_id를 넘기면 최근 대화를 함께 전송
+    """
+    if request.content_type not in ('note', 'youtube'):
+        raise HTTPException(status_code=400, detail="content_type은 'note' 또는 'youtube'여야 합니다")
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="질문을 입력해주세요")
+
+    repositories = get_repositories()
+    if not repositories:
+        raise HTTPException(status_code=503, detail="Storage not configured")
+
+    try:
+        if request.content_type == 'note':
+            version, load_content = await _note_source(repositories, request)
+        else:
+            version, load_content = await _youtube_source(repositories, request)
+
+        result = await ask(
+            f"{request.content_type}:{request.content_id}",
+            version,
+            request.question.strip(),
+            load_content,
+            conversation_id=request.conversation_id,
+            repositories=repositories,
+            gate=lambda: admit('chat', client_key(http_request, request.user_id)),
+        )
+        return ChatResponse(
+            answer=result['answer'],
+            conversation_id=result['conversation_id'],
+            cached=result['cached'],
+            token_usage={**result['token_usage'], 'similarity': result['similarity']},
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"질문 응답 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"질문 응답 실패: {str(e)}")
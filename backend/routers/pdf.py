@@ -1,25 +1,43 @@
 """
 PDF 업로드 & 요약 라우터
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request, Query
+from fastapi.concurrency import run_in_threadpool
 from services.pdf_service import process_pdf
 from services.gemini_service import summarize_transcript
+from services.transcript_compaction import compact_text, record_compaction
+from services.admission import admit, client_key
+from services.responses import ingest_response, parse_fields
+from services.content_dedup import fingerprint, summarize_shared
+from services.repository import get_repositories
 import os
 import uuid
 from datetime import datetime
 from typing import Optional
+from services.tracing import get_logger
+
+log = get_logger('routers.pdf')
 
 router = APIRouter()
 
+# 응답 필드 (fields= 검증용)
+PDF_RESPONSE_FIELDS = (
+    'id', 'filename', 'title', 'author', 'page_count', 'pages_extracted', 'partial',
+    'summary', 'key_points', 'word_count', 'duplicate_of', 'similarity', 'token_usage', 'created_at', 'transcript',
+)
+
 UPLOAD_DIR = "uploads/pdf"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
 @router.post("/upload")
 async def upload_and_summarize_pdf(
+    http_request: Request,
     file: UploadFile = File(...),
     custom_instruction: Optional[str] = Form(None),
-    user_id: Optional[str] = Form(None)
+    user_id: Optional[str] = Form(None),
+    fields: Optional[str] = Query(None, description="쉼표로 구분된 응답 필드 (id는 항상 포함)"),
+    include_transcript: bool = Query(False, description="응답에 추출한 전체 텍스트 포함 (transcript)")
 ):
     """
     PDF 파일 업로드 및 요약 생성
@@ -28,13 +46,18 @@ async def upload_and_summarize_pdf(
     2. 텍스트 추출
     3. Gemini AI로 요약
     4. 결과 반환
+    
+    추출 + 요약은 pdf admission 한도 안에서 스레드풀로 실행 (초과 시 429/503 + Retry-After)
+    지시사항 없는 요청은 본문이 거의 같은 PDF(다시 내보낸 강의 자료 등)의 요약을 사용자 간에 재사용합니다
+    응답은 fields로 필요한 키만 받을 수 있고, 추출한 텍스트는 include_transcript=true일 때만 포함합니다
     """
+    selected = parse_fields(fields, PDF_RESPONSE_FIELDS)
     try:
         # 파일 유효성 검사
         if not file.filename or not file.filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="PDF 파일만 업로드 가능합니다")
         
-        print(f"[INFO] PDF 업로드: {file.filename}")
+        log.info(f"PDF 업로드: {file.filename}")
         
         # 파일 저장
         file_id = str(uuid.uuid4())
@@ -46,49 +69,75 @@ async def upload_and_summarize_pdf(
             content = await file.read()
             f.write(content)
         
-        print(f"[SUCCESS] 파일 저장: {file_path}")
-        
-        # PDF 처리 (텍스트 추출)
-        pdf_data = process_pdf(file_path)
-        
-        if not pdf_data.get('has_text'):
-            raise HTTPException(
-                status_code=400,
-                detail="PDF에서 텍스트를 추출할 수 없습니다"
-            )
-        
-        # AI 요약 생성
-        print("[INFO] AI 요약 생성 중...")
-        summary_result = summarize_transcript(
-            transcript=pdf_data['text'],
-            video_title=pdf_data.get('title', file.filename),
-            custom_instruction=custom_instruction
-        )
+        log.success(f"파일 저장: {file_path}")
         
-        # 임시 파일 삭제
         try:
-            os.remove(file_path)
-            print(f"[INFO] 임시 파일 삭제: {file_path}")
-        except:
-            pass
+            async with admit('pdf', client_key(http_request, user_id)):
+                # PDF 처리 (텍스트 추출)
+                pdf_data = await run_in_threadpool(process_pdf, file_path)
+                
+                if not pdf_data.get('has_text'):
+                    raise HTTPException(
+                        status_code=400,
+                        detail="PDF에서 텍스트를 추출할 수 없습니다"
+                    )
+                
+                # 반복되는 머리글/바닥글, 메뉴 문구 제거 후 요약
+                compacted, stats = await run_in_threadpool(compact_text, pdf_data['text'], 'pdf')
+                record_compaction(stats)
+                
+                # 본문 지문 (일부 페이지만 추출한 경우는 공유하지 않음, 지시사항 있는 요약도 공유하지 않음)
+                repositories = None if custom_instruction else get_repositories()
+                fp = None
+                if repositories and not pdf_data.get('partial'):
+                    fp = await run_in_threadpool(fingerprint, 'pdf', compacted)
+                
+                # AI 요약 생성 (거의 같은 본문의 요약이 있으면 재사용)
+                log.info("AI 요약 생성 중...")
+                title = pdf_data.get('title', file.filename)
+                summary_result, duplicate = await summarize_shared(
+                    repositories,
+                    fp,
+                    lambda: run_in_threadpool(
+                        summarize_transcript,
+                        transcript=compacted,
+                        video_title=title,
+                        custom_instruction=custom_instruction
+                    ),
+                    title=title,
+                    meta={'author': pdf_data.get('author'), 'page_count': pdf_data.get('page_count')},
+                )
+        finally:
+            # 임시 파일 삭제 (거절 / 실패해도)
+            try:
+                os.remove(file_path)
+                log.info(f"임시 파일 삭제: {file_path}")
+            except:
+                pass
         
         # 결과 반환
-        return {
+        return ingest_response({
             'id': file_id,
             'filename': file.filename,
             'title': pdf_data.get('title', file.filename),
             'author': pdf_data.get('author'),
             'page_count': pdf_data.get('page_count'),
+            'pages_extracted': pdf_data.get('pages_extracted'),
+            'partial': pdf_data.get('partial', False),  # 파싱 시간 제한에 걸려 일부 페이지만 요약
             'summary': summary_result['summary'],
             'key_points': summary_result['key_points'],
             'word_count': pdf_data['text'].count(' ') + 1,
+            'duplicate_of': duplicate['id'] if duplicate else None,  # 거의 같은 PDF의 요약을 재사용
+            'similarity': duplicate['similarity'] if duplicate else None,
+            'token_usage': summary_result.get('token_usage'),
             'created_at': datetime.now().isoformat(),
-        }
+            'transcript': pdf_data['text'],
+        }, selected, include_transcript)
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[ERROR] PDF 처리 실패: {str(e)}")
+        log.error(f"PDF 처리 실패: {str(e)}")
         raise HTTPException(status_code=500, detail=f"PDF 처리 실패: {str(e)}")
 
 
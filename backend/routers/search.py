@@ -0,0 +1,172 @@
+"""
+통합 검색 API 라우터 (BM25 + Vector 하이브리드)
+"""
+from fastapi import APIRouter, HTTPException
+from models.schemas import SearchRequest, SearchResult, SearchDocument
+from services.search_service import (
+    hybrid_search,
+    index_document,
+    remove_document,
+    build_document_text,
+    get_search_index,
+    save_search_index,
+)
+from services.gemini_service import generate_embedding
+from services.repository import get_repositories
+from services.transcript_store import row_blob, unpack_segments
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Dict
+from services.tracing import get_logger
+
+log = get_logger('routers.search')
+
+router = APIRouter()
+
+
+async def _vector_search(query: str, user_id: str, content_type: str, limit: int) -> List[Dict]:
+    """
+    벡터 유사도 검색 (저장소 미설정/실패 시 빈 목록)
+    """
+    repositories = get_repositories()
+    if not repositories:
+        return []
+
+    try:
+        embedding = await run_in_threadpool(generate_embedding, query)
+        if not embedding:
+            return []
+
+        rows = await repositories.embeddings.search(embedding, user_id=user_id, limit=limit) or []
+        if content_type:
+            rows = [row for row in rows if row.get('content_type') == content_type]
+        return rows
+    except Exception as e:
+        log.warning(f"벡터 검색 실패 (BM25만 사용): {e}")
+        return []
+
+
+@router.post("", response_model=List[SearchResult])
+async def search_content(request: SearchRequest):
+    """
+    노트 + YouTube 요약 통합 검색
+
+    1. BM25 역색인 검색 (정확한 한국어 용어, 이름, 코드 식별자)
+    2. 벡터 유사도 검색 (의미 검색)
+    3. RRF로 두 순위 결합
+    """
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="검색어를 입력해주세요")
+
+    candidates = max(request.limit * 3, 30)
+    vector_rows = await _vector_search(request.query, request.user_id, request.content_type, candidates)
+    vector_content = {row['id']: row.get('content') for row in vector_rows}
+    vector_types = {row['id']: row.get('content_type') for row in vector_rows}
+
+    # SQLite 백엔드는 FTS5 결과도 함께 결합
+    text_rows = []
+    repositories = get_repositories()
+    if repositories and hasattr(repositories, 'text_search'):
+        try:
+            text_rows = await repositories.text_search(
+                request.query, user_id=request.user_id, content_type=request.content_type, limit=candidates
+            )
+        except Exception as e:
+            log.warning(f"FTS 검색 실패: {e}")
+
+    hits = await run_in_threadpool(
+        hybrid_search,
+        request.query,
+        limit=request.limit,
+        user_id=request.user_id,
+        content_type=request.content_type,
+        vector_results=[row['id'] for row in vector_rows],
+        text_results=text_rows
+    )
+
+    return [
+        SearchResult(
+            id=hit['id'],
+            content_type=hit['content_type'] or vector_types.get(hit['id']),
+            score=hit['score'],
+            bm25_rank=hit['bm25_rank'],
+            vector_rank=hit['vector_rank'],
+            content=vector_content.get(hit['id'])
+        )
+        for hit in hits
+    ]
+
+
+@router.post("/documents")
+async def upsert_search_document(document: SearchDocument):
+    """
+    검색 인덱스에 문서 추가/갱신 (노트 생성·수정 시 호출)
+    """
+    await run_in_threadpool(
+        index_document,
+        document.content_id,
+        build_document_text(document.title, document.content, ' '.join(document.tags)),
+        user_id=document.user_id,
+        content_type=document.content_type
+    )
+    return {"message": "색인되었습니다", "content_id": document.content_id}
+
+
+@router.delete("/documents/{content_id}")
+async def delete_search_document(content_id: str):
+    """
+    검색 인덱스에서 문서 제거 (노트 삭제 시 호출)
+    """
+    removed = await run_in_threadpool(remove_document, content_id)
+    return {"removed": removed}
+
+
+def _reindex(notes: List[Dict], summaries: List[Dict], transcripts: Dict[str, Dict]) -> None:
+    index = get_search_index()
+    for note in notes:
+        index.add_document(
+            note['id'],
+            build_document_text(note['title'], note['content'], ' '.join(note.get('tags') or [])),
+            user_id=note['user_id'],
+            content_type='note'
+        )
+    for summary in summaries:
+        transcript = summary.get('transcript')
+        if not transcript and summary['id'] in transcripts:
+            transcript = ' '.join(unpack_segments(row_blob(transcripts[summary['id']])))
+        index.add_document(
+            summary['id'],
+            build_document_text(summary['title'], summary['summary'], transcript),
+            user_id=summary['user_id'],
+            content_type='youtube'
+        )
+    save_search_index(force=True)
+
+
+@router.post("/reindex")
+async def reindex_user_content(user_id: str):
+    """
+    저장소의 노트 + YouTube 요약을 다시 색인
+    """
+    repositories = get_repositories()
+    if not repositories:
+        raise HTTPException(status_code=503, detail="Storage not configured")
+
+    try:
+        notes = await repositories.notes.list_by_user(user_id, columns='id,user_id,title,content,tags')
+        summaries = await repositories.summaries.list_by_user(user_id, limit=None)
+
+        # 분리 저장된 자막도 함께 색인
+        transcripts = {}
+        for summary in summaries:
+            if not summary.get('transcript'):
+                transcript_row = await repositories.transcripts.get(summary['id'])
+                if transcript_row:
+                    transcripts[summary['id']] = transcript_row
+
+        # 자막 복원 + 토큰화 + 저장은 스레드풀에서 (이벤트 루프 블로킹 방지)
+        await run_in_threadpool(_reindex, notes, summaries, transcripts)
+
+        return {"notes": len(notes), "youtube": len(summaries)}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
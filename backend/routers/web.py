@@ -1,16 +1,31 @@
 """
 웹 URL 요약 라우터
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, HttpUrl
-from services.web_service import process_web_url
+from services.web_service import process_web_url, url_key
 from services.gemini_service import summarize_transcript
+from services.transcript_compaction import compact_text, record_compaction
+from services.admission import admit, client_key
+from services.responses import ingest_response, parse_fields
+from services.content_dedup import fingerprint, find_by_url, summarize_shared
+from services.repository import get_repositories
 from datetime import datetime
 import uuid
 from typing import Optional
+from services.tracing import get_logger
+
+log = get_logger('routers.web')
 
 router = APIRouter()
 
+# 응답 필드 (fields= 검증용)
+WEB_RESPONSE_FIELDS = (
+    'id', 'url', 'canonical_url', 'title', 'description', 'author', 'summary', 'key_points',
+    'word_count', 'partial', 'duplicate_of', 'similarity', 'token_usage', 'created_at', 'transcript',
+)
+
 
 class WebSummaryRequest(BaseModel):
     url: HttpUrl
@@ -19,52 +34,120 @@ class WebSummaryRequest(BaseModel):
 
 
 @router.post("/summarize")
-async def summarize_web_page(request: WebSummaryRequest):
+async def summarize_web_page(
+    request: WebSummaryRequest,
+    http_request: Request,
+    fields: Optional[str] = Query(None, description="쉼표로 구분된 응답 필드 (id는 항상 포함)"),
+    include_transcript: bool = Query(False, description="응답에 추출한 본문 포함 (transcript)")
+):
     """
     웹 페이지 크롤링 및 요약 생성
     
-    1. URL에서 텍스트 크롤링
-    2. Gemini AI로 요약
-    3. 결과 반환
+    1. URL 정규화 (추적 파라미터 제거, 같은 URL 요약 조회 키)
+    2. URL에서 텍스트 크롤링 (요청한 URL 그대로)
+    3. Gemini AI로 요약
+    4. 결과 반환
+    
+    크롤링 + 요약은 web admission 한도 안에서 스레드풀로 실행 (초과 시 429/503 + Retry-After)
+    응답은 fields로 필요한 키만 받을 수 있고, 추출한 본문은 include_transcript=true일 때만 포함합니다
+    
+    지시사항 없는 요청은 사용자 간에 요약을 공유합니다: 최근에 같은 URL(정규화 기준)을 요약했으면
+    페이지를 다시 받지 않고, 본문이 거의 같은 글(다른 URL, 전재 기사)을 요약했으면 Gemini를 호출하지 않습니다
+    (duplicate_of = 재사용한 요약, similarity = 추정 유사도)
     """
+    selected = parse_fields(fields, WEB_RESPONSE_FIELDS)
     try:
         url_str = str(request.url)
-        print(f"[INFO] 웹 페이지 처리: {url_str}")
+        canonical_key = url_key(url_str)
+        log.info(f"웹 페이지 처리: {url_str}")
         
-        # 웹 페이지 크롤링
-        web_data = process_web_url(url_str)
+        # 공유 요약은 기본 지시사항 요약만
+        repositories = None if request.custom_instruction else get_repositories()
         
-        if not web_data.get('has_text'):
-            raise HTTPException(
-                status_code=400,
-                detail="웹 페이지에서 텍스트를 추출할 수 없습니다"
-            )
+        if repositories and not include_transcript:
+            shared = await find_by_url(repositories, canonical_key)
+            if shared:
+                log.info(f"같은 URL 요약 재사용: {canonical_key}")
+                meta = shared.get('meta') or {}
+                return ingest_response({
+                    'id': str(uuid.uuid4()),
+                    'url': url_str,
+                    'canonical_url': canonical_key,
+                    'title': shared.get('title') or meta.get('title', '제목 없음'),
+                    'description': meta.get('description', ''),
+                    'author': meta.get('author'),
+                    'summary': shared['summary'],
+                    'key_points': shared.get('key_points') or [],
+                    'word_count': meta.get('word_count'),
+                    'partial': False,
+                    'duplicate_of': shared['id'],
+                    'similarity': 1.0,
+                    'token_usage': None,
+                    'created_at': datetime.now().isoformat(),
+                }, selected, include_transcript)
         
-        # AI 요약 생성
-        print("[INFO] AI 요약 생성 중...")
-        summary_result = summarize_transcript(
-            transcript=web_data['text'],
-            video_title=web_data['title'],
-            custom_instruction=request.custom_instruction
-        )
+        async with admit('web', client_key(http_request, request.user_id)):
+            # 웹 페이지 크롤링
+            web_data = await run_in_threadpool(process_web_url, url_str)
+            
+            if not web_data.get('has_text'):
+                raise HTTPException(
+                    status_code=400,
+                    detail="웹 페이지에서 텍스트를 추출할 수 없습니다"
+                )
+            
+            # 반복되는 머리글/바닥글, 메뉴 문구 제거 후 요약
+            compacted, stats = await run_in_threadpool(compact_text, web_data['text'], 'web')
+            record_compaction(stats)
+            
+            # 본문 지문 (파싱이 중단된 페이지는 공유하지 않음)
+            fp = None
+            if repositories and not web_data.get('partial'):
+                fp = await run_in_threadpool(fingerprint, 'web', compacted)
+            
+            # AI 요약 생성 (거의 같은 본문의 요약이 있으면 재사용)
+            log.info("AI 요약 생성 중...")
+            summary_result, duplicate = await summarize_shared(
+                repositories,
+                fp,
+                lambda: run_in_threadpool(
+                    summarize_transcript,
+                    transcript=compacted,
+                    video_title=web_data['title'],
+                    custom_instruction=request.custom_instruction
+                ),
+                title=web_data['title'],
+                meta={
+                    'description': web_data.get('description', ''),
+                    'author': web_data.get('author'),
+                    'word_count': web_data['word_count'],
+                },
+                source_url=canonical_key,
+            )
         
         # 결과 반환
-        return {
+        return ingest_response({
             'id': str(uuid.uuid4()),
             'url': url_str,
+            'canonical_url': canonical_key,
             'title': web_data['title'],
             'description': web_data.get('description', ''),
             'author': web_data.get('author'),
             'summary': summary_result['summary'],
             'key_points': summary_result['key_points'],
             'word_count': web_data['word_count'],
+            'partial': web_data.get('partial', False),  # HTML 파싱이 중단돼 태그만 걷어낸 본문으로 요약
+            'duplicate_of': duplicate['id'] if duplicate else None,
+            'similarity': duplicate['similarity'] if duplicate else None,
+            'token_usage': summary_result.get('token_usage'),
             'created_at': datetime.now().isoformat(),
-        }
+            'transcript': web_data['text'],
+        }, selected, include_transcript)
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[ERROR] 웹 페이지 요약 실패: {str(e)}")
+        log.error(f"웹 페이지 요약 실패: {str(e)}")
         raise HTTPException(status_code=500, detail=f"웹 페이지 요약 실패: {str(e)}")
 
 
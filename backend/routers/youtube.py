@@ -1,37 +1,121 @@
 """
 YouTube 처리 API 라우터
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from models.schemas import YoutubeSummaryRequest, YoutubeSummaryResponse, VideoInfo
-from services.youtube_service import process_youtube_video, extract_video_id
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request, Response, Header
+from fastapi.concurrency import run_in_threadpool
+from models.schemas import (
+    YoutubeSummaryRequest,
+    YoutubeResummarizeRequest,
+    YoutubeBulkRequest,
+    YoutubeSummaryResponse,
+    VideoInfo,
+)
+from services.youtube_service import (
+    process_youtube_video,
+    transcribe_video_audio,
+    extract_video_id,
+    is_collection_url,
+    get_video_info as fetch_video_info,
+)
+from services.bulk_ingest import start_bulk_job, get_bulk_job, cancel_bulk_job, pipeline_stats
 from services.gemini_service import summarize_transcript
-from supabase import create_client, Client
-import os
-from dotenv import load_dotenv
+from services.summary_service import persist_youtube_summary
+from services.digest_service import resummarize
+from services.search_service import index_document, remove_document, build_document_text
+from services.repository import get_repositories
+from services.singleflight import SingleFlight
+from services.metrics import track_stage, FALLBACKS, TRANSCRIPT_SOURCE
+from services.admission import admit, client_key
+from services.prefetch import prefetcher
+from services.responses import ingest_response, parse_fields
+from services.read_cache import (
+    summary_cache,
+    summary_list_cache,
+    invalidate_summary,
+    cache_control,
+    SUMMARY_DETAIL_MAX_AGE,
+    SUMMARY_LIST_MAX_AGE,
+)
+from services.transcript_store import (
+    build_transcript_row,
+    row_blob,
+    read_header,
+    unpack_segments,
+    split_segments,
+    content_hash,
+    parse_segment_range,
+    unpack_timing,
+)
 from datetime import datetime
+from typing import Optional
 import uuid
+from services.tracing import get_logger
 
-load_dotenv()
+log = get_logger('routers.youtube')
 
 router = APIRouter()
 
-# Supabase 클라이언트 초기화
-SUPABASE_URL = os.getenv('SUPABASE_URL')
-SUPABASE_KEY = os.getenv('SUPABASE_KEY')
+# 같은 영상에 대한 동시 요청은 파이프라인 하나만 실행 (워커 간 lease 포함)
+youtube_flights = SingleFlight('youtube')
+summary_flights = SingleFlight('youtube-summary')
 
-# Supabase 연결 시도 (optional)
-supabase: Client = None
-try:
-    if SUPABASE_URL and SUPABASE_KEY:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-        print("[OK] Supabase connected")
-except Exception as e:
-    print(f"[WARNING] Supabase connection failed: {e}")
-    print("[INFO] Running without Supabase (responses will not be saved)")
+
+async def process_video_coalesced(video_url: str, use_whisper: bool = True) -> dict:
+    """
+    process_youtube_video를 비디오 ID 단위로 병합 실행
+    (Whisper/Gemini 중복 작업 및 downloads/<id>.mp3 경합 방지)
+    """
+    video_id = extract_video_id(video_url)
+    if not video_id:
+        raise ValueError("유효하지 않은 YouTube URL입니다")
+    
+    if not use_whisper:
+        # /info 미리보기 때 받아 둔 자막 (받는 중이면 그 결과를 기다림)
+        prefetched = await prefetcher.claim(video_id)
+        if prefetched:
+            if prefetched.get('has_transcript'):
+                TRANSCRIPT_SOURCE.inc(source='subtitle')
+            return prefetched
+    
+    key = f"{video_id}:{'whisper' if use_whisper else 'subtitle'}"
+    return await youtube_flights.run(key, process_youtube_video, video_url, use_whisper=use_whisper)
+
+
+async def transcribe_audio_coalesced(video_url: str, video_data: dict) -> dict:
+    """
+    자막이 없는 영상만 Whisper로 변환 (비디오 ID 단위로 병합)
+    """
+    result = await youtube_flights.run(f"{video_data['video_id']}:audio", transcribe_video_audio, video_url, video_data)
+    if not result:
+        return video_data
+    text, timing = result
+    return {**video_data, 'transcript': text, 'timed_transcript': timing, 'has_transcript': True, 'source': 'whisper'}
+
+
+async def summarize_video_data(video_data: dict, custom_instruction: Optional[str]) -> dict:
+    """
+    Gemini 요약 (같은 영상 + 같은 지시사항이면 호출 하나로 병합)
+    """
+    log.info(f"처리 방법: {video_data.get('source', 'unknown')}")
+    log.info("Generating summary with Gemini...")
+    summary_key = f"{video_data['video_id']}:{video_data.get('source')}:{(custom_instruction or '').strip()}"
+    with track_stage('youtube', 'summarize'):
+        return await summary_flights.run(
+            summary_key,
+            summarize_transcript,
+            transcript=video_data['transcript'],
+            video_title=video_data['title'],
+            custom_instruction=custom_instruction
+        )
 
 
 @router.post("/summarize", response_model=YoutubeSummaryResponse)
-async def summarize_youtube_video(request: YoutubeSummaryRequest):
+async def summarize_youtube_video(
+    request: YoutubeSummaryRequest,
+    http_request: Request,
+    fields: Optional[str] = Query(None, description="쉼표로 구분된 응답 필드 (id는 항상 포함)"),
+    include_transcript: bool = Query(False, description="응답에 전체 자막 포함")
+):
     """
     YouTube 비디오 요약 생성 (하이브리드)
     
@@ -40,83 +124,139 @@ async def summarize_youtube_video(request: YoutubeSummaryRequest):
     3. Gemini AI로 요약 생성
     4. Supabase에 저장
     5. 결과 반환
+    
+    자막 경로(subtitle)와 Whisper 경로(whisper)는 admission 한도가 따로 있어서
+    Whisper가 몰려도 자막 영상 요약은 계속 처리됩니다 (초과 시 429/503 + Retry-After)
+    
+    응답은 fields로 필요한 키만 받을 수 있고, 자막은 include_transcript=true일 때만 포함합니다
     """
+    selected = parse_fields(fields, YoutubeSummaryResponse.model_fields)
+    user_key = client_key(http_request, request.user_id)
     try:
-        # 1. YouTube 비디오 처리 (자막 + Whisper)
-        print(f"[INFO] Processing video: {request.video_url}")
-        video_data = process_youtube_video(request.video_url, use_whisper=True)
+        # 1. YouTube 비디오 처리 (자막 먼저, 없으면 Whisper 한도를 따로 받아서 변환)
+        log.info(f"Processing video: {request.video_url}")
+        # (블로킹 작업은 스레드풀에서 실행, 같은 영상 동시 요청은 하나로 병합)
+        async with admit('subtitle', user_key):
+            video_data = await process_video_coalesced(request.video_url, use_whisper=False)
+            if video_data.get('has_transcript'):
+                summary_result = await summarize_video_data(video_data, request.custom_instruction)
         
         if not video_data.get('has_transcript'):
-            raise HTTPException(
-                status_code=400,
-                detail="영상 처리 실패: 자막도 없고 Whisper로도 변환할 수 없습니다."
-            )
+            # 2. 자막 없으면 Whisper (오디오 다운로드 + 변환 + 요약까지 Whisper 한도 안에서)
+            FALLBACKS.inc(pipeline='youtube', from_stage='subtitle', to_stage='whisper')
+            async with admit('whisper', user_key):
+                video_data = await transcribe_audio_coalesced(request.video_url, video_data)
+                if not video_data.get('has_transcript'):
+                    raise HTTPException(
+                        status_code=400,
+                        detail="영상 처리 실패: 자막도 없고 Whisper로도 변환할 수 없습니다."
+                    )
+                summary_result = await summarize_video_data(video_data, request.custom_instruction)
         
-        # 처리 방법 로그
-        source = video_data.get('source', 'unknown')
-        print(f"[INFO] 처리 방법: {source}")
+        # 3. 저장소에 저장 + 검색 색인
+        with track_stage('youtube', 'persist'):
+            saved = await persist_youtube_summary(request.user_id, request.video_url, video_data, summary_result)
         
-        # 2. Gemini로 요약 생성
-        print(f"Generating summary with Gemini...")
-        summary_result = summarize_transcript(
-            transcript=video_data['transcript'],
-            video_title=video_data['title'],
-            custom_instruction=request.custom_instruction
-        )
-        
-        # 3. Supabase에 저장
-        if supabase:
-            summary_data = {
-                'id': str(uuid.uuid4()),
-                'user_id': request.user_id,
-                'video_url': request.video_url,
-                'video_id': video_data['video_id'],
-                'title': video_data['title'],
-                'thumbnail_url': video_data.get('thumbnail_url'),
-                'duration': video_data.get('duration'),
-                'summary': summary_result['summary'],
-                'key_points': summary_result['key_points'],
-                'transcript': video_data['transcript'],
-                'created_at': datetime.utcnow().isoformat()
-            }
-            
-            result = supabase.table('youtube_summaries').insert(summary_data).execute()
-            
-            if result.data:
-                return YoutubeSummaryResponse(**result.data[0])
-        
-        # Supabase 없이 반환 (개발용)
-        return YoutubeSummaryResponse(
-            id=str(uuid.uuid4()),
-            video_id=video_data['video_id'],
-            video_url=request.video_url,
-            title=video_data['title'],
-            thumbnail_url=video_data.get('thumbnail_url'),
-            duration=video_data.get('duration'),
-            summary=summary_result['summary'],
-            key_points=summary_result['key_points'],
-            transcript=video_data['transcript'],
-            created_at=datetime.utcnow()
-        )
+        transcript = video_data['transcript'] if include_transcript else None
+        if saved:
+            response = YoutubeSummaryResponse(
+                **{**saved, 'transcript': transcript}, token_usage=summary_result.get('token_usage')
+            )
+        else:
+            # 저장소 없이 반환 (개발용)
+            response = YoutubeSummaryResponse(
+                id=str(uuid.uuid4()),
+                video_id=video_data['video_id'],
+                video_url=request.video_url,
+                title=video_data['title'],
+                thumbnail_url=video_data.get('thumbnail_url'),
+                duration=video_data.get('duration'),
+                summary=summary_result['summary'],
+                key_points=summary_result['key_points'],
+                transcript=transcript,
+                created_at=datetime.utcnow(),
+                token_usage=summary_result.get('token_usage')
+            )
+        return ingest_response(response, selected, include_transcript)
     
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"Error: {str(e)}")
+        log.error(f"Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"요약 생성 실패: {str(e)}")
 
 
+@router.post("/bulk", status_code=202)
+async def start_bulk_ingest(request: YoutubeBulkRequest):
+    """
+    재생목록 / 채널 일괄 수집 시작 (바로 202 반환, 진행 상황은 GET /bulk/{job_id})
+    
+    영상들은 단계별 파이프라인(metadata → transcript → audio → whisper → summarize → persist)을
+    흐르며, 단계마다 워커 수와 큐 크기가 따로 있어서 자막 영상과 Whisper 영상이 겹쳐서 처리됩니다.
+    """
+    if not is_collection_url(request.source_url):
+        raise HTTPException(status_code=400, detail="YouTube 재생목록 또는 채널 URL이 아닙니다")
+    
+    job = await start_bulk_job(
+        request.source_url,
+        request.user_id,
+        custom_instruction=request.custom_instruction,
+        use_whisper=request.use_whisper,
+        limit=request.limit
+    )
+    return {
+        'job_id': job.id,
+        'state': job.state,
+        'status_url': f"/api/youtube/bulk/{job.id}",
+    }
+
+
+@router.get("/bulk/{job_id}")
+async def get_bulk_ingest(job_id: str, items: bool = Query(True, description="영상별 진행 상황 포함")):
+    """
+    일괄 수집 진행 상황 (영상별 단계/소요 시간 + 파이프라인 단계별 큐 상태)
+    """
+    job = get_bulk_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return {**job.to_dict(include_items=items), 'pipeline': pipeline_stats()}
+
+
+@router.delete("/bulk/{job_id}")
+async def cancel_bulk_ingest(job_id: str):
+    """
+    일괄 수집 취소 (이미 처리 중인 영상은 끝까지 처리)
+    """
+    job = await cancel_bulk_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return job.to_dict(include_items=False)
+
+
 @router.get("/info")
-async def get_video_info(video_url: str) -> VideoInfo:
+async def get_video_info(video_url: str, http_request: Request) -> VideoInfo:
     """
-    YouTube 비디오 정보만 가져오기 (요약 전 미리보기)
+    YouTube 비디오 정보만 가져오기 (요약 전 미리보기, light 한도)
+    
+    정보만 받아서 바로 반환하고, 자막(자막이 없으면 오디오)은 낮은 우선순위로 미리 받아 둡니다.
+    이어서 /summarize를 호출하면 받아 둔 결과로 시작합니다 (services/prefetch.py)
     """
     try:
         video_id = extract_video_id(video_url)
         if not video_id:
             raise HTTPException(status_code=400, detail="유효하지 않은 YouTube URL입니다")
         
-        video_data = process_youtube_video(video_url)
+        user_key = client_key(http_request)
+        job = prefetcher.get(video_id)
+        if job:
+            video_data = job.info
+        else:
+            async with admit('light', user_key):
+                with track_stage('youtube', 'video_info'):
+                    video_data = await youtube_flights.run(f"{video_id}:info", fetch_video_info, video_url)
+            prefetcher.schedule(video_url, video_id, user_key, video_data)
         
         return VideoInfo(
             video_id=video_data['video_id'],
@@ -129,51 +269,305 @@ async def get_video_info(video_url: str) -> VideoInfo:
             upload_date=video_data.get('upload_date')
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.delete("/prefetch")
+async def cancel_prefetch(video_url: str, http_request: Request):
+    """
+    미리보기를 닫았을 때 미리 받기 취소 (미리보기한 사용자만, 요약을 시작했거나 끝난 작업은 그대로)
+    """
+    video_id = extract_video_id(video_url)
+    if not video_id:
+        raise HTTPException(status_code=400, detail="유효하지 않은 YouTube URL입니다")
+    return {'video_id': video_id, 'cancelled': prefetcher.cancel(video_id, client_key(http_request))}
+
+
 @router.get("/summaries")
-async def get_user_summaries(user_id: str, limit: int = 20):
+async def get_user_summaries(
+    request: Request,
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="쉼표로 구분된 컬럼 (기본: id,title,thumbnail_url,created_at)"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값")
+):
     """
     사용자의 YouTube 요약 목록 가져오기
+    
+    - 기본은 가벼운 projection (transcript/summary 본문 제외)
+    - (created_at, id) keyset 페이지네이션: 다음 페이지 cursor는 X-Next-Cursor 헤더
+    - 프로세스 내부 캐시 (SUMMARY_LIST_CACHE_TTL) + ETag / If-None-Match → 304
+    """
+    key = (user_id, summary_list_cache.generation(user_id), limit, fields, cursor)
+    cached = summary_list_cache.get(key)
+    if cached is None:
+        repositories = get_repositories()
+        if not repositories:
+            raise HTTPException(status_code=503, detail="Storage not configured")
+        
+        try:
+            rows, next_cursor = await repositories.summaries.list_page(
+                user_id,
+                limit=limit,
+                fields=fields.split(',') if fields else None,
+                cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        
+        cached = summary_list_cache.put(
+            key, rows, headers={'X-Next-Cursor': next_cursor} if next_cursor else None
+        )
+    
+    return cached.to_response(request, cache_control(SUMMARY_LIST_MAX_AGE))
+
+
+@router.get("/summaries/{summary_id}")
+async def get_summary(summary_id: str, request: Request):
     """
-    if not supabase:
-        raise HTTPException(status_code=503, detail="Supabase not configured")
+    특정 YouTube 요약 가져오기
     
-    try:
-        result = supabase.table('youtube_summaries') \
-            .select('*') \
-            .eq('user_id', user_id) \
-            .order('created_at', desc=True) \
-            .limit(limit) \
-            .execute()
+    - 요약은 저장 후 바뀌지 않으므로 프로세스 내부 캐시 (SUMMARY_CACHE_TTL, 삭제 시 무효화)
+    - ETag / Last-Modified(생성 시각) + 조건부 요청이면 304
+    """
+    cached = summary_cache.get(summary_id)
+    if cached is None:
+        repositories = get_repositories()
+        if not repositories:
+            raise HTTPException(status_code=503, detail="Storage not configured")
+        
+        try:
+            summary = await repositories.summaries.get(summary_id)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
         
-        return result.data
+        if not summary:
+            raise HTTPException(status_code=404, detail="요약을 찾을 수 없습니다")
+        
+        cached = summary_cache.put(summary_id, summary, last_modified=summary.get('created_at'))
     
+    return cached.to_response(request, cache_control(SUMMARY_DETAIL_MAX_AGE))
+
+
+@router.get("/summaries/{summary_id}/transcript")
+async def get_summary_transcript(
+    summary_id: str,
+    response: Response,
+    start: Optional[int] = Query(None, ge=0, description="시작 세그먼트 (포함)"),
+    end: Optional[int] = Query(None, ge=1, description="끝 세그먼트 (미포함)"),
+    range_header: Optional[str] = Header(None, alias="Range")
+):
+    """
+    YouTube 요약의 자막 가져오기 (지연 로딩)
+    
+    - 세그먼트 범위 요청: `Range: segments=0-9` 헤더 또는 ?start=0&end=10
+    - 범위 요청이면 206 + Content-Range: segments 0-9/<전체>
+    """
+    repositories = get_repositories()
+    if not repositories:
+        raise HTTPException(status_code=503, detail="Storage not configured")
+    
+    try:
+        row = await repositories.transcripts.get(summary_id)
+        if row:
+            blob = row_blob(row)
+            total = read_header(blob)[1]
+            digest = row['content_hash']
+            legacy_segments = None
+        else:
+            # 분리 저장 이전의 행: youtube_summaries.transcript 컬럼에서 읽기
+            summary = await repositories.summaries.get(summary_id, fields=['id', 'transcript'])
+            if not summary or not summary.get('transcript'):
+                raise HTTPException(status_code=404, detail="자막을 찾을 수 없습니다")
+            legacy_segments = split_segments(summary['transcript'])
+            total = len(legacy_segments)
+            digest = content_hash(summary['transcript'])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    try:
+        requested = parse_segment_range(range_header, total)
+    except ValueError as e:
+        raise HTTPException(status_code=416, detail=str(e), headers={'Content-Range': f"segments */{total}"})
+    
+    if requested is None and (start is not None or end is not None):
+        requested = (start or 0, min(end if end is not None else total, total))
+    first, last = requested or (0, total)
+    
+    if legacy_segments is not None:
+        segments = legacy_segments[first:last]
+    else:
+        segments = await run_in_threadpool(unpack_segments, blob, first, last)
+    
+    response.headers['ETag'] = f'"{digest}"'
+    response.headers['Accept-Ranges'] = 'segments'
+    if requested is not None and total:
+        response.status_code = 206
+        response.headers['Content-Range'] = f"segments {first}-{max(first, last - 1)}/{total}"
+    
+    return {
+        'summary_id': summary_id,
+        'content_hash': digest,
+        'total_segments': total,
+        'start': first,
+        'end': last,
+        'segments': segments,
+    }
 
 
-@router.get("/summaries/{summary_id}")
-async def get_summary(summary_id: str):
+@router.get("/summaries/{summary_id}/transcript/timed")
+async def get_timed_transcript(
+    summary_id: str,
+    start: Optional[float] = Query(None, ge=0, description="시작 시각 (초)"),
+    end: Optional[float] = Query(None, gt=0, description="끝 시각 (초, 미포함)"),
+    at: Optional[float] = Query(None, ge=0, description="이 시각에 나오는 세그먼트 하나"),
+    q: Optional[str] = Query(None, min_length=1, description="이 문구가 처음 나오는 시각 찾기"),
+    after: float = Query(0, ge=0, description="q 검색 시작 시각 (초)")
+):
     """
-    특정 YouTube 요약 가져오기
+    시간 정보가 있는 자막 (원본 자막 / Whisper 세그먼트 기준)
+    
+    - ?start=60&end=180: 구간 세그먼트 목록
+    - ?at=125: 해당 시각의 세그먼트
+    - ?q=경사 하강법: 문구가 처음 나오는 시각 (영상 seek용)
     """
-    if not supabase:
-        raise HTTPException(status_code=503, detail="Supabase not configured")
+    repositories = get_repositories()
+    if not repositories:
+        raise HTTPException(status_code=503, detail="Storage not configured")
     
     try:
-        result = supabase.table('youtube_summaries') \
-            .select('*') \
-            .eq('id', summary_id) \
-            .single() \
-            .execute()
+        row = await repositories.transcripts.get(summary_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not row or not row.get('timing'):
+        raise HTTPException(status_code=404, detail="시간 정보가 있는 자막을 찾을 수 없습니다")
+    
+    timed = await run_in_threadpool(unpack_timing, row['timing'])
+    result = {
+        'summary_id': summary_id,
+        'total_segments': len(timed),
+        'duration': timed.end_time,
+    }
+    if not len(timed):
+        return {**result, 'segments': []}
+    
+    if q is not None:
+        found = timed.locate(q, after=after)
+        if not found:
+            raise HTTPException(status_code=404, detail="문구를 찾을 수 없습니다")
+        index, seconds = found
+        return {**result, 'query': q, 'index': index, 'start': seconds, 'text': timed.segment(index)[2]}
+    
+    if at is not None:
+        index = timed.index_at(at)
+        seconds, duration, text = timed.segment(index)
+        return {**result, 'index': index, 'start': seconds, 'duration': duration, 'text': text}
+    
+    if end is not None and start is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end는 start보다 커야 합니다")
+    part = timed.slice(start or 0, end)
+    return {**result, 'start': part.start_time, 'end': part.end_time, 'segments': part.to_dicts()}
+
+
+async def load_full_transcript(repositories, summary_id: str, summary: Optional[dict] = None) -> Optional[dict]:
+    """
+    저장된 자막 전체 (youtube_transcripts 행, 없으면 분리 저장 이전의 transcript 컬럼)
+
+    Returns:
+        {'text': 자막, 'row': youtube_transcripts 행 또는 None}
+    """
+    row = await repositories.transcripts.get(summary_id)
+    if row:
+        segments = await run_in_threadpool(unpack_segments, row_blob(row))
+        return {'text': ' '.join(segments), 'row': row}
+    
+    if summary is None or 'transcript' not in summary:
+        summary = await repositories.summaries.get(summary_id, fields=['id', 'transcript'])
+    if summary and summary.get('transcript'):
+        return {'text': summary['transcript'], 'row': None}
+    return None
+
+
+@router.post("/summaries/{summary_id}/resummarize", response_model=YoutubeSummaryResponse)
+async def resummarize_summary(summary_id: str, request: YoutubeResummarizeRequest, http_request: Request):
+    """
+    기존 요약을 새 지시사항으로 다시 요약
+    
+    - 영상 처리(자막/Whisper)를 다시 하지 않고 저장된 자막 사용
+    - 구간별 압축 노트를 재사용 (처음 한 번만 생성) → 마지막 생성 단계만 Gemini 호출
+    - 핵심 포인트는 지시사항과 무관하므로 원본 요약의 것을 그대로 사용
+    - 결과는 새 요약으로 저장 (자막 행은 압축된 그대로 복사)
+    """
+    repositories = get_repositories()
+    if not repositories:
+        raise HTTPException(status_code=503, detail="Storage not configured")
+    
+    try:
+        original = await repositories.summaries.get(summary_id, fields=[
+            'id', 'user_id', 'video_url', 'video_id', 'title', 'thumbnail_url', 'duration', 'key_points', 'transcript'
+        ])
+        if not original or original.get('user_id') != request.user_id:
+            raise HTTPException(status_code=404, detail="요약을 찾을 수 없습니다")
         
-        return result.data
+        transcript = await load_full_transcript(repositories, summary_id, original)
+        if not transcript:
+            raise HTTPException(status_code=404, detail="자막을 찾을 수 없습니다")
+        
+        async with admit('subtitle', client_key(http_request, request.user_id)):
+            summary_text, token_usage = await resummarize(
+                transcript['text'],
+                original['title'],
+                request.custom_instruction,
+                repositories
+            )
+        
+        summary_data = {
+            'id': str(uuid.uuid4()),
+            'user_id': request.user_id,
+            'video_url': original['video_url'],
+            'video_id': original['video_id'],
+            'title': original['title'],
+            'thumbnail_url': original.get('thumbnail_url'),
+            'duration': original.get('duration'),
+            'summary': summary_text,
+            'key_points': original.get('key_points') or [],
+            'created_at': datetime.utcnow().isoformat()
+        }
+        
+        with track_stage('youtube', 'persist'):
+            saved = await repositories.summaries.create(summary_data)
+            if saved:
+                invalidate_summary(summary_data['id'], request.user_id)
+                if transcript['row']:
+                    copied = {key: value for key, value in transcript['row'].items() if key != 'created_at'}
+                    await repositories.transcripts.save({**copied, 'id': summary_data['id'], 'user_id': request.user_id})
+                else:
+                    transcript_row = await run_in_threadpool(
+                        build_transcript_row, summary_data['id'], request.user_id, transcript['text']
+                    )
+                    await repositories.transcripts.save(transcript_row)
+        
+        await run_in_threadpool(
+            index_document,
+            summary_data['id'],
+            build_document_text(summary_data['title'], summary_text, transcript['text']),
+            user_id=request.user_id,
+            content_type='youtube'
+        )
+        return YoutubeSummaryResponse(**{**(saved or summary_data), 'transcript': None, 'token_usage': token_usage})
     
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=404, detail="요약을 찾을 수 없습니다")
+        log.error(f"다시 요약 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"다시 요약 실패: {str(e)}")
 
 
 @router.delete("/summaries/{summary_id}")
@@ -181,11 +575,16 @@ async def delete_summary(summary_id: str):
     """
     YouTube 요약 삭제
     """
-    if not supabase:
-        raise HTTPException(status_code=503, detail="Supabase not configured")
+    repositories = get_repositories()
+    if not repositories:
+        raise HTTPException(status_code=503, detail="Storage not configured")
     
     try:
-        supabase.table('youtube_summaries').delete().eq('id', summary_id).execute()
+        owner = await repositories.summaries.get(summary_id, fields=['id', 'user_id'])
+        await repositories.summaries.delete(summary_id)
+        await repositories.transcripts.delete(summary_id)
+        await run_in_threadpool(remove_document, summary_id)
+        invalidate_summary(summary_id, owner.get('user_id') if owner else None)
         return {"message": "삭제되었습니다"}
     
     except Exception as e:
@@ -0,0 +1,281 @@
+"""
+Admission control / load shedding
+- 파이프라인 종류(light / subtitle / web / chat / pdf / whisper)별 전체 동시 실행 수 + 사용자별 동시 실행 수
+- 자리가 없으면 크기 제한 대기열에서 기다림 (최대 대기 시간 초과 시 거절)
+- 대기열이 가득 차면 바로 거절: 사용자 한도 초과는 429, 서버 포화는 503 (Retry-After + 대기 순번)
+- 전체 가중치 용량을 나눠 쓰고, 자리가 나면 우선순위가 높은 종류(light → subtitle/web/chat → pdf → whisper)부터 배정
+  → Whisper가 몰려도 /info 같은 가벼운 요청은 먼저 처리
+"""
+from collections import deque
+from contextlib import asynccontextmanager
+from fastapi import HTTPException, Request
+from services.metrics import ADMISSION_EVENTS, ADMISSION_WAIT, QUEUE_DEPTH
+from services.tracing import get_logger, current_span
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+import asyncio
+import math
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('admission')
+
+ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# 모든 종류가 나눠 쓰는 가중치 용량 (weight 합이 이 값을 넘지 않게)
+ADMISSION_TOTAL_CAPACITY = int(os.getenv('ADMISSION_TOTAL_CAPACITY', '24'))
+
+# 종류별 기본값: (동시 실행, 사용자별 동시 실행, 대기열 크기, 최대 대기 초, 가중치, 우선순위)
+_DEFAULTS = {
+    'light':    (32, 8, 64, 2.0, 0, 0),
+    'subtitle': (16, 3, 32, 10.0, 1, 1),
+    'web':      (8, 3, 16, 10.0, 1, 1),
+    'chat':     (16, 4, 32, 10.0, 1, 1),
+    'pdf':      (4, 2, 8, 15.0, 2, 2),
+    'whisper':  (2, 1, 4, 30.0, 4, 3),
+}
+
+
+class AdmissionClass:
+    """
+    파이프라인 종류별 한도 (ADMISSION_<NAME>_LIMIT / _PER_USER / _QUEUE / _MAX_WAIT로 변경)
+    """
+
+    def __init__(self, name: str, limit: int, per_user: int, queue_size: int, max_wait: float, weight: int, priority: int):
+        self.name = name
+        self.limit = limit
+        self.per_user = per_user
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.weight = weight
+        self.priority = priority
+        # 평균 점유 시간 (Retry-After 추정용, EMA)
+        self.avg_hold = 1.0 if weight == 0 else 10.0 * weight
+
+    @classmethod
+    def from_env(cls, name: str, defaults: Tuple) -> 'AdmissionClass':
+        limit, per_user, queue_size, max_wait, weight, priority = defaults
+        prefix = f"ADMISSION_{name.upper()}"
+        return cls(
+            name,
+            int(os.getenv(f"{prefix}_LIMIT", str(limit))),
+            int(os.getenv(f"{prefix}_PER_USER", str(per_user))),
+            int(os.getenv(f"{prefix}_QUEUE", str(queue_size))),
+            float(os.getenv(f"{prefix}_MAX_WAIT", str(max_wait))),
+            weight,
+            priority,
+        )
+
+
+class AdmissionRejected(HTTPException):
+    """
+    429 (사용자 한도) / 503 (서버 포화) + Retry-After
+    """
+
+    def __init__(self, status_code: int, pipeline: str, reason: str, retry_after: int, queue_position: Optional[int] = None):
+        super().__init__(
+            status_code=status_code,
+            detail={
+                'message': reason,
+                'pipeline': pipeline,
+                'retry_after': retry_after,
+                'queue_position': queue_position,
+            },
+            headers={'Retry-After': str(retry_after)},
+        )
+
+
+class _Waiter:
+    __slots__ = ('user', 'future', 'enqueued_at')
+
+    def __init__(self, user: str, future: asyncio.Future):
+        self.user = user
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class AdmissionController:
+    """
+    이벤트 루프 안에서만 사용 (잠금 없음)
+    """
+
+    def __init__(self, classes: Dict[str, AdmissionClass], total_capacity: int):
+        self.classes = classes
+        self.total_capacity = total_capacity
+        self._used = 0
+        self._active: Dict[str, int] = {name: 0 for name in classes}
+        self._user_active: Dict[Tuple[str, str], int] = {}
+        self._queues: Dict[str, Deque[_Waiter]] = {name: deque() for name in classes}
+        self._by_priority = sorted(classes.values(), key=lambda item: item.priority)
+
+        for name in classes:
+            QUEUE_DEPTH.set_function(lambda name=name: len(self._queues[name]), queue=f"admission_{name}")
+
+    def _fits(self, admission: AdmissionClass, user: str) -> bool:
+        return (
+            self._active[admission.name] < admission.limit
+            and self._user_active.get((admission.name, user), 0) < admission.per_user
+            and self._used + admission.weight <= self.total_capacity
+        )
+
+    def _starved(self, admission: AdmissionClass) -> bool:
+        """
+        대기자가 있는데 종류 한도가 아니라 전체 용량 때문에 못 들어가는 상태
+        """
+        return (
+            bool(self._queues[admission.name])
+            and self._active[admission.name] < admission.limit
+            and self._used + admission.weight > self.total_capacity
+        )
+
+    def _grant(self, admission: AdmissionClass, user: str) -> None:
+        self._active[admission.name] += 1
+        self._user_active[(admission.name, user)] = self._user_active.get((admission.name, user), 0) + 1
+        self._used += admission.weight
+
+    def _retry_after(self, admission: AdmissionClass, position: int) -> int:
+        return max(1, math.ceil(admission.avg_hold * (position + 1) / max(1, admission.limit)))
+
+    def release(self, name: str, user: str, held: float) -> None:
+        admission = self.classes[name]
+        self._active[name] -= 1
+        key = (name, user)
+        self._user_active[key] -= 1
+        if self._user_active[key] <= 0:
+            del self._user_active[key]
+        self._used -= admission.weight
+        admission.avg_hold = 0.8 * admission.avg_hold + 0.2 * held
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """
+        빈 자리를 우선순위 순서로 배정 (같은 종류 안에서는 FIFO, 사용자 한도에 걸린 대기자는 건너뜀)
+        """
+        for admission in self._by_priority:
+            queue = self._queues[admission.name]
+            for waiter in list(queue):
+                if waiter.future.done():
+                    queue.remove(waiter)
+                    continue
+                if not self._fits(admission, waiter.user):
+                    if self._active[admission.name] >= admission.limit or self._used + admission.weight > self.total_capacity:
+                        break
+                    continue
+                queue.remove(waiter)
+                self._grant(admission, waiter.user)
+                waiter.future.set_result(True)
+            # 더 높은 우선순위 대기자가 용량을 기다리는 중이면 낮은 우선순위에는 용량을 주지 않음
+            if self._starved(admission):
+                return
+
+    async def acquire(self, name: str, user: str) -> None:
+        admission = self.classes[name]
+        queue = self._queues[name]
+        higher_waiting = any(
+            self._starved(other) for other in self._by_priority if other.priority < admission.priority
+        )
+
+        if not queue and not higher_waiting and self._fits(admission, user):
+            self._grant(admission, user)
+            ADMISSION_EVENTS.inc(pipeline=name, result='admitted')
+            return
+
+        # 사용자 한도: 이미 한도만큼 실행 중이고 대기 중인 요청도 있으면 바로 429
+        user_active = self._user_active.get((name, user), 0)
+        user_waiting = sum(1 for waiter in queue if waiter.user == user)
+        if user_active >= admission.per_user and user_waiting >= admission.per_user:
+            ADMISSION_EVENTS.inc(pipeline=name, result='rejected_user')
+            raise AdmissionRejected(
+                429, name, "사용자별 동시 처리 한도를 초과했습니다", self._retry_after(admission, user_waiting)
+            )
+
+        if len(queue) >= admission.queue_size:
+            ADMISSION_EVENTS.inc(pipeline=name, result='rejected_queue')
+            raise AdmissionRejected(
+                503, name, "서버가 혼잡합니다. 잠시 후 다시 시도해주세요",
+                self._retry_after(admission, len(queue)), queue_position=len(queue) + 1
+            )
+
+        waiter = _Waiter(user, asyncio.get_running_loop().create_future())
+        queue.append(waiter)
+        position = len(queue)
+        # 앞 대기자가 사용자 한도에 걸려 있을 뿐이면 바로 배정될 수 있음
+        self._dispatch()
+        ADMISSION_EVENTS.inc(pipeline=name, result='queued')
+        span = current_span()
+        if span:
+            span.add_event('admission.queued', pipeline=name, position=position)
+
+        try:
+            await asyncio.wait({waiter.future}, timeout=admission.max_wait)
+        except asyncio.CancelledError:
+            # 클라이언트가 끊음: 이미 배정됐으면 자리 반납
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(name, user, 0.0)
+            else:
+                waiter.future.cancel()
+            raise
+        finally:
+            ADMISSION_WAIT.observe(time.perf_counter() - waiter.enqueued_at, pipeline=name)
+
+        if not waiter.future.done():
+            waiter.future.cancel()
+            if waiter in queue:
+                queue.remove(waiter)
+            ADMISSION_EVENTS.inc(pipeline=name, result='timeout')
+            raise AdmissionRejected(
+                503, name, "대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요",
+                self._retry_after(admission, len(queue)), queue_position=position
+            )
+        ADMISSION_EVENTS.inc(pipeline=name, result='admitted')
+
+    def stats(self) -> Dict:
+        return {
+            'capacity': self.total_capacity,
+            'used': self._used,
+            'pipelines': {
+                name: {
+                    'active': self._active[name],
+                    'limit': admission.limit,
+                    'queued': len(self._queues[name]),
+                    'queue_size': admission.queue_size,
+                    'avg_hold_seconds': round(admission.avg_hold, 2),
+                }
+                for name, admission in self.classes.items()
+            },
+        }
+
+
+controller = AdmissionController(
+    {name: AdmissionClass.from_env(name, defaults) for name, defaults in _DEFAULTS.items()},
+    ADMISSION_TOTAL_CAPACITY,
+)
+
+
+@asynccontextmanager
+async def admit(pipeline: str, user: str) -> AsyncIterator[None]:
+    """
+    사용법:
+        async with admit('whisper', user_id):
+            ...   # 한도 안에서 실행, 초과 시 AdmissionRejected (429/503)
+    """
+    if not ADMISSION_ENABLED:
+        yield
+        return
+
+    await controller.acquire(pipeline, user)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        controller.release(pipeline, user, time.perf_counter() - start)
+
+
+def client_key(request: Request, user_id: Optional[str] = None) -> str:
+    """
+    사용자별 한도 키 (user_id가 없으면 클라이언트 IP)
+    """
+    if user_id:
+        return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
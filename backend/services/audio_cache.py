@@ -0,0 +1,285 @@
+"""
+오디오 다운로드 캐시 (Whisper용)
+- (비디오 ID, 오디오 형식) 단위로 downloads/audio/<id>.<형식>.<확장자>에 보관
+- 전체 크기(AUDIO_CACHE_MAX_MB)를 넘으면 가장 오래 안 쓴 파일부터 삭제 (LRU, 접근 시각 = mtime)
+- 다운로드는 .partial/<키>/ 안에서 진행 후 os.replace로 옮김 → 읽는 쪽은 쓰다 만 파일을 보지 않음
+- 중단된 다운로드의 .part 파일은 남겨 두고 다음 시도에서 이어받기 (AUDIO_CACHE_PARTIAL_TTL 이후 정리)
+- Whisper 변환 중인 파일은 pin → 삭제 대상에서 제외
+→ Whisper 실패 후 재시도 / 더 큰 모델로 재변환해도 다시 다운로드하지 않음
+"""
+from contextlib import contextmanager
+from services.metrics import CACHE_EVENTS, CACHE_BYTES
+from services.tracing import get_logger
+from typing import Dict, Iterator, List, Optional, Tuple
+import os
+import shutil
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('audio_cache')
+
+AUDIO_CACHE_DIR = os.getenv('AUDIO_CACHE_DIR', 'downloads/audio')
+# 캐시 전체 크기 상한 (0이면 캐시하지 않고 변환이 끝나면 바로 삭제)
+AUDIO_CACHE_MAX_BYTES = int(float(os.getenv('AUDIO_CACHE_MAX_MB', '2048')) * 1024 * 1024)
+# 이어받기용 부분 다운로드 보관 시간 (초)
+AUDIO_CACHE_PARTIAL_TTL = float(os.getenv('AUDIO_CACHE_PARTIAL_TTL', '86400'))
+# 다른 워커가 같은 키를 다운로드 중일 때 lock 파일이 이 시간 이상 갱신이 없으면 죽은 것으로 판단
+AUDIO_CACHE_LOCK_STALE_SECONDS = float(os.getenv('AUDIO_CACHE_LOCK_STALE_SECONDS', '600'))
+# Whisper 입력 형식 (코덱 / 비트레이트)
+AUDIO_CODEC = os.getenv('AUDIO_CODEC', 'mp3')
+AUDIO_QUALITY = os.getenv('AUDIO_QUALITY', '128')
+
+_PARTIAL_DIR = '.partial'
+_LOCK_POLL_SECONDS = 0.5
+
+
+def audio_format(codec: str = AUDIO_CODEC, quality: str = AUDIO_QUALITY) -> str:
+    """
+    캐시 키에 들어가는 형식 이름 (예: mp3-128)
+    """
+    return f"{codec}-{quality}"
+
+
+class AudioCache:
+    """
+    사용법:
+        path = cache.acquire(video_id, fmt)          # 있으면 pin 후 경로, 없으면 None
+        if not path:
+            with cache.download_slot(video_id, fmt) as work_dir:
+                path = cache.acquire(video_id, fmt)  # 다른 워커가 먼저 받았을 수 있음
+                if not path:
+                    ...  # work_dir 안에 다운로드 (.part 이어받기)
+                    path = cache.commit(video_id, fmt, downloaded_file)
+        ...
+        cache.release(path)
+    """
+
+    def __init__(self, directory: str = AUDIO_CACHE_DIR, max_bytes: int = AUDIO_CACHE_MAX_BYTES):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self._pins: Dict[str, int] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        CACHE_BYTES.set_function(self.size_bytes, cache='audio')
+
+    # ---- 경로 ----
+
+    def path_for(self, video_id: str, fmt: str) -> str:
+        codec = fmt.split('-', 1)[0]
+        return os.path.join(self.directory, f"{video_id}.{fmt}.{codec}")
+
+    def partial_dir(self, video_id: str, fmt: str) -> str:
+        return os.path.join(self.directory, _PARTIAL_DIR, f"{video_id}.{fmt}")
+
+    def owns(self, path: str) -> bool:
+        return os.path.dirname(os.path.abspath(path)) == self.directory
+
+    # ---- 조회 / pin ----
+
+    def acquire(self, video_id: str, fmt: str) -> Optional[str]:
+        """
+        캐시에 있으면 pin + 접근 시각 갱신 후 경로 반환 (없으면 None)
+        """
+        path = self.path_for(video_id, fmt)
+        with self._lock:
+            try:
+                os.utime(path, None)
+            except FileNotFoundError:
+                return None
+            self._pins[path] = self._pins.get(path, 0) + 1
+        CACHE_EVENTS.inc(cache='audio', result='hit')
+        return path
+
+    def release(self, path: str) -> None:
+        """
+        pin 해제 (캐시를 끈 경우에는 마지막 사용자가 파일 삭제)
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            count = self._pins.get(path, 0) - 1
+            if count > 0:
+                self._pins[path] = count
+                return
+            self._pins.pop(path, None)
+            if self.max_bytes > 0:
+                return
+        self._remove(path)
+
+    # ---- 다운로드 ----
+
+    @contextmanager
+    def download_slot(self, video_id: str, fmt: str) -> Iterator[str]:
+        """
+        같은 키의 다운로드는 한 번에 하나만 (스레드: Lock, 워커: O_EXCL lock 파일)
+
+        Yields:
+            다운로드 작업 디렉토리 (이전에 중단된 .part 파일이 남아 있으면 이어받기)
+        """
+        key = f"{video_id}.{fmt}"
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            work_dir = self.partial_dir(video_id, fmt)
+            os.makedirs(work_dir, exist_ok=True)
+            lock_path = f"{work_dir}.lock"
+            waited = False
+            while not self._try_lock(lock_path):
+                if not waited:
+                    log.info(f"다른 워커에서 다운로드 중, 대기: {key}")
+                    waited = True
+                if self._is_stale(lock_path):
+                    log.warning(f"만료된 다운로드 lock 제거: {lock_path}")
+                    self._remove(lock_path)
+                    continue
+                time.sleep(_LOCK_POLL_SECONDS)
+            try:
+                os.makedirs(work_dir, exist_ok=True)
+                yield work_dir
+            finally:
+                self._remove(lock_path)
+
+    def heartbeat(self, video_id: str, fmt: str) -> None:
+        """
+        다운로드 진행 중 lock 파일 갱신 (긴 다운로드가 만료된 것으로 오인되지 않도록)
+        """
+        try:
+            os.utime(f"{self.partial_dir(video_id, fmt)}.lock", None)
+        except FileNotFoundError:
+            pass
+
+    def discard_partial(self, video_id: str, fmt: str) -> bool:
+        """
+        중단된 다운로드의 .part 파일 삭제 (취소된 미리 받기 정리, 다른 곳에서 다운로드 중이면 그대로)
+        """
+        key = f"{video_id}.{fmt}"
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        if not key_lock.acquire(blocking=False):
+            return False
+        try:
+            work_dir = self.partial_dir(video_id, fmt)
+            lock_path = f"{work_dir}.lock"
+            if not os.path.isdir(work_dir) or not self._try_lock(lock_path):
+                return False
+            try:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            finally:
+                self._remove(lock_path)
+            return True
+        finally:
+            key_lock.release()
+
+    def commit(self, video_id: str, fmt: str, downloaded_file: str) -> str:
+        """
+        다운로드가 끝난 파일을 캐시로 옮기고 (atomic rename) pin한 경로 반환
+        """
+        path = self.path_for(video_id, fmt)
+        os.replace(downloaded_file, path)
+        shutil.rmtree(self.partial_dir(video_id, fmt), ignore_errors=True)
+        with self._lock:
+            self._pins[path] = self._pins.get(path, 0) + 1
+        CACHE_EVENTS.inc(cache='audio', result='miss')
+        self.evict()
+        return path
+
+    # ---- 용량 관리 ----
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.startswith('.'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """
+        상한을 넘으면 오래 안 쓴 파일부터 삭제 (pin된 파일 제외) + 오래된 부분 다운로드 정리
+
+        Returns:
+            삭제한 바이트 수
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in entries:
+            if total <= max(self.max_bytes, 0):
+                break
+            with self._lock:
+                if self._pins.get(path):
+                    continue
+                self._remove(path)
+            total -= size
+            freed += size
+            CACHE_EVENTS.inc(cache='audio', result='evict')
+        if freed:
+            log.info(f"오디오 캐시 정리: {freed / 1024 / 1024:.1f}MB 삭제 (현재 {total / 1024 / 1024:.1f}MB)")
+
+        self._cleanup_partials()
+        return freed
+
+    def _cleanup_partials(self) -> None:
+        root = os.path.join(self.directory, _PARTIAL_DIR)
+        now = time.time()
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    if entry.is_dir() and now - entry.stat().st_mtime > AUDIO_CACHE_PARTIAL_TTL:
+                        if os.path.exists(f"{entry.path}.lock"):
+                            continue
+                        shutil.rmtree(entry.path, ignore_errors=True)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict:
+        entries = self._entries()
+        with self._lock:
+            pinned = sum(1 for count in self._pins.values() if count > 0)
+        return {
+            'directory': self.directory,
+            'files': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'pinned': pinned,
+        }
+
+    # ---- 파일 도우미 ----
+
+    @staticmethod
+    def _try_lock(lock_path: str) -> bool:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"{os.getpid()} {time.time()}")
+        return True
+
+    @staticmethod
+    def _is_stale(lock_path: str) -> bool:
+        try:
+            return time.time() - os.path.getmtime(lock_path) > AUDIO_CACHE_LOCK_STALE_SECONDS
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+audio_cache = AudioCache()
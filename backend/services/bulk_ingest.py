@@ -0,0 +1,358 @@
+"""
+재생목록 / 채널 일괄 수집 서비스
+- yt-dlp flat 추출로 영상 목록 확장
+- 모든 작업이 하나의 단계별 파이프라인을 공유 (프로세스당 하나):
+  metadata → transcript → audio → whisper → summarize → persist
+- 자막이 있는 영상은 audio / whisper 단계를 건너뜀 → Whisper가 밀려도 자막 영상은 계속 처리
+- Whisper가 포화되면 audio 큐 → transcript 큐 → 작업 제출 순서로 대기 (backpressure)
+- Whisper / 요약 단계는 대화형 요청과 같은 admission 한도 안에서 실행 (bulk:<사용자> 키, 자리가 없으면 기다렸다가 재시도)
+  → 재생목록이 Whisper / Gemini 용량을 독차지하지 않음
+- 작업(job)별 / 영상별 진행 상황은 메모리에 보관 (BULK_JOB_TTL 이후 정리)
+"""
+from fastapi.concurrency import run_in_threadpool
+from services.admission import admit, AdmissionRejected
+from services.audio_cache import audio_cache
+from services.gemini_service import summarize_transcript
+from services.metrics import TRANSCRIPT_SOURCE, FALLBACKS
+from services.stage_pipeline import PipelineItem, Stage, StagePipeline
+from services.summary_service import persist_youtube_summary
+from services.tracing import get_logger
+from services.youtube_service import (
+    expand_playlist,
+    get_video_info,
+    get_transcript_with_timing,
+    download_audio,
+    transcribe_downloaded_audio,
+    language_hint,
+)
+from typing import Dict, List, Optional
+import asyncio
+import os
+import time
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('bulk')
+
+# 단계별 워커 수 (네트워크 단계는 넉넉하게, Whisper는 CPU/GPU 수만큼)
+_DEFAULT_WORKERS = 'metadata=4,transcript=4,audio=2,whisper=1,summarize=3,persist=2'
+BULK_STAGE_WORKERS = {
+    name.strip(): int(count)
+    for name, count in (
+        pair.split('=') for pair in os.getenv('BULK_STAGE_WORKERS', _DEFAULT_WORKERS).split(',') if '=' in pair
+    )
+}
+# 단계별 입력 큐 크기 = 워커 수 × 이 값 (작을수록 backpressure가 빨리 걸림)
+BULK_QUEUE_FACTOR = int(os.getenv('BULK_QUEUE_FACTOR', '2'))
+# 작업 하나당 최대 영상 수
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '200'))
+# 끝난 작업 상태 보관 시간 (초)
+BULK_JOB_TTL = float(os.getenv('BULK_JOB_TTL', '3600'))
+
+# admission 거절 후 재시도 간격 상한 (초, Retry-After가 더 길어도 이 간격으로 다시 시도)
+_ADMISSION_RETRY_MAX_SECONDS = 5.0
+
+STAGE_NAMES = ('metadata', 'transcript', 'audio', 'whisper', 'summarize', 'persist')
+
+
+class BulkJob:
+    """
+    일괄 수집 작업 하나 (재생목록 → 영상 목록)
+    """
+
+    def __init__(self, source_url: str, user_id: str, custom_instruction: Optional[str], use_whisper: bool):
+        self.id = str(uuid.uuid4())
+        self.source_url = source_url
+        self.user_id = user_id
+        self.custom_instruction = custom_instruction
+        self.use_whisper = use_whisper
+        self.playlist: Dict = {}
+        self.items: List[PipelineItem] = []
+        self.state = 'expanding'   # expanding / running / done / failed / cancelled
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._remaining = 0
+        self._feeder: Optional[asyncio.Task] = None
+
+    def _item_finished(self, item: PipelineItem) -> None:
+        self._remaining -= 1
+        if self._remaining <= 0 and self.state == 'running':
+            self.state = 'done'
+            self.finished_at = time.time()
+            counts = self.counts()
+            log.success(f"일괄 수집 완료: {self.id} (성공 {counts['done']}, 실패 {counts['failed']})")
+
+    def counts(self) -> Dict[str, int]:
+        counts = {'total': len(self.items), 'done': 0, 'failed': 0, 'queued': 0, 'in_progress': 0}
+        for item in self.items:
+            if item.state in ('done', 'failed'):
+                counts[item.state] += 1
+            elif item.state == 'queued':
+                counts['queued'] += 1
+            else:
+                counts['in_progress'] += 1
+        return counts
+
+    def to_dict(self, include_items: bool = True) -> Dict:
+        result = {
+            'job_id': self.id,
+            'source_url': self.source_url,
+            'state': self.state,
+            'error': self.error,
+            'playlist': {key: value for key, value in self.playlist.items() if key != 'entries'},
+            'progress': self.counts(),
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+        if include_items:
+            result['items'] = [
+                {
+                    **item.to_dict(),
+                    'video_id': item.data.get('video_id'),
+                    'title': item.data.get('title'),
+                    'source': item.data.get('source'),
+                    'summary_id': item.data.get('summary_id'),
+                }
+                for item in self.items
+            ]
+        return result
+
+
+class JobCancelled(Exception):
+    """
+    취소된 작업의 영상 (다음 단계로 넘기지 않음)
+    """
+
+    def __init__(self):
+        super().__init__("작업이 취소되었습니다")
+
+
+async def _run_admitted(pipeline: str, job: 'BulkJob', func, *args, **kwargs):
+    """
+    admission 한도 안에서 func 실행 (threadpool)
+
+    거절(대기열 가득 참 / 대기 시간 초과)되면 Retry-After만큼 쉬고 다시 시도 → 실패 대신 단계 큐에서 backpressure
+    """
+    while True:
+        if job.state == 'cancelled':
+            raise JobCancelled()
+        try:
+            async with admit(pipeline, f"bulk:{job.user_id}"):
+                return await run_in_threadpool(func, *args, **kwargs)
+        except AdmissionRejected as e:
+            delay = min(e.detail['retry_after'], _ADMISSION_RETRY_MAX_SECONDS)
+            log.debug(f"일괄 수집 {pipeline} 대기: {delay}초 후 재시도", job=job.id)
+            await asyncio.sleep(delay)
+
+
+# ---- 단계 핸들러 (다음 단계 이름 반환, None이면 끝) ----
+
+async def _stage_metadata(item: PipelineItem) -> Optional[str]:
+    if item.data['job'].state == 'cancelled':
+        raise JobCancelled()
+    info = await run_in_threadpool(get_video_info, item.data['video_url'])
+    item.data.update(info)
+    return 'transcript'
+
+
+async def _stage_transcript(item: PipelineItem) -> Optional[str]:
+    subtitle = await run_in_threadpool(get_transcript_with_timing, item.data['video_id'])
+    if subtitle:
+        TRANSCRIPT_SOURCE.inc(source='subtitle')
+        item.data.update(transcript=subtitle[0], timed_transcript=subtitle[1], source='subtitle')
+        return 'summarize'
+
+    if not item.data['job'].use_whisper:
+        raise Exception("자막이 없습니다 (Whisper 사용 안 함)")
+    FALLBACKS.inc(pipeline='bulk', from_stage='subtitle', to_stage='whisper')
+    return 'audio'
+
+
+async def _stage_audio(item: PipelineItem) -> Optional[str]:
+    audio_file = await run_in_threadpool(download_audio, item.data['video_url'])
+    if not audio_file or not os.path.exists(audio_file):
+        raise Exception("오디오 다운로드 실패")
+    item.data['audio_file'] = audio_file
+    return 'whisper'
+
+
+async def _stage_whisper(item: PipelineItem) -> Optional[str]:
+    audio_file = item.data.pop('audio_file')
+    try:
+        result = await _run_admitted(
+            'whisper',
+            item.data['job'],
+            transcribe_downloaded_audio,
+            audio_file,
+            'bulk',
+            language_hint(item.data),
+            item.data.get('duration')
+        )
+    except JobCancelled:
+        # 변환 전에 취소됨: 캐시 pin 해제 / 임시 파일 삭제
+        if audio_cache.owns(audio_file):
+            audio_cache.release(audio_file)
+        elif os.path.exists(audio_file):
+            os.remove(audio_file)
+        raise
+    if not result:
+        raise Exception("Whisper 변환 실패")
+    TRANSCRIPT_SOURCE.inc(source='whisper')
+    item.data.update(transcript=result[0], timed_transcript=result[1], source='whisper')
+    return 'summarize'
+
+
+async def _stage_summarize(item: PipelineItem) -> Optional[str]:
+    job: BulkJob = item.data['job']
+    item.data['summary_result'] = await _run_admitted(
+        'subtitle',
+        job,
+        summarize_transcript,
+        transcript=item.data['transcript'],
+        video_title=item.data['title'],
+        custom_instruction=job.custom_instruction
+    )
+    return 'persist'
+
+
+async def _stage_persist(item: PipelineItem) -> Optional[str]:
+    job: BulkJob = item.data['job']
+    result = item.data.pop('summary_result')
+    saved = await persist_youtube_summary(job.user_id, item.data['video_url'], item.data, result)
+    if saved:
+        item.data['summary_id'] = saved['id']
+    # 저장이 끝나면 자막 본문은 메모리에서 해제
+    item.data.pop('transcript', None)
+    item.data.pop('timed_transcript', None)
+    return None
+
+
+_HANDLERS = {
+    'metadata': _stage_metadata,
+    'transcript': _stage_transcript,
+    'audio': _stage_audio,
+    'whisper': _stage_whisper,
+    'summarize': _stage_summarize,
+    'persist': _stage_persist,
+}
+
+_pipeline: Optional[StagePipeline] = None
+_jobs: Dict[str, BulkJob] = {}
+
+
+def get_pipeline() -> StagePipeline:
+    """
+    일괄 수집 파이프라인 (첫 사용 시 워커 시작)
+    """
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = StagePipeline('bulk', [
+            Stage(
+                name,
+                _HANDLERS[name],
+                workers=BULK_STAGE_WORKERS.get(name, 1),
+                queue_size=BULK_STAGE_WORKERS.get(name, 1) * BULK_QUEUE_FACTOR,
+            )
+            for name in STAGE_NAMES
+        ])
+    if not _pipeline.running:
+        _pipeline.start()
+    return _pipeline
+
+
+def _cleanup_jobs() -> None:
+    now = time.time()
+    for job_id in [
+        job_id for job_id, job in _jobs.items()
+        if job.finished_at and now - job.finished_at > BULK_JOB_TTL
+    ]:
+        del _jobs[job_id]
+
+
+async def _run_job(job: BulkJob, limit: int) -> None:
+    pipeline = get_pipeline()
+    try:
+        job.playlist = await run_in_threadpool(expand_playlist, job.source_url, limit)
+    except Exception as e:
+        job.state, job.error, job.finished_at = 'failed', str(e), time.time()
+        log.error(f"재생목록 확장 실패: {job.source_url} ({e})")
+        return
+
+    entries = job.playlist.get('entries') or []
+    job.items = [
+        PipelineItem(
+            entry['video_id'],
+            {**entry, 'job': job},
+            on_finish=job._item_finished,
+        )
+        for entry in entries
+    ]
+    job._remaining = len(job.items)
+    job.state = 'running' if job.items else 'done'
+    if not job.items:
+        job.finished_at = time.time()
+    log.info(f"일괄 수집 시작: {job.id} ({len(job.items)}개 영상)", playlist=job.playlist.get('playlist_id'))
+
+    # 첫 단계 큐가 가득 차면 여기서 대기 (뒤 단계가 밀리면 제출도 느려짐)
+    for item in job.items:
+        await pipeline.submit(item)
+
+
+async def start_bulk_job(
+    source_url: str,
+    user_id: str,
+    custom_instruction: Optional[str] = None,
+    use_whisper: bool = True,
+    limit: Optional[int] = None
+) -> BulkJob:
+    """
+    일괄 수집 작업 시작 (재생목록 확장 + 제출은 백그라운드, 바로 반환)
+    """
+    _cleanup_jobs()
+    job = BulkJob(source_url, user_id, custom_instruction, use_whisper)
+    _jobs[job.id] = job
+    job._feeder = asyncio.create_task(_run_job(job, min(limit or BULK_MAX_ITEMS, BULK_MAX_ITEMS)))
+    return job
+
+
+def get_bulk_job(job_id: str) -> Optional[BulkJob]:
+    return _jobs.get(job_id)
+
+
+async def cancel_bulk_job(job_id: str) -> Optional[BulkJob]:
+    """
+    아직 제출되지 않은 영상은 취소 (이미 단계에 들어간 영상은 끝까지 처리)
+    """
+    job = _jobs.get(job_id)
+    if not job:
+        return None
+    if job._feeder and not job._feeder.done():
+        job._feeder.cancel()
+    if job.state in ('expanding', 'running'):
+        job.state = 'cancelled'
+        job.finished_at = time.time()
+        for item in job.items:
+            if item.state == 'queued':
+                item.state = 'failed'
+                item.error = 'cancelled'
+    return job
+
+
+def pipeline_stats() -> Dict[str, Dict]:
+    """
+    단계별 워커 / 큐 상태 (whisper saturated = backpressure 발생 중)
+    """
+    return _pipeline.stats() if _pipeline else {}
+
+
+async def shutdown_bulk_ingest() -> None:
+    global _pipeline
+    for job in _jobs.values():
+        if job._feeder and not job._feeder.done():
+            job._feeder.cancel()
+    if _pipeline:
+        await _pipeline.stop()
+        _pipeline = None
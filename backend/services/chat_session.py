@@ -0,0 +1,408 @@
+"""
+채팅 세션 서비스 - 같은 콘텐츠(노트 / YouTube 요약)에 대한 반복 질문 비용 줄이기
+- 콘텐츠 ID별 세션: 준비된 컨텍스트를 한 번만 만들어 재사용
+  · 긴 자료는 구간별 압축 노트(digest_service, 다시 요약과 공유)로 줄이고, 짧으면 원문 그대로
+  · 충분히 크면 Gemini context cache에 올려 두고 질문마다 이전 대화 + 질문만 전송
+    (SDK/모델이 지원하지 않으면 로컬 컨텍스트로 대체)
+- 질문 → 답변 LRU: 같은 질문이나 거의 같은 질문(토큰 cosine 유사도)은 Gemini 호출 없이 바로 응답
+  · 대화 이력에 의존하는 후속 질문은 답변이 이력마다 달라서 캐시를 쓰지 않음
+- 후속 질문: 대화(conversation_id)별 최근 대화 몇 턴을 함께 전송
+- 세션 / 답변 모두 개수 상한(LRU) + TTL, 콘텐츠가 바뀌면(version) 세션을 새로 만듦
+"""
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+from fastapi.concurrency import run_in_threadpool
+from services.digest_service import load_digests
+from services.gemini_service import (
+    chat_with_context,
+    create_chat_cache,
+    delete_chat_cache,
+    merge_usage,
+)
+from services.metrics import CACHE_EVENTS, QUEUE_DEPTH, track_stage
+from services.prompt_budget import estimate_tokens, fit_text
+from services.search_service import tokenize
+from services.singleflight import SingleFlight
+from services.tracing import get_logger, current_span
+from typing import AsyncContextManager, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import math
+import os
+import re
+import time
+import unicodedata
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('chat_session')
+
+# 세션 수 상한 / 마지막 사용 후 유지 시간 (초)
+CHAT_SESSION_MAX = int(os.getenv('CHAT_SESSION_MAX', '256'))
+CHAT_SESSION_TTL = float(os.getenv('CHAT_SESSION_TTL', '1800'))
+# 세션별 질문 → 답변 캐시 크기 / 유지 시간 (초)
+CHAT_ANSWER_CACHE_SIZE = int(os.getenv('CHAT_ANSWER_CACHE_SIZE', '64'))
+CHAT_ANSWER_TTL = float(os.getenv('CHAT_ANSWER_TTL', '3600'))
+# 이 값 이상이면 같은 질문으로 보고 캐시된 답변 사용 (토큰 cosine 유사도, 1이면 정확히 같은 질문만)
+CHAT_SIMILARITY_THRESHOLD = float(os.getenv('CHAT_SIMILARITY_THRESHOLD', '0.85'))
+# 후속 질문에 함께 보내는 이전 대화 턴 수 / 턴별 답변 토큰 상한
+CHAT_HISTORY_TURNS = int(os.getenv('CHAT_HISTORY_TURNS', '4'))
+CHAT_HISTORY_ANSWER_TOKENS = int(os.getenv('CHAT_HISTORY_ANSWER_TOKENS', '300'))
+# 이보다 긴 자료는 구간별 압축 노트로 컨텍스트 구성
+CHAT_DIGEST_MIN_TOKENS = int(os.getenv('CHAT_DIGEST_MIN_TOKENS', '8000'))
+# Gemini context caching (모델별 최소 토큰 수 이상일 때만 사용)
+CHAT_PROVIDER_CACHE = os.getenv('CHAT_PROVIDER_CACHE', 'true').lower() in ('1', 'true', 'yes')
+CHAT_PROVIDER_CACHE_MIN_TOKENS = int(os.getenv('CHAT_PROVIDER_CACHE_MIN_TOKENS', '4096'))
+
+# 세션별 대화 수 상한 (오래된 대화부터 삭제)
+_MAX_CONVERSATIONS = 64
+
+# 숫자가 다른 질문("3장 요약" / "4장 요약")은 유사도가 높아도 다른 질문
+_NUMBER_PATTERN = re.compile(r'\d+')
+
+chat_flights = SingleFlight('chat')
+
+
+def normalize_question(question: str) -> str:
+    """
+    캐시 키용 질문 정규화 (NFKC, 소문자, 공백 / 끝 문장부호 정리)
+    """
+    text = unicodedata.normalize('NFKC', question).lower()
+    return ' '.join(text.split()).rstrip(' ?!.~')
+
+
+class _Answer:
+    __slots__ = ('question', 'vector', 'norm', 'numbers', 'answer', 'token_usage', 'created_at')
+
+    def __init__(self, question: str, answer: str, token_usage: Dict):
+        self.question = question
+        self.vector = Counter(tokenize(question))
+        self.norm = math.sqrt(sum(count * count for count in self.vector.values()))
+        self.numbers = frozenset(_NUMBER_PATTERN.findall(question))
+        self.answer = answer
+        self.token_usage = token_usage
+        self.created_at = time.monotonic()
+
+    def similarity(self, vector: Counter, norm: float) -> float:
+        if not norm or not self.norm:
+            return 0.0
+        dot = sum(count * self.vector.get(token, 0) for token, count in vector.items())
+        return dot / (norm * self.norm)
+
+
+class AnswerCache:
+    """
+    질문 → 답변 LRU (정확히 같은 질문은 dict 조회, 아니면 저장된 질문들과 유사도 비교)
+    """
+
+    def __init__(self, max_size: int = CHAT_ANSWER_CACHE_SIZE, ttl: float = CHAT_ANSWER_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, _Answer]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, entry: _Answer) -> bool:
+        return time.monotonic() - entry.created_at > self.ttl
+
+    def get(self, question: str) -> Optional[Tuple[_Answer, float]]:
+        """
+        Returns:
+            (캐시된 답변, 유사도) 또는 None
+        """
+        key = normalize_question(question)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self._expired(entry):
+                del self._entries[key]
+            else:
+                self._entries.move_to_end(key)
+                return entry, 1.0
+
+        if CHAT_SIMILARITY_THRESHOLD >= 1.0:
+            return None
+
+        vector = Counter(tokenize(key))
+        norm = math.sqrt(sum(count * count for count in vector.values()))
+        numbers = frozenset(_NUMBER_PATTERN.findall(key))
+        best: Optional[Tuple[str, _Answer, float]] = None
+        for cached_key, cached in list(self._entries.items()):
+            if self._expired(cached):
+                del self._entries[cached_key]
+                continue
+            if cached.numbers != numbers:
+                continue
+            score = cached.similarity(vector, norm)
+            if score >= CHAT_SIMILARITY_THRESHOLD and (best is None or score > best[2]):
+                best = (cached_key, cached, score)
+        if best is None:
+            return None
+        self._entries.move_to_end(best[0])
+        return best[1], best[2]
+
+    def put(self, question: str, answer: str, token_usage: Dict) -> None:
+        key = normalize_question(question)
+        self._entries[key] = _Answer(key, answer, token_usage)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            CACHE_EVENTS.inc(cache='chat_answer', result='evict')
+
+
+class ChatSession:
+    """
+    콘텐츠 하나에 대한 준비된 컨텍스트 + 답변 캐시 + 대화별 최근 턴
+    """
+
+    def __init__(self, key: str, version: str):
+        self.key = key
+        self.version = version
+        self.context: Optional[str] = None
+        self.digested = False
+        self.cached_content = None
+        self.cached_until = 0.0
+        self.prepare_usage: Optional[Dict] = None
+        self.answers = AnswerCache()
+        self.conversations: 'OrderedDict[str, Deque[Tuple[str, str]]]' = OrderedDict()
+        self.last_used = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def prepared(self) -> bool:
+        return self.context is not None
+
+    def provider_cache(self):
+        """
+        아직 유효한 context cache (만료됐으면 None → 로컬 컨텍스트 사용)
+        """
+        if self.cached_content is not None and time.monotonic() < self.cached_until:
+            return self.cached_content
+        return None
+
+    def history(self, conversation_id: str) -> List[Tuple[str, str]]:
+        turns = self.conversations.get(conversation_id)
+        if turns is None:
+            return []
+        self.conversations.move_to_end(conversation_id)
+        return list(turns)
+
+    def remember(self, conversation_id: str, question: str, answer: str) -> None:
+        turns = self.conversations.get(conversation_id)
+        if turns is None:
+            turns = self.conversations[conversation_id] = deque(maxlen=max(1, CHAT_HISTORY_TURNS))
+        turns.append((question, answer))
+        self.conversations.move_to_end(conversation_id)
+        while len(self.conversations) > _MAX_CONVERSATIONS:
+            self.conversations.popitem(last=False)
+
+    def release(self) -> None:
+        """
+        세션 삭제 시 context cache 정리 (백그라운드, 실패해도 Gemini 쪽 TTL로 만료)
+        """
+        cached, self.cached_content = self.cached_content, None
+        if cached is None:
+            return
+        try:
+            asyncio.get_running_loop().run_in_executor(None, delete_chat_cache, cached)
+        except RuntimeError:
+            delete_chat_cache(cached)
+
+
+class ChatSessionStore:
+    """
+    콘텐츠 키 → ChatSession (LRU + TTL, 이벤트 루프 안에서만 사용)
+    """
+
+    def __init__(self, max_sessions: int = CHAT_SESSION_MAX, ttl: float = CHAT_SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: 'OrderedDict[str, ChatSession]' = OrderedDict()
+
+        QUEUE_DEPTH.set_function(lambda: len(self._sessions), queue='chat_sessions')
+
+    def get(self, key: str, version: str) -> ChatSession:
+        """
+        세션 조회 (없거나 만료됐거나 콘텐츠가 바뀌었으면 새로 생성)
+        """
+        now = time.monotonic()
+        session = self._sessions.get(key)
+        if session is not None and (session.version != version or now - session.last_used > self.ttl):
+            del self._sessions[key]
+            session.release()
+            session = None
+
+        if session is None:
+            session = self._sessions[key] = ChatSession(key, version)
+            self._evict(now)
+        self._sessions.move_to_end(key)
+        session.last_used = now
+        return session
+
+    def invalidate(self, key: str) -> None:
+        session = self._sessions.pop(key, None)
+        if session is not None:
+            session.release()
+
+    def _evict(self, now: float) -> None:
+        for key, session in list(self._sessions.items()):
+            if len(self._sessions) <= self.max_sessions and now - session.last_used <= self.ttl:
+                break
+            del self._sessions[key]
+            session.release()
+            CACHE_EVENTS.inc(cache='chat_session', result='evict')
+
+    def stats(self) -> Dict:
+        return {
+            'sessions': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'provider_cached': sum(1 for session in self._sessions.values() if session.provider_cache() is not None),
+            'answers': sum(len(session.answers) for session in self._sessions.values()),
+        }
+
+
+store = ChatSessionStore()
+
+
+async def _prepare(session: ChatSession, load_content: Callable[[], Awaitable[str]], repositories=None) -> None:
+    """
+    세션 컨텍스트 준비 (세션당 한 번, 동시에 들어온 첫 질문들은 lock에서 대기)
+    """
+    async with session._lock:
+        if session.prepared:
+            CACHE_EVENTS.inc(cache='chat_context', result='hit')
+            return
+        CACHE_EVENTS.inc(cache='chat_context', result='miss')
+
+        content = await load_content()
+        usage = None
+        if estimate_tokens(content) > CHAT_DIGEST_MIN_TOKENS:
+            with track_stage('chat', 'digest'):
+                digests, usage = await load_digests(content, repositories)
+            context = '\n\n'.join(f"[구간 {i + 1}]\n{digest}" for i, digest in enumerate(digests))
+            session.digested = True
+        else:
+            context = content
+
+        if CHAT_PROVIDER_CACHE and estimate_tokens(context) >= CHAT_PROVIDER_CACHE_MIN_TOKENS:
+            try:
+                with track_stage('chat', 'provider_cache'):
+                    session.cached_content = await run_in_threadpool(
+                        create_chat_cache, context, CHAT_SESSION_TTL, f"chat:{session.key}"
+                    )
+                # 만료 직전 호출이 실패하지 않도록 여유를 두고 로컬 컨텍스트로 전환
+                session.cached_until = time.monotonic() + CHAT_SESSION_TTL * 0.9
+                CACHE_EVENTS.inc(cache='chat_provider', result='created')
+            except Exception as e:
+                log.info(f"context cache 사용 불가 (로컬 컨텍스트 사용): {str(e)}")
+                CACHE_EVENTS.inc(cache='chat_provider', result='unsupported')
+
+        session.context = context
+        session.prepare_usage = usage
+        log.info(
+            f"채팅 세션 준비: {session.key} ({estimate_tokens(context)} 토큰, "
+            f"digest={session.digested}, provider_cache={session.cached_content is not None})"
+        )
+
+
+@asynccontextmanager
+async def _no_gate() -> AsyncIterator[None]:
+    yield
+
+
+def _format_history(turns: List[Tuple[str, str]]) -> str:
+    if not turns:
+        return ''
+    lines = ['이전 대화:']
+    for question, answer in turns:
+        lines.append(f"Q: {question}")
+        lines.append(f"A: {fit_text(answer, CHAT_HISTORY_ANSWER_TOKENS)}")
+    return '\n'.join(lines)
+
+
+async def ask(
+    key: str,
+    version: str,
+    question: str,
+    load_content: Callable[[], Awaitable[str]],
+    conversation_id: Optional[str] = None,
+    repositories=None,
+    gate: Optional[Callable[[], AsyncContextManager]] = None
+) -> Dict:
+    """
+    세션을 통해 질문 응답
+
+    Args:
+        key: 콘텐츠 키 (예: 'note:<id>')
+        version: 콘텐츠 버전 (바뀌면 세션을 새로 준비)
+        load_content: 세션을 처음 준비할 때만 호출 (자료 원문 반환)
+        conversation_id: 후속 질문이면 이전 응답의 conversation_id
+        gate: Gemini를 호출할 때만 거치는 admission (캐시된 답변은 바로 응답)
+
+    Returns:
+        {'answer', 'conversation_id', 'cached', 'similarity', 'token_usage'}
+    """
+    session = store.get(key, version)
+    conversation_id = conversation_id or uuid.uuid4().hex
+    turns = session.history(conversation_id)
+    span = current_span()
+
+    # 이력 없는 질문만 답변 캐시 사용 (후속 질문의 답은 대화마다 다름)
+    if not turns:
+        found = session.answers.get(question)
+        if found is not None:
+            entry, score = found
+            CACHE_EVENTS.inc(cache='chat_answer', result='hit' if score >= 1.0 else 'near_hit')
+            if span:
+                span.set_attribute('chat.cache', 'hit')
+                span.set_attribute('chat.similarity', round(score, 3))
+            session.remember(conversation_id, question, entry.answer)
+            return {
+                'answer': entry.answer,
+                'conversation_id': conversation_id,
+                'cached': True,
+                'similarity': round(score, 3),
+                'token_usage': merge_usage(),
+            }
+        CACHE_EVENTS.inc(cache='chat_answer', result='miss')
+
+    async with (gate() if gate else _no_gate()):
+        first_use = not session.prepared
+        await _prepare(session, load_content, repositories)
+
+        cached_content = session.provider_cache()
+        history = _format_history(turns)
+        with track_stage('chat', 'generate'):
+            if turns:
+                answer, usage = await run_in_threadpool(
+                    chat_with_context, session.context, question, history, cached_content
+                )
+            else:
+                # 같은 질문이 동시에 들어오면 Gemini 호출 하나로 병합 (결과는 JSON → 목록)
+                answer, usage = await chat_flights.run(
+                    f"{key}:{version}:{normalize_question(question)}",
+                    chat_with_context, session.context, question, '', cached_content
+                )
+
+    session.remember(conversation_id, question, answer)
+    if not turns:
+        session.answers.put(question, answer, usage)
+
+    token_usage = merge_usage(usage, session.prepare_usage) if first_use and session.prepare_usage else merge_usage(usage)
+    token_usage['calls'] = 1 + (session.prepare_usage['calls'] if first_use and session.prepare_usage else 0)
+    token_usage['context'] = {
+        'digested': session.digested,
+        'provider_cache': cached_content is not None,
+        'history_turns': len(turns),
+    }
+    if span:
+        span.set_attribute('chat.cache', 'miss')
+        span.set_attribute('chat.provider_cache', cached_content is not None)
+    return {
+        'answer': answer,
+        'conversation_id': conversation_id,
+        'cached': False,
+        'similarity': None,
+        'token_usage': token_usage,
+    }
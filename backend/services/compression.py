@@ -0,0 +1,189 @@
+"""
+응답 압축 미들웨어 (br / gzip)
+- Accept-Encoding의 q 값을 보고 br(brotli 설치 시) → gzip 순으로 선택
+- COMPRESS_MIN_BYTES보다 작은 응답, 이미 인코딩된 응답, 압축 효과가 없는 타입(이미지/오디오 등)은 그대로
+- 큰 본문(COMPRESS_THREAD_MIN_BYTES 이상)은 스레드풀에서 압축 (이벤트 루프 블로킹 방지)
+- 압축한 응답의 ETag는 weak(W/)로 바꿈 (If-None-Match 비교는 weak 비교라 304는 그대로 동작)
+"""
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from typing import Dict, Optional
+import os
+import zlib
+from dotenv import load_dotenv
+
+try:
+    import brotli
+except ImportError:  # 선택 의존성
+    brotli = None
+
+load_dotenv()
+
+COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '5'))
+# brotli 품질 (0-11, 높을수록 느림 - 동적 응답은 4~5가 gzip보다 작고 빠름)
+COMPRESS_BR_QUALITY = int(os.getenv('COMPRESS_BR_QUALITY', '4'))
+COMPRESS_THREAD_MIN_BYTES = int(os.getenv('COMPRESS_THREAD_MIN_BYTES', '262144'))
+
+_COMPRESSIBLE = ('application/json', 'text/', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """
+    'br;q=1.0, gzip;q=0.8, *;q=0' → {'br': 1.0, 'gzip': 0.8, '*': 0.0}
+    """
+    accepted: Dict[str, float] = {}
+    for part in value.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get('*', 0.0)
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Compressor:
+    """
+    스트리밍 압축기 (br / gzip 같은 인터페이스)
+    """
+
+    def __init__(self, encoding: str):
+        if encoding == 'br':
+            compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=COMPRESS_BR_QUALITY)
+            self._process, self._finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip 헤더
+            self._process, self._finish = compressor.compress, compressor.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._process(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    compressor = _Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    app.add_middleware(CompressionMiddleware)
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not COMPRESS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _Responder:
+    def __init__(self, app, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message = None
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _compressible(self, headers: Headers) -> bool:
+        content_type = headers.get('content-type', '')
+        return (
+            'content-encoding' not in headers
+            and self.start_message['status'] not in (204, 206, 304)
+            and any(content_type.startswith(prefix) for prefix in _COMPRESSIBLE)
+        )
+
+    def _set_headers(self, length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=self.start_message['headers'])
+        headers['Content-Encoding'] = self.encoding
+        if length is None:
+            del headers['Content-Length']
+        else:
+            headers['Content-Length'] = str(length)
+        headers.add_vary_header('Accept-Encoding')
+        etag = headers.get('etag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = f"W/{etag}"
+
+    async def send_compressed(self, message):
+        if message['type'] == 'http.response.start':
+            # 본문 첫 조각을 보고 압축 여부를 정할 때까지 보류
+            self.start_message = message
+            self.passthrough = not self._compressible(Headers(raw=message['headers']))
+            return
+        if message['type'] != 'http.response.body':
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.compressor is None and self.start_message is not None:
+            if not more_body:
+                # 한 번에 오는 본문 (JSONResponse 등)
+                if len(body) < self.minimum_size:
+                    await self.send(self.start_message)
+                    await self.send(message)
+                    return
+                if len(body) >= COMPRESS_THREAD_MIN_BYTES:
+                    body = await run_in_threadpool(compress, body, self.encoding)
+                else:
+                    body = compress(body, self.encoding)
+                self._set_headers(len(body))
+                await self.send(self.start_message)
+                await self.send({'type': 'http.response.body', 'body': body, 'more_body': False})
+                return
+            # 스트리밍 본문: 길이를 모르므로 Content-Length 제거 후 조각별 압축
+            self.compressor = _Compressor(self.encoding)
+            self._set_headers(None)
+            await self.send(self.start_message)
+            self.start_message = None
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        if chunk or not more_body:
+            await self.send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
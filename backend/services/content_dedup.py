@@ -0,0 +1,232 @@
+"""
+거의 같은 본문(near-duplicate) 요약 공유 (웹 / PDF)
+- 본문 → 단어 shingle → MinHash 서명 (one permutation hashing: shingle당 해시 1번, 빈 칸은 이웃 칸으로 채움)
+- LSH: 서명을 DEDUP_BANDS개 밴드로 나눠 밴드 키 저장 → 밴드가 하나라도 같은 행만 후보로 조회 후 유사도 확인
+  (기본 16 밴드 x 8행: 자카드 0.7 부근부터 후보가 되고 DEDUP_THRESHOLD 이상만 재사용)
+- 정규화한 본문이 완전히 같으면 id(sha256)로 바로 찾음
+- 사용자 간 공유: 지시사항(custom_instruction)이 없는 기본 요약만 저장 / 재사용
+- 웹은 정규화한 URL로도 찾음 (DEDUP_URL_TTL 안이면 페이지를 다시 받지 않음)
+"""
+from array import array
+from services.metrics import CACHE_EVENTS
+from services.tracing import get_logger, current_span
+from services.transcript_store import content_hash
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta, timezone
+import base64
+import hashlib
+import os
+import re
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('content_dedup')
+
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# 추정 자카드 유사도가 이 값 이상이면 기존 요약 재사용
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.85'))
+DEDUP_NUM_PERM = int(os.getenv('DEDUP_NUM_PERM', '128'))
+DEDUP_BANDS = int(os.getenv('DEDUP_BANDS', '16'))
+DEDUP_SHINGLE_WORDS = int(os.getenv('DEDUP_SHINGLE_WORDS', '5'))
+# 이보다 짧은 본문은 지문을 만들지 않음 (짧은 글은 shingle이 적어 오탐이 많음)
+DEDUP_MIN_WORDS = int(os.getenv('DEDUP_MIN_WORDS', '50'))
+# 같은 URL 요약을 다시 받지 않고 재사용하는 시간 (초, 0이면 URL로는 찾지 않음)
+DEDUP_URL_TTL = int(os.getenv('DEDUP_URL_TTL', '86400'))
+
+# 서명 / 밴드 형식이 바뀌면 올림 (이전 행은 후보에서 빠짐)
+_VERSION = 1
+_WORD_PATTERN = re.compile(r'\w+')
+_MASK = (1 << 64) - 1
+# 빈 칸을 이웃 칸 값으로 채울 때 거리별로 더하는 값 (서로 다른 칸이 우연히 같아지지 않도록)
+_DENSIFY_STEP = 0x9E3779B97F4A7C15
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def normalize_words(text: str) -> List[str]:
+    """
+    소문자 + 단어만 (문장 부호 / 공백 / 줄바꿈 차이 무시)
+    """
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def minhash(words: Sequence[str], num_perm: int = DEDUP_NUM_PERM, shingle: int = DEDUP_SHINGLE_WORDS) -> Tuple[int, ...]:
+    """
+    MinHash 서명 (one permutation hashing + 회전 densification)
+    """
+    if len(words) <= shingle:
+        shingles = {' '.join(words)}
+    else:
+        shingles = {' '.join(words[i:i + shingle]) for i in range(len(words) - shingle + 1)}
+
+    empty = _MASK
+    bins = [empty] * num_perm
+    for value in shingles:
+        h = _hash64(value)
+        index, rest = h % num_perm, h // num_perm
+        if rest < bins[index]:
+            bins[index] = rest
+
+    # 빈 칸: 오른쪽으로 가장 가까운 칸 값 + 거리 (원형)
+    filled = [i for i, value in enumerate(bins) if value != empty]
+    if filled and len(filled) < num_perm:
+        signature = list(bins)
+        for i in range(num_perm):
+            if bins[i] != empty:
+                continue
+            distance = 1
+            while bins[(i + distance) % num_perm] == empty:
+                distance += 1
+            signature[i] = (bins[(i + distance) % num_perm] + distance * _DENSIFY_STEP) & _MASK
+        bins = signature
+    return tuple(bins)
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """
+    추정 자카드 유사도 (같은 칸 비율)
+    """
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def band_keys(kind: str, signature: Sequence[int], bands: int = DEDUP_BANDS) -> List[str]:
+    rows = len(signature) // bands
+    keys = []
+    for band in range(bands):
+        chunk = array('Q', signature[band * rows:(band + 1) * rows]).tobytes()
+        keys.append(f"{kind}:{_VERSION}:{band}:{hashlib.blake2b(chunk, digest_size=8).hexdigest()}")
+    return keys
+
+
+def encode_signature(signature: Sequence[int]) -> str:
+    return base64.b64encode(array('Q', signature).tobytes()).decode('ascii')
+
+
+def decode_signature(value: str) -> Tuple[int, ...]:
+    signature = array('Q')
+    signature.frombytes(base64.b64decode(value))
+    return tuple(signature)
+
+
+class Fingerprint:
+    __slots__ = ('kind', 'id', 'signature', 'bands', 'words')
+
+    def __init__(self, kind: str, text: str):
+        words = normalize_words(text)
+        self.kind = kind
+        self.words = len(words)
+        self.id = content_hash(f"{kind}:{_VERSION}:{' '.join(words)}")
+        self.signature = minhash(words)
+        self.bands = band_keys(kind, self.signature)
+
+
+def fingerprint(kind: str, text: str) -> Optional[Fingerprint]:
+    """
+    본문 지문 (너무 짧으면 None) - CPU 작업이므로 run_in_threadpool로 호출
+    """
+    if not DEDUP_ENABLED:
+        return None
+    result = Fingerprint(kind, text)
+    return result if result.words >= DEDUP_MIN_WORDS else None
+
+
+async def find_duplicate(repositories, fp: Fingerprint) -> Optional[Tuple[Dict, float]]:
+    """
+    같은 본문 → 거의 같은 본문 순으로 찾기 (행, 유사도)
+    """
+    row = await repositories.fingerprints.get(fp.id)
+    if row:
+        CACHE_EVENTS.inc(cache='content_dedup', result='exact')
+        return row, 1.0
+
+    best, best_similarity = None, 0.0
+    for candidate in await repositories.fingerprints.find_by_bands(fp.kind, fp.bands):
+        score = similarity(fp.signature, decode_signature(candidate['signature']))
+        if score > best_similarity:
+            best, best_similarity = candidate, score
+    if best is not None and best_similarity >= DEDUP_THRESHOLD:
+        CACHE_EVENTS.inc(cache='content_dedup', result='near')
+        return best, best_similarity
+    CACHE_EVENTS.inc(cache='content_dedup', result='miss')
+    return None
+
+
+async def find_by_url(repositories, source_url: str) -> Optional[Dict]:
+    """
+    최근(DEDUP_URL_TTL 안)에 같은 정규화 URL로 만든 요약
+    """
+    if not DEDUP_ENABLED or DEDUP_URL_TTL <= 0 or not repositories:
+        return None
+    try:
+        row = await repositories.fingerprints.find_by_url(source_url)
+    except Exception as e:
+        log.warning(f"URL 지문 조회 실패: {str(e)}")
+        return None
+    if not row:
+        return None
+    created_at = datetime.fromisoformat(str(row['created_at']).replace('Z', '+00:00'))
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) - created_at > timedelta(seconds=DEDUP_URL_TTL):
+        return None
+    CACHE_EVENTS.inc(cache='content_dedup', result='url')
+    return row
+
+
+async def summarize_shared(
+    repositories,
+    fp: Optional[Fingerprint],
+    summarize: Callable[[], Awaitable[Dict]],
+    title: str,
+    meta: Dict,
+    source_url: Optional[str] = None,
+) -> Tuple[Dict, Optional[Dict]]:
+    """
+    거의 같은 본문의 요약이 있으면 재사용, 없으면 summarize() 후 저장
+
+    Returns:
+        (요약 결과, 재사용했으면 {'id': 지문 id, 'similarity': 유사도} 아니면 None)
+    """
+    if fp is None or not repositories:
+        return await summarize(), None
+
+    try:
+        found = await find_duplicate(repositories, fp)
+    except Exception as e:
+        log.warning(f"중복 본문 조회 실패: {str(e)}")
+        found = None
+
+    if found:
+        row, score = found
+        log.info(f"거의 같은 본문의 요약 재사용 ({fp.kind}, 유사도 {score:.2f})")
+        span = current_span()
+        if span:
+            span.set_attribute('dedup.similarity', round(score, 3))
+        return {
+            'summary': row['summary'],
+            'key_points': row.get('key_points') or [],
+            'token_usage': None,
+        }, {'id': row['id'], 'similarity': round(score, 3)}
+
+    summary_result = await summarize()
+    try:
+        await repositories.fingerprints.save({
+            'id': fp.id,
+            'kind': fp.kind,
+            'source_url': source_url,
+            'title': title,
+            'summary': summary_result['summary'],
+            'key_points': summary_result['key_points'],
+            'meta': meta,
+            'signature': encode_signature(fp.signature),
+            'bands': fp.bands,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+        })
+    except Exception as e:
+        log.warning(f"본문 지문 저장 실패: {str(e)}")
+    return summary_result, None
@@ -0,0 +1,148 @@
+"""
+다시 요약(re-summarize) 서비스 - 같은 영상을 다른 지시사항으로 다시 요약할 때 중간 결과 재사용
+- 저장된 자막을 토큰 기준 구간(chunk)으로 나눔 (세그먼트 경계 기준)
+- 구간별 압축 노트(digest)는 지시사항과 무관 → 한 번만 생성해서 transcript_digests에 저장
+  (id = 프롬프트 버전 + 구간 sha256, 같은 구간이면 다른 요약/사용자도 재사용)
+- 다시 요약: 노트를 이어 붙이고 지시사항별 마지막 생성 단계만 실행
+- 짧은 자막은 노트 없이 원문으로 마지막 단계만 실행
+"""
+from fastapi.concurrency import run_in_threadpool
+from services.gemini_service import digest_chunk, summarize_with_instruction, merge_usage
+from services.metrics import CACHE_EVENTS, track_stage
+from services.prompt_budget import estimate_tokens, GEMINI_DIGEST_CHUNK_TOKENS, RESUMMARIZE_DIRECT_MAX_TOKENS
+from services.singleflight import SingleFlight
+from services.tracing import get_logger
+from services.transcript_store import content_hash, split_segments
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('digest')
+
+# 구간 노트 동시 생성 수 (Gemini 분당 요청 한도 고려)
+DIGEST_CONCURRENCY = int(os.getenv('DIGEST_CONCURRENCY', '4'))
+
+# DIGEST_TEMPLATE이 바뀌면 올려서 이전 노트를 무효화
+DIGEST_VERSION = 'v1'
+
+digest_flights = SingleFlight('digest')
+
+
+def split_chunks(text: str, max_tokens: int = GEMINI_DIGEST_CHUNK_TOKENS) -> List[str]:
+    """
+    자막을 max_tokens 이하 구간으로 분할 (세그먼트를 순서대로 채움)
+
+    같은 자막이면 항상 같은 구간 → 구간 id로 캐시 가능
+    (보정 계수는 요청마다 바뀌므로 보정 전 추정치로 나눔)
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    used = 0
+    for segment in split_segments(text):
+        cost = estimate_tokens(segment, calibrated=False)
+        if current and used + cost > max_tokens:
+            chunks.append(' '.join(current))
+            current, used = [], 0
+        current.append(segment)
+        used += cost
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def chunk_id(chunk: str) -> str:
+    return content_hash(f"{DIGEST_VERSION}\n{chunk}")
+
+
+async def load_digests(transcript: str, repositories=None) -> Tuple[List[str], Dict]:
+    """
+    구간별 노트 (저장된 노트 재사용, 없는 구간만 생성 후 저장)
+
+    Returns:
+        (구간 순서대로 노트 목록, 통계 + 새로 생성한 노트의 토큰 사용량)
+    """
+    chunks = split_chunks(transcript)
+    ids = [chunk_id(chunk) for chunk in chunks]
+
+    cached: Dict[str, Dict] = {}
+    if repositories is not None:
+        try:
+            cached = await repositories.digests.get_many(ids)
+        except Exception as e:
+            log.warning(f"구간 노트 조회 실패 (새로 생성): {str(e)}")
+
+    missing = [i for i, digest_id in enumerate(ids) if digest_id not in cached]
+    CACHE_EVENTS.inc(len(ids) - len(missing), cache='digest', result='hit')
+    CACHE_EVENTS.inc(len(missing), cache='digest', result='miss')
+
+    semaphore = asyncio.Semaphore(DIGEST_CONCURRENCY)
+
+    async def generate(i: int):
+        async with semaphore:
+            # 같은 구간을 동시에 다시 요약하는 요청은 Gemini 호출 하나로 병합
+            return await digest_flights.run(ids[i], digest_chunk, chunks[i])
+
+    generated = await asyncio.gather(*(generate(i) for i in missing))
+
+    rows = []
+    usages = []
+    for i, (digest, usage) in zip(missing, generated):
+        usages.append(usage)
+        rows.append({
+            'id': ids[i],
+            'digest': digest,
+            'source_tokens': estimate_tokens(chunks[i]),
+            'digest_tokens': estimate_tokens(digest),
+        })
+        cached[ids[i]] = rows[-1]
+
+    if rows and repositories is not None:
+        try:
+            await repositories.digests.save_many(rows)
+        except Exception as e:
+            log.warning(f"구간 노트 저장 실패: {str(e)}")
+
+    stats = merge_usage(*usages) if usages else merge_usage()
+    stats.update({'chunks': len(chunks), 'cached_chunks': len(chunks) - len(missing)})
+    log.info(f"구간 노트: {len(chunks)}개 (재사용 {len(chunks) - len(missing)}, 생성 {len(missing)})")
+    return [cached[digest_id]['digest'] for digest_id in ids], stats
+
+
+async def resummarize(
+    transcript: str,
+    video_title: str,
+    custom_instruction: str,
+    repositories=None
+) -> Tuple[str, Dict]:
+    """
+    지시사항만 바꿔서 다시 요약
+
+    Returns:
+        (요약 텍스트, token_usage: 마지막 단계 + 이번에 생성한 구간 노트 합계, digest 통계 포함)
+    """
+    digest_stats: Optional[Dict] = None
+    if estimate_tokens(transcript) <= RESUMMARIZE_DIRECT_MAX_TOKENS:
+        content, digested = transcript, False
+    else:
+        with track_stage('youtube', 'digest'):
+            digests, digest_stats = await load_digests(transcript, repositories)
+        content = '\n\n'.join(f"[구간 {i + 1}]\n{digest}" for i, digest in enumerate(digests))
+        digested = True
+
+    with track_stage('youtube', 'resummarize'):
+        summary_text, usage = await run_in_threadpool(
+            summarize_with_instruction, content, video_title, custom_instruction, digested
+        )
+
+    token_usage = merge_usage(usage, digest_stats) if digest_stats else merge_usage(usage)
+    # merge_usage는 호출 수를 usage 개수로 셈 → 실제 Gemini 호출 수로 보정
+    token_usage['calls'] = 1 + (digest_stats['calls'] if digest_stats else 0)
+    token_usage['digest'] = {
+        'used': digested,
+        'chunks': digest_stats['chunks'] if digest_stats else 0,
+        'cached_chunks': digest_stats['cached_chunks'] if digest_stats else 0,
+    }
+    return summary_text, token_usage
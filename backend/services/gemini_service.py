@@ -3,52 +3,69 @@ Gemini AI 서비스
 - 텍스트 요약
 - 핵심 포인트 추출
 - 임베딩 생성
+- 콘텐츠 질의응답 (Gemini context caching 지원)
 """
-import google.generativeai as genai
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import math
 import os
+import threading
 from dotenv import load_dotenv
+from services.metrics import track_dependency, LLM_TOKENS
+from services.tracing import get_logger, current_span
+from services.prompt_budget import (
+    PackedPrompt,
+    calibration_scale,
+    fit_text,
+    pack_prompt,
+    record_usage,
+    GEMINI_SUMMARY_TOKEN_BUDGET,
+    GEMINI_KEYPOINTS_TOKEN_BUDGET,
+    GEMINI_CHAT_TOKEN_BUDGET,
+    GEMINI_EMBED_TOKEN_BUDGET,
+    GEMINI_DIGEST_CHUNK_TOKENS,
+)
+
+log = get_logger('gemini')
 
 load_dotenv()
 
 # Gemini API 설정
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
 
+_genai = None
+_genai_lock = threading.Lock()
 
-def summarize_transcript(
-    transcript: str,
-    video_title: str,
-    custom_instruction: Optional[str] = None
-) -> Dict[str, any]:
+
+def load_genai():
     """
-    YouTube 자막을 Gemini로 요약
-    
-    Args:
-        transcript: 자막 전체 텍스트
-        video_title: 비디오 제목
-        custom_instruction: 사용자 지정 요약 지시사항
-    
-    Returns:
-        요약 결과 딕셔너리
+    google.generativeai 로드 + API 키 설정 (import가 무거워서 처음 쓸 때 한 번만)
     """
-    try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-        
-        # 프롬프트 구성
-        if custom_instruction and custom_instruction.strip():
-            # 사용자 지시사항이 있으면 그것을 최우선으로!
-            prompt = f"""당신은 YouTube 영상 내용을 분석하는 전문가입니다.
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                if GEMINI_API_KEY:
+                    genai.configure(api_key=GEMINI_API_KEY)
+                _genai = genai
+    return _genai
+
+
+SUMMARY_MODEL = 'gemini-flash-latest'
+# context caching은 버전이 고정된 모델 이름이 필요
+CHAT_CACHE_MODEL = os.getenv('CHAT_CACHE_MODEL', 'models/gemini-2.0-flash-001')
+
+# 프롬프트 템플릿 ({title}, {instruction}, {content}는 prompt_budget.pack_prompt가 토큰 예산에 맞춰 채움)
+CUSTOM_SUMMARY_TEMPLATE = """당신은 YouTube 영상 내용을 분석하는 전문가입니다.
 
 # 영상 제목
-"{video_title}"
+"{title}"
 
 # 영상 내용 (자막/스크립트)
-{transcript[:10000]}
+{content}
 
 # 사용자의 요청
-{custom_instruction}
+{instruction}
 
 # 지시사항
 위 영상 내용을 바탕으로, **사용자의 요청에 정확히 맞게** 분석하고 정리해주세요.
@@ -57,15 +74,14 @@ def summarize_transcript(
 - 깔끔하고 읽기 쉽게 정리해주세요
 - Markdown 형식을 사용하여 구조화해주세요
 """
-        else:
-            # 기본 요약
-            prompt = f"""당신은 YouTube 영상 내용을 요약하는 전문가입니다.
+
+DEFAULT_SUMMARY_TEMPLATE = """당신은 YouTube 영상 내용을 요약하는 전문가입니다.
 
 # 영상 제목
-"{video_title}"
+"{title}"
 
 # 영상 내용 (자막/스크립트)
-{transcript[:10000]}
+{content}
 
 # 요약 작성
 위 영상 내용을 다음 형식으로 요약해주세요:
@@ -79,48 +95,214 @@ def summarize_transcript(
 ## 🎯 결론
 (한 문장으로 핵심 메시지 정리)
 """
+
+KEY_POINTS_TEMPLATE = """다음은 YouTube 영상 "{title}"의 자막입니다.
+
+자막:
+{content}
+
+위 내용에서 가장 중요한 핵심 포인트 5-10개를 추출해주세요.
+각 포인트는 한 문장으로, 불릿 포인트 형식으로 작성해주세요.
+
+형식:
+- 핵심 포인트 1
+- 핵심 포인트 2
+...
+"""
+
+# 구간 요약: 지시사항과 무관한 압축 노트 (제목/구간 번호를 넣지 않아서 같은 구간이면 어느 영상에서든 재사용)
+DIGEST_TEMPLATE = """다음은 영상 자막의 한 구간입니다.
+
+자막:
+{content}
+
+이 구간을 나중에 원문 대신 사용할 수 있도록 압축 노트로 정리해주세요.
+- 정의, 주장, 수치, 예시, 단계, 고유명사를 빠뜨리지 마세요
+- 원문 순서를 유지하고 불릿 포인트로 간결하게 작성하세요
+- 원문 길이의 1/5 이내로 작성하세요
+"""
+
+RESUMMARY_TEMPLATE = """당신은 YouTube 영상 내용을 분석하는 전문가입니다.
+
+# 영상 제목
+"{title}"
+
+# 영상 내용 (구간별 압축 노트, 영상 순서대로)
+{content}
+
+# 사용자의 요청
+{instruction}
+
+# 지시사항
+위 노트는 영상 전체를 순서대로 압축한 것입니다. 노트를 바탕으로 **사용자의 요청에 정확히 맞게** 분석하고 정리해주세요.
+- 사용자가 요청한 방식과 형식을 그대로 따라주세요
+- 사용자가 원하는 관점과 깊이로 분석해주세요
+- 깔끔하고 읽기 쉽게 정리해주세요
+- Markdown 형식을 사용하여 구조화해주세요
+"""
+
+CHAT_TEMPLATE = """다음은 학습 자료의 내용입니다:
+
+{content}
+
+{context}
+
+사용자 질문: {instruction}
+
+위 내용을 바탕으로 질문에 답변해주세요. 답변은 명확하고 구체적으로 작성해주세요.
+"""
+
+# 학습 자료가 Gemini context cache에 올라가 있을 때 (질문마다 이전 대화 + 질문만 전송)
+CHAT_CACHED_TEMPLATE = """{content}
+
+사용자 질문: {instruction}
+
+캐시된 학습 자료를 바탕으로 질문에 답변해주세요. 답변은 명확하고 구체적으로 작성해주세요.
+"""
+
+CHAT_CACHE_SYSTEM_INSTRUCTION = (
+    "당신은 사용자의 학습 자료에 대한 질문에 답하는 도우미입니다. "
+    "자료에 없는 내용은 추측하지 말고 자료에서 찾을 수 없다고 답해주세요."
+)
+
+
+def _generate(
+    packed: PackedPrompt,
+    operation: str,
+    model_name: str = SUMMARY_MODEL,
+    cached_content=None
+) -> Tuple[str, Dict]:
+    """
+    Gemini 호출 + 토큰 사용량 기록 (메트릭, span 속성, 추정기 보정)
+
+    Args:
+        cached_content: create_chat_cache() 결과 (있으면 캐시된 자료를 참조하는 모델로 호출)
+
+    Returns:
+        (응답 텍스트, 토큰 사용량)
+    """
+    genai = load_genai()
+    if cached_content is not None:
+        model_name = getattr(cached_content, 'model', None) or CHAT_CACHE_MODEL
+        model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+    else:
+        model = genai.GenerativeModel(model_name)
+    with track_dependency('gemini', operation):
+        response = model.generate_content(packed.text)
+
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', None) if usage else None
+        completion_tokens = getattr(usage, 'candidates_token_count', None) if usage else None
+        cached_tokens = getattr(usage, 'cached_content_token_count', None) if usage else None
+
+        span = current_span()
+        if span:
+            span.set_attribute('llm.model', model_name)
+            span.set_attribute('llm.estimated_prompt_tokens', packed.estimated_tokens)
+            span.set_attribute('llm.content_truncated', packed.truncated)
+            if prompt_tokens is not None:
+                span.set_attribute('llm.prompt_tokens', prompt_tokens)
+            if completion_tokens is not None:
+                span.set_attribute('llm.completion_tokens', completion_tokens)
+            if cached_tokens:
+                span.set_attribute('llm.cached_tokens', cached_tokens)
+
+    LLM_TOKENS.inc(packed.estimated_tokens, model=model_name, operation=operation, kind='estimated_prompt')
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model_name, operation=operation, kind='prompt')
+        # 캐시된 자료 토큰은 추정 대상(packed)에 없으므로 보정에서 제외
+        if not cached_tokens:
+            record_usage(packed.estimated_tokens, prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model_name, operation=operation, kind='completion')
+    if cached_tokens:
+        LLM_TOKENS.inc(cached_tokens, model=model_name, operation=operation, kind='cached')
+
+    return response.text, {
+        **packed.report(),
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'cached_tokens': cached_tokens,
+    }
+
+
+def merge_usage(*usages: Dict) -> Dict:
+    """
+    여러 호출의 토큰 사용량 합산 (응답 / 로그용)
+    """
+    merged = {
+        'calls': len(usages), 'estimated_prompt_tokens': 0, 'prompt_tokens': 0, 'completion_tokens': 0,
+        'cached_tokens': 0, 'truncated': False
+    }
+    for usage in usages:
+        merged['estimated_prompt_tokens'] += usage.get('estimated_prompt_tokens') or 0
+        merged['prompt_tokens'] += usage.get('prompt_tokens') or 0
+        merged['completion_tokens'] += usage.get('completion_tokens') or 0
+        merged['cached_tokens'] += usage.get('cached_tokens') or 0
+        merged['truncated'] = merged['truncated'] or bool(usage.get('truncated'))
+    merged['total_tokens'] = merged['prompt_tokens'] + merged['completion_tokens']
+    return merged
+
+
+def summarize_transcript(
+    transcript: str,
+    video_title: str,
+    custom_instruction: Optional[str] = None
+) -> Dict[str, any]:
+    """
+    YouTube 자막을 Gemini로 요약
+    
+    Args:
+        transcript: 자막 전체 텍스트
+        video_title: 비디오 제목
+        custom_instruction: 사용자 지정 요약 지시사항
+    
+    Returns:
+        요약 결과 딕셔너리 (token_usage: 요청 전체 토큰 사용량)
+    """
+    try:
+        # 프롬프트 구성 (사용자 지시사항이 있으면 그것을 최우선으로!)
+        if custom_instruction and custom_instruction.strip():
+            template = CUSTOM_SUMMARY_TEMPLATE
+        else:
+            template = DEFAULT_SUMMARY_TEMPLATE
+        packed = pack_prompt(
+            template,
+            transcript,
+            GEMINI_SUMMARY_TOKEN_BUDGET,
+            title=video_title,
+            instruction=(custom_instruction or '').strip()
+        )
         
         # Gemini로 요약 생성
-        response = model.generate_content(prompt)
-        summary_text = response.text
+        summary_text, summary_usage = _generate(packed, 'generate_content')
         
         # 주요 포인트 추출
-        key_points = extract_key_points(transcript, video_title)
+        key_points, key_points_usage = _extract_key_points(transcript, video_title)
+        
+        token_usage = merge_usage(summary_usage, key_points_usage)
+        log.info(
+            f"Gemini 토큰 사용량: prompt={token_usage['prompt_tokens']} completion={token_usage['completion_tokens']} "
+            f"(추정 {token_usage['estimated_prompt_tokens']}, 잘림={token_usage['truncated']})",
+            **token_usage
+        )
         
         return {
             'summary': summary_text,
             'key_points': key_points,
             'word_count': len(transcript.split()),
-            'summary_ratio': len(summary_text.split()) / len(transcript.split()) if transcript else 0
+            'summary_ratio': len(summary_text.split()) / len(transcript.split()) if transcript else 0,
+            'token_usage': token_usage
         }
     
     except Exception as e:
         raise Exception(f"요약 생성 실패: {str(e)}")
 
 
-def extract_key_points(transcript: str, video_title: str) -> List[str]:
-    """
-    자막에서 핵심 포인트 추출
-    """
+def _extract_key_points(transcript: str, video_title: str) -> Tuple[List[str], Dict]:
     try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-        
-        prompt = f"""다음은 YouTube 영상 "{video_title}"의 자막입니다.
-
-자막:
-{transcript[:10000]}
-
-위 내용에서 가장 중요한 핵심 포인트 5-10개를 추출해주세요.
-각 포인트는 한 문장으로, 불릿 포인트 형식으로 작성해주세요.
-
-형식:
-- 핵심 포인트 1
-- 핵심 포인트 2
-...
-"""
-        
-        response = model.generate_content(prompt)
-        text = response.text
+        packed = pack_prompt(KEY_POINTS_TEMPLATE, transcript, GEMINI_KEYPOINTS_TOKEN_BUDGET, title=video_title)
+        text, usage = _generate(packed, 'generate_content')
         
         # 불릿 포인트 추출
         points = []
@@ -131,11 +313,57 @@ def extract_key_points(transcript: str, video_title: str) -> List[str]:
                 if point:
                     points.append(point)
         
-        return points[:10]  # 최대 10개
+        return points[:10], usage  # 최대 10개
     
     except Exception as e:
-        print(f"핵심 포인트 추출 실패: {str(e)}")
-        return []
+        log.warning(f"핵심 포인트 추출 실패: {str(e)}")
+        return [], {}
+
+
+def extract_key_points(transcript: str, video_title: str) -> List[str]:
+    """
+    자막에서 핵심 포인트 추출
+    """
+    return _extract_key_points(transcript, video_title)[0]
+
+
+def digest_chunk(chunk: str) -> Tuple[str, Dict]:
+    """
+    자막 한 구간의 압축 노트 생성 (다시 요약할 때 원문 대신 사용)
+
+    Returns:
+        (노트, 토큰 사용량)
+    """
+    # 구간은 보정 전 추정치로 나눴으므로 예산도 현재 보정 계수로 환산 (템플릿 + 반올림 여유 500)
+    # → 보정 계수가 커져도 구간 끝이 잘린 노트가 저장되지 않음
+    packed = pack_prompt(DIGEST_TEMPLATE, chunk, math.ceil((GEMINI_DIGEST_CHUNK_TOKENS + 500) * calibration_scale()))
+    return _generate(packed, 'digest')
+
+
+def summarize_with_instruction(
+    content: str,
+    video_title: str,
+    custom_instruction: str,
+    digested: bool = True
+) -> Tuple[str, Dict]:
+    """
+    지시사항별 마지막 생성 단계만 실행 (다시 요약)
+
+    Args:
+        content: 구간 노트를 이어 붙인 텍스트 (digested=False면 자막 원문)
+    """
+    try:
+        packed = pack_prompt(
+            RESUMMARY_TEMPLATE if digested else CUSTOM_SUMMARY_TEMPLATE,
+            content,
+            GEMINI_SUMMARY_TOKEN_BUDGET,
+            title=video_title,
+            instruction=custom_instruction.strip()
+        )
+        return _generate(packed, 'resummarize')
+    
+    except Exception as e:
+        raise Exception(f"요약 생성 실패: {str(e)}")
 
 
 def generate_embedding(text: str) -> List[float]:
@@ -143,14 +371,15 @@ def generate_embedding(text: str) -> List[float]:
     텍스트 임베딩 생성 (Vector 검색용)
     """
     try:
-        result = genai.embed_content(
-            model="models/embedding-001",
-            content=text,
-            task_type="retrieval_document"
-        )
+        with track_dependency('gemini', 'embed_content'):
+            result = load_genai().embed_content(
+                model="models/embedding-001",
+                content=fit_text(text, GEMINI_EMBED_TOKEN_BUDGET, marker=''),
+                task_type="retrieval_document"
+            )
         return result['embedding']
     except Exception as e:
-        print(f"임베딩 생성 실패: {str(e)}")
+        log.warning(f"임베딩 생성 실패: {str(e)}")
         return []
 
 
@@ -159,21 +388,82 @@ def chat_with_content(content: str, question: str, context: Optional[str] = None
     콘텐츠에 대해 질문하기
     """
     try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-        
-        prompt = f"""다음은 학습 자료의 내용입니다:
+        packed = pack_prompt(
+            CHAT_TEMPLATE,
+            content,
+            GEMINI_CHAT_TOKEN_BUDGET,
+            instruction=question,
+            context=f"추가 컨텍스트: {context}" if context else ''
+        )
+        text, _ = _generate(packed, 'generate_content')
+        return text
+    
+    except Exception as e:
+        raise Exception(f"질문 응답 생성 실패: {str(e)}")
 
-{content[:8000]}
 
-{"추가 컨텍스트: " + context if context else ""}
+def create_chat_cache(content: str, ttl_seconds: float, display_name: Optional[str] = None):
+    """
+    학습 자료를 Gemini context cache에 올림 (이후 질문은 자료를 다시 보내지 않음)
 
-사용자 질문: {question}
+    SDK에 caching이 없거나 모델/자료 크기가 지원 범위 밖이면 예외 → 호출하는 쪽에서 로컬 컨텍스트로 대체
+
+    Returns:
+        CachedContent (_generate의 cached_content로 전달)
+    """
+    from google.generativeai import caching
+    import datetime
+
+    with track_dependency('gemini', 'create_cached_content'):
+        return caching.CachedContent.create(
+            model=CHAT_CACHE_MODEL,
+            display_name=display_name,
+            system_instruction=CHAT_CACHE_SYSTEM_INSTRUCTION,
+            contents=[content],
+            ttl=datetime.timedelta(seconds=ttl_seconds),
+        )
+
+
+def delete_chat_cache(cached_content) -> None:
+    """
+    context cache 삭제 (실패해도 TTL이 지나면 Gemini 쪽에서 만료)
+    """
+    try:
+        with track_dependency('gemini', 'delete_cached_content'):
+            cached_content.delete()
+    except Exception as e:
+        log.warning(f"context cache 삭제 실패: {str(e)}")
+
+
+def chat_with_context(
+    context: str,
+    question: str,
+    history: str = '',
+    cached_content=None
+) -> Tuple[str, Dict]:
+    """
+    채팅 세션용 질문 응답 (services.chat_session에서 호출)
+
+    Args:
+        context: 준비된 자료 (원문 또는 구간별 압축 노트, cached_content가 있으면 사용하지 않음)
+        history: 이전 대화 (후속 질문용)
+        cached_content: create_chat_cache() 결과
+
+    Returns:
+        (답변, 토큰 사용량)
+    """
+    try:
+        if cached_content is not None:
+            packed = pack_prompt(CHAT_CACHED_TEMPLATE, history, GEMINI_CHAT_TOKEN_BUDGET, instruction=question)
+        else:
+            packed = pack_prompt(
+                CHAT_TEMPLATE,
+                context,
+                GEMINI_CHAT_TOKEN_BUDGET,
+                instruction=question,
+                context=history
+            )
+        return _generate(packed, 'generate_content', cached_content=cached_content)
 
-위 내용을 바탕으로 질문에 답변해주세요. 답변은 명확하고 구체적으로 작성해주세요.
-"""
-        
-        response = model.generate_content(prompt)
-        return response.text
-    
     except Exception as e:
         raise Exception(f"질문 응답 생성 실패: {str(e)}")
@@ -0,0 +1,342 @@
+"""
+메트릭 서비스 (Prometheus 텍스트 포맷)
+- Counter / Gauge / Histogram (레이블 지원)
+- 파이프라인 단계별, 외부 의존성별 지연 시간 히스토그램
+- 캐시 히트, 폴백(subtitle → whisper) 카운터
+- 큐 깊이, 커넥션 풀 사용률 게이지 (스크레이프 시점에 수집)
+- track_stage / track_dependency는 트레이싱 span도 함께 생성 (services/tracing.py)
+
+상시 켜둘 수 있도록 가볍게 유지:
+측정은 time.perf_counter() 두 번 + 락 하나, 렌더링은 /metrics 요청 때만
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from services.tracing import start_span, exporter_stats
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+import threading
+import time
+
+# 기본 버킷 (초) - 수 ms 쿼리부터 수 분짜리 Whisper까지
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """
+    set()으로 값을 넣거나, set_function()으로 스크레이프 시점에 계산
+    """
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels) -> None:
+        with self._lock:
+            self._functions[self._key(labels)] = fn
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = list(self._functions.items())
+        for key, fn in functions:
+            try:
+                values[key] = float(fn())
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets))
+        # key → [bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self._buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), []))
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self._buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# ----------------------------------------------------------------------
+# 공통 메트릭
+# ----------------------------------------------------------------------
+HTTP_REQUEST_DURATION = histogram(
+    'supremenote_http_request_duration_seconds',
+    'HTTP request latency by route',
+    ('method', 'route', 'status'),
+)
+STAGE_DURATION = histogram(
+    'supremenote_stage_duration_seconds',
+    'Ingestion pipeline stage latency',
+    ('pipeline', 'stage', 'outcome'),
+)
+DEPENDENCY_DURATION = histogram(
+    'supremenote_dependency_duration_seconds',
+    'External dependency call latency',
+    ('dependency', 'operation', 'outcome'),
+)
+TRANSCRIPT_SOURCE = counter(
+    'supremenote_transcript_source_total',
+    'Transcripts obtained per source (subtitle / whisper / none)',
+    ('source',),
+)
+FALLBACKS = counter(
+    'supremenote_fallbacks_total',
+    'Pipeline fallbacks taken',
+    ('pipeline', 'from_stage', 'to_stage'),
+)
+CACHE_EVENTS = counter(
+    'supremenote_cache_events_total',
+    'Cache lookups by cache and result (hit / miss / coalesced)',
+    ('cache', 'result'),
+)
+LLM_TOKENS = counter(
+    'supremenote_llm_tokens_total',
+    'LLM tokens by model, operation and kind (prompt / completion / estimated_prompt)',
+    ('model', 'operation', 'kind'),
+)
+ADMISSION_EVENTS = counter(
+    'supremenote_admission_events_total',
+    'Admission decisions by pipeline class (admitted / queued / rejected_user / rejected_queue / timeout)',
+    ('pipeline', 'result'),
+)
+ADMISSION_WAIT = histogram(
+    'supremenote_admission_wait_seconds',
+    'Time spent in the admission wait queue',
+    ('pipeline',),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+PARSER_JOBS = counter(
+    'supremenote_parser_jobs_total',
+    'Sandboxed parse jobs by job type and outcome (ok / timeout / memory / crashed / error)',
+    ('job', 'outcome'),
+)
+COMPACTION_RATIO = histogram(
+    'supremenote_compaction_ratio',
+    'Transcript size after / before compaction',
+    ('source',),
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0),
+)
+QUEUE_DEPTH = gauge(
+    'supremenote_queue_depth',
+    'Items waiting in internal queues',
+    ('queue',),
+)
+CACHE_BYTES = gauge(
+    'supremenote_cache_bytes',
+    'Bytes held by caches (in-memory read caches and the on-disk audio cache)',
+    ('cache',),
+)
+POOL_CONNECTIONS = gauge(
+    'supremenote_pool_connections',
+    'Connection pool usage',
+    ('pool', 'state'),
+)
+
+
+QUEUE_DEPTH.set_function(lambda: exporter_stats()['queued'], queue='telemetry_export')
+
+
+@contextmanager
+def track_stage(pipeline: str, stage: str) -> Iterator[None]:
+    """
+    파이프라인 단계 시간 측정 + span (예외 발생 시 outcome=error)
+    """
+    start = time.perf_counter()
+    outcome = 'ok'
+    try:
+        with start_span(f"{pipeline}.{stage}", pipeline=pipeline, stage=stage):
+            yield
+    except BaseException:
+        outcome = 'error'
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, pipeline=pipeline, stage=stage, outcome=outcome)
+
+
+@contextmanager
+def track_dependency(dependency: str, operation: str) -> Iterator[None]:
+    """
+    외부 의존성 호출 시간 측정 + client span (yt_dlp, youtube_transcript_api, gemini, whisper, supabase, ...)
+    """
+    start = time.perf_counter()
+    outcome = 'ok'
+    try:
+        with start_span(f"{dependency}.{operation}", kind='client', **{'peer.service': dependency, 'operation': operation}):
+            yield
+    except BaseException:
+        outcome = 'error'
+        raise
+    finally:
+        DEPENDENCY_DURATION.observe(
+            time.perf_counter() - start, dependency=dependency, operation=operation, outcome=outcome
+        )
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
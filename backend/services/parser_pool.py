@@ -0,0 +1,409 @@
+"""
+문서 파싱 워커 프로세스 풀 (pdfplumber / BeautifulSoup)
+- 파싱은 요청을 처리하는 프로세스가 아니라 별도 워커 프로세스(spawn)에서 실행
+- 작업별 wall-clock 제한: 넘기면 워커를 죽이고 새로 띄움, 그때까지 받은 부분 결과는 반환
+  (작업은 진행 중 emit(kind, payload)로 부분 결과를 보냄 - PDF는 페이지별 텍스트)
+- 워커별 메모리 상한 (RLIMIT_AS, 리눅스/macOS): 넘으면 작업은 MemoryError로 실패하고 워커 교체
+- 워커는 N개 작업 후 / 최대 RSS를 넘으면 재시작 (파서 메모리 누적 방지)
+- PARSER_ENABLED=false면 같은 작업을 현재 프로세스에서 실행 (제한 없음, 디버깅용)
+- 요청이 프로파일 중이면 워커도 작업 동안 자기 스택을 샘플링해서 1초마다 부모로 전송
+  (시간 초과로 워커를 죽여도 그때까지의 프로파일은 남음)
+"""
+from services import profiler
+from services.metrics import PARSER_JOBS, POOL_CONNECTIONS
+from services.tracing import get_logger
+from typing import Any, Dict, List, Optional, Tuple
+import importlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('parser_pool')
+
+PARSER_ENABLED = os.getenv('PARSER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# 동시에 실행하는 파싱 작업 수 (= 최대 워커 수, 기본: CPU 수, 최대 4)
+PARSER_WORKERS = int(os.getenv('PARSER_WORKERS') or min(4, os.cpu_count() or 2))
+# 워커 하나가 처리할 최대 작업 수 (이후 재시작)
+PARSER_MAX_JOBS_PER_WORKER = int(os.getenv('PARSER_MAX_JOBS_PER_WORKER', '50'))
+# 워커 주소 공간 상한 (MB, 0이면 제한 없음)
+PARSER_MEMORY_LIMIT_MB = int(os.getenv('PARSER_MEMORY_LIMIT_MB', '1536'))
+# 작업 후 최대 RSS가 이 값을 넘은 워커는 재시작 (MB, 0이면 확인하지 않음)
+PARSER_RECYCLE_RSS_MB = int(os.getenv('PARSER_RECYCLE_RSS_MB', '512'))
+# 기본 작업 제한 시간 (초, 작업별로 덮어씀)
+PARSER_JOB_TIMEOUT = float(os.getenv('PARSER_JOB_TIMEOUT', '60'))
+
+# 워커 프로세스 시작 대기 시간 (초)
+_START_TIMEOUT = 30.0
+# 워커 프로파일 전송 주기 (초)
+_PROFILE_FLUSH_INTERVAL = 1.0
+
+# 작업 결과 종류
+OK, TIMEOUT, MEMORY, CRASHED, ERROR = 'ok', 'timeout', 'memory', 'crashed', 'error'
+
+
+# ----------------------------------------------------------------------
+# 워커 프로세스
+# ----------------------------------------------------------------------
+def _resolve(target: str):
+    module_name, _, name = target.partition(':')
+    return getattr(importlib.import_module(module_name), name)
+
+
+def _max_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 bytes, 리눅스는 KB
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _limit_memory(limit_mb: int) -> None:
+    if limit_mb <= 0:
+        return
+    try:
+        import resource
+        limit = limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _worker_main(conn, memory_limit_mb: int) -> None:
+    """
+    워커 루프: (target, args, profile) 수신 → 실행 → ('done' | 'error', ...) 전송, None이면 종료
+    """
+    _limit_memory(memory_limit_mb)
+    send_lock = threading.Lock()
+
+    def send(message: Tuple) -> None:
+        with send_lock:
+            conn.send(message)
+
+    def emit(kind: str, payload: Any) -> None:
+        send(('progress', kind, payload))
+
+    send(('ready', os.getpid()))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError, KeyboardInterrupt):
+            return
+        if message is None:
+            return
+
+        target, args, profile = message
+        try:
+            if profile:
+                with _profiled(send):
+                    result = _resolve(target)(*args, emit=emit)
+            else:
+                result = _resolve(target)(*args, emit=emit)
+            send(('done', result, _max_rss_mb()))
+        except MemoryError:
+            # 메모리 부족 뒤에는 상태를 믿을 수 없으므로 알리고 종료
+            try:
+                send(('error', MEMORY, "메모리 한도를 초과했습니다", _max_rss_mb()))
+            except Exception:
+                pass
+            return
+        except Exception as e:
+            send(('error', ERROR, f"{type(e).__name__}: {e}", _max_rss_mb()))
+
+
+class _profiled:
+    """
+    워커 작업 프로파일: 작업 스레드만 샘플링, 쌓인 스택은 주기적으로 ('profile', stacks) 전송
+    """
+
+    def __init__(self, send):
+        self._send = send
+        self._done = threading.Event()
+
+    def __enter__(self):
+        self._scope = profiler.profile_thread('parser-worker')
+        self._profile = self._scope.__enter__()
+        self._flusher = threading.Thread(target=self._flush_loop, name='profile-flush', daemon=True)
+        self._flusher.start()
+        return self._profile
+
+    def __exit__(self, *exc_info):
+        self._scope.__exit__(*exc_info)
+        self._done.set()
+        self._flusher.join()
+        return False
+
+    def _flush_loop(self) -> None:
+        while True:
+            done = self._done.wait(_PROFILE_FLUSH_INTERVAL)
+            stacks = self._profile.drain()
+            if stacks:
+                try:
+                    self._send(('profile', stacks))
+                except (OSError, ValueError):
+                    return
+            if done:
+                return
+
+
+def preload(*modules: str, emit=None) -> int:
+    """
+    warm-up 작업: 파서 라이브러리를 워커에 미리 import
+    """
+    for module in modules:
+        importlib.import_module(module)
+    return os.getpid()
+
+
+# ----------------------------------------------------------------------
+# 부모 프로세스
+# ----------------------------------------------------------------------
+class ParseResult:
+    """
+    outcome이 ok가 아니어도 progress에는 그때까지 받은 부분 결과가 들어 있음
+    """
+    __slots__ = ('result', 'progress', 'outcome', 'error', 'elapsed')
+
+    def __init__(self, result: Any, progress: List[Tuple[str, Any]], outcome: str, error: Optional[str], elapsed: float):
+        self.result = result
+        self.progress = progress
+        self.outcome = outcome
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def partial(self) -> bool:
+        return self.outcome != OK
+
+    def items(self, kind: str) -> List[Any]:
+        return [payload for progress_kind, payload in self.progress if progress_kind == kind]
+
+    def last(self, kind: str, default: Any = None) -> Any:
+        found = self.items(kind)
+        return found[-1] if found else default
+
+
+class _Worker:
+    def __init__(self, context, memory_limit_mb: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, memory_limit_mb), name='parser-worker', daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.ready = False
+
+    def wait_ready(self, timeout: float) -> bool:
+        """
+        프로세스 시작 대기 (시작 시간은 작업 제한 시간에 넣지 않음)
+        """
+        if not self.ready and self.conn.poll(timeout):
+            self.ready = self.conn.recv()[0] == 'ready'
+        return self.ready
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self) -> None:
+        """
+        정상 종료 요청 후 응답이 없으면 강제 종료
+        """
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(5.0)
+
+
+class ParserPool:
+    """
+    사용법:
+        parsed = parser_pool.run('services.pdf_service:extract_pdf_pages', path, timeout=60, job='pdf')
+        pages = parsed.items('page')       # timeout / crashed여도 그때까지 받은 페이지
+        if parsed.outcome == 'error': ...  # 작업 함수가 예외를 던짐
+
+    run()은 블로킹 (라우터에서는 run_in_threadpool로 호출)
+    """
+
+    def __init__(
+        self,
+        size: int = PARSER_WORKERS,
+        max_jobs: int = PARSER_MAX_JOBS_PER_WORKER,
+        memory_limit_mb: int = PARSER_MEMORY_LIMIT_MB,
+        recycle_rss_mb: int = PARSER_RECYCLE_RSS_MB,
+        enabled: bool = PARSER_ENABLED,
+    ):
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.memory_limit_mb = memory_limit_mb
+        self.recycle_rss_mb = recycle_rss_mb
+        self.enabled = enabled
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._busy = 0
+        self._started = 0
+        self._killed = 0
+        self._closed = False
+
+        POOL_CONNECTIONS.set_function(lambda: self._busy, pool='parser', state='busy')
+        POOL_CONNECTIONS.set_function(lambda: len(self._idle), pool='parser', state='idle')
+
+    # ---- 워커 관리 ----
+
+    def _checkout(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    return worker
+                worker.conn.close()
+        self._started += 1
+        return _Worker(self._context, self.memory_limit_mb)
+
+    def _checkin(self, worker: _Worker, rss_mb: float = 0.0) -> None:
+        recycle = (
+            self._closed
+            or not worker.alive()
+            or (self.max_jobs > 0 and worker.jobs >= self.max_jobs)
+            or (self.recycle_rss_mb > 0 and rss_mb > self.recycle_rss_mb)
+        )
+        if recycle:
+            if worker.alive() and not self._closed:
+                log.info(f"파싱 워커 재시작 (작업 {worker.jobs}개, 최대 RSS {rss_mb:.0f}MB)")
+            worker.stop()
+            return
+        with self._lock:
+            self._idle.append(worker)
+
+    def _discard(self, worker: _Worker) -> None:
+        self._killed += 1
+        if worker.alive():
+            worker.kill()
+        worker.conn.close()
+
+    # ---- 실행 ----
+
+    def run(self, target: str, *args, timeout: Optional[float] = None, job: str = 'parse') -> ParseResult:
+        """
+        target('모듈:함수')을 워커에서 실행 (함수는 emit 키워드 인자로 부분 결과 전송)
+        """
+        timeout = PARSER_JOB_TIMEOUT if timeout is None else timeout
+        if not self.enabled:
+            return self._run_inline(target, args, job)
+
+        with self._slots:
+            self._busy += 1
+            try:
+                return self._run_in_worker(target, args, timeout, job)
+            finally:
+                self._busy -= 1
+
+    def _run_inline(self, target: str, args: Tuple, job: str) -> ParseResult:
+        progress: List[Tuple[str, Any]] = []
+        start = time.perf_counter()
+        try:
+            result = _resolve(target)(*args, emit=lambda kind, payload: progress.append((kind, payload)))
+            outcome, error = OK, None
+        except Exception as e:
+            result, outcome, error = None, ERROR, f"{type(e).__name__}: {e}"
+        PARSER_JOBS.inc(job=job, outcome=outcome)
+        return ParseResult(result, progress, outcome, error, time.perf_counter() - start)
+
+    def _run_in_worker(self, target: str, args: Tuple, timeout: float, job: str) -> ParseResult:
+        worker = self._checkout()
+        worker.jobs += 1
+        progress: List[Tuple[str, Any]] = []
+        start = time.perf_counter()
+        result, outcome, error, rss_mb = None, None, None, 0.0
+        profile = profiler.current()
+
+        try:
+            if not worker.wait_ready(_START_TIMEOUT):
+                raise EOFError
+            start = time.perf_counter()
+            deadline = start + timeout
+            worker.conn.send((target, args, profile is not None))
+            while outcome is None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not worker.conn.poll(remaining):
+                    outcome, error = TIMEOUT, f"파싱 시간 제한({timeout:g}초)을 초과했습니다"
+                    break
+                message = worker.conn.recv()
+                if message[0] == 'progress':
+                    progress.append((message[1], message[2]))
+                elif message[0] == 'profile':
+                    profile.merge(message[1], f"parser-worker:{job}")
+                elif message[0] == 'done':
+                    result, outcome, rss_mb = message[1], OK, message[2]
+                else:
+                    outcome, error, rss_mb = message[1], message[2], message[3]
+        except (EOFError, OSError, BrokenPipeError):
+            # 워커가 죽음 (세그폴트, OOM killer 등)
+            worker.process.join(1.0)
+            outcome, error = CRASHED, f"파싱 워커가 비정상 종료되었습니다 (exit code {worker.process.exitcode})"
+
+        elapsed = time.perf_counter() - start
+        PARSER_JOBS.inc(job=job, outcome=outcome)
+        if outcome in (TIMEOUT, CRASHED, MEMORY):
+            log.warning(f"파싱 작업 중단 ({job}, {outcome}, {elapsed:.1f}초, 부분 결과 {len(progress)}개): {error}")
+            self._discard(worker)
+        else:
+            self._checkin(worker, rss_mb)
+        return ParseResult(result, progress, outcome, error, elapsed)
+
+    def warm(self, *modules: str) -> None:
+        """
+        워커를 미리 띄우고 파서 라이브러리 import (첫 요청의 프로세스 시작 비용 제거)
+        """
+        if not self.enabled:
+            for module in modules:
+                importlib.import_module(module)
+            return
+        threads = [
+            threading.Thread(target=self.run, args=('services.parser_pool:preload', *modules), kwargs={'job': 'preload'})
+            for _ in range(self.size)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def shutdown(self) -> None:
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+    def stats(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'size': self.size,
+            'busy': self._busy,
+            'idle': len(self._idle),
+            'started': self._started,
+            'killed': self._killed,
+        }
+
+
+parser_pool = ParserPool()
+
+
+def shutdown_parser_pool() -> None:
+    parser_pool.shutdown()
@@ -2,83 +2,79 @@
 PDF 처리 서비스
 - PDF에서 텍스트 추출
 - 이미지 포함 PDF 처리
+- 파싱은 parser_pool 워커 프로세스에서 실행 (시간 / 메모리 제한, 부분 결과)
 """
-import pdfplumber
-from typing import Optional, Dict
+from typing import Dict
+from services.metrics import track_stage
+from services.parser_pool import ParseResult, parser_pool
 import os
+from services.tracing import get_logger
+from dotenv import load_dotenv
 
+load_dotenv()
 
-def extract_text_from_pdf(pdf_path: str) -> Optional[str]:
+log = get_logger('pdf')
+
+
+# 파싱 워커에서 한 PDF에 쓸 수 있는 최대 시간 (초, 넘으면 그때까지 추출한 페이지만 사용)
+PDF_PARSE_TIMEOUT = float(os.getenv('PDF_PARSE_TIMEOUT', '60'))
+
+_DEFAULT_INFO = {
+    'page_count': 0,
+    'title': '제목 없음',
+    'author': '저자 없음',
+    'subject': '',
+    'creator': '',
+    'producer': '',
+}
+
+
+def extract_pdf_pages(pdf_path: str, emit) -> int:
     """
-    PDF 파일에서 텍스트 추출
-    
-    Args:
-        pdf_path: PDF 파일 경로
-    
+    파싱 워커에서 실행: 메타데이터('info') → 페이지별 텍스트('page')를 순서대로 emit
+
     Returns:
-        추출된 텍스트
+        처리한 페이지 수
     """
-    try:
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"PDF 파일을 찾을 수 없습니다: {pdf_path}")
-        
-        print(f"[INFO] PDF 텍스트 추출 시작: {pdf_path}")
-        
-        full_text = []
-        page_count = 0
-        
-        with pdfplumber.open(pdf_path) as pdf:
-            page_count = len(pdf.pages)
-            print(f"[INFO] 총 페이지 수: {page_count}")
-            
-            for i, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if text:
-                    full_text.append(text)
-                    print(f"[PROGRESS] 페이지 {i+1}/{page_count} 처리 중...")
-        
-        result = "\n\n".join(full_text)
-        print(f"[SUCCESS] PDF 텍스트 추출 완료! ({len(result)} 글자)")
-        
-        return result
-    
-    except Exception as e:
-        print(f"[ERROR] PDF 텍스트 추출 실패: {str(e)}")
-        return None
+    import pdfplumber  # 처음 쓸 때 로드 (워커 프로세스)
 
+    with pdfplumber.open(pdf_path) as pdf:
+        metadata = pdf.metadata or {}
+        emit('info', {
+            'page_count': len(pdf.pages),
+            'title': metadata.get('Title', '제목 없음'),
+            'author': metadata.get('Author', '저자 없음'),
+            'subject': metadata.get('Subject', ''),
+            'creator': metadata.get('Creator', ''),
+            'producer': metadata.get('Producer', ''),
+        })
+        count = 0
+        for page in pdf.pages:
+            emit('page', page.extract_text() or '')
+            # 페이지 객체 캐시 해제 (긴 PDF에서 메모리 누적 방지)
+            page.close()
+            count += 1
+    return count
 
-def get_pdf_info(pdf_path: str) -> Dict:
+
+def parse_pdf(pdf_path: str) -> ParseResult:
     """
-    PDF 파일 메타데이터 추출
-    
-    Args:
-        pdf_path: PDF 파일 경로
-    
-    Returns:
-        PDF 정보 딕셔너리
+    파싱 워커에서 PDF 처리 (시간 / 메모리 제한, 중단돼도 그때까지의 페이지는 결과에 포함)
     """
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            metadata = pdf.metadata or {}
-            
-            return {
-                'page_count': len(pdf.pages),
-                'title': metadata.get('Title', '제목 없음'),
-                'author': metadata.get('Author', '저자 없음'),
-                'subject': metadata.get('Subject', ''),
-                'creator': metadata.get('Creator', ''),
-                'producer': metadata.get('Producer', ''),
-            }
-    except Exception as e:
-        print(f"[ERROR] PDF 정보 추출 실패: {str(e)}")
-        return {}
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF 파일을 찾을 수 없습니다: {pdf_path}")
+
+    log.info(f"PDF 텍스트 추출 시작: {pdf_path}")
+    return parser_pool.run(
+        'services.pdf_service:extract_pdf_pages', pdf_path, timeout=PDF_PARSE_TIMEOUT, job='pdf'
+    )
 
 
 def process_pdf(pdf_path: str) -> Dict:
     """
     PDF 전체 처리
-    - 메타데이터 추출
-    - 텍스트 추출
+    - 메타데이터 + 페이지별 텍스트 추출 (파싱 워커, 한 번만 열기)
+    - 시간 제한 / 워커 중단 시 그때까지 추출한 페이지로 계속 (partial=True)
     
     Args:
         pdf_path: PDF 파일 경로
@@ -87,19 +83,30 @@ def process_pdf(pdf_path: str) -> Dict:
         처리 결과 딕셔너리
     """
     try:
-        # PDF 정보 추출
-        info = get_pdf_info(pdf_path)
+        with track_stage('pdf', 'extract_text'):
+            parsed = parse_pdf(pdf_path)
         
-        # 텍스트 추출
-        text = extract_text_from_pdf(pdf_path)
+        if parsed.outcome == 'error':
+            raise Exception(parsed.error)
         
+        pages = parsed.items('page')
+        text = "\n\n".join(page for page in pages if page)
         if not text:
-            raise Exception("PDF에서 텍스트를 추출할 수 없습니다")
+            reason = f" ({parsed.error})" if parsed.partial else ''
+            raise Exception(f"PDF에서 텍스트를 추출할 수 없습니다{reason}")
+        
+        info = {**_DEFAULT_INFO, **(parsed.last('info') or {})}
+        if parsed.partial:
+            log.warning(f"PDF 일부만 추출: {len(pages)}/{info['page_count']} 페이지 ({parsed.error})")
+        else:
+            log.success(f"PDF 텍스트 추출 완료! ({len(text)} 글자, {len(pages)} 페이지)")
         
         return {
             **info,
             'text': text,
             'has_text': True,
+            'partial': parsed.partial,
+            'pages_extracted': len(pages),
         }
     
     except Exception as e:
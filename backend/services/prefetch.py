@@ -0,0 +1,424 @@
+"""
+YouTube 미리 받기 (speculative prefetch)
+- 미리보기(GET /api/youtube/info) 후 요약 버튼을 누르기까지의 시간 동안
+  자막을 받아 두고, 자막이 없는 영상은 오디오 다운로드를 시작
+  → /summarize는 받아 둔 자막을 바로 사용 (받는 중이면 그 결과를 기다림), Whisper 경로는 오디오 캐시에서 바로 시작
+- 실제 요청과 경쟁하지 않도록 (낮은 우선순위):
+  · admission 대기열에 요청이 있거나 사용 중인 용량이 PREFETCH_MAX_LOAD 비율을 넘으면 새 작업을 시작하지 않음
+  · 동시 실행 수 제한 (자막 PREFETCH_CONCURRENCY, 오디오 PREFETCH_AUDIO_CONCURRENCY)
+  · 오디오 다운로드 중에 실제 요청이 밀리기 시작하면 중단 후 다시 대기열로 (.part 파일에서 이어받기)
+    (/summarize가 이미 가져간 영상은 중단하지 않음)
+- 대기열 크기(PREFETCH_QUEUE_SIZE) / 사용자별 대기 수(PREFETCH_PER_CLIENT) 제한: 넘으면 오래된 미리보기부터 버림
+- 정리: 대기 시간 초과(PREFETCH_QUEUE_TTL), 완료 후 PREFETCH_TTL 경과, 취소(DELETE /api/youtube/prefetch)
+  → 쓰지 않은 오디오 .part 파일 삭제 (다 받은 오디오는 오디오 캐시 LRU로 정리)
+- 결과는 프로세스 메모리에 보관 (다른 워커로 간 /summarize는 공유 오디오 캐시만 이용)
+"""
+from collections import OrderedDict, deque
+from fastapi.concurrency import run_in_threadpool
+from services.admission import controller, ADMISSION_ENABLED
+from services.audio_cache import audio_cache, audio_format
+from services.metrics import CACHE_EVENTS, QUEUE_DEPTH
+from services.tracing import get_logger, start_trace, current_span
+from services.youtube_service import get_transcript_with_timing, download_audio
+from typing import Deque, Dict, Optional, Set
+import asyncio
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('prefetch')
+
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# 동시에 받는 자막 수
+PREFETCH_CONCURRENCY = int(os.getenv('PREFETCH_CONCURRENCY', '2'))
+# 자막 없는 영상의 오디오도 미리 받을지 / 동시 다운로드 수 / 이보다 긴 영상(초)은 받지 않음
+PREFETCH_AUDIO = os.getenv('PREFETCH_AUDIO', 'true').lower() in ('1', 'true', 'yes')
+PREFETCH_AUDIO_CONCURRENCY = int(os.getenv('PREFETCH_AUDIO_CONCURRENCY', '1'))
+PREFETCH_AUDIO_MAX_SECONDS = float(os.getenv('PREFETCH_AUDIO_MAX_SECONDS', '3600'))
+PREFETCH_QUEUE_SIZE = int(os.getenv('PREFETCH_QUEUE_SIZE', '64'))
+PREFETCH_PER_CLIENT = int(os.getenv('PREFETCH_PER_CLIENT', '3'))
+# 대기열에서 시작하지 못하고 이 시간(초)이 지나면 버림
+PREFETCH_QUEUE_TTL = float(os.getenv('PREFETCH_QUEUE_TTL', '120'))
+# 받아 둔 결과 보관 시간 (초)
+PREFETCH_TTL = float(os.getenv('PREFETCH_TTL', '900'))
+# admission 전체 용량 중 이 비율 이상 사용 중이면 새 작업을 시작하지 않음
+PREFETCH_MAX_LOAD = float(os.getenv('PREFETCH_MAX_LOAD', '0.5'))
+
+_POLL_SECONDS = 0.5
+# 완료된 결과까지 포함한 최대 보관 수
+_MAX_JOBS = max(1, PREFETCH_QUEUE_SIZE) * 4
+_FINISHED = ('ready', 'failed', 'cancelled', 'expired')
+
+
+class PrefetchJob:
+    """
+    영상 하나의 미리 받기
+
+    state: queued → transcript → (자막 없음) audio_queued → audio → ready
+           또는 failed / cancelled / expired
+    """
+
+    def __init__(self, video_id: str, video_url: str, client: str, info: Dict):
+        self.video_id = video_id
+        self.video_url = video_url
+        self.client = client
+        self.info = info
+        self.video_data: Optional[Dict] = None
+        self.state = 'queued'
+        self.audio: Optional[str] = None   # None / done / skipped / failed
+        self.claimed = False
+        self.preempted = False
+        self.attempted_audio = False
+        self.created_at = time.time()
+        self.queued_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        # 자막 단계 결과 (video_data, 실패/취소면 None) - /summarize가 진행 중인 작업을 기다릴 때 사용
+        self.transcript_ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        parent = current_span()
+        self._trace = (parent.trace_id, parent.span_id, parent.sampled) if parent else (None, None, None)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in _FINISHED
+
+    def resolve(self, video_data: Optional[Dict]) -> None:
+        if not self.transcript_ready.done():
+            self.transcript_ready.set_result(video_data)
+
+    def to_dict(self) -> Dict:
+        return {
+            'video_id': self.video_id,
+            'state': self.state,
+            'has_transcript': bool(self.video_data and self.video_data.get('has_transcript')),
+            'audio': self.audio,
+            'claimed': self.claimed,
+            'created_at': self.created_at,
+        }
+
+
+class PrefetchScheduler:
+    """
+    이벤트 루프 안에서만 사용 (admission과 같이 잠금 없음, 스레드 쪽은 cancel_event / _busy만 읽음)
+    """
+
+    def __init__(self):
+        self._jobs: 'OrderedDict[str, PrefetchJob]' = OrderedDict()
+        self._queue: Deque[PrefetchJob] = deque()
+        self._audio_queue: Deque[PrefetchJob] = deque()
+        self._running = 0
+        self._audio_running = 0
+        self._busy = False
+        self._wake: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        QUEUE_DEPTH.set_function(lambda: len(self._queue), queue='prefetch')
+        QUEUE_DEPTH.set_function(lambda: len(self._audio_queue), queue='prefetch_audio')
+
+    # ---- 요청 쪽 ----
+
+    def get(self, video_id: str) -> Optional[PrefetchJob]:
+        job = self._jobs.get(video_id)
+        if job is None or job.state in ('failed', 'cancelled', 'expired'):
+            return None
+        return job
+
+    def schedule(self, video_url: str, video_id: str, client: str, info: Dict) -> Optional[PrefetchJob]:
+        """
+        미리보기한 영상을 대기열에 추가 (이미 있으면 기존 작업)
+        """
+        if not PREFETCH_ENABLED or PREFETCH_QUEUE_SIZE <= 0:
+            return None
+        job = self.get(video_id)
+        if job is not None:
+            return job
+
+        # 같은 사용자가 여러 영상을 넘겨 보는 경우: 가장 최근 미리보기만 남김
+        pending = [item for item in self._queue if item.client == client]
+        while pending and len(pending) >= PREFETCH_PER_CLIENT:
+            self._finish(pending.pop(0), 'cancelled')
+        while len(self._queue) >= PREFETCH_QUEUE_SIZE:
+            self._finish(self._queue[0], 'expired')
+
+        job = PrefetchJob(video_id, video_url, client, info)
+        self._jobs.pop(video_id, None)
+        self._jobs[video_id] = job
+        self._queue.append(job)
+        self._trim()
+        self._start()
+        self._wake.set()
+        return job
+
+    async def claim(self, video_id: str) -> Optional[Dict]:
+        """
+        /summarize에서 호출: 받아 둔 video_data (process_youtube_video(use_whisper=False) 결과와 같은 형식)
+
+        - 자막 단계가 진행 중이면 끝날 때까지 기다림
+        - 아직 시작 전이면 대기열에서 빼고 None (요청이 직접 처리)
+        - 오디오 다운로드 중이면 계속 진행 (더 이상 실제 요청에 밀려 중단되지 않음)
+        """
+        job = self.get(video_id)
+        if job is None:
+            return None
+        job.claimed = True
+
+        if job.state == 'queued':
+            self._finish(job, 'cancelled')
+            CACHE_EVENTS.inc(cache='prefetch', result='miss')
+            return None
+        if job.state == 'audio_queued':
+            # 요청이 Whisper 한도 안에서 직접 받음
+            job.audio = 'skipped'
+            self._finish(job, 'ready')
+
+        if job.state == 'transcript':
+            video_data = await asyncio.shield(job.transcript_ready)
+            CACHE_EVENTS.inc(cache='prefetch', result='wait' if video_data else 'miss')
+        else:
+            video_data = job.video_data
+            CACHE_EVENTS.inc(cache='prefetch', result='hit' if video_data else 'miss')
+        return dict(video_data) if video_data else None
+
+    def cancel(self, video_id: str, client: str) -> bool:
+        """
+        미리보기를 닫았을 때 (다른 사용자의 작업, /summarize가 이미 가져간 작업, 끝난 작업은 그대로)
+        """
+        job = self.get(video_id)
+        if job is None or job.client != client or job.claimed or job.state == 'ready':
+            return False
+        self._finish(job, 'cancelled')
+        return True
+
+    def stats(self) -> Dict:
+        states: Dict[str, int] = {}
+        for job in self._jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+        return {
+            'enabled': PREFETCH_ENABLED,
+            'busy': self._busy,
+            'running': self._running,
+            'audio_running': self._audio_running,
+            'queued': len(self._queue),
+            'audio_queued': len(self._audio_queue),
+            'jobs': states,
+        }
+
+    async def shutdown(self) -> None:
+        for job in list(self._jobs.values()):
+            job.cancel_event.set()
+            job.resolve(None)
+        tasks = list(self._tasks)
+        if self._dispatcher:
+            tasks.append(self._dispatcher)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._jobs.clear()
+        self._queue.clear()
+        self._audio_queue.clear()
+        self._dispatcher = None
+        self._tasks.clear()
+
+    # ---- 스케줄러 ----
+
+    def _start(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wake = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch(), name='prefetch.dispatcher')
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _real_work_busy(self) -> bool:
+        if not ADMISSION_ENABLED:
+            return False
+        stats = controller.stats()
+        if any(pipeline['queued'] for pipeline in stats['pipelines'].values()):
+            return True
+        return stats['used'] > stats['capacity'] * PREFETCH_MAX_LOAD
+
+    async def _dispatch(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), _POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self._expire()
+
+            self._busy = self._real_work_busy()
+            if self._busy:
+                continue
+            while self._queue and self._running < PREFETCH_CONCURRENCY:
+                job = self._queue.popleft()
+                job.state = 'transcript'
+                self._running += 1
+                self._spawn(self._run_transcript(job))
+            while self._audio_queue and self._audio_running < PREFETCH_AUDIO_CONCURRENCY:
+                job = self._audio_queue.popleft()
+                job.state = 'audio'
+                job.preempted = False
+                job.attempted_audio = True
+                self._audio_running += 1
+                self._spawn(self._run_audio(job))
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for job in [item for item in self._queue if now - item.queued_at > PREFETCH_QUEUE_TTL]:
+            self._finish(job, 'expired')
+        for job in [item for item in self._audio_queue if now - item.queued_at > PREFETCH_QUEUE_TTL]:
+            # 자막 단계 결과(자막 없음)는 그대로 쓸 수 있음
+            job.audio = 'skipped'
+            self._finish(job, 'ready')
+        for video_id, job in list(self._jobs.items()):
+            if job.finished and now - job.finished_at > PREFETCH_TTL:
+                del self._jobs[video_id]
+
+    def _trim(self) -> None:
+        excess = len(self._jobs) - _MAX_JOBS
+        if excess <= 0:
+            return
+        for video_id in [video_id for video_id, job in self._jobs.items() if job.finished][:excess]:
+            del self._jobs[video_id]
+
+    def _finish(self, job: PrefetchJob, state: str) -> None:
+        """
+        작업 종료 (대기열에서 제거, 기다리는 /summarize 깨우기, 쓰지 않을 .part 파일 정리)
+        """
+        for queue in (self._queue, self._audio_queue):
+            if job in queue:
+                queue.remove(job)
+        running_audio = job.state == 'audio'
+        job.state = state
+        job.finished_at = time.monotonic()
+        job.resolve(job.video_data if state == 'ready' else None)
+        if state in ('cancelled', 'expired'):
+            if not job.claimed:
+                CACHE_EVENTS.inc(cache='prefetch', result=state)
+            job.cancel_event.set()
+        # 다운로드 중이면 _run_audio가 중단 후 정리
+        if job.attempted_audio and not running_audio and job.audio != 'done' and not job.claimed:
+            self._spawn(self._discard_audio(job))
+
+    def _should_stop(self, job: PrefetchJob) -> bool:
+        """
+        오디오 다운로드 진행 중 호출 (스레드풀)
+        """
+        if job.cancel_event.is_set():
+            return True
+        if self._busy and not job.claimed:
+            job.preempted = True
+            return True
+        return False
+
+    def _wants_audio(self, job: PrefetchJob) -> bool:
+        duration = (job.video_data or {}).get('duration') or 0
+        return PREFETCH_AUDIO and PREFETCH_AUDIO_CONCURRENCY > 0 and duration <= PREFETCH_AUDIO_MAX_SECONDS
+
+    # ---- 작업 ----
+
+    async def _run_transcript(self, job: PrefetchJob) -> None:
+        trace_id, parent_id, sampled = job._trace
+        try:
+            with start_trace(
+                'prefetch.transcript', trace_id=trace_id, parent_id=parent_id, sampled=sampled,
+                kind='internal', video_id=job.video_id
+            ):
+                video_data = await run_in_threadpool(_fetch_transcript, job.video_id, job.info)
+        except Exception as e:
+            log.warning(f"자막 미리 받기 실패 ({job.video_id}): {str(e)}")
+            if job.state == 'transcript':
+                self._finish(job, 'failed')
+            return
+        finally:
+            self._running -= 1
+            self._wake.set()
+
+        if job.state != 'transcript':
+            # 받는 동안 취소 / 만료됨
+            return
+        job.video_data = video_data
+        job.resolve(video_data)
+        # /summarize가 이미 가져갔으면 오디오는 요청이 Whisper 한도 안에서 직접 받음
+        if video_data.get('has_transcript') or job.claimed or not self._wants_audio(job):
+            self._finish(job, 'ready')
+            return
+        log.info(f"자막 없음, 오디오 미리 받기 대기: {job.video_id}")
+        job.state = 'audio_queued'
+        job.queued_at = time.monotonic()
+        self._audio_queue.append(job)
+
+    async def _run_audio(self, job: PrefetchJob) -> None:
+        trace_id, parent_id, sampled = job._trace
+        path = None
+        try:
+            with start_trace(
+                'prefetch.audio', trace_id=trace_id, parent_id=parent_id, sampled=sampled,
+                kind='internal', video_id=job.video_id
+            ):
+                path = await run_in_threadpool(download_audio, job.video_url, None, lambda: self._should_stop(job))
+        except Exception as e:
+            log.warning(f"오디오 미리 받기 실패 ({job.video_id}): {str(e)}")
+        finally:
+            self._audio_running -= 1
+            self._wake.set()
+
+        if path:
+            # 캐시에 남겨 두고 pin만 해제 (Whisper 경로가 acquire로 가져감)
+            audio_cache.release(path)
+            job.audio = 'done'
+            if job.state == 'audio':
+                self._finish(job, 'ready')
+            return
+
+        if job.state != 'audio':
+            # 받는 동안 취소 / 만료됨
+            if not job.claimed:
+                await self._discard_audio(job)
+            return
+        if job.preempted:
+            log.info(f"실제 요청 대기 중, 오디오 미리 받기 중단 (나중에 이어받기): {job.video_id}")
+            CACHE_EVENTS.inc(cache='prefetch', result='preempted')
+            job.state = 'audio_queued'
+            # 다시 기다리기 시작한 시각 (처음 대기 시각 기준이면 바로 만료되어 .part 파일이 삭제됨)
+            job.queued_at = time.monotonic()
+            self._audio_queue.append(job)
+            return
+        job.audio = 'failed'
+        self._finish(job, 'ready')
+
+    async def _discard_audio(self, job: PrefetchJob) -> None:
+        if await run_in_threadpool(audio_cache.discard_partial, job.video_id, audio_format()):
+            log.info(f"취소된 오디오 미리 받기 정리: {job.video_id}")
+
+
+def _fetch_transcript(video_id: str, info: Dict) -> Dict:
+    """
+    자막만 받기 (process_youtube_video(use_whisper=False)와 같은 형식)
+
+    자막 출처 지표 / 실패 로그는 남기지 않음 → 실제 요약 요청이 가져갈 때 집계
+    """
+    video_data = dict(info)
+    subtitle = get_transcript_with_timing(video_id)
+    if subtitle:
+        video_data['transcript'], video_data['timed_transcript'] = subtitle
+        video_data['has_transcript'] = True
+        video_data['source'] = 'subtitle'
+    else:
+        video_data['transcript'] = None
+        video_data['has_transcript'] = False
+        video_data['source'] = 'none'
+    return video_data
+
+
+prefetcher = PrefetchScheduler()
+
+
+async def shutdown_prefetch() -> None:
+    await prefetcher.shutdown()
@@ -0,0 +1,362 @@
+"""
+요청 단위 샘플링 프로파일러
+- 관리자 요청(X-Profile: 1 또는 ?profile=1 + X-Admin-Token) 또는 PROFILE_SAMPLE_RATE 비율의 요청만 프로파일
+- 프로파일 중인 요청이 있을 때만 샘플러 스레드 하나가 PROFILE_INTERVAL_MS마다 sys._current_frames()를 읽음
+  → 꺼져 있으면 요청마다 헤더 확인 + 난수 하나 외에는 비용 없음
+- 결과는 collapsed stack(folded) 파일로 저장 (flamegraph.pl / speedscope / inferno에서 그대로 열림)
+  · 스레드 이름이 첫 프레임 (이벤트 루프 = MainThread, run_in_threadpool = AnyIO worker thread)
+  · 파싱 워커 프로세스(parser_pool)의 스택은 'parser-worker:<작업>' 아래에 합쳐짐
+  · 프로세스 전체를 샘플링하므로 동시에 처리 중인 다른 요청의 스택도 섞일 수 있음
+- 대기 중인 스레드(스레드풀 유휴, 이벤트 루프 select)는 기본적으로 제외 (PROFILE_INCLUDE_IDLE)
+- 파일 저장은 저장 스레드에서 (save_later) → 프로파일한 요청의 응답을 늦추지 않음
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+import hmac
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 관리자 토큰 (없으면 요청별 프로파일 / 관리자 API 비활성화)
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+# 요청 중 이 비율만큼 자동으로 프로파일 (0이면 관리자 요청만)
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '10'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'data/profiles')
+# 보관할 프로파일 수 (넘으면 오래된 것부터 삭제)
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))
+PROFILE_MAX_DEPTH = int(os.getenv('PROFILE_MAX_DEPTH', '128'))
+PROFILE_INCLUDE_IDLE = os.getenv('PROFILE_INCLUDE_IDLE', 'false').lower() in ('1', 'true', 'yes')
+
+_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# 이 함수에서 멈춰 있는 스레드는 유휴 상태 (파일 이름, 함수 이름)
+_IDLE_LEAVES = {
+    ('threading.py', 'wait'),
+    ('queue.py', 'get'),
+    ('selectors.py', 'select'),
+    ('connection.py', 'wait'),
+}
+
+_current: ContextVar[Optional['Profile']] = ContextVar('current_profile', default=None)
+_labels: Dict[object, str] = {}
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = _labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+def _collapse(frame) -> Optional[str]:
+    """
+    프레임 → 'root;...;leaf' (유휴 스레드면 None)
+    """
+    code = frame.f_code
+    if not PROFILE_INCLUDE_IDLE and (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+        return None
+    labels: List[str] = []
+    while frame is not None and len(labels) < PROFILE_MAX_DEPTH:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ';'.join(labels)
+
+
+class Profile:
+    """
+    프로파일 하나 (thread가 있으면 그 스레드만 샘플링)
+    """
+
+    def __init__(self, label: str, reason: str, trace_id: Optional[str] = None, thread: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.reason = reason
+        self.trace_id = trace_id
+        self.thread = thread
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._start = time.perf_counter()
+
+    def merge(self, stacks: Dict[str, int], prefix: str) -> None:
+        for stack, count in stacks.items():
+            self.stacks[f"{prefix};{stack}"] += count
+
+    def drain(self) -> Dict[str, int]:
+        """
+        지금까지 쌓인 스택을 꺼내고 비움 (워커 → 부모 전송용)
+        """
+        stacks, self.stacks = self.stacks, Counter()
+        return dict(stacks)
+
+    def folded(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def meta(self) -> Dict:
+        return {
+            'id': self.id,
+            'label': self.label,
+            'reason': self.reason,
+            'trace_id': self.trace_id,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 1),
+            'samples': self.samples,
+            'interval_ms': PROFILE_INTERVAL_MS,
+            'stacks': len(self.stacks),
+        }
+
+
+class Sampler:
+    """
+    활성 프로파일이 있을 때만 도는 샘플러 스레드 (마지막 프로파일이 끝나면 종료)
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self._profiles: List[Profile] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+                self._thread.start()
+
+    def stop(self, profile: Profile) -> None:
+        with self._lock:
+            if profile in self._profiles:
+                self._profiles.remove(profile)
+        profile.duration = time.perf_counter() - profile._start
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                active = list(self._profiles)
+                if not active:
+                    self._thread = None
+                    return
+
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = _collapse(frame)
+                if stack is None:
+                    continue
+                for profile in active:
+                    if profile.thread is None:
+                        profile.stacks[f"{names.get(ident, 'thread')};{stack}"] += 1
+                    elif profile.thread == ident:
+                        profile.stacks[stack] += 1
+            for profile in active:
+                profile.samples += 1
+            del frame
+            time.sleep(self.interval)
+
+
+sampler = Sampler()
+
+
+def current() -> Optional[Profile]:
+    """
+    현재 요청의 프로파일 (run_in_threadpool 안에서도 contextvar로 전달됨)
+    """
+    return _current.get()
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and bool(token) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+def requested(headers, query_params) -> Optional[str]:
+    """
+    이 요청을 프로파일할지 (on_demand: 관리자 요청, sampled: PROFILE_SAMPLE_RATE)
+    """
+    flag = headers.get('x-profile') or query_params.get('profile')
+    if flag and flag.lower() in ('1', 'true', 'yes') and is_admin(headers.get('x-admin-token')):
+        return 'on_demand'
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return 'sampled'
+    return None
+
+
+@contextmanager
+def profile_request(label: str, reason: str, trace_id: Optional[str] = None) -> Iterator[Profile]:
+    """
+    사용법:
+        with profile_request('POST /api/pdf/upload', 'on_demand', trace_id) as profile:
+            ...
+        save(profile)
+    """
+    profile = Profile(label, reason, trace_id)
+    token = _current.set(profile)
+    sampler.start(profile)
+    try:
+        yield profile
+    finally:
+        sampler.stop(profile)
+        _current.reset(token)
+
+
+@contextmanager
+def profile_thread(label: str) -> Iterator[Profile]:
+    """
+    현재 스레드만 샘플링 (파싱 워커 프로세스에서 작업 하나를 프로파일할 때)
+    """
+    profile = Profile(label, 'worker', thread=threading.get_ident())
+    sampler.start(profile)
+    try:
+        yield profile
+    finally:
+        sampler.stop(profile)
+
+
+# ----------------------------------------------------------------------
+# 저장 / 조회
+# ----------------------------------------------------------------------
+def _paths(profile_id: str):
+    base = os.path.join(PROFILE_DIR, profile_id)
+    return f"{base}.folded", f"{base}.json"
+
+
+def save(profile: Profile) -> None:
+    """
+    folded + 메타데이터 저장 후 오래된 프로파일 정리
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    folded_path, meta_path = _paths(profile.id)
+    with open(folded_path, 'w', encoding='utf-8') as f:
+        f.write(profile.folded())
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(profile.meta(), f, ensure_ascii=False)
+    _prune()
+
+
+_save_queue: 'queue.Queue[Profile]' = queue.Queue(maxsize=PROFILE_MAX_FILES)
+_saver: Optional[threading.Thread] = None
+_saver_lock = threading.Lock()
+
+
+def save_later(profile: Profile) -> None:
+    """
+    저장 스레드에 넘기고 바로 반환 (대기열이 가득 차면 버림)
+    """
+    global _saver
+    with _saver_lock:
+        if _saver is None:
+            _saver = threading.Thread(target=_save_loop, name='profile-saver', daemon=True)
+            _saver.start()
+    try:
+        _save_queue.put_nowait(profile)
+    except queue.Full:
+        sys.stderr.write(f"[WARNING] 프로파일 저장 대기열이 가득 차서 버림: {profile.id}\n")
+
+
+def _save_loop() -> None:
+    while True:
+        profile = _save_queue.get()
+        try:
+            save(profile)
+        except Exception as e:
+            sys.stderr.write(f"[WARNING] 프로파일 저장 실패 ({profile.id}): {e}\n")
+
+
+def _prune() -> None:
+    try:
+        with os.scandir(PROFILE_DIR) as it:
+            metas = sorted(
+                (entry.stat().st_mtime, entry.name[:-5]) for entry in it if entry.name.endswith('.json')
+            )
+    except FileNotFoundError:
+        return
+    for _, profile_id in metas[:max(0, len(metas) - PROFILE_MAX_FILES)]:
+        for path in _paths(profile_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(limit: int = 50) -> List[Dict]:
+    """
+    최근 프로파일 메타데이터 (최신순)
+    """
+    try:
+        with os.scandir(PROFILE_DIR) as it:
+            entries = sorted(
+                ((entry.stat().st_mtime, entry.path) for entry in it if entry.name.endswith('.json')),
+                reverse=True
+            )
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for _, path in entries[:limit]:
+        try:
+            with open(path, encoding='utf-8') as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def load_folded(profile_id: str) -> Optional[str]:
+    if not _ID_PATTERN.match(profile_id):
+        return None
+    try:
+        with open(_paths(profile_id)[0], encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def to_speedscope(folded: str, name: str) -> Dict:
+    """
+    folded → speedscope JSON (https://www.speedscope.app 에서 flamegraph로 열기)
+    """
+    frames: List[Dict] = []
+    index: Dict[str, int] = {}
+    samples: List[List[int]] = []
+    weights: List[int] = []
+    for line in folded.splitlines():
+        stack, _, count = line.rpartition(' ')
+        if not stack:
+            continue
+        sample = []
+        for label in stack.split(';'):
+            if label not in index:
+                index[label] = len(frames)
+                frames.append({'name': label})
+            sample.append(index[label])
+        samples.append(sample)
+        weights.append(int(count))
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'none',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+        'name': name,
+    }
@@ -0,0 +1,207 @@
+"""
+프롬프트 토큰 예산 서비스
+- 글자 수 대신 토큰 수 기준으로 프롬프트 구성 (한국어/영어 토큰 밀도 차이 반영)
+- 토큰 추정: 문자 종류별 가중치 (한글, 한자, 가나, 영문, 숫자, 기호)
+  + 실제 응답의 usage_metadata로 보정 계수를 계속 갱신 (EMA)
+- 템플릿의 고정 문구 → 제목 / 지시사항 → 남은 예산만큼 본문 순서로 채움
+- 요청별 실제 토큰 사용량은 메트릭(supremenote_llm_tokens_total)과 span 속성으로 기록
+"""
+from functools import lru_cache
+from typing import Dict, Optional
+import os
+import re
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 작업별 입력 토큰 예산 (모델 컨텍스트보다 작게: 비용 / 지연 기준)
+GEMINI_SUMMARY_TOKEN_BUDGET = int(os.getenv('GEMINI_SUMMARY_TOKEN_BUDGET', '32000'))
+GEMINI_KEYPOINTS_TOKEN_BUDGET = int(os.getenv('GEMINI_KEYPOINTS_TOKEN_BUDGET', '16000'))
+GEMINI_CHAT_TOKEN_BUDGET = int(os.getenv('GEMINI_CHAT_TOKEN_BUDGET', '16000'))
+# embedding-001 입력 한도 (약 2048 토큰)
+GEMINI_EMBED_TOKEN_BUDGET = int(os.getenv('GEMINI_EMBED_TOKEN_BUDGET', '2000'))
+# 다시 요약(re-summarize)용 구간 요약: 구간 크기 / 이보다 짧은 자막은 구간 요약 없이 원문 그대로 사용
+GEMINI_DIGEST_CHUNK_TOKENS = int(os.getenv('GEMINI_DIGEST_CHUNK_TOKENS', '4000'))
+RESUMMARIZE_DIRECT_MAX_TOKENS = int(os.getenv('RESUMMARIZE_DIRECT_MAX_TOKENS', '3000'))
+# 제목 / 지시사항 / 추가 필드(대화 기록, 추가 컨텍스트) 최대 토큰 (본문 예산을 잠식하지 않도록)
+PROMPT_TITLE_MAX_TOKENS = int(os.getenv('PROMPT_TITLE_MAX_TOKENS', '100'))
+PROMPT_INSTRUCTION_MAX_TOKENS = int(os.getenv('PROMPT_INSTRUCTION_MAX_TOKENS', '800'))
+PROMPT_FIELD_MAX_TOKENS = int(os.getenv('PROMPT_FIELD_MAX_TOKENS', '4000'))
+
+TRUNCATION_MARKER = '\n...(이하 생략)'
+
+# 문자 종류별 토큰 가중치 (Gemini SentencePiece 기준 대략값, 실제 사용량으로 보정됨)
+_HANGUL = '\uac00-\ud7a3\u3130-\u318f'
+_CJK = '\u4e00-\u9fff'
+_KANA = '\u3040-\u30ff'
+_CLASSES = [
+    (re.compile(f'[{_HANGUL}]'), 0.75),                         # 한글
+    (re.compile(f'[{_CJK}]'), 1.0),                             # 한자
+    (re.compile(f'[{_KANA}]'), 0.8),                            # 가나
+    (re.compile(r'[A-Za-z]'), 0.25),                            # 영문 (단어당 약 1.2토큰)
+    (re.compile(r'[0-9]'), 1.0),                                # 숫자 (한 자리씩)
+    (re.compile(f'[^\\sA-Za-z0-9{_HANGUL}{_CJK}{_KANA}]'), 1.0),  # 기호, 이모지 등
+]
+# 공백은 앞뒤 토큰에 합쳐지지만 연속 공백 / 줄바꿈은 별도 토큰
+_WHITESPACE_RUN = re.compile(r'\s{2,}|\n')
+
+# 본문을 자를 때 추정 단위 (이 크기 블록씩 누적 → 마지막 블록만 글자 단위)
+_BLOCK_CHARS = 512
+
+_calibration = {'scale': 1.0, 'samples': 0}
+_calibration_lock = threading.Lock()
+
+
+def _weigh(text: str) -> float:
+    total = 0.0
+    for pattern, weight in _CLASSES:
+        total += len(pattern.findall(text)) * weight
+    total += len(_WHITESPACE_RUN.findall(text)) * 0.5
+    return total
+
+
+# 템플릿 / 제목 / 지시사항처럼 반복되는 짧은 문자열만 캐시 (긴 본문을 캐시에 붙잡아 두지 않도록)
+_CACHE_MAX_CHARS = 2000
+_cached_weigh = lru_cache(maxsize=4096)(_weigh)
+
+
+def estimate_tokens(text: str, calibrated: bool = True) -> int:
+    """
+    토큰 수 추정 (보정 계수 적용, 반복되는 템플릿/제목은 캐시)
+
+    calibrated=False: 보정 계수 없이 문자 가중치만 → 같은 텍스트면 프로세스 / 시점과 무관하게 같은 값
+    """
+    if not text:
+        return 0
+    raw = _cached_weigh(text) if len(text) <= _CACHE_MAX_CHARS else _weigh(text)
+    scale = _calibration['scale'] if calibrated else 1.0
+    return max(1, round(raw * scale))
+
+
+def record_usage(estimated_prompt_tokens: int, actual_prompt_tokens: Optional[int]) -> None:
+    """
+    실제 prompt 토큰 수로 추정기 보정 (지수 이동 평균, 0.5 ~ 2.0배 범위)
+    """
+    if not actual_prompt_tokens or not estimated_prompt_tokens:
+        return
+    with _calibration_lock:
+        raw = estimated_prompt_tokens / _calibration['scale']
+        ratio = min(2.0, max(0.5, actual_prompt_tokens / raw))
+        alpha = 0.5 if _calibration['samples'] < 10 else 0.1
+        _calibration['scale'] = (1 - alpha) * _calibration['scale'] + alpha * ratio
+        _calibration['samples'] += 1
+
+
+def calibration_scale() -> float:
+    return _calibration['scale']
+
+
+def fit_text(text: str, max_tokens: int, marker: str = TRUNCATION_MARKER) -> str:
+    """
+    max_tokens 안에 들어가도록 앞에서부터 자르기 (문장/단어 경계 우선, 선형 시간)
+    """
+    if not text or max_tokens <= 0:
+        return ''
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max_tokens - estimate_tokens(marker)
+    if budget <= 0:
+        return ''
+
+    scale = _calibration['scale']
+    used = 0.0
+    cut = 0
+    # 블록 단위로 누적 (본문은 재사용되지 않으므로 캐시하지 않음)
+    while cut < len(text):
+        block = text[cut:cut + _BLOCK_CHARS]
+        cost = _weigh(block) * scale
+        if used + cost > budget:
+            break
+        used += cost
+        cut += len(block)
+
+    # 마지막 블록은 글자 단위
+    while cut < len(text):
+        cost = _weigh(text[cut]) * scale
+        if used + cost > budget:
+            break
+        used += cost
+        cut += 1
+
+    # 문장 / 단어 경계로 되돌리기 (너무 많이 버리지 않는 범위에서)
+    head = text[:cut]
+    for boundary in ('\n', '. ', '? ', '! ', ' '):
+        position = head.rfind(boundary)
+        if position >= cut * 0.9:
+            head = head[:position + len(boundary)].rstrip()
+            break
+    return head + marker
+
+
+class PackedPrompt:
+    """
+    예산에 맞춰 구성된 프롬프트
+    """
+    __slots__ = ('text', 'estimated_tokens', 'content_tokens', 'content_chars', 'truncated', 'budget')
+
+    def __init__(self, text: str, estimated_tokens: int, content_tokens: int, content_chars: int, truncated: bool, budget: int):
+        self.text = text
+        self.estimated_tokens = estimated_tokens
+        self.content_tokens = content_tokens
+        self.content_chars = content_chars
+        self.truncated = truncated
+        self.budget = budget
+
+    def report(self) -> Dict:
+        return {
+            'budget': self.budget,
+            'estimated_prompt_tokens': self.estimated_tokens,
+            'content_tokens': self.content_tokens,
+            'content_chars': self.content_chars,
+            'truncated': self.truncated,
+        }
+
+
+def pack_prompt(
+    template: str,
+    content: str,
+    budget: int,
+    title: str = '',
+    instruction: str = '',
+    **fields: str
+) -> PackedPrompt:
+    """
+    템플릿의 {title}, {instruction}, {content} (및 추가 필드)를 예산 안에서 채움
+
+    1. 고정 문구
+    2. 제목 / 지시사항 / 추가 필드 (각각 상한까지)
+    3. 남은 예산을 모두 본문에
+    """
+    title = fit_text(title, PROMPT_TITLE_MAX_TOKENS, marker='…')
+    instruction = fit_text(instruction, PROMPT_INSTRUCTION_MAX_TOKENS)
+    fields = {key: fit_text(value, PROMPT_FIELD_MAX_TOKENS) for key, value in fields.items()}
+
+    # 본문 자리를 먼저 나눠서 사용자 입력에 들어 있는 "{content}"가 치환되지 않도록
+    def fill(part: str) -> str:
+        for key, value in fields.items():
+            part = part.replace('{' + key + '}', value)
+        return part.replace('{title}', title).replace('{instruction}', instruction)
+
+    head, _, tail = template.partition('{content}')
+    head, tail = fill(head), fill(tail)
+
+    fixed_tokens = estimate_tokens(head) + estimate_tokens(tail)
+    fitted = fit_text(content, max(0, budget - fixed_tokens))
+    truncated = fitted != content
+
+    content_tokens = estimate_tokens(fitted)
+    return PackedPrompt(
+        text=head + fitted + tail,
+        estimated_tokens=fixed_tokens + content_tokens,
+        content_tokens=content_tokens,
+        content_chars=len(fitted),
+        truncated=truncated,
+        budget=budget,
+    )
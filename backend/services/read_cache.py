@@ -0,0 +1,204 @@
+"""
+조회 API 응답 캐시 (프로세스 내부 read-through LRU + HTTP 조건부 요청)
+- 응답 본문을 JSON bytes로 한 번만 직렬화해서 보관 → 캐시 hit는 dict 조회 + bytes 반환
+- ETag = 본문 해시, Last-Modified = 행 생성 시각(요약 상세) 또는 조회 시각(목록)
+- If-None-Match / If-Modified-Since가 맞으면 본문 없이 304
+- 무효화: 키 단위(요약 상세) / 사용자 단위 세대 번호(목록 - 세대가 바뀌면 이전 키는 LRU에서 밀려남)
+- 다른 워커의 쓰기는 보이지 않으므로 TTL로 오래된 응답 기간을 제한
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request
+from fastapi.responses import Response
+from services.metrics import CACHE_EVENTS, CACHE_BYTES
+from services.responses import dumps
+from typing import Any, Dict, Hashable, Optional
+import hashlib
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 요약 상세: 요약은 만들어진 뒤 바뀌지 않음 (다시 요약은 새 행) → 긴 TTL
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '2048'))
+SUMMARY_CACHE_TTL = float(os.getenv('SUMMARY_CACHE_TTL', '300'))
+# 목록: 다른 워커에서 추가/삭제된 요약이 보이기까지의 최대 시간
+SUMMARY_LIST_CACHE_MAX_ENTRIES = int(os.getenv('SUMMARY_LIST_CACHE_MAX_ENTRIES', '1024'))
+SUMMARY_LIST_CACHE_TTL = float(os.getenv('SUMMARY_LIST_CACHE_TTL', '10'))
+# 브라우저 캐시 유지 시간 (0이면 매번 조건부 요청으로 재검증)
+SUMMARY_DETAIL_MAX_AGE = int(os.getenv('SUMMARY_DETAIL_MAX_AGE', '60'))
+SUMMARY_LIST_MAX_AGE = int(os.getenv('SUMMARY_LIST_MAX_AGE', '0'))
+
+
+def cache_control(max_age: int) -> str:
+    """
+    사용자별 데이터라서 공유 캐시(CDN/프록시)에는 저장하지 않음
+    """
+    if max_age > 0:
+        return f"private, max-age={max_age}"
+    return "private, no-cache"
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    else:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).replace(microsecond=0)
+
+
+class CachedResponse:
+    __slots__ = ('body', 'etag', 'last_modified', 'headers', 'expires_at')
+
+    def __init__(self, body: bytes, last_modified: datetime, headers: Dict[str, str], expires_at: float):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self.last_modified = last_modified
+        self.headers = headers
+        self.expires_at = expires_at
+
+    def not_modified(self, request: Request) -> bool:
+        """
+        조건부 요청 판단 (If-None-Match가 있으면 If-Modified-Since는 무시, RFC 9110)
+        """
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match is not None:
+            if if_none_match.strip() == '*':
+                return True
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return self.etag in tags
+
+        if_modified_since = request.headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified <= since
+        return False
+
+    def to_response(self, request: Request, cache_control_value: str) -> Response:
+        headers = {
+            **self.headers,
+            'ETag': self.etag,
+            'Last-Modified': format_datetime(self.last_modified, usegmt=True),
+            'Cache-Control': cache_control_value,
+        }
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type='application/json', headers=headers)
+
+
+class ReadCache:
+    """
+    사용법:
+        cached = cache.get(key)
+        if cached is None:
+            rows = ...  # 저장소 조회
+            cached = cache.put(key, rows, last_modified=row['created_at'])
+        return cached.to_response(request, cache_control(max_age))
+
+    이벤트 루프 안에서만 사용 (잠금 없음)
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Hashable, CachedResponse]' = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._bytes = 0
+
+        CACHE_BYTES.set_function(lambda: self._bytes, cache=name)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def generation(self, scope: str) -> int:
+        """
+        scope(예: 사용자 ID) 세대 번호 - 키에 넣으면 invalidate_scope로 한 번에 무효화
+        """
+        return self._generations.get(scope, 0)
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            CACHE_EVENTS.inc(cache=self.name, result='miss')
+            return None
+        if time.monotonic() >= entry.expires_at:
+            self._drop(key)
+            CACHE_EVENTS.inc(cache=self.name, result='expired')
+            return None
+        self._entries.move_to_end(key)
+        CACHE_EVENTS.inc(cache=self.name, result='hit')
+        return entry
+
+    def put(
+        self,
+        key: Hashable,
+        payload: Any,
+        last_modified: Any = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> CachedResponse:
+        """
+        응답 본문 직렬화 + 저장 (캐시를 끈 경우에도 응답용 CachedResponse 반환)
+        """
+        # 기본 응답 클래스와 같은 직렬화
+        body = dumps(payload)
+        modified = _parse_datetime(last_modified) or datetime.now(timezone.utc).replace(microsecond=0)
+        entry = CachedResponse(body, modified, headers or {}, time.monotonic() + self.ttl)
+        if not self.enabled:
+            return entry
+
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        self._bytes += len(body)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            CACHE_EVENTS.inc(cache=self.name, result='evict')
+        return entry
+
+    def invalidate(self, key: Hashable) -> None:
+        if key in self._entries:
+            self._drop(key)
+            CACHE_EVENTS.inc(cache=self.name, result='invalidate')
+
+    def invalidate_scope(self, scope: str) -> None:
+        self._generations[scope] = self._generations.get(scope, 0) + 1
+        CACHE_EVENTS.inc(cache=self.name, result='invalidate')
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+    def stats(self) -> Dict:
+        return {'entries': len(self._entries), 'max_entries': self.max_entries, 'bytes': self._bytes}
+
+
+summary_cache = ReadCache('summary_detail', SUMMARY_CACHE_MAX_ENTRIES, SUMMARY_CACHE_TTL)
+summary_list_cache = ReadCache('summary_list', SUMMARY_LIST_CACHE_MAX_ENTRIES, SUMMARY_LIST_CACHE_TTL)
+
+
+def invalidate_summary(summary_id: str, user_id: Optional[str] = None) -> None:
+    """
+    요약 추가 / 삭제 시 호출 (상세 + 해당 사용자의 목록)
+    """
+    summary_cache.invalidate(summary_id)
+    if user_id:
+        summary_list_cache.invalidate_scope(user_id)
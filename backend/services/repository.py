@@ -0,0 +1,863 @@
+"""
+비동기 영속성 계층
+- 저장소 인터페이스: summaries / transcripts / digests / notes / folders / embeddings
+- 백엔드: Supabase PostgREST (기본) 또는 내장 SQLite (services/sqlite_repository.py)
+- Supabase: 비동기 HTTP 클라이언트 + 커넥션 풀
+- write-behind 모드: insert를 모아서 bulk upsert (지연 시간 상한)
+- flush 실패 시 로컬 spool 파일에 보관 후 재시도
+"""
+import httpx
+from services.metrics import track_dependency, QUEUE_DEPTH, POOL_CONNECTIONS
+from services.tracing import get_logger
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import asyncio
+import base64
+import glob
+import json
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('repository')
+
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_KEY = os.getenv('SUPABASE_KEY')
+
+# 저장소 백엔드: 'supabase' / 'sqlite' / 'auto' (SUPABASE_URL 있으면 supabase, 없으면 sqlite)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'auto').lower()
+
+# 커넥션 풀
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '20'))
+DB_TIMEOUT = float(os.getenv('DB_TIMEOUT', '10'))
+
+# write-behind 설정
+DB_WRITE_BEHIND = os.getenv('DB_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+DB_WRITE_BATCH_SIZE = int(os.getenv('DB_WRITE_BATCH_SIZE', '100'))
+DB_WRITE_MAX_DELAY_MS = int(os.getenv('DB_WRITE_MAX_DELAY_MS', '200'))
+DB_SPOOL_PATH = os.getenv('DB_SPOOL_PATH', 'data/write_spool.jsonl')
+DB_SPOOL_RETRY_SECONDS = float(os.getenv('DB_SPOOL_RETRY_SECONDS', '30'))
+
+
+# youtube_summaries 컬럼 (fields= 검증용)
+SUMMARY_COLUMNS = (
+    'id', 'user_id', 'video_url', 'video_id', 'title', 'thumbnail_url',
+    'duration', 'summary', 'key_points', 'transcript', 'created_at',
+)
+# 목록 기본 projection (사이드바 렌더링에 필요한 최소 컬럼)
+SUMMARY_LIST_FIELDS = ('id', 'title', 'thumbnail_url', 'created_at')
+# 단건 조회 기본 projection (자막은 /transcript 엔드포인트로 따로 로드)
+SUMMARY_DETAIL_FIELDS = tuple(column for column in SUMMARY_COLUMNS if column != 'transcript')
+
+NOTE_COLUMNS = (
+    'id', 'user_id', 'folder_id', 'title', 'content', 'tags',
+    'is_favorite', 'created_at', 'updated_at',
+)
+FOLDER_COLUMNS = (
+    'id', 'user_id', 'name', 'color', 'icon', 'parent_id',
+    'position', 'created_at', 'updated_at',
+)
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    """
+    keyset 커서 인코딩: (created_at, id) → URL-safe base64
+    """
+    raw = json.dumps([str(created_at), str(row_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    keyset 커서 디코딩 (형식이 잘못되면 ValueError)
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        created_at, row_id = str(created_at), str(row_id)
+    except Exception:
+        raise ValueError("유효하지 않은 cursor입니다")
+
+    # PostgREST 필터 문자열에 그대로 들어가므로 따옴표/역슬래시 차단
+    if any(ch in value for value in (created_at, row_id) for ch in '"\\'):
+        raise ValueError("유효하지 않은 cursor입니다")
+    return created_at, row_id
+
+
+def resolve_fields(fields: Optional[Sequence[str]], allowed: Sequence[str], default: Sequence[str]) -> List[str]:
+    """
+    요청 fields 검증 후 컬럼 목록 반환 (커서용 id, created_at은 항상 포함)
+    """
+    selected = [field.strip() for field in (fields or default) if field and field.strip()]
+    unknown = [field for field in selected if field not in allowed]
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(unknown)}")
+
+    for required in ('id', 'created_at'):
+        if required not in selected:
+            selected.append(required)
+    return selected
+
+
+class SupabaseRestClient:
+    """
+    PostgREST 비동기 클라이언트 (httpx 커넥션 풀 공유)
+    """
+
+    def __init__(self, url: str, key: str, pool_size: int = DB_POOL_SIZE, timeout: float = DB_TIMEOUT):
+        if not url.startswith(('http://', 'https://')):
+            url = f"https://{url}"
+        self._client = httpx.AsyncClient(
+            base_url=f"{url.rstrip('/')}/rest/v1",
+            headers={
+                'apikey': key,
+                'Authorization': f"Bearer {key}",
+                'Content-Type': 'application/json',
+            },
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size
+            ),
+            timeout=timeout,
+        )
+
+    async def select(
+        self,
+        table: str,
+        columns: str = '*',
+        filters: Optional[Dict[str, str]] = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        filters: PostgREST 연산자 형식 ({'user_id': 'eq.xxx'})
+        """
+        params: Dict[str, Any] = {'select': columns, **(filters or {})}
+        if order:
+            params['order'] = order
+        if limit is not None:
+            params['limit'] = limit
+
+        with track_dependency('supabase', 'select'):
+            response = await self._client.get(f"/{table}", params=params)
+            response.raise_for_status()
+        return response.json()
+
+    async def insert(
+        self,
+        table: str,
+        rows: List[Dict],
+        upsert: bool = False,
+        returning: bool = True
+    ) -> List[Dict]:
+        prefer = ['return=representation' if returning else 'return=minimal']
+        params = {}
+        if upsert:
+            prefer.append('resolution=merge-duplicates')
+            params['on_conflict'] = 'id'
+
+        with track_dependency('supabase', 'upsert' if upsert else 'insert'):
+            response = await self._client.post(
+                f"/{table}",
+                params=params,
+                content=json.dumps(rows, ensure_ascii=False, default=str),
+                headers={'Prefer': ','.join(prefer)},
+            )
+            response.raise_for_status()
+        return response.json() if returning else []
+
+    async def update(self, table: str, values: Dict, filters: Dict[str, str]) -> List[Dict]:
+        with track_dependency('supabase', 'update'):
+            response = await self._client.patch(
+                f"/{table}",
+                params=filters,
+                content=json.dumps(values, ensure_ascii=False, default=str),
+                headers={'Prefer': 'return=representation'},
+            )
+            response.raise_for_status()
+        return response.json()
+
+    async def delete(self, table: str, filters: Dict[str, str]) -> None:
+        with track_dependency('supabase', 'delete'):
+            response = await self._client.delete(f"/{table}", params=filters)
+            response.raise_for_status()
+
+    async def rpc(self, function: str, params: Dict) -> Any:
+        with track_dependency('supabase', f"rpc:{function}"):
+            response = await self._client.post(
+                f"/rpc/{function}",
+                content=json.dumps(params, ensure_ascii=False, default=str),
+            )
+            response.raise_for_status()
+        return response.json()
+
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        커넥션 풀 사용 현황 (httpcore 내부 상태 기준, 실패 시 빈 dict)
+        """
+        try:
+            pool = self._client._transport._pool
+            connections = pool.connections
+            return {
+                'size': DB_POOL_SIZE,
+                'open': len(connections),
+                'in_use': sum(1 for c in connections if not c.is_idle()),
+            }
+        except Exception:
+            return {}
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class WriteBehindBuffer:
+    """
+    테이블별 insert를 모아서 bulk upsert
+
+    - 배치 크기(DB_WRITE_BATCH_SIZE)에 도달하거나
+      첫 행이 들어온 뒤 DB_WRITE_MAX_DELAY_MS가 지나면 flush
+    - flush 실패 시 spool 파일(JSON Lines)에 기록, 주기적으로 재시도
+    - flush 전 행은 pending()으로 조회 가능 (read-your-writes)
+    - 삭제된 행은 tombstone으로 기록 → flush 중이거나 spool에 남은 행이 삭제 뒤에 다시 생기지 않음
+    """
+
+    def __init__(
+        self,
+        client: SupabaseRestClient,
+        batch_size: int = DB_WRITE_BATCH_SIZE,
+        max_delay_ms: int = DB_WRITE_MAX_DELAY_MS,
+        spool_path: str = DB_SPOOL_PATH
+    ):
+        self._client = client
+        self._batch_size = batch_size
+        self._max_delay = max_delay_ms / 1000
+        self._spool_path = spool_path
+
+        self._pending: Dict[str, Dict[str, Dict]] = {}  # table → id → row
+        self._inflight: Dict[str, Dict[str, Dict]] = {}  # flush 중인 행
+        self._first_at: Dict[str, float] = {}
+        self._tombstones: Set[Tuple[str, str]] = set()  # (table, id) 삭제된 행
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._spool_task: Optional[asyncio.Task] = None
+
+        self.flush_count = 0
+        self.row_count = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            self._spool_task = asyncio.create_task(self._retry_spool_loop())
+
+    def enqueue(self, table: str, row: Dict) -> None:
+        rows = self._pending.setdefault(table, {})
+        rows[row['id']] = row
+        self._tombstones.discard((table, row['id']))
+        self._first_at.setdefault(table, time.monotonic())
+        if len(rows) >= self._batch_size:
+            self._wakeup.set()
+
+    def pending(self, table: str, row_id: str) -> Optional[Dict]:
+        row = self._pending.get(table, {}).get(row_id)
+        if row is None:
+            row = self._inflight.get(table, {}).get(row_id)
+        return row
+
+    def pending_rows(self, table: str) -> List[Dict]:
+        return list(self._pending.get(table, {}).values())
+
+    async def discard(self, table: str, row_id: str) -> bool:
+        """
+        삭제 요청 시 아직 flush되지 않은 행 제거
+
+        진행 중인 flush / spool 재시도가 끝날 때까지 기다린 뒤 반환 → 호출한 쪽의 DELETE가 마지막 쓰기.
+        spool에 남은 행은 tombstone으로 다음 재시도에서 건너뜀
+        """
+        key = (table, row_id)
+        self._tombstones.add(key)
+        removed = self._pending.get(table, {}).pop(row_id, None) is not None
+        async with self._flush_lock:
+            if not self._has_spool():
+                self._tombstones.discard(key)
+        return removed
+
+    def _has_spool(self) -> bool:
+        return os.path.exists(self._spool_path) or bool(glob.glob(f"{glob.escape(self._spool_path)}.*.retry"))
+
+    @property
+    def depth(self) -> int:
+        return sum(len(rows) for rows in self._pending.values())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._max_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            now = time.monotonic()
+            due = [
+                table for table, rows in self._pending.items()
+                if rows and (len(rows) >= self._batch_size or now - self._first_at.get(table, now) >= self._max_delay)
+            ]
+            for table in due:
+                await self.flush(table)
+
+    async def flush(self, table: Optional[str] = None) -> None:
+        """
+        대기 중인 행을 bulk upsert (table 미지정 시 전체)
+        """
+        async with self._flush_lock:
+            tables = [table] if table else list(self._pending.keys())
+            for name in tables:
+                rows = self._pending.get(name)
+                if not rows:
+                    continue
+
+                batch: List[Dict] = []
+                while rows and len(batch) < self._batch_size:
+                    row = rows.pop(next(iter(rows)))
+                    if (name, row['id']) not in self._tombstones:
+                        batch.append(row)
+                if rows:
+                    self._first_at[name] = time.monotonic()
+                    self._wakeup.set()
+                else:
+                    self._first_at.pop(name, None)
+                if not batch:
+                    continue
+
+                self._inflight[name] = {row['id']: row for row in batch}
+                try:
+                    await self._client.insert(name, batch, upsert=True, returning=False)
+                    self.flush_count += 1
+                    self.row_count += len(batch)
+                except Exception as e:
+                    log.warning(f"write-behind flush 실패 ({name}, {len(batch)}행) → spool 저장: {e}")
+                    self._spool(name, batch)
+                finally:
+                    self._inflight.pop(name, None)
+
+    def _spool(self, table: str, rows: List[Dict]) -> None:
+        directory = os.path.dirname(self._spool_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self._spool_path, 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps({'table': table, 'row': row}, ensure_ascii=False, default=str) + '\n')
+
+    async def retry_spool(self) -> int:
+        """
+        spool 파일의 행을 다시 upsert (삭제된 행은 건너뜀). 성공한 행 수 반환
+        """
+        # flush / 삭제와 겹치지 않도록 같은 lock 안에서 재시도
+        async with self._flush_lock:
+            return await self._retry_spool()
+
+    async def _retry_spool(self) -> int:
+        # 재시도 중 새로 spool되는 행과 섞이지 않도록 파일을 먼저 옮김
+        # (이전 실행에서 남은 .retry 파일도 함께 처리)
+        if os.path.exists(self._spool_path):
+            os.replace(self._spool_path, f"{self._spool_path}.{time.time_ns()}.retry")
+        processing = sorted(glob.glob(f"{glob.escape(self._spool_path)}.*.retry"))
+        if not processing:
+            self._tombstones.clear()
+            return 0
+
+        tombstones = set(self._tombstones)
+        grouped: Dict[str, List[Dict]] = {}
+        for path in processing:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        if (entry['table'], entry['row'].get('id')) in tombstones:
+                            continue
+                        grouped.setdefault(entry['table'], []).append(entry['row'])
+                    except Exception:
+                        continue
+
+        restored = 0
+        for table, rows in grouped.items():
+            for i in range(0, len(rows), self._batch_size):
+                batch = rows[i:i + self._batch_size]
+                try:
+                    await self._client.insert(table, batch, upsert=True, returning=False)
+                    restored += len(batch)
+                except Exception as e:
+                    log.warning(f"spool 재시도 실패 ({table}): {e}")
+                    self._spool(table, batch)
+
+        for path in processing:
+            os.remove(path)
+        # 건너뛴 행은 spool에서 사라졌으므로 tombstone 정리 (재시도 중 새로 삭제된 행은 유지)
+        self._tombstones -= tombstones
+        if restored:
+            log.info(f"spool 재시도 성공: {restored}행")
+        return restored
+
+    async def _retry_spool_loop(self) -> None:
+        while True:
+            await asyncio.sleep(DB_SPOOL_RETRY_SECONDS)
+            try:
+                await self.retry_spool()
+            except Exception as e:
+                log.warning(f"spool 재시도 오류: {e}")
+
+    async def close(self) -> None:
+        for task in (self._task, self._spool_task):
+            if task:
+                task.cancel()
+        self._task = None
+        self._spool_task = None
+
+        # 남은 행 모두 flush (실패분은 spool로)
+        while self.depth:
+            await self.flush()
+
+
+class SummaryRepository:
+    """
+    youtube_summaries 저장소
+    """
+    table = 'youtube_summaries'
+
+    def __init__(self, client: SupabaseRestClient, buffer: Optional[WriteBehindBuffer] = None):
+        self._client = client
+        self._buffer = buffer
+
+    async def create(self, row: Dict) -> Dict:
+        """
+        요약 저장. write-behind 모드면 즉시 반환 (DB 쓰기는 백그라운드)
+        """
+        if self._buffer:
+            self._buffer.enqueue(self.table, row)
+            return row
+
+        result = await self._client.insert(self.table, [row])
+        return result[0] if result else row
+
+    async def get(self, summary_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        columns = resolve_fields(fields, SUMMARY_COLUMNS, SUMMARY_DETAIL_FIELDS)
+
+        if self._buffer:
+            pending = self._buffer.pending(self.table, summary_id)
+            if pending:
+                return {column: pending.get(column) for column in columns}
+
+        rows = await self._client.select(
+            self.table,
+            columns=','.join(columns),
+            filters={'id': f"eq.{summary_id}"},
+            limit=1
+        )
+        return rows[0] if rows else None
+
+    async def list_by_user(self, user_id: str, limit: Optional[int] = 20) -> List[Dict]:
+        rows = await self._client.select(
+            self.table,
+            filters={'user_id': f"eq.{user_id}"},
+            order='created_at.desc',
+            limit=limit
+        )
+        if self._buffer:
+            pending = [row for row in self._buffer.pending_rows(self.table) if row.get('user_id') == user_id]
+            if pending:
+                known = {row['id'] for row in rows}
+                rows = pending + [row for row in rows if row['id'] not in known]
+                rows.sort(key=lambda row: str(row.get('created_at', '')), reverse=True)
+                rows = rows[:limit]
+        return rows
+
+    async def list_page(
+        self,
+        user_id: str,
+        limit: int = 20,
+        fields: Optional[Sequence[str]] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        목록 조회 (컬럼 projection + keyset 페이지네이션)
+
+        - 기본 컬럼: id, title, thumbnail_url, created_at
+        - 정렬: (created_at DESC, id DESC) → idx_youtube_user_created 인덱스 사용
+        - cursor: 이전 페이지 마지막 행의 (created_at, id)
+
+        Returns:
+            (행 목록, 다음 페이지 cursor 또는 None)
+        """
+        columns = resolve_fields(fields, SUMMARY_COLUMNS, SUMMARY_LIST_FIELDS)
+        filters = {'user_id': f"eq.{user_id}"}
+        if cursor:
+            created_at, row_id = decode_cursor(cursor)
+            filters['or'] = (
+                f'(created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt."{row_id}"))'
+            )
+
+        # 한 행 더 가져와서 다음 페이지 존재 여부 판단
+        rows = await self._client.select(
+            self.table,
+            columns=','.join(columns),
+            filters=filters,
+            order='created_at.desc,id.desc',
+            limit=limit + 1
+        )
+
+        # 첫 페이지에는 아직 flush되지 않은 최신 행 포함
+        if self._buffer and not cursor:
+            pending = [
+                {column: row.get(column) for column in columns}
+                for row in self._buffer.pending_rows(self.table)
+                if row.get('user_id') == user_id
+            ]
+            if pending:
+                known = {row['id'] for row in rows}
+                rows = pending + [row for row in rows if row['id'] not in known]
+                rows.sort(key=lambda row: (str(row.get('created_at', '')), str(row['id'])), reverse=True)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last['created_at'], last['id'])
+
+        return rows, next_cursor
+
+    async def delete(self, summary_id: str) -> None:
+        if self._buffer:
+            await self._buffer.discard(self.table, summary_id)
+        await self._client.delete(self.table, {'id': f"eq.{summary_id}"})
+
+
+class TranscriptRepository:
+    """
+    youtube_transcripts 저장소 (압축된 자막, id = 요약 ID)
+    """
+    table = 'youtube_transcripts'
+
+    def __init__(self, client: SupabaseRestClient, buffer: Optional[WriteBehindBuffer] = None):
+        self._client = client
+        self._buffer = buffer
+
+    async def save(self, row: Dict) -> None:
+        if self._buffer:
+            self._buffer.enqueue(self.table, row)
+            return
+        await self._client.insert(self.table, [row], upsert=True, returning=False)
+
+    async def get(self, summary_id: str) -> Optional[Dict]:
+        if self._buffer:
+            pending = self._buffer.pending(self.table, summary_id)
+            if pending:
+                return pending
+
+        rows = await self._client.select(self.table, filters={'id': f"eq.{summary_id}"}, limit=1)
+        return rows[0] if rows else None
+
+    async def delete(self, summary_id: str) -> None:
+        # DB에서는 ON DELETE CASCADE로 함께 삭제됨 (flush 전 행만 정리)
+        if self._buffer:
+            await self._buffer.discard(self.table, summary_id)
+
+
+class DigestRepository:
+    """
+    transcript_digests 저장소 (자막 구간별 압축 노트, id = 프롬프트 버전 + 구간 sha256)
+    """
+    table = 'transcript_digests'
+    # PostgREST URL 길이 제한 안에서 한 번에 조회할 id 수
+    _SELECT_BATCH = 50
+
+    def __init__(self, client: SupabaseRestClient, buffer: Optional[WriteBehindBuffer] = None):
+        self._client = client
+        self._buffer = buffer
+
+    async def get_many(self, digest_ids: Sequence[str]) -> Dict[str, Dict]:
+        found: Dict[str, Dict] = {}
+        remaining = []
+        for digest_id in digest_ids:
+            pending = self._buffer.pending(self.table, digest_id) if self._buffer else None
+            if pending:
+                found[digest_id] = pending
+            else:
+                remaining.append(digest_id)
+
+        for i in range(0, len(remaining), self._SELECT_BATCH):
+            batch = remaining[i:i + self._SELECT_BATCH]
+            rows = await self._client.select(self.table, filters={'id': f"in.({','.join(batch)})"})
+            found.update({row['id']: row for row in rows})
+        return found
+
+    async def save_many(self, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        if self._buffer:
+            for row in rows:
+                self._buffer.enqueue(self.table, row)
+            return
+        await self._client.insert(self.table, rows, upsert=True, returning=False)
+
+
+class FingerprintRepository:
+    """
+    content_fingerprints 저장소 (웹 / PDF 본문 MinHash 서명 + 공유 요약)
+    """
+    table = 'content_fingerprints'
+
+    def __init__(self, client: SupabaseRestClient, buffer: Optional[WriteBehindBuffer] = None):
+        self._client = client
+        self._buffer = buffer
+
+    async def get(self, fingerprint_id: str) -> Optional[Dict]:
+        if self._buffer:
+            pending = self._buffer.pending(self.table, fingerprint_id)
+            if pending:
+                return pending
+
+        rows = await self._client.select(self.table, filters={'id': f"eq.{fingerprint_id}"}, limit=1)
+        return rows[0] if rows else None
+
+    async def find_by_bands(self, kind: str, band_keys: Sequence[str], limit: int = 20) -> List[Dict]:
+        """
+        LSH 후보: 밴드 키가 하나라도 겹치는 행 (GIN 인덱스, && 연산자)
+        """
+        return await self._client.select(
+            self.table,
+            filters={'kind': f"eq.{kind}", 'bands': f"ov.{{{','.join(band_keys)}}}"},
+            limit=limit
+        )
+
+    async def find_by_url(self, source_url: str) -> Optional[Dict]:
+        rows = await self._client.select(
+            self.table,
+            filters={'source_url': f"eq.{source_url}"},
+            order='created_at.desc',
+            limit=1
+        )
+        return rows[0] if rows else None
+
+    async def save(self, row: Dict) -> None:
+        if self._buffer:
+            self._buffer.enqueue(self.table, row)
+            return
+        await self._client.insert(self.table, [row], upsert=True, returning=False)
+
+
+class NoteRepository:
+    """
+    notes 저장소
+    """
+    table = 'notes'
+
+    def __init__(self, client: SupabaseRestClient, buffer: Optional[WriteBehindBuffer] = None):
+        self._client = client
+        self._buffer = buffer
+
+    async def create(self, row: Dict) -> Dict:
+        if self._buffer:
+            self._buffer.enqueue(self.table, row)
+            return row
+
+        result = await self._client.insert(self.table, [row])
+        return result[0] if result else row
+
+    async def get(self, note_id: str) -> Optional[Dict]:
+        if self._buffer:
+            pending = self._buffer.pending(self.table, note_id)
+            if pending:
+                return pending
+
+        rows = await self._client.select(self.table, filters={'id': f"eq.{note_id}"}, limit=1)
+        return rows[0] if rows else None
+
+    async def list_by_user(self, user_id: str, limit: Optional[int] = None, columns: str = '*') -> List[Dict]:
+        return await self._client.select(
+            self.table,
+            columns=columns,
+            filters={'user_id': f"eq.{user_id}"},
+            order='created_at.desc',
+            limit=limit
+        )
+
+    async def update(self, note_id: str, values: Dict) -> Optional[Dict]:
+        rows = await self._client.update(self.table, values, {'id': f"eq.{note_id}"})
+        return rows[0] if rows else None
+
+    async def delete(self, note_id: str) -> None:
+        if self._buffer:
+            await self._buffer.discard(self.table, note_id)
+        await self._client.delete(self.table, {'id': f"eq.{note_id}"})
+
+
+class FolderRepository:
+    """
+    folders 저장소
+    """
+    table = 'folders'
+
+    def __init__(self, client: SupabaseRestClient, buffer: Optional[WriteBehindBuffer] = None):
+        self._client = client
+
+    async def create(self, row: Dict) -> Dict:
+        result = await self._client.insert(self.table, [row])
+        return result[0] if result else row
+
+    async def list_by_user(self, user_id: str) -> List[Dict]:
+        return await self._client.select(
+            self.table,
+            filters={'user_id': f"eq.{user_id}"},
+            order='position.asc'
+        )
+
+    async def update(self, folder_id: str, values: Dict) -> Optional[Dict]:
+        rows = await self._client.update(self.table, values, {'id': f"eq.{folder_id}"})
+        return rows[0] if rows else None
+
+    async def delete(self, folder_id: str) -> None:
+        await self._client.delete(self.table, {'id': f"eq.{folder_id}"})
+
+
+class EmbeddingRepository:
+    """
+    embeddings 저장소 (pgvector)
+    """
+    table = 'embeddings'
+
+    def __init__(self, client: SupabaseRestClient, buffer: Optional[WriteBehindBuffer] = None):
+        self._client = client
+        self._buffer = buffer
+
+    async def add(self, row: Dict) -> None:
+        if self._buffer:
+            self._buffer.enqueue(self.table, row)
+            return
+        await self._client.insert(self.table, [row], returning=False)
+
+    async def add_many(self, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        if self._buffer:
+            for row in rows:
+                self._buffer.enqueue(self.table, row)
+            return
+        await self._client.insert(self.table, rows, returning=False)
+
+    async def search(
+        self,
+        embedding: List[float],
+        user_id: Optional[str] = None,
+        limit: int = 10,
+        threshold: float = 0.5
+    ) -> List[Dict]:
+        return await self._client.rpc('search_similar_content', {
+            'query_embedding': embedding,
+            'match_threshold': threshold,
+            'match_count': limit,
+            'filter_user_id': user_id,
+        })
+
+    async def delete_for_content(self, content_id: str) -> None:
+        await self._client.delete(self.table, {'content_id': f"eq.{content_id}"})
+
+
+class Repositories:
+    """
+    Supabase 저장소 묶음 (앱 수명 동안 하나)
+    """
+    backend = 'supabase'
+
+    def __init__(self, client: SupabaseRestClient, write_behind: bool = DB_WRITE_BEHIND):
+        self.client = client
+        self.buffer = WriteBehindBuffer(client) if write_behind else None
+        self.summaries = SummaryRepository(client, self.buffer)
+        self.transcripts = TranscriptRepository(client, self.buffer)
+        self.digests = DigestRepository(client, self.buffer)
+        self.notes = NoteRepository(client, self.buffer)
+        self.folders = FolderRepository(client, self.buffer)
+        self.embeddings = EmbeddingRepository(client, self.buffer)
+        self.fingerprints = FingerprintRepository(client, self.buffer)
+
+        # /metrics 스크레이프 시점에 수집하는 게이지
+        if self.buffer:
+            QUEUE_DEPTH.set_function(lambda: self.buffer.depth, queue='write_behind')
+        for state in ('size', 'open', 'in_use'):
+            POOL_CONNECTIONS.set_function(
+                lambda state=state: self.client.pool_stats()[state], pool='supabase', state=state
+            )
+
+    async def start(self) -> None:
+        if self.buffer:
+            self.buffer.start()
+            await self.buffer.retry_spool()
+
+    async def warm(self) -> None:
+        """
+        커넥션 풀 미리 열기 (TLS 핸드셰이크를 첫 요청이 부담하지 않도록)
+        """
+        await asyncio.gather(*(
+            self.client.select('youtube_summaries', columns='id', limit=1)
+            for _ in range(min(DB_POOL_SIZE, 4))
+        ))
+
+    async def close(self) -> None:
+        if self.buffer:
+            await self.buffer.close()
+        await self.client.close()
+
+
+# 전역 저장소 (첫 사용 시 생성, 사용 가능한 백엔드가 없으면 None)
+_repositories = None
+
+
+def get_repositories():
+    """
+    저장소 가져오기
+
+    - STORAGE_BACKEND=supabase: Supabase (미설정이면 None)
+    - STORAGE_BACKEND=sqlite: 내장 SQLite
+    - auto (기본): SUPABASE_URL이 있으면 Supabase, 없으면 SQLite
+    """
+    global _repositories
+
+    if _repositories is not None:
+        return _repositories
+
+    backend = STORAGE_BACKEND
+    if backend == 'auto':
+        backend = 'supabase' if SUPABASE_URL and SUPABASE_KEY else 'sqlite'
+
+    try:
+        if backend == 'sqlite':
+            from services.sqlite_repository import SqliteRepositories, SQLITE_PATH
+            _repositories = SqliteRepositories(SQLITE_PATH)
+            log.success(f"SQLite repository ready ({SQLITE_PATH})")
+        elif SUPABASE_URL and SUPABASE_KEY:
+            _repositories = Repositories(SupabaseRestClient(SUPABASE_URL, SUPABASE_KEY))
+            mode = 'write-behind' if _repositories.buffer else 'write-through'
+            log.success(f"Supabase repository ready ({mode}, pool={DB_POOL_SIZE})")
+    except Exception as e:
+        log.warning(f"Storage backend ({backend}) init failed: {e}")
+        log.info("Running without storage (responses will not be saved)")
+
+    return _repositories
+
+
+async def startup_repositories() -> None:
+    repositories = get_repositories()
+    if repositories:
+        await repositories.start()
+
+
+async def shutdown_repositories() -> None:
+    global _repositories
+
+    if _repositories:
+        await _repositories.close()
+        _repositories = None
@@ -0,0 +1,82 @@
+"""
+API 응답 직렬화
+- 기본 응답 클래스: orjson(설치 시)으로 바로 bytes 직렬화 (없으면 json + jsonable_encoder)
+- 수집 API(요약 생성) 응답 축소: fields= 로 필요한 키만, 자막/본문은 include_transcript=true일 때만
+- 압축은 CompressionMiddleware (services/compression.py)
+"""
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Any, Dict, Iterable, List, Optional
+import json
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def _default(value: Any) -> Any:
+    """
+    orjson이 직접 처리하지 못하는 값 (pydantic 모델, set, Decimal 등)
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode='json')
+    return jsonable_encoder(value)
+
+
+def dumps(payload: Any) -> bytes:
+    """
+    JSON bytes (JSONResponse와 같은 형식: UTF-8, 공백 없음)
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    FastAPI 기본 응답 클래스 (app = FastAPI(default_response_class=FastJSONResponse))
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """
+    fields 쿼리 검증 (작업 전에 호출 - 잘못된 요청으로 요약을 만들지 않도록)
+    """
+    if not fields:
+        return None
+    selected = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in selected if field not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 필드: {', '.join(unknown)}")
+    return selected or None
+
+
+def ingest_response(
+    payload: Any,
+    fields: Optional[List[str]] = None,
+    include_transcript: bool = False,
+    always: Iterable[str] = ('id',),
+) -> FastJSONResponse:
+    """
+    요약 생성 응답 (FastAPI의 응답 검증 / jsonable_encoder를 거치지 않고 바로 직렬화)
+
+    - include_transcript=False면 transcript 제외 (fields로 요청해도 제외)
+    - fields(parse_fields 결과)가 있으면 그 키 + always만
+    """
+    data: Dict[str, Any] = payload.model_dump() if isinstance(payload, BaseModel) else dict(payload)
+    if not include_transcript:
+        data.pop('transcript', None)
+    if fields:
+        keep = set(fields) | set(always)
+        data = {key: value for key, value in data.items() if key in keep}
+    return FastJSONResponse(content=data)
@@ -0,0 +1,602 @@
+"""
+하이브리드 검색 서비스
+- BM25 역색인 (notes + youtube_summaries)
+- 한국어 문자 n-gram 토크나이저
+- 증분 추가/삭제
+- 압축 디스크 포맷 (delta + varint), 저장은 백그라운드 스레드에서 변경을 모아서
+- 벡터 검색 결과와 RRF(Reciprocal Rank Fusion) 결합
+"""
+from array import array
+from services.tracing import get_logger
+from typing import Dict, List, Optional, Tuple, Iterable
+import heapq
+import math
+import os
+import re
+import struct
+import threading
+import time
+import unicodedata
+
+log = get_logger('search')
+
+# 인덱스 파일 경로 / 저장 주기
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', 'data/search_index.bin')
+SEARCH_INDEX_SAVE_INTERVAL = float(os.getenv('SEARCH_INDEX_SAVE_INTERVAL', '5'))
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# RRF 상수 (논문 기본값)
+RRF_K = 60
+
+_MAGIC = b'SNIX'
+_VERSION = 1
+_MAX_TF = 0xFFFF
+
+# 한글/CJK 연속 구간은 n-gram, 영문/숫자/식별자는 단어 단위
+_TOKEN_PATTERN = re.compile(
+    r'[가-힣ㄱ-ㆎ]+'          # 한글 음절 + 자모
+    r'|[぀-ヿ一-鿿]+'          # 일본어 가나 + 한자
+    r'|[a-z0-9_]+(?:[.\-][a-z0-9_]+)*'         # 영문/숫자/코드 식별자
+)
+_CJK_PATTERN = re.compile(r'[぀-ヿ一-鿿가-힣ㄱ-ㆎ]')
+
+
+def tokenize(text: str, ngram: int = 2) -> List[str]:
+    """
+    한국어 인식 토크나이저
+
+    - 한글/CJK: 문자 n-gram (기본 bigram, 한 글자 단어는 unigram)
+    - 영문/숫자: 소문자 단어 + 코드 식별자 (snake_case, a.b.c 는 전체와 부분 모두)
+
+    Args:
+        text: 원문
+        ngram: 한글 n-gram 크기
+
+    Returns:
+        토큰 목록 (중복 포함, tf 계산용)
+    """
+    if not text:
+        return []
+
+    text = unicodedata.normalize('NFKC', text).lower()
+    tokens: List[str] = []
+
+    for match in _TOKEN_PATTERN.finditer(text):
+        run = match.group(0)
+
+        if _CJK_PATTERN.match(run):
+            if len(run) <= ngram:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + ngram] for i in range(len(run) - ngram + 1))
+            continue
+
+        tokens.append(run)
+        # 식별자는 부분 토큰도 색인 (get_video_info → get, video, info)
+        if '_' in run or '.' in run or '-' in run:
+            tokens.extend(part for part in re.split(r'[._\-]+', run) if part and part != run)
+
+    return tokens
+
+
+def _write_varint(buf: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_str(buf: bytearray, value: str) -> None:
+    raw = value.encode('utf-8')
+    _write_varint(buf, len(raw))
+    buf += raw
+
+
+def _read_str(data: bytes, pos: int) -> Tuple[str, int]:
+    length, pos = _read_varint(data, pos)
+    return data[pos:pos + length].decode('utf-8'), pos + length
+
+
+class BM25Index:
+    """
+    증분 업데이트 가능한 BM25 역색인
+
+    - 문서는 내부 정수 ID로 관리 (추가 순서대로 증가)
+    - 포스팅은 term별 array('I') 문서 ID + array('H') tf (문서 ID 오름차순)
+    - 삭제는 툼스톤 처리 후 일정 비율을 넘으면 압축(재번호)
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+        # term 사전
+        self._term_ids: Dict[str, int] = {}
+        self._postings_docs: List[array] = []
+        self._postings_tfs: List[array] = []
+        self._df = array('I')
+
+        # 문서 테이블 (내부 ID 기준)
+        self._doc_keys: List[Optional[str]] = []
+        self._doc_meta: List[Optional[Tuple[str, str]]] = []  # (user_id, content_type)
+        self._doc_terms: List[Optional[array]] = []  # 고유 term ID (삭제 시 df 감소용)
+        self._doc_len = array('I')
+        self._doc_index: Dict[str, int] = {}
+
+        self._total_len = 0
+        self._deleted = 0
+        self.dirty = False
+
+    # ------------------------------------------------------------------
+    # 색인
+    # ------------------------------------------------------------------
+    @property
+    def doc_count(self) -> int:
+        return len(self._doc_index)
+
+    def get_meta(self, content_id: str) -> Optional[Tuple[str, str]]:
+        """
+        (user_id, content_type) 반환 (없으면 None)
+        """
+        with self._lock:
+            doc = self._doc_index.get(content_id)
+            return self._doc_meta[doc] if doc is not None else None
+
+    def add_document(self, content_id: str, text: str, user_id: str = '', content_type: str = 'note') -> None:
+        """
+        문서 추가 (이미 있으면 교체)
+        """
+        tokens = tokenize(text)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        with self._lock:
+            if content_id in self._doc_index:
+                self._remove_locked(content_id)
+
+            doc = len(self._doc_keys)
+            term_ids = array('I')
+
+            for term, tf in counts.items():
+                term_id = self._term_ids.get(term)
+                if term_id is None:
+                    term_id = len(self._postings_docs)
+                    self._term_ids[term] = term_id
+                    self._postings_docs.append(array('I'))
+                    self._postings_tfs.append(array('H'))
+                    self._df.append(0)
+                self._postings_docs[term_id].append(doc)
+                self._postings_tfs[term_id].append(min(tf, _MAX_TF))
+                self._df[term_id] += 1
+                term_ids.append(term_id)
+
+            self._doc_keys.append(content_id)
+            self._doc_meta.append((user_id or '', content_type or ''))
+            self._doc_terms.append(term_ids)
+            self._doc_len.append(len(tokens))
+            self._doc_index[content_id] = doc
+            self._total_len += len(tokens)
+            self.dirty = True
+
+    def remove_document(self, content_id: str) -> bool:
+        """
+        문서 삭제 (없으면 False)
+        """
+        with self._lock:
+            if content_id not in self._doc_index:
+                return False
+            self._remove_locked(content_id)
+            self.dirty = True
+
+            # 툼스톤이 많아지면 압축
+            if self._deleted > 1000 and self._deleted * 4 > len(self._doc_keys):
+                self._compact_locked()
+            return True
+
+    def _remove_locked(self, content_id: str) -> None:
+        doc = self._doc_index.pop(content_id)
+        for term_id in self._doc_terms[doc]:
+            self._df[term_id] -= 1
+        self._total_len -= self._doc_len[doc]
+        self._doc_keys[doc] = None
+        self._doc_meta[doc] = None
+        self._doc_terms[doc] = None
+        self._deleted += 1
+
+    def _compact_locked(self) -> None:
+        """
+        삭제된 문서를 포스팅에서 제거하고 내부 ID 재번호
+        """
+        remap = array('i', [-1]) * len(self._doc_keys)
+        doc_keys, doc_meta, doc_terms, doc_len = [], [], [], array('I')
+
+        for old, key in enumerate(self._doc_keys):
+            if key is None:
+                continue
+            remap[old] = len(doc_keys)
+            doc_keys.append(key)
+            doc_meta.append(self._doc_meta[old])
+            doc_terms.append(self._doc_terms[old])
+            doc_len.append(self._doc_len[old])
+
+        for term_id, docs in enumerate(self._postings_docs):
+            tfs = self._postings_tfs[term_id]
+            new_docs, new_tfs = array('I'), array('H')
+            for doc, tf in zip(docs, tfs):
+                new_id = remap[doc]
+                if new_id >= 0:
+                    new_docs.append(new_id)
+                    new_tfs.append(tf)
+            self._postings_docs[term_id] = new_docs
+            self._postings_tfs[term_id] = new_tfs
+
+        self._doc_keys = doc_keys
+        self._doc_meta = doc_meta
+        self._doc_terms = doc_terms
+        self._doc_len = doc_len
+        self._doc_index = {key: i for i, key in enumerate(doc_keys)}
+        self._deleted = 0
+
+    # ------------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------------
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        user_id: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        BM25 검색
+
+        Returns:
+            (content_id, score) 목록 (점수 내림차순)
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return []
+
+        with self._lock:
+            n_docs = len(self._doc_index)
+            if n_docs == 0:
+                return []
+            avgdl = self._total_len / n_docs
+            scores: Dict[int, float] = {}
+
+            for term in query_terms:
+                term_id = self._term_ids.get(term)
+                if term_id is None:
+                    continue
+                df = self._df[term_id]
+                if df == 0:
+                    continue
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                docs = self._postings_docs[term_id]
+                tfs = self._postings_tfs[term_id]
+                doc_len = self._doc_len
+                meta = self._doc_meta
+
+                for doc, tf in zip(docs, tfs):
+                    doc_meta = meta[doc]
+                    if doc_meta is None:
+                        continue
+                    if user_id is not None and doc_meta[0] != user_id:
+                        continue
+                    if content_type is not None and doc_meta[1] != content_type:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[doc] / avgdl)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(self._doc_keys[doc], score) for doc, score in top]
+
+    # ------------------------------------------------------------------
+    # 디스크 저장 / 로드
+    # ------------------------------------------------------------------
+    def to_bytes(self) -> bytes:
+        """
+        압축 바이너리 포맷으로 직렬화
+
+        포맷: magic | version | n_docs | n_terms
+              | docs(key, user_id, content_type, len)
+              | terms(term, n, delta doc ids..., tfs...)
+        살아있는 문서만 0부터 재번호해서 저장
+        """
+        with self._lock:
+            remap: Dict[int, int] = {}
+            doc_buf = bytearray()
+            for old, key in enumerate(self._doc_keys):
+                if key is None:
+                    continue
+                remap[old] = len(remap)
+                user_id, content_type = self._doc_meta[old]
+                _write_str(doc_buf, key)
+                _write_str(doc_buf, user_id)
+                _write_str(doc_buf, content_type)
+                _write_varint(doc_buf, self._doc_len[old])
+
+            term_buf = bytearray()
+            n_terms = 0
+            for term, term_id in self._term_ids.items():
+                if self._df[term_id] == 0:
+                    continue
+                pairs = [
+                    (remap[doc], tf)
+                    for doc, tf in zip(self._postings_docs[term_id], self._postings_tfs[term_id])
+                    if doc in remap
+                ]
+                n_terms += 1
+                _write_str(term_buf, term)
+                _write_varint(term_buf, len(pairs))
+                prev = 0
+                for doc, _ in pairs:
+                    _write_varint(term_buf, doc - prev)
+                    prev = doc
+                for _, tf in pairs:
+                    _write_varint(term_buf, tf)
+
+            header = _MAGIC + struct.pack('<HII', _VERSION, len(remap), n_terms)
+            return bytes(header + doc_buf + term_buf)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BM25Index':
+        """
+        to_bytes() 결과에서 인덱스 복원
+        """
+        if data[:4] != _MAGIC:
+            raise ValueError("검색 인덱스 파일 형식이 올바르지 않습니다")
+        version, n_docs, n_terms = struct.unpack_from('<HII', data, 4)
+        if version != _VERSION:
+            raise ValueError(f"지원하지 않는 검색 인덱스 버전: {version}")
+
+        index = cls()
+        pos = 4 + struct.calcsize('<HII')
+        doc_terms: List[array] = [array('I') for _ in range(n_docs)]
+
+        for doc in range(n_docs):
+            key, pos = _read_str(data, pos)
+            user_id, pos = _read_str(data, pos)
+            content_type, pos = _read_str(data, pos)
+            length, pos = _read_varint(data, pos)
+            index._doc_keys.append(key)
+            index._doc_meta.append((user_id, content_type))
+            index._doc_len.append(length)
+            index._doc_index[key] = doc
+            index._total_len += length
+
+        for term_id in range(n_terms):
+            term, pos = _read_str(data, pos)
+            count, pos = _read_varint(data, pos)
+            docs, tfs = array('I'), array('H')
+            doc = 0
+            for _ in range(count):
+                delta, pos = _read_varint(data, pos)
+                doc += delta
+                docs.append(doc)
+                doc_terms[doc].append(term_id)
+            for _ in range(count):
+                tf, pos = _read_varint(data, pos)
+                tfs.append(tf)
+            index._term_ids[term] = term_id
+            index._postings_docs.append(docs)
+            index._postings_tfs.append(tfs)
+            index._df.append(count)
+
+        index._doc_terms = doc_terms
+        return index
+
+    def save(self, path: str) -> int:
+        """
+        원자적 저장 (임시 파일 → rename). 저장된 바이트 수 반환
+        """
+        with self._lock:
+            # 직렬화한 시점까지의 변경만 저장됨 (쓰는 동안 들어온 변경은 dirty로 남음)
+            data = self.to_bytes()
+            self.dirty = False
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            self.dirty = True
+            raise
+        return len(data)
+
+    @classmethod
+    def load(cls, path: str) -> 'BM25Index':
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Iterable[List[str]],
+    k: int = RRF_K,
+    limit: Optional[int] = None
+) -> List[Tuple[str, float]]:
+    """
+    여러 순위 목록을 RRF로 결합: score(d) = Σ 1 / (k + rank)
+
+    Args:
+        ranked_lists: content_id 목록들 (각각 순위순)
+        k: RRF 상수
+        limit: 최대 결과 수
+
+    Returns:
+        (content_id, rrf_score) 목록
+    """
+    scores: Dict[str, float] = {}
+    for ranked in ranked_lists:
+        for rank, content_id in enumerate(ranked, start=1):
+            scores[content_id] = scores.get(content_id, 0.0) + 1.0 / (k + rank)
+
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return fused[:limit] if limit else fused
+
+
+# ----------------------------------------------------------------------
+# 전역 인덱스 (프로세스당 하나)
+# ----------------------------------------------------------------------
+_search_index: Optional[BM25Index] = None
+_index_lock = threading.Lock()
+_save_lock = threading.Lock()
+_last_saved = 0.0
+# 변경 알림 → 저장 스레드가 SEARCH_INDEX_SAVE_INTERVAL 동안 모은 변경을 한 번에 저장
+_save_requested = threading.Event()
+_saver: Optional[threading.Thread] = None
+
+
+def get_search_index() -> BM25Index:
+    """
+    검색 인덱스 로드 (싱글톤, 디스크에 있으면 복원)
+    """
+    global _search_index
+
+    if _search_index is None:
+        with _index_lock:
+            if _search_index is None:
+                if os.path.exists(SEARCH_INDEX_PATH):
+                    try:
+                        _search_index = BM25Index.load(SEARCH_INDEX_PATH)
+                        log.info(f"검색 인덱스 로드: {_search_index.doc_count}개 문서")
+                    except Exception as e:
+                        log.warning(f"검색 인덱스 로드 실패, 새로 생성: {e}")
+                if _search_index is None:
+                    _search_index = BM25Index()
+
+    return _search_index
+
+
+def save_search_index(force: bool = False) -> None:
+    """
+    변경된 인덱스를 디스크에 저장 (SEARCH_INDEX_SAVE_INTERVAL 간격으로 제한)
+    """
+    global _last_saved
+
+    index = get_search_index()
+    if not index.dirty:
+        return
+    now = time.monotonic()
+    if not force and now - _last_saved < SEARCH_INDEX_SAVE_INTERVAL:
+        return
+
+    try:
+        with _save_lock:
+            size = index.save(SEARCH_INDEX_PATH)
+        _last_saved = now
+        log.info(f"검색 인덱스 저장: {index.doc_count}개 문서, {size} bytes")
+    except Exception as e:
+        log.warning(f"검색 인덱스 저장 실패: {e}")
+
+
+def _save_loop() -> None:
+    while True:
+        _save_requested.wait()
+        time.sleep(SEARCH_INDEX_SAVE_INTERVAL)
+        _save_requested.clear()
+        save_search_index(force=True)
+
+
+def request_save() -> None:
+    """
+    저장 예약 (직렬화 + 파일 쓰기는 백그라운드 스레드에서, 호출한 쪽은 기다리지 않음)
+    """
+    global _saver
+    _save_requested.set()
+    if _saver is None:
+        with _index_lock:
+            if _saver is None:
+                _saver = threading.Thread(target=_save_loop, name='search-index-saver', daemon=True)
+                _saver.start()
+
+
+def build_document_text(*parts: Optional[str]) -> str:
+    """
+    색인할 텍스트 조합 (제목, 본문, 태그 등)
+    """
+    return '\n'.join(part for part in parts if part)
+
+
+def index_document(content_id: str, text: str, user_id: str = '', content_type: str = 'note') -> None:
+    """
+    문서 색인 (추가/교체) 후 저장 예약 - 토큰화 CPU 작업이므로 run_in_threadpool로 호출
+    """
+    get_search_index().add_document(content_id, text, user_id=user_id, content_type=content_type)
+    request_save()
+
+
+def remove_document(content_id: str) -> bool:
+    """
+    문서 색인 제거 후 저장 예약 (압축이 일어날 수 있으므로 run_in_threadpool로 호출)
+    """
+    removed = get_search_index().remove_document(content_id)
+    if removed:
+        request_save()
+    return removed
+
+
+def hybrid_search(
+    query: str,
+    limit: int = 10,
+    user_id: Optional[str] = None,
+    content_type: Optional[str] = None,
+    vector_results: Optional[List[str]] = None,
+    text_results: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    BM25 + 벡터 검색 결과를 RRF로 결합 (CPU 작업이므로 run_in_threadpool로 호출)
+
+    Args:
+        query: 검색어
+        limit: 최대 결과 수
+        user_id: 사용자 필터
+        content_type: 'note' / 'youtube' / None
+        vector_results: 벡터 검색 content_id 목록 (유사도순)
+        text_results: 저장소 전문 검색(SQLite FTS5 등) content_id 목록 (선택)
+
+    Returns:
+        [{'id', 'score', 'bm25_rank', 'vector_rank'}]
+    """
+    # 후보를 넉넉히 가져와서 결합
+    candidates = max(limit * 3, 30)
+    bm25_hits = get_search_index().search(query, limit=candidates, user_id=user_id, content_type=content_type)
+    bm25_ranked = [content_id for content_id, _ in bm25_hits]
+    vector_ranked = list(vector_results or [])
+
+    bm25_rank = {content_id: i + 1 for i, content_id in enumerate(bm25_ranked)}
+    vector_rank = {content_id: i + 1 for i, content_id in enumerate(vector_ranked)}
+
+    rankings = [bm25_ranked, vector_ranked]
+    if text_results:
+        rankings.append(list(text_results))
+    fused = reciprocal_rank_fusion(rankings, limit=limit)
+    index = get_search_index()
+    return [
+        {
+            'id': content_id,
+            'content_type': (index.get_meta(content_id) or (None, None))[1],
+            'score': score,
+            'bm25_rank': bm25_rank.get(content_id),
+            'vector_rank': vector_rank.get(content_id),
+        }
+        for content_id, score in fused
+    ]
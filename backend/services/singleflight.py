@@ -0,0 +1,228 @@
+"""
+Single-flight 요청 병합 서비스
+- 같은 키(예: YouTube 비디오 ID)로 동시에 들어온 요청은 하나의 파이프라인만 실행
+- 프로세스 내부: 진행 중인 Future에 합류
+- 워커 간: lease 파일(O_EXCL 생성 + heartbeat)로 한 워커만 실행,
+  나머지는 결과 파일이 생길 때까지 대기 후 결과 공유
+- 결과 파일은 SINGLEFLIGHT_RESULT_TTL이 지나면 삭제 (결과를 쓸 때 만료된 파일을 함께 정리)
+- 실행하던 요청이 취소되면 합류한 요청 중 하나가 이어서 실행
+"""
+from fastapi.concurrency import run_in_threadpool
+from services.metrics import CACHE_EVENTS, QUEUE_DEPTH
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import hashlib
+import json
+import os
+import time
+from services.tracing import get_logger
+
+log = get_logger('singleflight')
+
+SINGLEFLIGHT_DIR = os.getenv('SINGLEFLIGHT_DIR', 'downloads/.singleflight')
+# 결과 파일 재사용 시간 (초) - 몇 초 간격으로 몰리는 같은 요청 흡수
+SINGLEFLIGHT_RESULT_TTL = float(os.getenv('SINGLEFLIGHT_RESULT_TTL', '60'))
+# heartbeat 간격 / 이 시간 이상 갱신이 없으면 lease 소유 워커가 죽은 것으로 판단
+SINGLEFLIGHT_HEARTBEAT_SECONDS = float(os.getenv('SINGLEFLIGHT_HEARTBEAT_SECONDS', '10'))
+SINGLEFLIGHT_STALE_SECONDS = float(os.getenv('SINGLEFLIGHT_STALE_SECONDS', '60'))
+SINGLEFLIGHT_POLL_SECONDS = 0.5
+
+# 실행하던 요청이 취소됨 → 합류한 요청이 다시 시도
+_LEADER_CANCELLED = object()
+
+
+class SingleFlight:
+    """
+    키 단위 요청 병합
+
+    사용법:
+        flights = SingleFlight('youtube')
+        result = await flights.run(video_id, process_youtube_video, url)
+    """
+
+    def __init__(self, namespace: str, directory: str = SINGLEFLIGHT_DIR):
+        self.namespace = namespace
+        self._directory = os.path.join(directory, namespace)
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._last_sweep = 0.0
+
+        # 통계 (병합된 요청 수 등)
+        self.leader_count = 0
+        self.coalesced_count = 0
+        self.shared_result_count = 0
+        QUEUE_DEPTH.set_function(lambda: self.in_flight, queue=f"singleflight_{namespace}")
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _paths(self, key: str):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        base = os.path.join(self._directory, digest)
+        return f"{base}.lease", f"{base}.result.json"
+
+    async def run(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        fn(*args, **kwargs)를 키 단위로 한 번만 실행 (블로킹 함수는 스레드풀에서 실행)
+        """
+        call = self._calls.get(key)
+        while call is not None:
+            self.coalesced_count += 1
+            CACHE_EVENTS.inc(cache=f"singleflight_{self.namespace}", result='coalesced')
+            log.info(f"진행 중인 요청에 합류: {self.namespace}:{key}")
+            result = await asyncio.shield(call)
+            if result is not _LEADER_CANCELLED:
+                return result
+            # 먼저 깨어난 요청이 새로 실행하고 나머지는 다시 합류
+            log.info(f"실행 중이던 요청이 취소됨, 이어서 실행: {self.namespace}:{key}")
+            call = self._calls.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        # 기다리는 쪽이 없을 때 예외 미확인 경고 방지
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[key] = future
+
+        try:
+            result = await self._run_across_workers(key, fn, args, kwargs)
+        except asyncio.CancelledError:
+            # 이 요청만 취소 → 합류한 요청은 실패시키지 않음
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(key, None)
+
+    async def _run_across_workers(self, key: str, fn: Callable, args, kwargs) -> Any:
+        os.makedirs(self._directory, exist_ok=True)
+        lease_path, result_path = self._paths(key)
+        waited = False
+
+        while True:
+            # 1. 다른 워커가 방금 끝낸 결과가 있으면 재사용
+            cached = self._read_result(result_path)
+            if cached is not None:
+                self.shared_result_count += 1
+                CACHE_EVENTS.inc(cache=f"singleflight_{self.namespace}", result='hit')
+                if waited:
+                    log.info(f"다른 워커의 결과 공유: {self.namespace}:{key}")
+                return cached
+
+            # 2. lease 획득 시도 → 성공하면 직접 실행
+            if self._acquire(lease_path):
+                break
+
+            # 3. 다른 워커가 실행 중 → 대기 (죽은 lease는 제거)
+            if not waited:
+                log.info(f"다른 워커에서 처리 중, 대기: {self.namespace}:{key}")
+                waited = True
+            if self._is_stale(lease_path):
+                log.warning(f"만료된 lease 제거: {lease_path}")
+                self._remove(lease_path)
+                continue
+            await asyncio.sleep(SINGLEFLIGHT_POLL_SECONDS)
+
+        self.leader_count += 1
+        CACHE_EVENTS.inc(cache=f"singleflight_{self.namespace}", result='miss')
+        heartbeat = asyncio.create_task(self._heartbeat(lease_path))
+        try:
+            result = await run_in_threadpool(fn, *args, **kwargs)
+            self._write_result(result_path, result)
+            return result
+        finally:
+            heartbeat.cancel()
+            self._remove(lease_path)
+
+    @staticmethod
+    def _acquire(lease_path: str) -> bool:
+        try:
+            fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"{os.getpid()} {time.time()}")
+        return True
+
+    @staticmethod
+    def _is_stale(lease_path: str) -> bool:
+        try:
+            return time.time() - os.path.getmtime(lease_path) > SINGLEFLIGHT_STALE_SECONDS
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    async def _heartbeat(lease_path: str) -> None:
+        while True:
+            await asyncio.sleep(SINGLEFLIGHT_HEARTBEAT_SECONDS)
+            try:
+                os.utime(lease_path, None)
+            except FileNotFoundError:
+                return
+
+    def _write_result(self, result_path: str, result: Any) -> None:
+        """
+        결과를 임시 파일에 쓰고 rename (대기 중인 워커가 쓰다 만 파일을 읽지 않도록)
+        """
+        try:
+            tmp_path = f"{result_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, result_path)
+        except Exception as e:
+            log.warning(f"single-flight 결과 저장 실패: {e}")
+
+        # 다시 조회되지 않은 키의 결과 파일도 남지 않도록 (TTL 간격으로 한 번씩)
+        now = time.time()
+        if now - self._last_sweep >= SINGLEFLIGHT_RESULT_TTL:
+            self._last_sweep = now
+            self.sweep(now)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        만료된 결과 파일 / 남은 임시 파일 삭제
+
+        Returns:
+            삭제한 파일 수
+        """
+        now = now or time.time()
+        removed = 0
+        try:
+            with os.scandir(self._directory) as it:
+                for entry in it:
+                    if entry.name.endswith('.result.json'):
+                        ttl = SINGLEFLIGHT_RESULT_TTL
+                    elif entry.name.endswith('.tmp'):
+                        ttl = SINGLEFLIGHT_STALE_SECONDS
+                    else:
+                        continue
+                    try:
+                        if now - entry.stat().st_mtime > ttl:
+                            self._remove(entry.path)
+                            removed += 1
+                    except FileNotFoundError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return removed
+
+    @classmethod
+    def _read_result(cls, result_path: str) -> Optional[Any]:
+        try:
+            if time.time() - os.path.getmtime(result_path) > SINGLEFLIGHT_RESULT_TTL:
+                cls._remove(result_path)
+                return None
+            with open(result_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
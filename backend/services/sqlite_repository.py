@@ -0,0 +1,745 @@
+"""
+내장 SQLite 저장소 (Supabase 저장소와 같은 인터페이스)
+- 단일 노드 배포 / 오프라인 부하 테스트용
+- WAL 모드 (읽기와 쓰기 동시 진행), 스레드별 읽기 커넥션
+- 문장 캐시(prepared statement) 재사용
+- FTS5 전문 검색 (notes + youtube_summaries)
+- 임베딩은 float32 BLOB, 코사인 유사도는 메모리에서 계산 (NumPy 있으면 행렬 곱)
+- 모든 쿼리는 스레드풀에서 실행 (이벤트 루프 블로킹 방지)
+"""
+from array import array
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, List, Optional, Sequence, Tuple
+import base64
+import json
+import math
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from services.metrics import track_dependency
+
+try:
+    import numpy
+except ImportError:  # 선택 의존성
+    numpy = None
+from services.repository import (
+    SUMMARY_COLUMNS,
+    SUMMARY_DETAIL_FIELDS,
+    SUMMARY_LIST_FIELDS,
+    NOTE_COLUMNS,
+    FOLDER_COLUMNS,
+    encode_cursor,
+    decode_cursor,
+    resolve_fields,
+)
+
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/supremenote.db')
+SQLITE_CACHE_STATEMENTS = int(os.getenv('SQLITE_CACHE_STATEMENTS', '256'))
+# 벡터 검색 시 사용자별로 훑는 최대 임베딩 수 (최근 것부터)
+SQLITE_EMBEDDING_SCAN_LIMIT = int(os.getenv('SQLITE_EMBEDDING_SCAN_LIMIT', '20000'))
+
+# JSON으로 저장하는 배열 컬럼 (Postgres TEXT[])
+_JSON_COLUMNS = {'key_points', 'tags'}
+_BOOL_COLUMNS = {'is_favorite'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+  id TEXT PRIMARY KEY,
+  user_id TEXT NOT NULL,
+  name TEXT NOT NULL,
+  color TEXT DEFAULT '#3b82f6',
+  icon TEXT DEFAULT '📁',
+  parent_id TEXT REFERENCES folders(id) ON DELETE CASCADE,
+  position INTEGER DEFAULT 0,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS notes (
+  id TEXT PRIMARY KEY,
+  user_id TEXT NOT NULL,
+  folder_id TEXT REFERENCES folders(id) ON DELETE SET NULL,
+  title TEXT NOT NULL,
+  content TEXT NOT NULL,
+  tags TEXT DEFAULT '[]',
+  is_favorite INTEGER DEFAULT 0,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS youtube_summaries (
+  id TEXT PRIMARY KEY,
+  user_id TEXT NOT NULL,
+  video_url TEXT NOT NULL,
+  video_id TEXT NOT NULL,
+  title TEXT NOT NULL,
+  thumbnail_url TEXT,
+  duration INTEGER,
+  summary TEXT NOT NULL,
+  key_points TEXT,
+  transcript TEXT,
+  created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS youtube_transcripts (
+  id TEXT PRIMARY KEY REFERENCES youtube_summaries(id) ON DELETE CASCADE,
+  user_id TEXT NOT NULL,
+  codec TEXT NOT NULL,
+  content_hash TEXT NOT NULL,
+  segment_count INTEGER NOT NULL,
+  raw_size INTEGER NOT NULL,
+  compressed_size INTEGER NOT NULL,
+  data BLOB NOT NULL,
+  timing BLOB,
+  created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS transcript_digests (
+  id TEXT PRIMARY KEY,
+  digest TEXT NOT NULL,
+  source_tokens INTEGER,
+  digest_tokens INTEGER,
+  created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS content_fingerprints (
+  id TEXT PRIMARY KEY,
+  kind TEXT NOT NULL,
+  source_url TEXT,
+  title TEXT,
+  summary TEXT NOT NULL,
+  key_points TEXT,
+  meta TEXT,
+  signature TEXT NOT NULL,
+  created_at TEXT NOT NULL
+);
+
+-- LSH 밴드 키 → 서명 (Postgres는 bands TEXT[] + GIN)
+CREATE TABLE IF NOT EXISTS content_fingerprint_bands (
+  band_key TEXT NOT NULL,
+  fingerprint_id TEXT NOT NULL REFERENCES content_fingerprints(id) ON DELETE CASCADE,
+  PRIMARY KEY (band_key, fingerprint_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS embeddings (
+  id TEXT PRIMARY KEY,
+  user_id TEXT NOT NULL,
+  content_id TEXT NOT NULL,
+  content_type TEXT NOT NULL,
+  content TEXT NOT NULL,
+  embedding BLOB,
+  created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_folders_user_id ON folders(user_id, position);
+CREATE INDEX IF NOT EXISTS idx_notes_user_created ON notes(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_youtube_user_created ON youtube_summaries(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_content_fingerprints_url ON content_fingerprints(source_url, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_embeddings_user_created ON embeddings(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_embeddings_content_id ON embeddings(content_id);
+
+-- 전문 검색 (external content 없이 독립 테이블, 트리거로 동기화)
+CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5(
+  content_id UNINDEXED,
+  user_id UNINDEXED,
+  content_type UNINDEXED,
+  title,
+  body,
+  tokenize = '{tokenizer}'
+);
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+  INSERT INTO content_fts (content_id, user_id, content_type, title, body)
+  VALUES (new.id, new.user_id, 'note', new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF title, content ON notes BEGIN
+  DELETE FROM content_fts WHERE content_id = old.id;
+  INSERT INTO content_fts (content_id, user_id, content_type, title, body)
+  VALUES (new.id, new.user_id, 'note', new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+  DELETE FROM content_fts WHERE content_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS youtube_fts_insert AFTER INSERT ON youtube_summaries BEGIN
+  INSERT INTO content_fts (content_id, user_id, content_type, title, body)
+  VALUES (new.id, new.user_id, 'youtube', new.title, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS youtube_fts_delete AFTER DELETE ON youtube_summaries BEGIN
+  DELETE FROM content_fts WHERE content_id = old.id;
+END;
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _encode_value(column: str, value):
+    if column in _JSON_COLUMNS:
+        return json.dumps(value or [], ensure_ascii=False)
+    if column in _BOOL_COLUMNS:
+        return int(bool(value))
+    return value
+
+
+def _decode_row(row: sqlite3.Row) -> Dict:
+    result = {}
+    for column in row.keys():
+        value = row[column]
+        if column in _JSON_COLUMNS and value is not None:
+            value = json.loads(value)
+        elif column in _BOOL_COLUMNS and value is not None:
+            value = bool(value)
+        result[column] = value
+    return result
+
+
+def _fts_tokenizer() -> str:
+    """
+    trigram 토크나이저 (SQLite 3.34+, 한국어 부분 일치) 없으면 unicode61
+    """
+    try:
+        probe = sqlite3.connect(':memory:')
+        probe.execute("CREATE VIRTUAL TABLE probe USING fts5(a, tokenize='trigram')")
+        probe.close()
+        return 'trigram'
+    except sqlite3.OperationalError:
+        return 'unicode61'
+
+
+class SqliteDatabase:
+    """
+    SQLite 연결 관리
+
+    - 쓰기: 단일 커넥션 + 락 (SQLite는 writer가 하나)
+    - 읽기: 스레드별 커넥션 (WAL이라 쓰기와 동시 진행)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._writer = self._connect()
+        self.tokenizer = _fts_tokenizer()
+        with self._write_lock:
+            self._writer.executescript(_SCHEMA.replace('{tokenizer}', self.tokenizer))
+            self._migrate()
+
+    def _migrate(self) -> None:
+        """
+        예전 DB 파일에 나중에 추가된 컬럼 보충
+        """
+        columns = {row[1] for row in self._writer.execute("PRAGMA table_info(youtube_transcripts)")}
+        if 'timing' not in columns:
+            self._writer.execute("ALTER TABLE youtube_transcripts ADD COLUMN timing BLOB")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=SQLITE_CACHE_STATEMENTS,
+            isolation_level=None,  # autocommit, 트랜잭션은 명시적으로
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.execute('PRAGMA busy_timeout=5000')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA mmap_size=268435456')
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        # :memory: DB는 커넥션마다 별도 DB라서 writer 공유
+        if self.path == ':memory:':
+            return self._writer
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._write_lock:
+                self._readers.append(conn)
+        return conn
+
+    def query(self, sql: str, params: Sequence = ()) -> List[Dict]:
+        with track_dependency('sqlite', 'query'):
+            if self.path == ':memory:':
+                with self._write_lock:
+                    return [_decode_row(row) for row in self._writer.execute(sql, params).fetchall()]
+            return [_decode_row(row) for row in self._reader().execute(sql, params).fetchall()]
+
+    def execute(self, sql: str, params: Sequence = ()) -> int:
+        with track_dependency('sqlite', 'execute'), self._write_lock:
+            return self._writer.execute(sql, params).rowcount
+
+    def execute_many(self, sql: str, rows: List[Sequence]) -> None:
+        with track_dependency('sqlite', 'execute_many'), self._write_lock:
+            self._writer.execute('BEGIN')
+            try:
+                self._writer.executemany(sql, rows)
+                self._writer.execute('COMMIT')
+            except Exception:
+                self._writer.execute('ROLLBACK')
+                raise
+
+    def insert(self, table: str, row: Dict, upsert: bool = False) -> None:
+        columns = list(row.keys())
+        sql = (
+            f"INSERT {'OR REPLACE ' if upsert else ''}INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        self.execute(sql, [_encode_value(column, row[column]) for column in columns])
+
+    # ---- 비동기 (스레드풀에서 실행: 이벤트 루프를 막지 않고, 읽기는 스레드별 커넥션으로 동시 진행) ----
+
+    async def aquery(self, sql: str, params: Sequence = ()) -> List[Dict]:
+        return await run_in_threadpool(self.query, sql, params)
+
+    async def aexecute(self, sql: str, params: Sequence = ()) -> int:
+        return await run_in_threadpool(self.execute, sql, params)
+
+    async def aexecute_many(self, sql: str, rows: List[Sequence]) -> None:
+        await run_in_threadpool(self.execute_many, sql, rows)
+
+    async def ainsert(self, table: str, row: Dict, upsert: bool = False) -> None:
+        await run_in_threadpool(self.insert, table, row, upsert)
+
+    def close(self) -> None:
+        with self._write_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+            self._writer.close()
+
+
+def _filter_row(row: Dict, allowed: Sequence[str]) -> Dict:
+    return {column: value for column, value in row.items() if column in allowed}
+
+
+class SqliteSummaryRepository:
+    table = 'youtube_summaries'
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    async def create(self, row: Dict) -> Dict:
+        row = _filter_row(row, SUMMARY_COLUMNS)
+        row.setdefault('id', str(uuid.uuid4()))
+        row.setdefault('created_at', _now())
+        await self._db.ainsert(self.table, row)
+        return row
+
+    async def get(self, summary_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        columns = resolve_fields(fields, SUMMARY_COLUMNS, SUMMARY_DETAIL_FIELDS)
+        rows = await self._db.aquery(f"SELECT {', '.join(columns)} FROM {self.table} WHERE id = ?", (summary_id,))
+        return rows[0] if rows else None
+
+    async def list_by_user(self, user_id: str, limit: Optional[int] = 20) -> List[Dict]:
+        return await self._db.aquery(
+            f"SELECT * FROM {self.table} WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+            (user_id, -1 if limit is None else limit)
+        )
+
+    async def list_page(
+        self,
+        user_id: str,
+        limit: int = 20,
+        fields: Optional[Sequence[str]] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        columns = resolve_fields(fields, SUMMARY_COLUMNS, SUMMARY_LIST_FIELDS)
+        sql = f"SELECT {', '.join(columns)} FROM {self.table} WHERE user_id = ?"
+        params: List = [user_id]
+        if cursor:
+            created_at, row_id = decode_cursor(cursor)
+            sql += " AND (created_at < ? OR (created_at = ? AND id < ?))"
+            params += [created_at, created_at, row_id]
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = await self._db.aquery(sql, params)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+        return rows, next_cursor
+
+    async def delete(self, summary_id: str) -> None:
+        await self._db.aexecute(f"DELETE FROM {self.table} WHERE id = ?", (summary_id,))
+
+
+class SqliteTranscriptRepository:
+    table = 'youtube_transcripts'
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    async def save(self, row: Dict) -> None:
+        row = dict(row)
+        row['data'] = base64.b64decode(row['data'])  # SQLite에는 BLOB 그대로 저장
+        if row.get('timing'):
+            row['timing'] = base64.b64decode(row['timing'])
+        row.setdefault('created_at', _now())
+        await self._db.ainsert(self.table, row, upsert=True)
+
+    async def get(self, summary_id: str) -> Optional[Dict]:
+        rows = await self._db.aquery(f"SELECT * FROM {self.table} WHERE id = ?", (summary_id,))
+        if not rows:
+            return None
+        row = rows[0]
+        row['data'] = base64.b64encode(row['data']).decode('ascii')
+        if row.get('timing'):
+            row['timing'] = base64.b64encode(row['timing']).decode('ascii')
+        return row
+
+    async def delete(self, summary_id: str) -> None:
+        # youtube_summaries 삭제 시 ON DELETE CASCADE
+        await self._db.aexecute(f"DELETE FROM {self.table} WHERE id = ?", (summary_id,))
+
+
+class SqliteDigestRepository:
+    table = 'transcript_digests'
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    async def get_many(self, digest_ids: Sequence[str]) -> Dict[str, Dict]:
+        found: Dict[str, Dict] = {}
+        ids = list(digest_ids)
+        # SQLite 변수 개수 제한 (기본 999) 안에서 나눠 조회
+        for i in range(0, len(ids), 500):
+            batch = ids[i:i + 500]
+            rows = await self._db.aquery(
+                f"SELECT * FROM {self.table} WHERE id IN ({','.join('?' * len(batch))})", batch
+            )
+            found.update({row['id']: row for row in rows})
+        return found
+
+    async def save_many(self, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        await self._db.aexecute_many(
+            f"INSERT OR REPLACE INTO {self.table} (id, digest, source_tokens, digest_tokens, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (row['id'], row['digest'], row.get('source_tokens'), row.get('digest_tokens'), row.get('created_at') or _now())
+                for row in rows
+            ]
+        )
+
+
+class SqliteFingerprintRepository:
+    table = 'content_fingerprints'
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    @staticmethod
+    def _decode(row: Dict) -> Dict:
+        if row.get('meta') is not None:
+            row['meta'] = json.loads(row['meta'])
+        return row
+
+    async def get(self, fingerprint_id: str) -> Optional[Dict]:
+        rows = await self._db.aquery(f"SELECT * FROM {self.table} WHERE id = ?", (fingerprint_id,))
+        return self._decode(rows[0]) if rows else None
+
+    async def find_by_bands(self, kind: str, band_keys: Sequence[str], limit: int = 20) -> List[Dict]:
+        keys = list(band_keys)
+        if not keys:
+            return []
+        rows = await self._db.aquery(
+            f"SELECT * FROM {self.table} WHERE kind = ? AND id IN ("
+            f"SELECT fingerprint_id FROM content_fingerprint_bands WHERE band_key IN ({','.join('?' * len(keys))})"
+            ") LIMIT ?",
+            [kind, *keys, limit]
+        )
+        return [self._decode(row) for row in rows]
+
+    async def find_by_url(self, source_url: str) -> Optional[Dict]:
+        rows = await self._db.aquery(
+            f"SELECT * FROM {self.table} WHERE source_url = ? ORDER BY created_at DESC LIMIT 1", (source_url,)
+        )
+        return self._decode(rows[0]) if rows else None
+
+    async def save(self, row: Dict) -> None:
+        await self._db.ainsert(self.table, {
+            **{column: row.get(column) for column in ('id', 'kind', 'source_url', 'title', 'summary', 'key_points', 'signature')},
+            'meta': json.dumps(row.get('meta') or {}, ensure_ascii=False),
+            'created_at': row.get('created_at') or _now(),
+        }, upsert=True)
+        await self._db.aexecute_many(
+            "INSERT OR IGNORE INTO content_fingerprint_bands (band_key, fingerprint_id) VALUES (?, ?)",
+            [(band_key, row['id']) for band_key in row.get('bands') or []]
+        )
+
+
+class SqliteNoteRepository:
+    table = 'notes'
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    async def create(self, row: Dict) -> Dict:
+        row = _filter_row(row, NOTE_COLUMNS)
+        row.setdefault('id', str(uuid.uuid4()))
+        row.setdefault('created_at', _now())
+        row.setdefault('updated_at', row['created_at'])
+        await self._db.ainsert(self.table, row)
+        return row
+
+    async def get(self, note_id: str) -> Optional[Dict]:
+        rows = await self._db.aquery(f"SELECT * FROM {self.table} WHERE id = ?", (note_id,))
+        return rows[0] if rows else None
+
+    async def list_by_user(self, user_id: str, limit: Optional[int] = None, columns: str = '*') -> List[Dict]:
+        selected = '*' if columns == '*' else ', '.join(resolve_fields(columns.split(','), NOTE_COLUMNS, NOTE_COLUMNS))
+        return await self._db.aquery(
+            f"SELECT {selected} FROM {self.table} WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+            (user_id, -1 if limit is None else limit)
+        )
+
+    async def update(self, note_id: str, values: Dict) -> Optional[Dict]:
+        values = _filter_row(values, NOTE_COLUMNS)
+        values.pop('id', None)
+        values['updated_at'] = _now()
+        assignments = ', '.join(f"{column} = ?" for column in values)
+        await self._db.aexecute(
+            f"UPDATE {self.table} SET {assignments} WHERE id = ?",
+            [_encode_value(column, value) for column, value in values.items()] + [note_id]
+        )
+        return await self.get(note_id)
+
+    async def delete(self, note_id: str) -> None:
+        await self._db.aexecute(f"DELETE FROM {self.table} WHERE id = ?", (note_id,))
+
+
+class SqliteFolderRepository:
+    table = 'folders'
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    async def create(self, row: Dict) -> Dict:
+        row = _filter_row(row, FOLDER_COLUMNS)
+        row.setdefault('id', str(uuid.uuid4()))
+        row.setdefault('created_at', _now())
+        row.setdefault('updated_at', row['created_at'])
+        await self._db.ainsert(self.table, row)
+        return row
+
+    async def list_by_user(self, user_id: str) -> List[Dict]:
+        return await self._db.aquery(
+            f"SELECT * FROM {self.table} WHERE user_id = ? ORDER BY position ASC",
+            (user_id,)
+        )
+
+    async def update(self, folder_id: str, values: Dict) -> Optional[Dict]:
+        values = _filter_row(values, FOLDER_COLUMNS)
+        values.pop('id', None)
+        values['updated_at'] = _now()
+        assignments = ', '.join(f"{column} = ?" for column in values)
+        await self._db.aexecute(
+            f"UPDATE {self.table} SET {assignments} WHERE id = ?",
+            list(values.values()) + [folder_id]
+        )
+        rows = await self._db.aquery(f"SELECT * FROM {self.table} WHERE id = ?", (folder_id,))
+        return rows[0] if rows else None
+
+    async def delete(self, folder_id: str) -> None:
+        await self._db.aexecute(f"DELETE FROM {self.table} WHERE id = ?", (folder_id,))
+
+
+class SqliteEmbeddingRepository:
+    """
+    embeddings 저장소 (float32 BLOB, 사용자별 brute-force 코사인 검색)
+    """
+    table = 'embeddings'
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    @staticmethod
+    def _to_row(row: Dict) -> Tuple:
+        vector = array('f', row.get('embedding') or [])
+        return (
+            row.get('id') or str(uuid.uuid4()),
+            row['user_id'],
+            row['content_id'],
+            row['content_type'],
+            row['content'],
+            vector.tobytes(),
+            row.get('created_at') or _now(),
+        )
+
+    async def add(self, row: Dict) -> None:
+        await self.add_many([row])
+
+    async def add_many(self, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        await self._db.aexecute_many(
+            f"INSERT OR REPLACE INTO {self.table} "
+            "(id, user_id, content_id, content_type, content, embedding, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [self._to_row(row) for row in rows]
+        )
+
+    async def search(
+        self,
+        embedding: List[float],
+        user_id: Optional[str] = None,
+        limit: int = 10,
+        threshold: float = 0.5
+    ) -> List[Dict]:
+        """
+        search_similar_content RPC와 같은 형태로 반환: id(content_id), content, content_type, similarity
+        (조회 + 코사인 계산은 스레드풀에서, 최근 SQLITE_EMBEDDING_SCAN_LIMIT개까지만)
+        """
+        return await run_in_threadpool(self._search, embedding, user_id, limit, threshold)
+
+    def _search(self, embedding: List[float], user_id: Optional[str], limit: int, threshold: float) -> List[Dict]:
+        sql = f"SELECT content_id, content, content_type, embedding FROM {self.table}"
+        params: List = []
+        if user_id:
+            sql += " WHERE user_id = ?"
+            params.append(user_id)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(SQLITE_EMBEDDING_SCAN_LIMIT)
+
+        rows = [
+            row for row in self._db.query(sql, params)
+            if row['embedding'] and len(row['embedding']) == len(embedding) * 4
+        ]
+        if not rows:
+            return []
+
+        if numpy is not None:
+            query = numpy.asarray(embedding, dtype=numpy.float32)
+            matrix = numpy.frombuffer(b''.join(row['embedding'] for row in rows), dtype=numpy.float32)
+            matrix = matrix.reshape(len(rows), len(embedding))
+            norms = numpy.linalg.norm(matrix, axis=1)
+            norms[norms == 0] = 1.0
+            similarities = (matrix @ query) / (norms * (float(numpy.linalg.norm(query)) or 1.0))
+            scores = similarities.tolist()
+        else:
+            query_norm = math.sqrt(sum(value * value for value in embedding)) or 1.0
+            scores = []
+            for row in rows:
+                vector = array('f')
+                vector.frombytes(row['embedding'])
+                dot = sum(a * b for a, b in zip(vector, embedding))
+                norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+                scores.append(dot / (norm * query_norm))
+
+        results = [
+            {
+                'id': row['content_id'],
+                'content': row['content'],
+                'content_type': row['content_type'],
+                'similarity': similarity,
+            }
+            for row, similarity in zip(rows, scores)
+            if similarity > threshold
+        ]
+        results.sort(key=lambda item: item['similarity'], reverse=True)
+        return results[:limit]
+
+    async def delete_for_content(self, content_id: str) -> None:
+        await self._db.aexecute(f"DELETE FROM {self.table} WHERE content_id = ?", (content_id,))
+
+
+class SqliteRepositories:
+    """
+    SQLite 저장소 묶음 (Supabase Repositories와 같은 속성)
+    """
+    backend = 'sqlite'
+    buffer = None
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.db = SqliteDatabase(path)
+        self.summaries = SqliteSummaryRepository(self.db)
+        self.transcripts = SqliteTranscriptRepository(self.db)
+        self.digests = SqliteDigestRepository(self.db)
+        self.notes = SqliteNoteRepository(self.db)
+        self.folders = SqliteFolderRepository(self.db)
+        self.embeddings = SqliteEmbeddingRepository(self.db)
+        self.fingerprints = SqliteFingerprintRepository(self.db)
+
+    async def text_search(
+        self,
+        query: str,
+        user_id: Optional[str] = None,
+        content_type: Optional[str] = None,
+        limit: int = 10
+    ) -> List[str]:
+        """
+        FTS5 전문 검색 (bm25 순위) → content_id 목록
+
+        trigram은 3글자 미만 검색어(미분, 통계 같은 두 글자 한국어 명사)를 매칭할 수 없어서
+        짧은 검색어는 LIKE '%검색어%'로 찾고, 두 쪽에 모두 걸린 문서를 앞에 둠
+        """
+        terms = [term for term in query.split() if term]
+        short_terms: List[str] = []
+        if self.db.tokenizer == 'trigram':
+            short_terms = [term for term in terms if len(term) < 3]
+            terms = [term for term in terms if len(term) >= 3]
+        if not terms and not short_terms:
+            return []
+
+        filters = ''
+        filter_params: List = []
+        if user_id:
+            filters += " AND user_id = ?"
+            filter_params.append(user_id)
+        if content_type:
+            filters += " AND content_type = ?"
+            filter_params.append(content_type)
+
+        matched: List[str] = []
+        if terms:
+            match = ' OR '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+            rows = await self.db.aquery(
+                f"SELECT content_id FROM content_fts WHERE content_fts MATCH ?{filters} ORDER BY bm25(content_fts) LIMIT ?",
+                [match, *filter_params, limit]
+            )
+            matched = [row['content_id'] for row in rows]
+        if not short_terms:
+            return matched
+
+        patterns = ['%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%' for term in short_terms]
+        hits = ' + '.join("((title LIKE ? ESCAPE '\\') OR (body LIKE ? ESCAPE '\\'))" for _ in patterns)
+        rows = await self.db.aquery(
+            f"SELECT content_id, {hits} AS hits FROM content_fts WHERE hits > 0{filters} "
+            "ORDER BY hits DESC, rowid DESC LIMIT ?",
+            [value for pattern in patterns for value in (pattern, pattern)] + filter_params + [limit]
+        )
+        like_matched = [row['content_id'] for row in rows]
+
+        both = set(matched) & set(like_matched)
+        ranked = [content_id for content_id in matched if content_id in both]
+        ranked += [content_id for content_id in matched + like_matched if content_id not in both]
+        return list(dict.fromkeys(ranked))[:limit]
+
+    async def start(self) -> None:
+        pass
+
+    async def warm(self) -> None:
+        """
+        읽기 연결 열기 + 자주 쓰는 인덱스 페이지를 캐시에 올림
+        """
+        await self.db.aquery("SELECT id FROM youtube_summaries ORDER BY created_at DESC LIMIT 20")
+        await self.db.aquery("SELECT count(*) AS n FROM content_fts")
+
+    async def close(self) -> None:
+        self.db.close()
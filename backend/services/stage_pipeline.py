@@ -0,0 +1,187 @@
+"""
+단계별 파이프라인 스케줄러
+- 단계마다 자기 워커 수와 크기 제한 큐 → 네트워크 단계와 CPU 단계가 겹쳐서 실행
+- 각 단계 핸들러가 다음 단계 이름을 반환 (자막이 있는 영상은 오디오/Whisper 단계를 건너뜀)
+- 다음 단계 큐가 가득 차면 put에서 대기 → 앞 단계 워커도 멈춤 (backpressure)
+- 작업 항목은 제출한 요청의 trace에 이어서 단계별 span 기록
+"""
+from services.metrics import QUEUE_DEPTH, STAGE_DURATION
+from services.tracing import get_logger, start_trace, current_span
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import time
+
+log = get_logger('pipeline')
+
+
+class PipelineItem:
+    """
+    파이프라인을 흐르는 작업 하나 (단계 결과는 data에 누적)
+    """
+
+    def __init__(self, key: str, data: Optional[Dict] = None, on_finish: Optional[Callable[['PipelineItem'], None]] = None):
+        self.key = key
+        self.data = data or {}
+        self.state = 'queued'      # queued / waiting:<stage> / running:<stage> / done / failed
+        self.stage: Optional[str] = None
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._on_finish = on_finish
+
+        # 제출한 요청의 trace에 이어서 기록
+        parent = current_span()
+        self._trace = (parent.trace_id, parent.span_id, parent.sampled) if parent else (None, None, None)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ('done', 'failed')
+
+    def finish(self, error: Optional[str] = None) -> None:
+        self.state = 'failed' if error else 'done'
+        self.error = error
+        self.finished_at = time.time()
+        if self._on_finish:
+            self._on_finish(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            'key': self.key,
+            'state': self.state,
+            'stage': self.stage,
+            'error': self.error,
+            'timings': {name: round(seconds, 3) for name, seconds in self.timings.items()},
+        }
+
+
+StageHandler = Callable[[PipelineItem], Awaitable[Optional[str]]]
+
+
+class Stage:
+    """
+    파이프라인 단계 (핸들러 + 워커 수 + 입력 큐 크기)
+    """
+
+    def __init__(self, name: str, handler: StageHandler, workers: int = 1, queue_size: Optional[int] = None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = queue_size if queue_size is not None else self.workers * 2
+        self.queue: Optional[asyncio.Queue] = None
+        self.busy = 0
+        self.blocked = 0     # 다음 단계 큐가 가득 차서 넘기지 못하고 기다리는 워커 수
+        self.processed = 0
+        self.failed = 0
+
+    def stats(self) -> Dict:
+        queued = self.queue.qsize() if self.queue else 0
+        return {
+            'workers': self.workers,
+            'busy': self.busy,
+            'blocked': self.blocked,
+            'queued': queued,
+            'capacity': self.queue_size,
+            'saturated': self.busy >= self.workers and queued >= self.queue_size,
+            'processed': self.processed,
+            'failed': self.failed,
+        }
+
+
+class StagePipeline:
+    """
+    사용법:
+        pipeline = StagePipeline('bulk', [Stage('metadata', fetch, 4), Stage('whisper', transcribe, 1)])
+        pipeline.start()
+        await pipeline.submit(PipelineItem(video_id))   # 첫 단계 큐가 가득 차면 대기
+    """
+
+    def __init__(self, name: str, stages: List[Stage]):
+        self.name = name
+        self.stages: Dict[str, Stage] = {stage.name: stage for stage in stages}
+        self.first = stages[0].name
+        self._tasks: List[asyncio.Task] = []
+
+        for stage in stages:
+            QUEUE_DEPTH.set_function(
+                lambda stage=stage: stage.queue.qsize() if stage.queue else 0,
+                queue=f"{name}_{stage.name}"
+            )
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        for stage in self.stages.values():
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+            for i in range(stage.workers):
+                self._tasks.append(asyncio.create_task(self._worker(stage), name=f"{self.name}.{stage.name}.{i}"))
+        log.info(
+            f"파이프라인 시작: {self.name}",
+            **{f"workers.{name}": stage.workers for name, stage in self.stages.items()}
+        )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, item: PipelineItem, stage: Optional[str] = None) -> None:
+        """
+        작업 제출 (첫 단계 큐가 가득 차면 자리가 날 때까지 대기)
+        """
+        name = stage or self.first
+        item.state = f"waiting:{name}"
+        await self.stages[name].queue.put(item)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {name: stage.stats() for name, stage in self.stages.items()}
+
+    async def _worker(self, stage: Stage) -> None:
+        while True:
+            item = await stage.queue.get()
+            next_stage: Optional[str] = None
+            error: Optional[str] = None
+
+            stage.busy += 1
+            item.stage = stage.name
+            item.state = f"running:{stage.name}"
+            start = time.perf_counter()
+            trace_id, parent_id, sampled = item._trace
+            try:
+                with start_trace(
+                    f"{self.name}.{stage.name}", trace_id=trace_id, parent_id=parent_id, sampled=sampled,
+                    kind='internal', pipeline=self.name, stage=stage.name, item=item.key
+                ):
+                    next_stage = await stage.handler(item)
+                stage.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.failed += 1
+                error = f"{stage.name}: {str(e)[:300]}"
+                log.warning(f"파이프라인 작업 실패 ({self.name}/{item.key}) {error}")
+            finally:
+                elapsed = time.perf_counter() - start
+                item.timings[stage.name] = elapsed
+                STAGE_DURATION.observe(
+                    elapsed, pipeline=self.name, stage=stage.name, outcome='error' if error else 'ok'
+                )
+                stage.busy -= 1
+                stage.queue.task_done()
+
+            if error or next_stage is None:
+                item.finish(error)
+                continue
+
+            # 다음 단계 큐가 가득 차면 여기서 대기 → 이 단계의 처리도 멈춤 (backpressure)
+            item.state = f"waiting:{next_stage}"
+            stage.blocked += 1
+            try:
+                await self.stages[next_stage].queue.put(item)
+            finally:
+                stage.blocked -= 1
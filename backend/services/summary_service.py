@@ -0,0 +1,67 @@
+"""
+YouTube 요약 저장 서비스 (단건 요약 API와 일괄 수집 파이프라인이 함께 사용)
+- youtube_summaries 행 저장
+- 자막은 압축해서 youtube_transcripts에 따로 저장 (시간 정보가 있으면 함께)
+- 검색 인덱스 증분 업데이트
+- 조회 캐시 무효화 (요약 상세 / 사용자 목록)
+"""
+from fastapi.concurrency import run_in_threadpool
+from services.read_cache import invalidate_summary
+from services.repository import get_repositories
+from services.search_service import index_document, build_document_text
+from services.transcript_store import build_transcript_row
+from datetime import datetime
+from typing import Dict, Optional
+import uuid
+
+
+async def persist_youtube_summary(
+    user_id: str,
+    video_url: str,
+    video_data: Dict,
+    summary_result: Dict
+) -> Optional[Dict]:
+    """
+    요약 + 자막 저장 후 색인
+
+    Returns:
+        저장된 행 (저장소가 없으면 None)
+    """
+    repositories = get_repositories()
+    if not repositories:
+        return None
+
+    summary_data = {
+        'id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'video_url': video_url,
+        'video_id': video_data['video_id'],
+        'title': video_data['title'],
+        'thumbnail_url': video_data.get('thumbnail_url'),
+        'duration': video_data.get('duration'),
+        'summary': summary_result['summary'],
+        'key_points': summary_result['key_points'],
+        'created_at': datetime.utcnow().isoformat()
+    }
+
+    # Supabase write-behind 모드면 응답 후 백그라운드에서 일괄 저장
+    saved = await repositories.summaries.create(summary_data)
+    if not saved:
+        return None
+    invalidate_summary(summary_data['id'], user_id)
+
+    # 자막은 압축해서 별도 테이블에 저장 (응답에는 포함하지 않음)
+    transcript_row = await run_in_threadpool(
+        build_transcript_row, summary_data['id'], user_id, video_data['transcript'], video_data.get('timed_transcript')
+    )
+    await repositories.transcripts.save(transcript_row)
+
+    # 검색 인덱스 증분 업데이트
+    await run_in_threadpool(
+        index_document,
+        summary_data['id'],
+        build_document_text(summary_data['title'], summary_data['summary'], video_data['transcript']),
+        user_id=user_id,
+        content_type='youtube'
+    )
+    return saved
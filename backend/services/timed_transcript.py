@@ -0,0 +1,276 @@
+"""
+시간 정보가 있는 자막 (세그먼트별 시작 시각 / 길이)
+- 텍스트는 UTF-8 blob 하나 (세그먼트 뒤마다 공백 1바이트), 세그먼트 정보는 병렬 배열
+  (array('I'): 시작 ms, 길이 ms, blob 안의 byte offset) → 세그먼트별 dict 목록보다 메모리를 훨씬 적게 사용
+- 시각 → 세그먼트, 텍스트 위치 → 시각: 이진 탐색 (bisect)
+- 시간 범위 자르기는 같은 버퍼를 공유하는 view (세그먼트 dict를 만들지 않음)
+- 직렬화: header | starts | durations | offsets | text, 읽을 때는 memoryview.cast로 복사 없이 사용
+  (NumPy가 있으면 numpy.frombuffer(transcript.starts, dtype=numpy.uint32)로 그대로 사용 가능)
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import struct
+import sys
+
+_MAGIC = b'SNTT'
+_VERSION = 1
+_HEADER = struct.Struct('<4sB3xI')  # magic, version, n_segments
+_MAX_MS = 2 ** 32 - 1
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _to_ms(seconds: Optional[float]) -> int:
+    return min(_MAX_MS, max(0, int(round((seconds or 0.0) * 1000))))
+
+
+def _copy(values: Sequence[int], lo: int, hi: int) -> array:
+    if isinstance(values, array):
+        return values[lo:hi]
+    return array('I', values[lo:hi].tobytes())
+
+
+class TimedTranscript:
+    """
+    사용법:
+        timed = TimedTranscript.from_subtitles(transcript_data)   # 또는 from_whisper(result)
+        timed.text_at(125.0)                 # 2분 5초에 나오는 문장
+        timed.locate('경사 하강법')           # → (세그먼트 번호, 시작 초)
+        part = timed.slice(60, 180)          # 1분 ~ 3분 (복사 없는 view)
+        blob = timed.to_bytes(); TimedTranscript.from_bytes(blob)
+    """
+
+    __slots__ = ('_buf', '_base', 'starts', 'durations', 'offsets', '_lo', '_hi')
+
+    def __init__(
+        self,
+        buf: Buffer,
+        starts: Sequence[int],
+        durations: Sequence[int],
+        offsets: Sequence[int],
+        base: int = 0,
+        lo: int = 0,
+        hi: Optional[int] = None
+    ):
+        # buf[base:]가 텍스트 blob, offsets는 세그먼트 수 + 1개 (마지막 = blob 길이)
+        self._buf = buf
+        self._base = base
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets
+        self._lo = lo
+        self._hi = len(starts) if hi is None else hi
+
+    # ---- 생성 ----
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Tuple[float, float, str]]) -> 'TimedTranscript':
+        """
+        (시작 초, 길이 초, 텍스트) 목록 → TimedTranscript (시작 시각 순으로 정렬, 빈 세그먼트 제외)
+        """
+        starts, durations, offsets = array('I'), array('I'), array('I')
+        parts: List[bytes] = []
+        position = 0
+        for start, duration, text in sorted(segments, key=lambda segment: segment[0] or 0.0):
+            data = ' '.join((text or '').split()).encode('utf-8')
+            if not data:
+                continue
+            starts.append(_to_ms(start))
+            durations.append(_to_ms(duration))
+            offsets.append(position)
+            parts.append(data)
+            parts.append(b' ')
+            position += len(data) + 1
+        offsets.append(position)
+        return cls(b''.join(parts), starts, durations, offsets)
+
+    @classmethod
+    def from_subtitles(cls, transcript_data: Iterable[Dict]) -> 'TimedTranscript':
+        """
+        youtube_transcript_api fetch() 결과 ({'text', 'start', 'duration'} 목록)
+        """
+        return cls.from_segments(
+            (item.get('start'), item.get('duration'), item.get('text')) for item in transcript_data
+        )
+
+    @classmethod
+    def from_whisper(cls, result: Dict) -> 'TimedTranscript':
+        """
+        whisper transcribe() 결과의 segments ({'start', 'end', 'text'} 목록)
+        """
+        return cls.from_segments(
+            (segment.get('start'), (segment.get('end') or 0.0) - (segment.get('start') or 0.0), segment.get('text'))
+            for segment in result.get('segments') or []
+        )
+
+    # ---- 조회 ----
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    def _segment_bytes(self, index: int) -> memoryview:
+        start = self._base + self.offsets[index]
+        end = self._base + self.offsets[index + 1] - 1  # 세그먼트 뒤 공백 제외
+        return memoryview(self._buf)[start:end]
+
+    def _absolute(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("세그먼트 범위를 벗어났습니다")
+        return self._lo + index
+
+    def segment(self, index: int) -> Tuple[float, float, str]:
+        """
+        (시작 초, 길이 초, 텍스트)
+        """
+        i = self._absolute(index)
+        return self.starts[i] / 1000, self.durations[i] / 1000, str(self._segment_bytes(i), 'utf-8')
+
+    def __iter__(self) -> Iterator[Tuple[float, float, str]]:
+        for index in range(len(self)):
+            yield self.segment(index)
+
+    @property
+    def text(self) -> str:
+        """
+        전체 텍스트 (세그먼트를 공백으로 연결)
+        """
+        if not len(self):
+            return ''
+        start = self._base + self.offsets[self._lo]
+        end = self._base + self.offsets[self._hi] - 1
+        return str(memoryview(self._buf)[start:end], 'utf-8')
+
+    @property
+    def start_time(self) -> float:
+        return self.starts[self._lo] / 1000 if len(self) else 0.0
+
+    @property
+    def end_time(self) -> float:
+        if not len(self):
+            return 0.0
+        last = self._hi - 1
+        return (self.starts[last] + self.durations[last]) / 1000
+
+    def index_at(self, seconds: float) -> int:
+        """
+        해당 시각에 재생 중인 세그먼트 번호 (첫 세그먼트 전이면 0)
+        """
+        if not len(self):
+            raise IndexError("빈 자막입니다")
+        i = bisect_right(self.starts, _to_ms(seconds), self._lo, self._hi) - 1
+        return max(i, self._lo) - self._lo
+
+    def text_at(self, seconds: float) -> str:
+        return self.segment(self.index_at(seconds))[2]
+
+    def time_at_offset(self, byte_offset: int) -> float:
+        """
+        텍스트 blob 안의 byte 위치 → 그 위치가 들어 있는 세그먼트의 시작 초
+        """
+        i = bisect_right(self.offsets, byte_offset, self._lo, self._hi) - 1
+        return self.starts[max(i, self._lo)] / 1000
+
+    def locate(self, query: str, after: float = 0.0) -> Optional[Tuple[int, float]]:
+        """
+        텍스트 → 시각: query가 처음 나오는 세그먼트 (after 초 이후부터 검색)
+
+        Returns:
+            (세그먼트 번호, 시작 초) 또는 None
+        """
+        needle = ' '.join(query.split()).encode('utf-8')
+        if not needle or not len(self):
+            return None
+        first = self._lo + self.index_at(after) if after else self._lo
+        begin = self._base + self.offsets[first]
+        end = self._base + self.offsets[self._hi]
+        # memoryview에는 find가 없음 (from_bytes에 bytes를 넘기면 복사 없이 검색)
+        haystack = self._buf.tobytes() if isinstance(self._buf, memoryview) else self._buf
+        found = haystack.find(needle, begin, end)
+        if found < 0:
+            return None
+        i = bisect_right(self.offsets, found - self._base, self._lo, self._hi) - 1
+        return i - self._lo, self.starts[i] / 1000
+
+    def slice(self, start: float, end: Optional[float] = None) -> 'TimedTranscript':
+        """
+        [start, end) 초 구간의 세그먼트 (start 시각에 재생 중인 세그먼트 포함, 버퍼 공유)
+        """
+        if not len(self):
+            return self
+        lo = self._lo + self.index_at(start)
+        hi = self._hi if end is None else max(lo, bisect_left(self.starts, _to_ms(end), lo, self._hi))
+        return TimedTranscript(self._buf, self.starts, self.durations, self.offsets, self._base, lo, hi)
+
+    def to_dicts(self) -> List[Dict]:
+        """
+        API 응답용 (필요한 구간만 잘라서 호출)
+        """
+        return [
+            {'start': start, 'duration': duration, 'text': text}
+            for start, duration, text in self
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        이 view가 차지하는 메모리 (텍스트 + 배열)
+        """
+        count = len(self)
+        text_bytes = self.offsets[self._hi] - self.offsets[self._lo] if count else 0
+        return text_bytes + 4 * (3 * count + 1)
+
+    # ---- 직렬화 ----
+
+    def buffers(self) -> List[Buffer]:
+        """
+        직렬화 버퍼 목록 (writelines / b''.join에 그대로 사용, view면 해당 구간만)
+        """
+        lo, hi = self._lo, self._hi
+        starts = _copy(self.starts, lo, hi)
+        durations = _copy(self.durations, lo, hi)
+        offsets = _copy(self.offsets, lo, hi + 1)
+        shift = offsets[0] if offsets else 0
+        if shift:
+            offsets = array('I', (offset - shift for offset in offsets))
+        text_start = self._base + self.offsets[lo]
+        text_end = self._base + self.offsets[hi]
+        if sys.byteorder != 'little':
+            for values in (starts, durations, offsets):
+                values.byteswap()
+        return [
+            _HEADER.pack(_MAGIC, _VERSION, hi - lo),
+            memoryview(starts).cast('B'),
+            memoryview(durations).cast('B'),
+            memoryview(offsets).cast('B'),
+            memoryview(self._buf)[text_start:text_end],
+        ]
+
+    def to_bytes(self) -> bytes:
+        return b''.join(self.buffers())
+
+    @classmethod
+    def from_bytes(cls, buf: Buffer) -> 'TimedTranscript':
+        """
+        to_bytes() 결과에서 복원 (리틀 엔디언이면 배열은 buf를 그대로 참조)
+        """
+        magic, version, count = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("시간 정보 자막 형식이 올바르지 않습니다")
+
+        view = memoryview(buf)
+        position = _HEADER.size
+        arrays = []
+        for length in (count, count, count + 1):
+            chunk = view[position:position + 4 * length]
+            if sys.byteorder == 'little':
+                arrays.append(chunk.cast('I'))
+            else:
+                values = array('I', chunk.tobytes())
+                values.byteswap()
+                arrays.append(values)
+            position += 4 * length
+        starts, durations, offsets = arrays
+        return cls(buf, starts, durations, offsets, base=position)
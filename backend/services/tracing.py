@@ -0,0 +1,374 @@
+"""
+트레이싱 / 구조화 로그 서비스
+- 요청 단위 trace (correlation id = trace id), 단계/외부 호출 단위 span
+- contextvars로 부모 span 전파 (스레드풀 작업에도 전파됨)
+- W3C traceparent / X-Request-ID 헤더 지원
+- span과 로그는 요청 경로에서 큐에 넣기만 하고, 백그라운드 스레드가 일괄 내보냄
+  (OTLP JSON: 파일에 한 줄씩 또는 OTLP/HTTP collector로 전송)
+- trace 단위 샘플링 (TRACE_SAMPLE_RATE), 큐가 가득 차면 버림 (요청을 막지 않음)
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SERVICE_NAME = os.getenv('SERVICE_NAME', 'supremenote-backend')
+# 내보낼 trace 비율 (0.0 ~ 1.0), 상위 서비스가 traceparent로 샘플링 여부를 넘기면 그것을 따름
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))
+# OTLP JSON 파일 (기본: 내보내지 않음, 예: data/telemetry.jsonl)
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', '')
+# 파일이 이 크기를 넘으면 <경로>.1로 옮기고 새로 씀 (이전 .1은 삭제, 0이면 교체하지 않음)
+TRACE_EXPORT_MAX_BYTES = int(float(os.getenv('TRACE_EXPORT_MAX_MB', '100')) * 1024 * 1024)
+# OTLP/HTTP collector (예: http://localhost:4318) - 설정하면 /v1/traces, /v1/logs로 전송
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', '')
+TRACE_QUEUE_SIZE = int(os.getenv('TRACE_QUEUE_SIZE', '10000'))
+TRACE_BATCH_SIZE = int(os.getenv('TRACE_BATCH_SIZE', '512'))
+TRACE_FLUSH_SECONDS = float(os.getenv('TRACE_FLUSH_SECONDS', '2'))
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# 콘솔에도 "[INFO] ..." 형식으로 출력 (백그라운드 스레드에서)
+LOG_CONSOLE = os.getenv('LOG_CONSOLE', 'true').lower() in ('1', 'true', 'yes')
+
+_SEVERITY = {'DEBUG': 5, 'INFO': 9, 'SUCCESS': 9, 'PROGRESS': 9, 'WARNING': 13, 'ERROR': 17}
+_KIND = {'internal': 1, 'server': 2, 'client': 3}
+_TRACEPARENT = re.compile(r'^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+def _new_id(n_bytes: int) -> str:
+    return f"{random.getrandbits(n_bytes * 8):0{n_bytes * 2}x}"
+
+
+def _attribute(key: str, value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class Span:
+    __slots__ = (
+        'trace_id', 'span_id', 'parent_id', 'name', 'kind', 'sampled',
+        'start_ns', 'end_ns', 'attributes', 'events', 'status', 'status_message',
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        kind: str = 'internal',
+        attributes: Optional[Dict] = None
+    ):
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = dict(attributes or {})
+        self.events: List[Tuple[int, str, Dict]] = []
+        self.status = 0  # 0 unset, 1 ok, 2 error
+        self.status_message = ''
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes) -> None:
+        if self.sampled:
+            self.events.append((time.time_ns(), name, attributes))
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = 2
+        self.status_message = f"{type(exc).__name__}: {exc}"[:500]
+        self.add_event('exception', **{'exception.type': type(exc).__name__, 'exception.message': str(exc)[:500]})
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self) -> Dict:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': _KIND.get(self.kind, 1),
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': self.status, 'message': self.status_message} if self.status else {},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.events:
+            span['events'] = [
+                {'timeUnixNano': str(ts), 'name': name, 'attributes': [_attribute(k, v) for k, v in attrs.items()]}
+                for ts, name, attrs in self.events
+            ]
+        return span
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    W3C traceparent → (trace_id, parent_span_id, sampled)
+    """
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match or match.group(1) == '0' * 32:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+@contextmanager
+def start_trace(
+    name: str,
+    trace_id: Optional[str] = None,
+    parent_id: Optional[str] = None,
+    sampled: Optional[bool] = None,
+    kind: str = 'server',
+    **attributes
+) -> Iterator[Span]:
+    """
+    루트 span 시작 (요청 하나 = trace 하나). 샘플링 여부는 여기서 한 번만 결정
+    """
+    if sampled is None:
+        sampled = random.random() < TRACE_SAMPLE_RATE
+    span = Span(name, trace_id or _new_id(16), parent_id, sampled, kind, attributes)
+    with _activate(span):
+        yield span
+
+
+@contextmanager
+def start_span(name: str, kind: str = 'internal', **attributes) -> Iterator[Span]:
+    """
+    현재 span의 자식 span 시작 (trace 밖에서 호출되면 새 trace)
+    """
+    parent = _current_span.get()
+    if parent is None:
+        with start_trace(name, kind=kind, **attributes) as span:
+            yield span
+        return
+
+    span = Span(name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes)
+    with _activate(span):
+        yield span
+
+
+@contextmanager
+def _activate(span: Span) -> Iterator[Span]:
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end_ns = time.time_ns()
+        if span.sampled:
+            _exporter.submit('span', span)
+
+
+class Logger:
+    """
+    구조화 로그 (현재 span의 trace_id / span_id 자동 첨부)
+
+    사용법:
+        log = get_logger('youtube')
+        log.info("자막 발견", language='ko')
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _emit(self, level: str, message: str, attributes: Dict) -> None:
+        if _SEVERITY[level] < _SEVERITY.get(LOG_LEVEL, 9):
+            return
+        span = _current_span.get()
+        _exporter.submit('log', (
+            time.time_ns(), level, self.name, message, attributes,
+            span.trace_id if span else None, span.span_id if span else None,
+        ))
+
+    def debug(self, message: str, **attributes) -> None:
+        self._emit('DEBUG', message, attributes)
+
+    def info(self, message: str, **attributes) -> None:
+        self._emit('INFO', message, attributes)
+
+    def success(self, message: str, **attributes) -> None:
+        self._emit('SUCCESS', message, attributes)
+
+    def progress(self, message: str, **attributes) -> None:
+        self._emit('PROGRESS', message, attributes)
+
+    def warning(self, message: str, **attributes) -> None:
+        self._emit('WARNING', message, attributes)
+
+    def error(self, message: str, **attributes) -> None:
+        self._emit('ERROR', message, attributes)
+
+
+def get_logger(name: str) -> Logger:
+    return Logger(name)
+
+
+class _Exporter:
+    """
+    span / 로그 비동기 내보내기 (bounded queue + 백그라운드 스레드)
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._http = None
+        self.dropped = 0
+        self.exported = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, kind: str, item: Any) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait((kind, item))
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='telemetry-exporter', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=TRACE_FLUSH_SECONDS))
+                while len(batch) < TRACE_BATCH_SIZE:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if batch:
+                self._export(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _export(self, batch: List[Tuple[str, Any]]) -> None:
+        spans = [item.to_otlp() for kind, item in batch if kind == 'span']
+        logs = [item for kind, item in batch if kind == 'log']
+
+        if LOG_CONSOLE:
+            for ts, level, name, message, attributes, trace_id, _ in logs:
+                suffix = f" (trace={trace_id[:8]})" if trace_id else ''
+                sys.stdout.write(f"[{level}] {message}{suffix}\n")
+            sys.stdout.flush()
+
+        payloads = []
+        if spans:
+            payloads.append(('traces', {'resourceSpans': [{
+                'resource': self._resource(),
+                'scopeSpans': [{'scope': {'name': 'supremenote'}, 'spans': spans}],
+            }]}))
+        if logs:
+            payloads.append(('logs', {'resourceLogs': [{
+                'resource': self._resource(),
+                'scopeLogs': [{'scope': {'name': 'supremenote'}, 'logRecords': [self._log_record(log) for log in logs]}],
+            }]}))
+
+        for signal, payload in payloads:
+            try:
+                if TRACE_EXPORT_PATH:
+                    self._write_file(payload)
+                if TRACE_OTLP_ENDPOINT:
+                    self._post(signal, payload)
+                self.exported += len(spans) if signal == 'traces' else len(logs)
+            except Exception as e:
+                sys.stderr.write(f"[WARNING] 텔레메트리 내보내기 실패: {e}\n")
+
+    @staticmethod
+    def _write_file(payload: Dict) -> None:
+        os.makedirs(os.path.dirname(TRACE_EXPORT_PATH) or '.', exist_ok=True)
+        with open(TRACE_EXPORT_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(payload, ensure_ascii=False, default=str) + '\n')
+            size = f.tell()
+        # 크기 기준 교체 (쓰는 스레드는 exporter 하나뿐)
+        if TRACE_EXPORT_MAX_BYTES > 0 and size >= TRACE_EXPORT_MAX_BYTES:
+            os.replace(TRACE_EXPORT_PATH, f"{TRACE_EXPORT_PATH}.1")
+
+    def _post(self, signal: str, payload: Dict) -> None:
+        if self._http is None:
+            import httpx
+            self._http = httpx.Client(timeout=5.0)
+        response = self._http.post(f"{TRACE_OTLP_ENDPOINT.rstrip('/')}/v1/{signal}", json=payload)
+        response.raise_for_status()
+
+    @staticmethod
+    def _resource() -> Dict:
+        return {'attributes': [_attribute('service.name', SERVICE_NAME), _attribute('process.pid', os.getpid())]}
+
+    @staticmethod
+    def _log_record(log: Tuple) -> Dict:
+        ts, level, name, message, attributes, trace_id, span_id = log
+        record = {
+            'timeUnixNano': str(ts),
+            'severityNumber': _SEVERITY[level],
+            'severityText': level,
+            'body': {'stringValue': message},
+            'attributes': [_attribute('logger', name)] + [_attribute(k, v) for k, v in attributes.items()],
+        }
+        if trace_id:
+            record['traceId'] = trace_id
+            record['spanId'] = span_id
+        return record
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        큐에 남은 항목이 내보내질 때까지 대기 (종료 시)
+        """
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+
+_exporter = _Exporter()
+
+
+def exporter_stats() -> Dict:
+    return {'queued': _exporter.depth, 'dropped': _exporter.dropped, 'exported': _exporter.exported}
+
+
+def shutdown_tracing() -> None:
+    _exporter.flush()
@@ -0,0 +1,322 @@
+"""
+자막 압축(compaction) 서비스 - 프롬프트를 만들기 전에 토큰 낭비 제거
+- [음악], [박수], ♪ 같은 잡음 태그 제거
+- 자동 자막의 겹치는 줄(이전 줄 끝 = 다음 줄 시작) 제거
+- 최근 줄과 같거나 거의 같은 줄 제거 (정규화 키 + shingle 유사도, 고정 크기 창)
+- 반복 루프 축약 ("감사합니다 감사합니다 감사합니다 ..." → 최대 N번)
+- 추임새(음, 어, um, uh) 제거, 공백 정리
+- PDF / 웹은 줄 / 문단 구분을 유지 (제목, 목록 구조를 요약 단계에 그대로 전달)
+
+모든 단계가 입력 길이에 선형 (창 크기 / n-gram 길이는 상수)
+소스(subtitle / whisper / pdf / web)별로 켜는 단계가 다름 → COMPACTION_PROFILES
+"""
+from collections import OrderedDict
+from functools import lru_cache
+from services.metrics import COMPACTION_RATIO
+from services.tracing import get_logger
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import re
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('compaction')
+
+# 전체 on/off
+TRANSCRIPT_COMPACTION = os.getenv('TRANSCRIPT_COMPACTION', 'true').lower() in ('1', 'true', 'yes')
+
+
+class CompactionProfile:
+    """
+    소스별 압축 설정
+    """
+
+    def __init__(
+        self,
+        strip_tags: bool = True,
+        remove_overlap: bool = True,
+        dedupe_window: int = 50,
+        near_duplicate_threshold: float = 0.9,
+        near_duplicate_window: int = 3,
+        max_repeats: int = 2,
+        remove_fillers: bool = True,
+        keep_lines: bool = False,
+        enabled: bool = True,
+    ):
+        self.strip_tags = strip_tags
+        self.remove_overlap = remove_overlap
+        self.dedupe_window = dedupe_window
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.near_duplicate_window = near_duplicate_window
+        self.max_repeats = max_repeats
+        self.remove_fillers = remove_fillers
+        # 원문 줄 단위로 처리하고 줄바꿈 / 빈 줄(문단)을 유지 (줄 안의 공백만 정리)
+        self.keep_lines = keep_lines
+        self.enabled = enabled
+
+
+COMPACTION_PROFILES: Dict[str, CompactionProfile] = {
+    # 자동 자막: 모든 단계
+    'subtitle': CompactionProfile(),
+    # Whisper: 겹치는 줄은 없지만 반복 루프(환각)가 흔함
+    'whisper': CompactionProfile(remove_overlap=False, max_repeats=1),
+    # PDF: 페이지마다 반복되는 머리글/바닥글 제거, 본문 문장은 건드리지 않음
+    'pdf': CompactionProfile(
+        strip_tags=False, remove_overlap=False, dedupe_window=200,
+        near_duplicate_threshold=1.1, max_repeats=3, remove_fillers=False, keep_lines=True,
+    ),
+    # 웹: 메뉴/공유 버튼 문구 반복 제거 정도만
+    'web': CompactionProfile(
+        strip_tags=False, remove_overlap=False, dedupe_window=100,
+        near_duplicate_threshold=1.1, max_repeats=3, remove_fillers=False, keep_lines=True,
+    ),
+}
+
+# COMPACTION_DISABLED_SOURCES=pdf,web 처럼 소스별로 끌 수 있음
+for _source in os.getenv('COMPACTION_DISABLED_SOURCES', '').split(','):
+    if _source.strip() in COMPACTION_PROFILES:
+        COMPACTION_PROFILES[_source.strip()].enabled = False
+
+_NOISE_TAG = re.compile(
+    r'[\[(（【]\s*(?:음악|박수|웃음|웃음소리|환호|함성|박수갈채|효과음|배경음악|침묵|기침|'
+    r'music|applause|laughter|laughs|cheering|silence|inaudible|noise|sound|foreign)\s*[\])）】]'
+    r'|[♪♫♬♩]+',
+    re.IGNORECASE,
+)
+_WHITESPACE = re.compile(r'\s+')
+_FILLERS = frozenset([
+    '음', '음..', '음...', '어', '어..', '어...', '아..', '흠', '으음', '에..',
+    'um', 'umm', 'uh', 'uhh', 'erm', 'er', 'hmm', 'mm',
+])
+_FILLER_STRIP = '.,…!?~'
+_KEY_STRIP = re.compile(r'[\W_]+', re.UNICODE)
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?。？！])\s+|\n+')
+_LINE_SPLIT = re.compile(r'\r?\n')
+
+# 반복 루프 탐지 n-gram 최대 길이
+_MAX_LOOP_NGRAM = 8
+# 겹침 탐지 최대 단어 수
+_MAX_OVERLAP_WORDS = 20
+
+
+class CompactionStats:
+    __slots__ = (
+        'source', 'original_chars', 'compacted_chars', 'lines_in', 'lines_out',
+        'tags_removed', 'overlap_words_removed', 'duplicates_removed',
+        'near_duplicates_removed', 'loop_words_removed', 'fillers_removed',
+    )
+
+    def __init__(self, source: str):
+        self.source = source
+        self.original_chars = 0
+        self.compacted_chars = 0
+        self.lines_in = 0
+        self.lines_out = 0
+        self.tags_removed = 0
+        self.overlap_words_removed = 0
+        self.duplicates_removed = 0
+        self.near_duplicates_removed = 0
+        self.loop_words_removed = 0
+        self.fillers_removed = 0
+
+    @property
+    def ratio(self) -> float:
+        """
+        압축 후 / 압축 전 (작을수록 많이 줄어듦)
+        """
+        return self.compacted_chars / self.original_chars if self.original_chars else 1.0
+
+    def to_dict(self) -> Dict:
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result['ratio'] = round(self.ratio, 4)
+        return result
+
+
+def _line_key(line: str) -> str:
+    return _KEY_STRIP.sub('', line).lower()
+
+
+# 단어 어휘는 반복이 많아서 단어 단위 키는 캐시 (크기 제한)
+_word_key = lru_cache(maxsize=65536)(_line_key)
+
+
+def _shingles(key: str) -> frozenset:
+    if len(key) < 4:
+        return frozenset([key])
+    return frozenset(key[i:i + 3] for i in range(len(key) - 2))
+
+
+def _collapse_loops(words: List[str], max_repeats: int, stats: CompactionStats) -> List[str]:
+    """
+    연속으로 반복되는 n-gram(n ≤ 8)을 max_repeats번까지만 남김
+
+    단어를 하나씩 추가하면서 끝부분만 검사 → 단어당 O(n² × max_repeats) 상수 작업
+    """
+    out: List[str] = []
+    keys: List[str] = []
+    for word in words:
+        out.append(word)
+        keys.append(_word_key(word) or word)
+        last = len(keys) - 1
+        for n in range(1, _MAX_LOOP_NGRAM + 1):
+            span = n * (max_repeats + 1)
+            if len(keys) < span:
+                break
+            # 마지막 단어가 n칸 앞 단어와 다르면 n-gram 반복일 수 없음
+            if keys[last] != keys[last - n]:
+                continue
+            tail = keys[-n:]
+            if all(keys[-n * (r + 1):len(keys) - n * r] == tail for r in range(1, max_repeats + 1)):
+                del out[-n:]
+                del keys[-n:]
+                stats.loop_words_removed += n
+                break
+    return out
+
+
+def _remove_overlap(previous: List[str], words: List[str]) -> int:
+    """
+    이전 줄 끝과 현재 줄 시작이 겹치는 단어 수 (롤링 자동 자막)
+    """
+    limit = min(len(previous), len(words), _MAX_OVERLAP_WORDS)
+    previous_keys = [_word_key(w) for w in previous[-limit:]]
+    keys = [_word_key(w) for w in words[:limit]]
+    for size in range(limit, 0, -1):
+        if previous_keys[-size:] == keys[:size]:
+            return size
+    return 0
+
+
+def compact_lines(lines: Iterable[str], source: str = 'subtitle') -> Tuple[str, CompactionStats]:
+    """
+    줄 목록 압축 → (압축된 텍스트, 통계)
+    """
+    profile = COMPACTION_PROFILES.get(source, COMPACTION_PROFILES['subtitle'])
+    stats = CompactionStats(source)
+
+    raw_lines = list(lines)
+    stats.lines_in = len(raw_lines)
+    stats.original_chars = sum(len(line) for line in raw_lines) + max(0, len(raw_lines) - 1)
+
+    separator = '\n' if profile.keep_lines else ' '
+    if not TRANSCRIPT_COMPACTION or not profile.enabled:
+        text = separator.join(raw_lines)
+        stats.compacted_chars = len(text)
+        stats.lines_out = stats.lines_in
+        return text, stats
+
+    recent_keys: 'OrderedDict[str, None]' = OrderedDict()
+    recent_shingles: List[frozenset] = []
+    previous_words: List[str] = []
+    kept: List[str] = []
+
+    for line in raw_lines:
+        # 1. 잡음 태그
+        if profile.strip_tags:
+            line, count = _NOISE_TAG.subn(' ', line)
+            stats.tags_removed += count
+
+        words = _WHITESPACE.sub(' ', line).strip().split(' ')
+        words = [w for w in words if w]
+
+        # 2. 추임새
+        if profile.remove_fillers and words:
+            before = len(words)
+            words = [w for w in words if w.lower().strip(_FILLER_STRIP) not in _FILLERS and w.lower() not in _FILLERS]
+            stats.fillers_removed += before - len(words)
+
+        # 3. 이전 줄과 겹치는 앞부분 (겹친 경우 이전 줄 끝에 이어 붙여서 다음 줄과 비교)
+        if profile.remove_overlap and words:
+            overlap = _remove_overlap(previous_words, words) if previous_words else 0
+            stats.overlap_words_removed += overlap
+            words = words[overlap:]
+            previous_words = ((previous_words if overlap else []) + words)[-_MAX_OVERLAP_WORDS:]
+
+        if not words:
+            # 빈 줄 = 문단 구분 (연속된 빈 줄은 하나로)
+            if profile.keep_lines and kept and kept[-1]:
+                kept.append('')
+            continue
+
+        # 4. 줄 안의 반복 루프
+        if profile.max_repeats > 0:
+            words = _collapse_loops(words, profile.max_repeats, stats)
+
+        line = ' '.join(words)
+        key = _line_key(line)
+        if not key:
+            continue
+
+        # 5. 최근 줄과 같은 줄 (정규화 키, 고정 크기 창)
+        if profile.dedupe_window and key in recent_keys:
+            stats.duplicates_removed += 1
+            recent_keys.move_to_end(key)
+            continue
+
+        # 6. 거의 같은 줄 (직전 몇 줄과 shingle Jaccard)
+        if profile.near_duplicate_threshold <= 1.0:
+            shingles = _shingles(key)
+            is_near = False
+            for other in recent_shingles:
+                union = len(shingles | other)
+                if union and len(shingles & other) / union >= profile.near_duplicate_threshold:
+                    is_near = True
+                    break
+            if is_near:
+                stats.near_duplicates_removed += 1
+                continue
+            recent_shingles.append(shingles)
+            if len(recent_shingles) > profile.near_duplicate_window:
+                recent_shingles.pop(0)
+
+        if profile.dedupe_window:
+            recent_keys[key] = None
+            if len(recent_keys) > profile.dedupe_window:
+                recent_keys.popitem(last=False)
+
+        kept.append(line)
+
+    if profile.keep_lines:
+        while kept and not kept[-1]:
+            kept.pop()
+        text = '\n'.join(kept)
+        stats.lines_out = sum(1 for line in kept if line)
+        stats.compacted_chars = len(text)
+        return text, stats
+
+    # 7. 줄 경계를 넘는 반복 루프 (Whisper 환각은 문장 단위로 반복됨)
+    words = ' '.join(kept).split(' ') if kept else []
+    if profile.max_repeats > 0 and words:
+        words = _collapse_loops(words, profile.max_repeats, stats)
+
+    text = ' '.join(words)
+    stats.lines_out = len(kept)
+    stats.compacted_chars = len(text)
+    return text, stats
+
+
+def compact_text(text: Optional[str], source: str = 'whisper') -> Tuple[str, CompactionStats]:
+    """
+    긴 텍스트(Whisper, PDF, 웹) 압축 - 문장/줄 단위로 나눠서 compact_lines
+    (PDF / 웹은 원문 줄 단위 → 줄 / 문단 구분 유지)
+    """
+    if not text:
+        stats = CompactionStats(source)
+        return text or '', stats
+    profile = COMPACTION_PROFILES.get(source, COMPACTION_PROFILES['subtitle'])
+    splitter = _LINE_SPLIT if profile.keep_lines else _SENTENCE_SPLIT
+    return compact_lines(splitter.split(text), source)
+
+
+def record_compaction(stats: CompactionStats) -> None:
+    """
+    압축률 메트릭 + 로그
+    """
+    if not stats.original_chars:
+        return
+    COMPACTION_RATIO.observe(stats.ratio, source=stats.source)
+    log.info(
+        f"자막 압축 ({stats.source}): {stats.original_chars} → {stats.compacted_chars} 글자 ({stats.ratio:.1%})",
+        **stats.to_dict()
+    )
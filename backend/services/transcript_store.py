@@ -0,0 +1,217 @@
+"""
+자막(transcript) 압축 저장 서비스
+- 요약 행과 분리해서 별도 테이블(youtube_transcripts)에 저장
+- 세그먼트 단위로 나눠 블록별 압축 (zstd 설치 시 zstd, 없으면 gzip)
+- sha256 content hash
+- 세그먼트 범위만 압축 해제해서 읽기
+- 시간 정보(TimedTranscript)는 timing 컬럼에 따로 압축 저장
+"""
+from typing import Dict, List, Optional, Tuple
+import base64
+import gzip
+import hashlib
+import json
+import re
+import struct
+from services.timed_transcript import TimedTranscript
+from services.tracing import get_logger
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성
+    zstandard = None
+
+log = get_logger('transcript_store')
+
+# 세그먼트 / 블록 크기
+TRANSCRIPT_SEGMENT_CHARS = 1000
+TRANSCRIPT_SEGMENTS_PER_BLOCK = 16
+
+_MAGIC = b'SNTR'
+_VERSION = 1
+_CODEC_GZIP = 1
+_CODEC_ZSTD = 2
+_CODEC_NAMES = {_CODEC_GZIP: 'gzip', _CODEC_ZSTD: 'zstd'}
+_HEADER = struct.Struct('<4sBBIII')  # magic, version, codec, n_segments, per_block, n_blocks
+
+_SENTENCE_END = re.compile(r'(?<=[.!?。？！])\s+|\n+')
+
+
+def content_hash(text: str) -> str:
+    """
+    원문 sha256 (hex)
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def split_segments(text: str, target_chars: int = TRANSCRIPT_SEGMENT_CHARS) -> List[str]:
+    """
+    자막을 약 target_chars 크기의 세그먼트로 분할 (문장 경계 우선, 없으면 공백 기준)
+    """
+    if not text:
+        return []
+
+    segments: List[str] = []
+    current = ''
+
+    for sentence in _SENTENCE_END.split(text):
+        if not sentence:
+            continue
+        # 문장 부호가 없는 자동 자막은 공백 기준으로 자름
+        while len(sentence) > target_chars:
+            cut = sentence.rfind(' ', 0, target_chars)
+            if cut <= 0:
+                cut = target_chars
+            piece, sentence = sentence[:cut], sentence[cut:].lstrip()
+            if current:
+                segments.append(current)
+                current = ''
+            segments.append(piece)
+
+        if current and len(current) + len(sentence) + 1 > target_chars:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+
+    if current:
+        segments.append(current)
+    return segments
+
+
+def _compress(data: bytes, codec: int) -> bytes:
+    if codec == _CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=9)
+
+
+def _decompress(data: bytes, codec: int) -> bytes:
+    if codec == _CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd로 압축된 자막을 읽으려면 zstandard 패키지가 필요합니다")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def pack_segments(segments: List[str], per_block: int = TRANSCRIPT_SEGMENTS_PER_BLOCK) -> bytes:
+    """
+    세그먼트 목록을 블록 압축 컨테이너로 직렬화
+
+    포맷: header | block sizes (u32 × n_blocks) | blocks
+          block = 압축된 JSON 문자열 배열
+    """
+    codec = _CODEC_ZSTD if zstandard is not None else _CODEC_GZIP
+    blocks = [
+        _compress(json.dumps(segments[i:i + per_block], ensure_ascii=False).encode('utf-8'), codec)
+        for i in range(0, len(segments), per_block)
+    ]
+
+    header = _HEADER.pack(_MAGIC, _VERSION, codec, len(segments), per_block, len(blocks))
+    sizes = struct.pack(f'<{len(blocks)}I', *(len(block) for block in blocks))
+    return header + sizes + b''.join(blocks)
+
+
+def read_header(blob: bytes) -> Tuple[int, int, int, int]:
+    """
+    (codec, n_segments, per_block, n_blocks)
+    """
+    magic, version, codec, n_segments, per_block, n_blocks = _HEADER.unpack_from(blob, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("자막 저장 형식이 올바르지 않습니다")
+    return codec, n_segments, per_block, n_blocks
+
+
+def unpack_segments(blob: bytes, start: int = 0, end: Optional[int] = None) -> List[str]:
+    """
+    세그먼트 [start, end) 범위만 읽기 (해당 블록만 압축 해제)
+    """
+    codec, n_segments, per_block, n_blocks = read_header(blob)
+    end = n_segments if end is None else min(end, n_segments)
+    start = max(0, start)
+    if start >= end:
+        return []
+
+    sizes = struct.unpack_from(f'<{n_blocks}I', blob, _HEADER.size)
+    offsets = [_HEADER.size + 4 * n_blocks]
+    for size in sizes:
+        offsets.append(offsets[-1] + size)
+
+    first_block = start // per_block
+    last_block = (end - 1) // per_block
+    segments: List[str] = []
+    for block in range(first_block, last_block + 1):
+        raw = _decompress(blob[offsets[block]:offsets[block + 1]], codec)
+        segments.extend(json.loads(raw.decode('utf-8')))
+
+    base = first_block * per_block
+    return segments[start - base:end - base]
+
+
+def pack_timing(timed: TimedTranscript) -> str:
+    """
+    TimedTranscript → 압축 + base64 (codec 1바이트 + 압축 데이터)
+    """
+    codec = _CODEC_ZSTD if zstandard is not None else _CODEC_GZIP
+    return base64.b64encode(bytes([codec]) + _compress(timed.to_bytes(), codec)).decode('ascii')
+
+
+def unpack_timing(value: str) -> TimedTranscript:
+    raw = base64.b64decode(value)
+    return TimedTranscript.from_bytes(_decompress(raw[1:], raw[0]))
+
+
+def build_transcript_row(summary_id: str, user_id: str, text: str, timing: Optional[str] = None) -> Dict:
+    """
+    youtube_transcripts 행 생성 (id = 요약 ID, timing = pack_timing 결과)
+    """
+    segments = split_segments(text)
+    blob = pack_segments(segments)
+    codec = read_header(blob)[0]
+    raw_size = len(text.encode('utf-8'))
+
+    log.info(f"자막 압축: {raw_size} → {len(blob)} bytes ({_CODEC_NAMES[codec]}, {len(segments)}개 세그먼트)")
+
+    return {
+        'id': summary_id,
+        'user_id': user_id,
+        'codec': _CODEC_NAMES[codec],
+        'content_hash': content_hash(text),
+        'segment_count': len(segments),
+        'raw_size': raw_size,
+        'compressed_size': len(blob),
+        'data': base64.b64encode(blob).decode('ascii'),
+        'timing': timing,
+    }
+
+
+def row_blob(row: Dict) -> bytes:
+    """
+    youtube_transcripts 행에서 압축 컨테이너 추출
+    """
+    return base64.b64decode(row['data'])
+
+
+def parse_segment_range(range_header: Optional[str], total: int) -> Optional[Tuple[int, int]]:
+    """
+    Range 헤더 파싱: "segments=10-19" (끝 포함), "segments=10-", "segments=-5" (마지막 5개)
+
+    Returns:
+        [start, end) 또는 None (헤더 없음). 형식 오류/범위 밖이면 ValueError
+    """
+    if not range_header:
+        return None
+
+    match = re.fullmatch(r'\s*segments=(\d*)-(\d*)\s*', range_header)
+    if not match or match.group(0).strip() == 'segments=-':
+        raise ValueError("Range 형식: segments=<start>-<end>")
+
+    first, last = match.group(1), match.group(2)
+    if first == '':
+        start, end = max(0, total - int(last)), total
+    else:
+        start = int(first)
+        end = min(total, int(last) + 1) if last else total
+
+    if start >= total or start >= end:
+        raise ValueError(f"요청 범위가 올바르지 않습니다 (전체 {total}개 세그먼트)")
+    return start, end
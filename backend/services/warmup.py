@@ -0,0 +1,159 @@
+"""
+시작 warm-up / readiness 서비스
+- 무거운 라이브러리(yt_dlp, google.generativeai, pdfplumber, bs4/lxml, whisper)는 처음 쓸 때 import
+- 서버 시작 후 설정된 구성 요소를 미리 로드 (기본: 백그라운드, 그동안 /health는 바로 응답)
+- /ready: 구성 요소별 상태 (pending / warming / ready / failed)
+"""
+from fastapi.concurrency import run_in_threadpool
+from services.tracing import get_logger, start_span
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('warmup')
+
+# 미리 로드할 구성 요소 (쉼표 구분, whisper는 모델 로딩이 무거워서 기본 제외)
+WARMUP_COMPONENTS = [
+    name.strip() for name in
+    os.getenv('WARMUP_COMPONENTS', 'storage,search_index,gemini,youtube,web,pdf').split(',')
+    if name.strip()
+]
+# true면 warm-up이 끝날 때까지 서버 시작을 기다림
+WARMUP_BLOCKING = os.getenv('WARMUP_BLOCKING', 'false').lower() in ('1', 'true', 'yes')
+# 이 구성 요소가 실패하면 /ready가 503 (나머지는 실패해도 첫 사용 시 다시 시도)
+READY_REQUIRED = [
+    name.strip() for name in os.getenv('READY_REQUIRED', 'storage,search_index').split(',') if name.strip()
+]
+
+
+async def _warm_storage() -> None:
+    from services.repository import get_repositories
+
+    repositories = get_repositories()
+    if repositories is None:
+        raise RuntimeError("저장소가 설정되지 않았습니다")
+    await repositories.warm()
+
+
+async def _warm_search_index() -> None:
+    from services.search_service import get_search_index
+    await run_in_threadpool(get_search_index)
+
+
+async def _warm_gemini() -> None:
+    from services.gemini_service import load_genai
+    await run_in_threadpool(load_genai)
+
+
+async def _warm_youtube() -> None:
+    from services.youtube_service import load_yt_dlp, load_transcript_api
+    await run_in_threadpool(load_yt_dlp)
+    await run_in_threadpool(load_transcript_api)
+
+
+def _import_web() -> None:
+    import requests  # noqa: F401
+    from services.parser_pool import parser_pool
+    # HTML 파싱은 워커 프로세스에서 → 워커를 띄우고 bs4 / lxml은 워커에 로드
+    parser_pool.warm('bs4', 'lxml.etree')
+
+
+async def _warm_web() -> None:
+    await run_in_threadpool(_import_web)
+
+
+def _import_pdf() -> None:
+    from services.parser_pool import parser_pool
+    parser_pool.warm('pdfplumber')
+
+
+async def _warm_pdf() -> None:
+    await run_in_threadpool(_import_pdf)
+
+
+async def _warm_whisper() -> None:
+    from services.whisper_service import get_whisper_model
+    await run_in_threadpool(get_whisper_model)
+
+
+WARMERS: Dict[str, Callable[[], Awaitable[None]]] = {
+    'storage': _warm_storage,
+    'search_index': _warm_search_index,
+    'gemini': _warm_gemini,
+    'youtube': _warm_youtube,
+    'web': _warm_web,
+    'pdf': _warm_pdf,
+    'whisper': _warm_whisper,
+}
+
+_components: Dict[str, Dict] = {}
+_task: Optional[asyncio.Task] = None
+
+
+async def _warm(name: str) -> None:
+    component = _components[name]
+    component['state'] = 'warming'
+    start = time.perf_counter()
+    try:
+        with start_span(f"warmup.{name}"):
+            await WARMERS[name]()
+        component['state'] = 'ready'
+        log.info(f"warm-up 완료: {name}", seconds=round(time.perf_counter() - start, 3))
+    except Exception as e:
+        component['state'] = 'failed'
+        component['error'] = str(e)[:300]
+        log.warning(f"warm-up 실패: {name} ({e})")
+    finally:
+        component['seconds'] = round(time.perf_counter() - start, 3)
+
+
+async def run_warmup() -> None:
+    unknown = [name for name in WARMUP_COMPONENTS if name not in WARMERS]
+    if unknown:
+        log.warning(f"알 수 없는 warm-up 구성 요소 무시: {', '.join(unknown)}")
+
+    names = [name for name in WARMUP_COMPONENTS if name in WARMERS]
+    for name in names:
+        _components[name] = {'state': 'pending'}
+
+    with start_span('warmup', components=','.join(names)):
+        await asyncio.gather(*(_warm(name) for name in names))
+
+
+async def start_warmup() -> None:
+    """
+    startup 이벤트에서 호출 (WARMUP_BLOCKING=false면 백그라운드 작업으로 실행)
+    """
+    global _task
+
+    if WARMUP_BLOCKING:
+        await run_warmup()
+    else:
+        # 상태 표시를 위해 pending은 바로 등록
+        for name in WARMUP_COMPONENTS:
+            if name in WARMERS:
+                _components[name] = {'state': 'pending'}
+        _task = asyncio.create_task(run_warmup())
+
+
+async def stop_warmup() -> None:
+    if _task and not _task.done():
+        _task.cancel()
+
+
+def readiness() -> Tuple[bool, Dict[str, Dict]]:
+    """
+    (준비 완료 여부, 구성 요소별 상태)
+
+    준비 완료: 진행 중인 warm-up이 없고, READY_REQUIRED 구성 요소가 모두 ready
+    """
+    components = {name: dict(state) for name, state in _components.items()}
+    in_progress = any(state['state'] in ('pending', 'warming') for state in components.values())
+    required_ok = all(
+        components[name]['state'] == 'ready' for name in READY_REQUIRED if name in components
+    )
+    return not in_progress and required_ok, components
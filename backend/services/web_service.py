@@ -2,11 +2,41 @@
 웹 페이지 크롤링 서비스
 - URL에서 텍스트 추출
 - 메타데이터 추출
+- HTML 파싱은 parser_pool 워커 프로세스에서 실행 (시간 / 메모리 제한)
+  제한에 걸리면 태그만 걷어낸 텍스트로 대체 (partial=True)
+- URL 정규화 (추적 파라미터 제거) → 같은 URL 요약 조회 키 (요청은 사용자가 준 URL 그대로)
 """
-import requests
-from bs4 import BeautifulSoup
-from typing import Optional, Dict
+from typing import Optional, Dict, TYPE_CHECKING
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from services.metrics import track_stage, track_dependency, FALLBACKS
+from services.parser_pool import parser_pool
+import html as html_lib
+import os
 import re
+from services.tracing import get_logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = get_logger('web')
+
+# 파싱 워커에서 한 페이지에 쓸 수 있는 최대 시간 (초)
+HTML_PARSE_TIMEOUT = float(os.getenv('HTML_PARSE_TIMEOUT', '15'))
+# 파싱이 중단됐을 때 대체 텍스트를 만들 HTML 앞부분 길이
+HTML_FALLBACK_CHARS = int(os.getenv('HTML_FALLBACK_CHARS', '2000000'))
+
+_TAG_PATTERN = re.compile(r'<[^>]*>')
+
+# 광고 / 유입 추적 전용 쿼리 파라미터 (사이트마다 의미가 다른 from / src / ref 같은 이름은 남김)
+_TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'gbraid', 'wbraid', 'dclid', 'msclkid', 'yclid', 'twclid', 'ttclid', 'igshid',
+    'li_fat_id', 'mc_cid', 'mc_eid', '_ga', '_gl', 'pk_campaign', 'pk_kwd', 'pk_source', 'pk_medium',
+}
+_TRACKING_PREFIXES = ('utm_', 'hsa_')
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 
 def clean_text(text: str) -> str:
@@ -18,7 +48,50 @@ def clean_text(text: str) -> str:
     return text
 
 
-def extract_article_text(soup: BeautifulSoup) -> str:
+def canonicalize_url(url: str) -> str:
+    """
+    같은 URL 요약 조회용 정규화 (요청에는 쓰지 않음)
+    - 스킴 / 호스트 소문자, 기본 포트 / fragment / 추적 파라미터 제거, 나머지 파라미터 정렬
+    - Google AMP 캐시 주소 → 원래 사이트 주소
+    - 모바일 / AMP 페이지처럼 주소가 다른 같은 글은 본문 지문(content_dedup)으로 찾음
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    path = parts.path or '/'
+
+    # Google AMP 캐시: https://<...>.cdn.ampproject.org/c/s/example.com/path
+    if host.endswith('.cdn.ampproject.org'):
+        match = re.match(r'^/[a-z]+(/s)?/([^/]+)(/.*)?$', path)
+        if match:
+            scheme = 'https' if match.group(1) else 'http'
+            host = match.group(2).lower()
+            path = match.group(3) or '/'
+
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+
+    netloc = host
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in _TRACKING_PARAMS and not key.lower().startswith(_TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def url_key(url: str) -> str:
+    """
+    같은 글 판단용 URL 키 (정규화 + www. / 스킴 차이 무시)
+    """
+    parts = urlsplit(canonicalize_url(url))
+    host = parts.netloc[4:] if parts.netloc.startswith('www.') else parts.netloc
+    return urlunsplit(('', host, parts.path, parts.query, '')).lstrip('/')
+
+
+def extract_article_text(soup: 'BeautifulSoup') -> str:
     """
     웹 페이지에서 본문 추출
     """
@@ -49,6 +122,61 @@ def extract_article_text(soup: BeautifulSoup) -> str:
     return clean_text(article_text)
 
 
+def parse_html(html: str, emit) -> Dict:
+    """
+    파싱 워커에서 실행: 메타데이터('meta')를 먼저 emit한 뒤 본문 추출
+    """
+    from bs4 import BeautifulSoup  # 처음 쓸 때 로드 (워커 프로세스)
+
+    soup = BeautifulSoup(html, 'lxml')
+    
+    title = soup.find('title')
+    title_text = title.get_text(strip=True) if title else '제목 없음'
+    
+    description_tag = soup.find('meta', attrs={'name': 'description'})
+    description = description_tag['content'] if description_tag and description_tag.get('content') else ''
+    
+    author_tag = soup.find('meta', attrs={'name': 'author'})
+    author = author_tag['content'] if author_tag and author_tag.get('content') else '저자 없음'
+    
+    meta = {'title': title_text, 'description': description, 'author': author}
+    emit('meta', meta)
+    return {**meta, 'text': extract_article_text(soup)}
+
+
+def _strip_blocks(html: str, tag: str) -> str:
+    """
+    <script>/<style> 블록 제거 (정규식 역추적 없이 선형 시간)
+    """
+    lower = html.lower()
+    parts = []
+    position = 0
+    open_tag, close_tag = f"<{tag}", f"</{tag}"
+    while True:
+        start = lower.find(open_tag, position)
+        if start < 0:
+            break
+        end = lower.find(close_tag, start)
+        parts.append(html[position:start])
+        if end < 0:
+            position = len(html)
+            break
+        end = lower.find('>', end)
+        position = len(html) if end < 0 else end + 1
+    parts.append(html[position:])
+    return ''.join(parts)
+
+
+def fallback_text(html: str) -> str:
+    """
+    파싱이 중단된 페이지용 대체 본문 (태그 제거만, 선형 시간)
+    """
+    html = html[:HTML_FALLBACK_CHARS]
+    for tag in ('script', 'style'):
+        html = _strip_blocks(html, tag)
+    return clean_text(html_lib.unescape(_TAG_PATTERN.sub(' ', html)))
+
+
 def fetch_web_page(url: str) -> Dict:
     """
     웹 페이지 크롤링
@@ -59,53 +187,67 @@ def fetch_web_page(url: str) -> Dict:
     Returns:
         웹 페이지 정보 딕셔너리
     """
+    # requests는 처음 쓸 때 로드 (bs4 / lxml은 파싱 워커에서)
+    import requests
+
     try:
-        print(f"[INFO] 웹 페이지 크롤링 시작: {url}")
+        log.info(f"웹 페이지 크롤링 시작: {url}")
         
         # HTTP 요청
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        with track_dependency('http', 'fetch_page'):
+            response = requests.get(url, headers=headers, timeout=15)
+            response.raise_for_status()
         response.encoding = response.apparent_encoding
         
-        print(f"[SUCCESS] HTTP 요청 성공: {response.status_code}")
-        
-        # HTML 파싱
-        soup = BeautifulSoup(response.text, 'lxml')
-        
-        # 메타데이터 추출
-        title = soup.find('title')
-        title_text = title.get_text(strip=True) if title else '제목 없음'
+        log.success(f"HTTP 요청 성공: {response.status_code}")
         
-        description_tag = soup.find('meta', attrs={'name': 'description'})
-        description = description_tag['content'] if description_tag and description_tag.get('content') else ''
+        # HTML 파싱 + 메타데이터 / 본문 추출 (파싱 워커)
+        html = response.text
+        with track_stage('web', 'parse_html'):
+            parsed = parser_pool.run(
+                'services.web_service:parse_html', html, timeout=HTML_PARSE_TIMEOUT, job='html'
+            )
         
-        author_tag = soup.find('meta', attrs={'name': 'author'})
-        author = author_tag['content'] if author_tag and author_tag.get('content') else '저자 없음'
+        if parsed.outcome == 'error':
+            raise Exception(parsed.error)
         
-        # 본문 추출
-        article_text = extract_article_text(soup)
+        if parsed.partial:
+            # 시간 / 메모리 제한에 걸림: 받은 메타데이터 + 태그만 걷어낸 본문
+            log.warning(f"HTML 파싱 중단, 대체 텍스트 사용: {parsed.error}")
+            FALLBACKS.inc(pipeline='web', from_stage='parse_html', to_stage='strip_tags')
+            page = {
+                'title': '제목 없음',
+                'description': '',
+                'author': '저자 없음',
+                **(parsed.last('meta') or {}),
+                'text': fallback_text(html),
+            }
+        else:
+            page = parsed.result
         
-        print(f"[SUCCESS] 텍스트 추출 완료! ({len(article_text)} 글자)")
+        article_text = page['text']
+        log.success(f"텍스트 추출 완료! ({len(article_text)} 글자)")
         
         return {
             'url': url,
-            'title': title_text,
-            'description': description,
-            'author': author,
+            'title': page['title'],
+            'description': page['description'],
+            'author': page['author'],
             'text': article_text,
             'word_count': len(article_text.split()),
-            'has_text': True,
+            'has_text': bool(article_text),
+            'partial': parsed.partial,
         }
     
     except requests.RequestException as e:
-        print(f"[ERROR] HTTP 요청 실패: {str(e)}")
+        log.error(f"HTTP 요청 실패: {str(e)}")
         raise Exception(f"웹 페이지를 불러올 수 없습니다: {str(e)}")
     
     except Exception as e:
-        print(f"[ERROR] 웹 크롤링 실패: {str(e)}")
+        log.error(f"웹 크롤링 실패: {str(e)}")
         raise Exception(f"웹 페이지 처리 실패: {str(e)}")
 
 
@@ -124,7 +266,7 @@ def process_web_url(url: str) -> Dict:
         if not url.startswith(('http://', 'https://')):
             raise ValueError("올바른 URL을 입력해주세요 (http:// 또는 https://로 시작)")
         
-        # 웹 페이지 크롤링
+        # 웹 페이지 크롤링 (정규화한 URL은 조회 키로만 쓰고, 요청은 사용자가 준 URL로)
         web_data = fetch_web_page(url)
         
         if not web_data.get('has_text'):
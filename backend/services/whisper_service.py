@@ -2,35 +2,162 @@
 Whisper 음성 인식 서비스 (무료 로컬 버전)
 - 오디오를 텍스트로 변환
 - 완전 무료
+- 2단계: 짧은 구간(또는 메타데이터 / 자막 목록 언어)으로 언어 결정 → 언어 고정 디코딩
+- 언어 / 오디오 길이별 모델 크기 선택 (WHISPER_MODEL_BY_LANGUAGE, WHISPER_LONG_AUDIO_*)
 """
-import whisper
 import os
-from typing import Optional
+import subprocess
+import threading
+from typing import Dict, Optional, Tuple
+from services.metrics import track_dependency
+from services.tracing import get_logger, current_span
+from dotenv import load_dotenv
 
-# Whisper 모델 로드 (한 번만 로드)
-_whisper_model = None
+load_dotenv()
 
-def get_whisper_model():
+log = get_logger('whisper')
+
+# 기본 모델 (tiny: 39MB, 가장 빠름)
+WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'tiny')
+# 언어별 모델 (예: ko=small,en=base.en) - 없으면 WHISPER_MODEL
+WHISPER_MODEL_BY_LANGUAGE = {
+    lang.strip(): size.strip()
+    for lang, size in (
+        pair.split('=', 1) for pair in os.getenv('WHISPER_MODEL_BY_LANGUAGE', '').split(',') if '=' in pair
+    )
+}
+# 이보다 긴 오디오는 WHISPER_LONG_AUDIO_MODEL보다 큰 모델을 쓰지 않음 (처리 시간 제한)
+WHISPER_LONG_AUDIO_SECONDS = float(os.getenv('WHISPER_LONG_AUDIO_SECONDS', '3600'))
+WHISPER_LONG_AUDIO_MODEL = os.getenv('WHISPER_LONG_AUDIO_MODEL', 'base')
+# 언어 감지 probe: 구간 길이(초, Whisper 입력 창은 30초) / 구간 수 (앞·중간·뒤에서 나눠 뽑아 인트로 음악 등 회피)
+WHISPER_PROBE_SECONDS = float(os.getenv('WHISPER_PROBE_SECONDS', '30'))
+WHISPER_PROBE_WINDOWS = int(os.getenv('WHISPER_PROBE_WINDOWS', '3'))
+# probe 결과 확률이 이보다 낮으면 언어를 고정하지 않고 전체 디코딩에서 감지
+WHISPER_PROBE_MIN_PROBABILITY = float(os.getenv('WHISPER_PROBE_MIN_PROBABILITY', '0.5'))
+
+_MODEL_ORDER = ('tiny', 'base', 'small', 'medium', 'large', 'turbo')
+_SAMPLE_RATE = 16000
+
+# Whisper 모델 로드 (크기별로 한 번만 로드)
+_whisper_models: Dict[str, object] = {}
+_whisper_lock = threading.Lock()
+
+def get_whisper_model(size: Optional[str] = None):
+    """
+    Whisper 모델 로드 (크기별 싱글톤)
+    """
+    size = size or WHISPER_MODEL
+    model = _whisper_models.get(size)
+    
+    if model is None:
+        # warm-up과 첫 요청이 동시에 로드하지 않도록
+        with _whisper_lock:
+            model = _whisper_models.get(size)
+            if model is None:
+                log.info(f"Whisper 모델 로딩 중... ({size}, 처음 한 번만)")
+                # whisper는 torch까지 끌어오므로 모델이 필요할 때만 import
+                import whisper
+                with track_dependency('whisper', 'load_model'):
+                    model = whisper.load_model(size)
+                _whisper_models[size] = model
+                log.info(f"Whisper 모델 로드 완료! ({size})")
+    
+    return model
+
+
+def normalize_language(code: Optional[str]) -> Optional[str]:
+    """
+    yt-dlp / 자막 언어 코드를 Whisper 언어 코드로 (ko-KR → ko, zh-Hans → zh)
+    """
+    if not code:
+        return None
+    code = code.strip().lower().replace('_', '-').split('-')[0]
+    if not code or code in ('und', 'zxx', 'mul'):
+        return None
+    try:
+        from whisper.tokenizer import LANGUAGES
+    except Exception:
+        return code if len(code) in (2, 3) else None
+    return code if code in LANGUAGES else None
+
+
+def _model_rank(size: str) -> int:
+    base = size.split('.')[0].split('-')[0]
+    return _MODEL_ORDER.index(base) if base in _MODEL_ORDER else len(_MODEL_ORDER)
+
+
+def choose_model(language: Optional[str], duration: Optional[float] = None) -> str:
+    """
+    언어 + 오디오 길이로 모델 크기 선택
     """
-    Whisper 모델 로드 (싱글톤)
+    size = WHISPER_MODEL_BY_LANGUAGE.get(language or '', WHISPER_MODEL_BY_LANGUAGE.get('*', WHISPER_MODEL))
+    # 영어 전용 모델(.en)은 다른 언어에 쓰지 않음
+    if size.endswith('.en') and language != 'en':
+        size = size[:-3]
+    if duration and duration > WHISPER_LONG_AUDIO_SECONDS and _model_rank(size) > _model_rank(WHISPER_LONG_AUDIO_MODEL):
+        size = WHISPER_LONG_AUDIO_MODEL
+    return size
+
+
+def _load_window(audio_path: str, offset: float, seconds: float):
+    """
+    오디오 일부만 디코딩 (whisper.audio.load_audio와 같은 형식: 16kHz mono float32)
+    """
+    import numpy as np
+    
+    cmd = [
+        'ffmpeg', '-nostdin', '-ss', f"{offset:.2f}", '-t', f"{seconds:.2f}", '-i', audio_path,
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(_SAMPLE_RATE), '-'
+    ]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def detect_language(audio_path: str, duration: Optional[float] = None) -> Tuple[Optional[str], float]:
+    """
+    짧은 구간 몇 개로 언어 감지 (전체 디코딩 없이 encoder만 실행)
+    
+    Returns:
+        (언어 코드, 확률) - 감지 실패 시 (None, 0.0)
     """
-    global _whisper_model
+    import whisper
     
-    if _whisper_model is None:
-        print("[INFO] Whisper 모델 로딩 중... (처음 한 번만)")
-        _whisper_model = whisper.load_model("tiny")  # tiny 모델 (39MB, 2-3배 빠름!)
-        print("[INFO] Whisper 모델 로드 완료!")
+    model = get_whisper_model()
+    if duration and duration > WHISPER_PROBE_SECONDS * 2:
+        windows = max(1, WHISPER_PROBE_WINDOWS)
+        # 앞 10% ~ 뒤 90% 사이에서 고르게 (인트로/아웃트로 음악 회피)
+        offsets = [duration * (0.1 + 0.8 * i / max(1, windows - 1)) for i in range(windows)] if windows > 1 else [duration * 0.3]
+        offsets = [min(offset, duration - WHISPER_PROBE_SECONDS) for offset in offsets]
+    else:
+        offsets = [0.0]
     
-    return _whisper_model
+    totals: Dict[str, float] = {}
+    with track_dependency('whisper', 'detect_language'):
+        for offset in offsets:
+            audio = _load_window(audio_path, offset, WHISPER_PROBE_SECONDS)
+            if not len(audio):
+                continue
+            mel = whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(audio), n_mels=model.dims.n_mels
+            ).to(model.device)
+            _, probs = model.detect_language(mel)
+            for language, probability in probs.items():
+                totals[language] = totals.get(language, 0.0) + probability
+    
+    if not totals:
+        return None, 0.0
+    language = max(totals, key=totals.get)
+    return language, totals[language] / len(offsets)
 
 
-def transcribe_audio(audio_path: str, language: str = 'ko') -> Optional[str]:
+def transcribe_audio(audio_path: str, language: str = 'ko', model_size: Optional[str] = None) -> Optional[str]:
     """
-    오디오 파일을 텍스트로 변환
+    오디오 파일을 텍스트로 변환 (언어 고정)
     
     Args:
         audio_path: 오디오 파일 경로
         language: 언어 코드 ('ko', 'en' 등)
+        model_size: Whisper 모델 크기 (기본: choose_model(language))
     
     Returns:
         변환된 텍스트
@@ -39,73 +166,119 @@ def transcribe_audio(audio_path: str, language: str = 'ko') -> Optional[str]:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"오디오 파일을 찾을 수 없습니다: {audio_path}")
         
-        print(f"[INFO] Whisper로 음성 인식 시작: {audio_path}")
-        print(f"[INFO] 언어: {language}")
+        log.info(f"Whisper로 음성 인식 시작: {audio_path}")
+        model_size = model_size or choose_model(language)
+        log.info(f"언어: {language}, 모델: {model_size}")
         
         # Whisper 모델 로드
-        model = get_whisper_model()
+        model = get_whisper_model(model_size)
         
         # 음성 인식 실행
-        result = model.transcribe(
-            audio_path,
-            language=language,
-            verbose=False,
-            fp16=False  # CPU 호환성
-        )
+        with track_dependency('whisper', 'transcribe'):
+            result = model.transcribe(
+                audio_path,
+                language=language,
+                verbose=False,
+                fp16=False  # CPU 호환성
+            )
         
         text = result["text"]
-        print(f"[SUCCESS] Whisper 변환 완료! ({len(text)} 글자)")
+        log.success(f"Whisper 변환 완료! ({len(text)} 글자)")
         
         return text
     
     except Exception as e:
-        print(f"[ERROR] Whisper 변환 실패: {str(e)}")
+        log.error(f"Whisper 변환 실패: {str(e)}")
         return None
 
 
-def transcribe_audio_auto_detect(audio_path: str) -> Optional[str]:
+def transcribe_audio_auto_detect(
+    audio_path: str,
+    language_hint: Optional[str] = None,
+    duration: Optional[float] = None
+) -> Optional[str]:
+    """
+    오디오 파일을 텍스트로 변환 (transcribe_audio_result의 텍스트만)
+    """
+    result = transcribe_audio_result(audio_path, language_hint, duration)
+    return result['text'] if result else None
+
+
+def transcribe_audio_result(
+    audio_path: str,
+    language_hint: Optional[str] = None,
+    duration: Optional[float] = None
+) -> Optional[Dict]:
     """
-    오디오 파일을 텍스트로 변환 (언어 자동 감지)
+    오디오 파일을 텍스트로 변환 (2단계: 언어 감지 → 언어 고정 디코딩)
+    
+    1. 언어 결정: language_hint(yt-dlp 메타데이터 / 자막 목록 언어) → 없으면 짧은 구간 probe
+    2. 언어 + 길이로 모델 선택 후 언어를 고정해서 디코딩
+       (여러 언어가 섞인 영상에서 중간에 언어가 바뀌지 않고, 감지용 디코딩이 없어 더 빠름)
+    probe가 실패하거나 확신이 낮으면 예전처럼 전체 디코딩에서 감지
     
     Args:
         audio_path: 오디오 파일 경로
+        language_hint: 미리 알고 있는 언어 코드
+        duration: 오디오 길이 (초, probe 구간 / 모델 선택에 사용)
     
     Returns:
-        변환된 텍스트
+        Whisper 결과 {'text', 'language', 'segments': [{'start', 'end', 'text'}, ...]}
     """
     try:
         # 절대 경로로 변환
         audio_path = os.path.abspath(audio_path)
         
-        print(f"[DEBUG] Whisper 입력 파일: {audio_path}")
-        print(f"[DEBUG] 파일 존재 여부: {os.path.exists(audio_path)}")
-        print(f"[DEBUG] 현재 작업 디렉토리: {os.getcwd()}")
+        log.debug(f"Whisper 입력 파일: {audio_path}")
         
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"오디오 파일을 찾을 수 없습니다: {audio_path}")
         
-        print(f"[INFO] Whisper로 음성 인식 시작 (언어 자동 감지): {audio_path}")
+        # 1단계: 언어 결정
+        language = normalize_language(language_hint)
+        detected_by = 'hint' if language else None
+        if not language:
+            try:
+                language, probability = detect_language(audio_path, duration)
+                if language and probability >= WHISPER_PROBE_MIN_PROBABILITY:
+                    detected_by = 'probe'
+                    log.info(f"언어 감지 (probe): {language} ({probability:.2f})")
+                else:
+                    log.info(f"언어 감지 확신 낮음: {language} ({probability:.2f}) → 전체 디코딩에서 감지")
+                    language = None
+            except Exception as e:
+                log.warning(f"언어 감지 probe 실패, 전체 디코딩에서 감지: {str(e)}")
+                language = None
         
-        # Whisper 모델 로드
-        model = get_whisper_model()
+        # 2단계: 모델 선택 + 언어 고정 디코딩
+        model_size = choose_model(language, duration)
+        span = current_span()
+        if span:
+            span.set_attribute('whisper.language', language or 'auto')
+            span.set_attribute('whisper.language_source', detected_by or 'decode')
+            span.set_attribute('whisper.model', model_size)
         
-        # 음성 인식 실행 (언어 자동 감지)
-        result = model.transcribe(
-            audio_path,
-            verbose=False,
-            fp16=False  # CPU 호환성
-        )
+        log.info(f"Whisper로 음성 인식 시작 (언어: {language or '자동'}, 모델: {model_size}): {audio_path}")
+        model = get_whisper_model(model_size)
         
-        detected_language = result.get("language", "unknown")
+        with track_dependency('whisper', 'transcribe'):
+            result = model.transcribe(
+                audio_path,
+                language=language,
+                verbose=False,
+                fp16=False  # CPU 호환성
+            )
+        
+        detected_language = result.get("language", language or "unknown")
         text = result["text"]
         
-        print(f"[SUCCESS] 언어 감지: {detected_language}")
-        print(f"[SUCCESS] Whisper 변환 완료! ({len(text)} 글자)")
+        log.success(f"언어: {detected_language} ({detected_by or 'decode'})")
+        log.success(f"Whisper 변환 완료! ({len(text)} 글자)")
         
-        return text
+        return result
     
     except Exception as e:
-        print(f"[ERROR] Whisper 변환 실패: {str(e)}")
+        log.error(f"Whisper 변환 실패: {str(e)}")
         import traceback
         traceback.print_exc()
         return None
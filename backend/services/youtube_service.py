@@ -5,11 +5,30 @@ YouTube 비디오 처리 서비스
 - 오디오 추출
 - Whisper 음성 인식
 """
-import yt_dlp
-from youtube_transcript_api import YouTubeTranscriptApi
-from typing import Optional, Dict, List
+from collections import OrderedDict
+from typing import Callable, Optional, Dict, List, Tuple
+from services.metrics import track_stage, track_dependency, TRANSCRIPT_SOURCE, FALLBACKS
+from services.transcript_compaction import compact_lines, compact_text, record_compaction
 import re
 import os
+from services.tracing import get_logger
+
+log = get_logger('youtube')
+
+# 자막 목록에 있던 언어 (자막을 못 가져와도 Whisper 언어 힌트로 사용, 자동 생성 자막 언어 우선)
+_transcript_languages: 'OrderedDict[str, List[str]]' = OrderedDict()
+_TRANSCRIPT_LANGUAGES_MAX = 1024
+
+
+# yt_dlp / youtube_transcript_api는 import 비용이 커서 처음 쓸 때 로드 (services/warmup.py에서 미리 로드 가능)
+def load_yt_dlp():
+    import yt_dlp
+    return yt_dlp
+
+
+def load_transcript_api():
+    from youtube_transcript_api import YouTubeTranscriptApi
+    return YouTubeTranscriptApi
 
 
 def extract_video_id(url: str) -> Optional[str]:
@@ -30,6 +49,73 @@ def extract_video_id(url: str) -> Optional[str]:
     return None
 
 
+def is_collection_url(url: str) -> bool:
+    """
+    재생목록 / 채널 URL인지 (일괄 수집 대상)
+    """
+    return bool(re.search(
+        r'youtube\.com\/(?:playlist\?|watch\?.*[?&]?list=|@[^/?#]+|channel\/|c\/|user\/)',
+        url
+    ))
+
+
+def expand_playlist(url: str, limit: Optional[int] = None) -> Dict:
+    """
+    재생목록 / 채널의 영상 목록 (yt-dlp flat 추출: 영상별 페이지는 요청하지 않음)
+
+    Returns:
+        {'playlist_id', 'title', 'channel', 'entries': [{'video_id', 'video_url', 'title', 'duration'}]}
+    """
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': 'in_playlist',
+        'skip_download': True,
+        'nocheckcertificate': True,
+        'ignoreerrors': True,
+        'no_color': True,
+    }
+    if limit:
+        ydl_opts['playlistend'] = limit
+    
+    try:
+        with load_yt_dlp().YoutubeDL(ydl_opts) as ydl, track_dependency('yt_dlp', 'extract_playlist'):
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        raise Exception(f"재생목록 정보 가져오기 실패: {str(e)}")
+    
+    if not info:
+        raise Exception("재생목록 정보를 가져올 수 없습니다")
+    
+    entries = []
+    seen = set()
+    for entry in info.get('entries') or []:
+        # 채널 URL은 탭(동영상/Shorts/...)별 재생목록이 중첩되어 나올 수 있음
+        nested = entry.get('entries') if entry else None
+        for item in (nested if nested is not None else [entry]):
+            video_id = item.get('id') if item else None
+            if not video_id or video_id in seen or len(video_id) != 11:
+                continue
+            seen.add(video_id)
+            entries.append({
+                'video_id': video_id,
+                'video_url': f"https://www.youtube.com/watch?v={video_id}",
+                'title': item.get('title'),
+                'duration': item.get('duration'),
+            })
+            if limit and len(entries) >= limit:
+                break
+        if limit and len(entries) >= limit:
+            break
+    
+    return {
+        'playlist_id': info.get('id'),
+        'title': info.get('title'),
+        'channel': info.get('uploader') or info.get('channel'),
+        'entries': entries,
+    }
+
+
 def get_video_info(video_url: str) -> Dict:
     """
     YouTube 비디오 정보 가져오기 (개선된 버전)
@@ -46,7 +132,7 @@ def get_video_info(video_url: str) -> Dict:
     }
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with load_yt_dlp().YoutubeDL(ydl_opts) as ydl, track_dependency('yt_dlp', 'extract_info'):
             info = ydl.extract_info(video_url, download=False)
             
             if not info:
@@ -61,14 +147,43 @@ def get_video_info(video_url: str) -> Dict:
                 'channel': info.get('uploader'),
                 'view_count': info.get('view_count'),
                 'upload_date': info.get('upload_date'),
+                'language': info.get('language'),  # 업로더가 지정한 음성 언어 (없을 수 있음)
             }
     except Exception as e:
         raise Exception(f"비디오 정보 가져오기 실패: {str(e)}")
 
 
-def get_transcript(video_id: str, languages: List[str] = None) -> Optional[str]:
+def _join_transcript(transcript_data: List[Dict]) -> str:
+    """
+    자막 조각을 하나의 텍스트로 (겹치는 줄 / 잡음 태그 / 반복 제거)
+    """
+    with track_stage('youtube', 'compact'):
+        text, stats = compact_lines([item['text'] for item in transcript_data], 'subtitle')
+    record_compaction(stats)
+    return text
+
+
+def _remember_transcript_languages(video_id: str, languages: List[str]) -> None:
+    _transcript_languages[video_id] = languages
+    _transcript_languages.move_to_end(video_id)
+    while len(_transcript_languages) > _TRANSCRIPT_LANGUAGES_MAX:
+        _transcript_languages.popitem(last=False)
+
+
+def language_hint(video_data: Dict) -> Optional[str]:
+    """
+    Whisper 언어 힌트: 자동 생성 자막 언어(= YouTube가 인식한 음성 언어) → yt-dlp 메타데이터 언어
+    (없으면 None → Whisper가 짧은 구간으로 감지)
     """
-    YouTube 비디오 자막 가져오기
+    languages = _transcript_languages.get(video_data.get('video_id') or '')
+    if languages:
+        return languages[0]
+    return video_data.get('language')
+
+
+def fetch_transcript_data(video_id: str, languages: List[str] = None) -> Optional[List[Dict]]:
+    """
+    YouTube 비디오 자막 가져오기 (시간 정보가 있는 조각 목록: {'text', 'start', 'duration'})
     - 더 많은 언어 지원
     - 자동 생성 자막 우선 지원
     """
@@ -78,16 +193,20 @@ def get_transcript(video_id: str, languages: List[str] = None) -> Optional[str]:
     
     try:
         # 자막 목록 가져오기
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+        with track_dependency('youtube_transcript_api', 'list_transcripts'):
+            transcript_list = load_transcript_api().list_transcripts(video_id)
         
-        print(f"[INFO] 비디오 ID: {video_id}")
+        log.info(f"비디오 ID: {video_id}")
         
         # 사용 가능한 모든 자막 출력
         try:
             available = []
+            generated, manual = [], []
             for t in transcript_list:
                 available.append(f"{t.language_code}({t.language})")
-            print(f"[INFO] 사용 가능한 자막: {', '.join(available)}")
+                (generated if getattr(t, 'is_generated', False) else manual).append(t.language_code)
+            log.info(f"사용 가능한 자막: {', '.join(available)}")
+            _remember_transcript_languages(video_id, generated + manual)
         except:
             pass
         
@@ -95,10 +214,10 @@ def get_transcript(video_id: str, languages: List[str] = None) -> Optional[str]:
         for lang in languages:
             try:
                 transcript = transcript_list.find_generated_transcript([lang])
-                transcript_data = transcript.fetch()
-                full_text = ' '.join([item['text'] for item in transcript_data])
-                print(f"[SUCCESS] 자동 생성 자막 발견: {lang}")
-                return full_text
+                with track_dependency('youtube_transcript_api', 'fetch'):
+                    transcript_data = transcript.fetch()
+                log.success(f"자동 생성 자막 발견: {lang}")
+                return transcript_data
             except:
                 continue
         
@@ -106,10 +225,10 @@ def get_transcript(video_id: str, languages: List[str] = None) -> Optional[str]:
         for lang in languages:
             try:
                 transcript = transcript_list.find_manually_created_transcript([lang])
-                transcript_data = transcript.fetch()
-                full_text = ' '.join([item['text'] for item in transcript_data])
-                print(f"[SUCCESS] 수동 자막 발견: {lang}")
-                return full_text
+                with track_dependency('youtube_transcript_api', 'fetch'):
+                    transcript_data = transcript.fetch()
+                log.success(f"수동 자막 발견: {lang}")
+                return transcript_data
             except:
                 continue
         
@@ -117,86 +236,203 @@ def get_transcript(video_id: str, languages: List[str] = None) -> Optional[str]:
         try:
             for transcript in transcript_list:
                 try:
-                    transcript_data = transcript.fetch()
-                    full_text = ' '.join([item['text'] for item in transcript_data])
-                    print(f"[SUCCESS] 자막 발견: {transcript.language_code}")
-                    return full_text
+                    with track_dependency('youtube_transcript_api', 'fetch'):
+                        transcript_data = transcript.fetch()
+                        log.success(f"자막 발견: {transcript.language_code}")
+                    return transcript_data
                 except Exception as e:
-                    print(f"[DEBUG] {transcript.language_code} 자막 가져오기 실패: {str(e)}")
+                    log.debug(f"{transcript.language_code} 자막 가져오기 실패: {str(e)}")
                     continue
         except Exception as e:
-            print(f"[DEBUG] 자막 목록 순회 실패: {str(e)}")
+            log.debug(f"자막 목록 순회 실패: {str(e)}")
         
-        print("[ERROR] 사용 가능한 자막을 찾을 수 없습니다")
+        log.error("사용 가능한 자막을 찾을 수 없습니다")
         return None
     
     except Exception as e:
-        print(f"[ERROR] 자막 가져오기 실패: {str(e)}")
+        log.error(f"자막 가져오기 실패: {str(e)}")
         return None
 
 
-def download_audio(video_url: str, output_path: str = 'downloads') -> Optional[str]:
+def get_transcript_with_timing(video_id: str, languages: List[str] = None) -> Optional[Tuple[str, str]]:
     """
-    YouTube 비디오에서 오디오만 다운로드 (Whisper용, 개선된 버전)
+    자막 텍스트(압축, 요약용) + 시간 정보(pack_timing 결과, 원본 조각 기준)
     """
-    import os
+    from services.timed_transcript import TimedTranscript
+    from services.transcript_store import pack_timing
     
-    # downloads 폴더 생성
-    if not os.path.exists(output_path):
-        os.makedirs(output_path)
+    transcript_data = fetch_transcript_data(video_id, languages)
+    if not transcript_data:
+        return None
+    return _join_transcript(transcript_data), pack_timing(TimedTranscript.from_subtitles(transcript_data))
+
+
+def get_transcript(video_id: str, languages: List[str] = None) -> Optional[str]:
+    """
+    YouTube 비디오 자막 가져오기 (텍스트만)
+    """
+    transcript_data = fetch_transcript_data(video_id, languages)
+    return _join_transcript(transcript_data) if transcript_data else None
+
+
+def download_audio(
+    video_url: str,
+    fmt: Optional[str] = None,
+    should_cancel: Optional[Callable[[], bool]] = None
+) -> Optional[str]:
+    """
+    YouTube 비디오에서 오디오만 다운로드 (Whisper용, 오디오 캐시 사용)
+    - 캐시에 있으면 네트워크 없이 바로 반환
+    - 중단된 다운로드는 남아 있는 .part 파일에서 이어받기
+    - 반환된 파일은 pin 상태 → 다 쓰면 transcribe_downloaded_audio(또는 audio_cache.release)가 해제
+    - should_cancel()이 True가 되면 중단하고 None (.part 파일은 남겨서 다음에 이어받기, 미리 받기용)
+    """
+    from services.audio_cache import audio_cache, audio_format, AUDIO_CODEC, AUDIO_QUALITY
+    
+    video_id = extract_video_id(video_url)
+    fmt = fmt or audio_format()
+    if video_id:
+        cached = audio_cache.acquire(video_id, fmt)
+        if cached:
+            log.info(f"오디오 캐시 사용: {cached}")
+            return cached
     
     # FFmpeg 경로 설정
     ffmpeg_location = r'C:\Users\1213j\AppData\Local\Microsoft\WinGet\Packages\Gyan.FFmpeg_Microsoft.Winget.Source_8wekyb3d8bbwe\ffmpeg-8.0.1-full_build\bin'
-    
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '128',  # 품질 낮춤 (Whisper용으로 충분)
-        }],
-        'ffmpeg_location': ffmpeg_location,  # FFmpeg 경로 명시
-        'outtmpl': f'{output_path}/%(id)s.%(ext)s',
-        'quiet': True,
-        'no_warnings': True,
-        'nocheckcertificate': True,
-        'ignoreerrors': False,
-        'no_color': True,
-        'extract_flat': False,
-        'geo_bypass': True,  # 지역 제한 우회 시도
-        'geo_bypass_country': 'KR',  # 한국으로 설정
-    }
+    codec, _, quality = fmt.partition('-')
     
     try:
-        print(f"[INFO] 오디오 다운로드 시작: {video_url}")
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(video_url, download=True)
-            
-            if not info:
-                print(f"[ERROR] 영상 정보를 가져올 수 없습니다")
+        log.info(f"오디오 다운로드 시작: {video_url}")
+        with audio_cache.download_slot(video_id or 'unknown', fmt) as work_dir:
+            # 기다리는 동안 다른 워커가 받아 뒀을 수 있음
+            cached = audio_cache.acquire(video_id, fmt) if video_id else None
+            if cached:
+                log.info(f"오디오 캐시 사용: {cached}")
+                return cached
+            if should_cancel and should_cancel():
                 return None
             
-            # 절대 경로로 변환
-            audio_file = os.path.abspath(f"{output_path}/{info['id']}.mp3")
+            yt_dlp = load_yt_dlp()
+            
+            def on_progress(_):
+                audio_cache.heartbeat(video_id or 'unknown', fmt)
+                if should_cancel and should_cancel():
+                    raise yt_dlp.utils.DownloadCancelled("다운로드 취소")
+            
+            ydl_opts = {
+                'format': 'bestaudio/best',
+                'postprocessors': [{
+                    'key': 'FFmpegExtractAudio',
+                    'preferredcodec': codec or AUDIO_CODEC,
+                    'preferredquality': quality or AUDIO_QUALITY,  # 품질 낮춤 (Whisper용으로 충분)
+                }],
+                'ffmpeg_location': ffmpeg_location,  # FFmpeg 경로 명시
+                # 작업 디렉토리 안에서 받고 끝나면 캐시로 rename (.part 이어받기)
+                'outtmpl': os.path.join(work_dir, '%(id)s.%(ext)s'),
+                'continuedl': True,
+                'progress_hooks': [on_progress],
+                'quiet': True,
+                'no_warnings': True,
+                'nocheckcertificate': True,
+                'ignoreerrors': False,
+                'no_color': True,
+                'extract_flat': False,
+                'geo_bypass': True,  # 지역 제한 우회 시도
+                'geo_bypass_country': 'KR',  # 한국으로 설정
+            }
+            
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl, track_dependency('yt_dlp', 'download_audio'):
+                info = ydl.extract_info(video_url, download=True)
             
-            print(f"[DEBUG] 파일 경로 확인: {audio_file}")
-            print(f"[DEBUG] 파일 존재 여부: {os.path.exists(audio_file)}")
+            if not info:
+                log.error(f"영상 정보를 가져올 수 없습니다")
+                return None
             
-            if os.path.exists(audio_file):
-                print(f"[SUCCESS] 오디오 다운로드 완료: {audio_file}")
-                return audio_file
-            else:
-                print(f"[ERROR] 오디오 파일을 찾을 수 없음: {audio_file}")
+            downloaded = os.path.join(work_dir, f"{info['id']}.{codec or AUDIO_CODEC}")
+            if not os.path.exists(downloaded):
+                log.error(f"오디오 파일을 찾을 수 없음: {downloaded}")
                 return None
+            
+            audio_file = audio_cache.commit(info['id'], fmt, downloaded)
+            log.success(f"오디오 다운로드 완료: {audio_file}")
+            return audio_file
     except Exception as e:
-        print(f"[ERROR] 오디오 다운로드 실패: {str(e)}")
+        if should_cancel and should_cancel():
+            log.info(f"오디오 다운로드 중단: {video_url}")
+            return None
+        log.error(f"오디오 다운로드 실패: {str(e)}")
         return None
 
 
-def process_youtube_video(video_url: str, use_whisper: bool = True) -> Dict:
+def transcribe_downloaded_audio(
+    audio_file: str,
+    pipeline: str = 'youtube',
+    language: Optional[str] = None,
+    duration: Optional[float] = None
+) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    다운로드한 오디오를 Whisper로 변환 + 압축 (끝나면 캐시 pin 해제, 캐시 밖 파일은 삭제)
+    
+    Returns:
+        (압축된 텍스트, 시간 정보(pack_timing 결과, 세그먼트가 없으면 None)) 또는 None
+    """
+    from services.whisper_service import transcribe_audio_result
+    from services.timed_transcript import TimedTranscript
+    from services.transcript_store import pack_timing
+    
+    try:
+        with track_stage(pipeline, 'whisper'):
+            result = transcribe_audio_result(audio_file, language_hint=language, duration=duration)
+        if not result or not result.get('text'):
+            return None
+        
+        # Whisper 반복 환각 / 추임새 제거
+        with track_stage(pipeline, 'compact'):
+            whisper_text, stats = compact_text(result['text'], 'whisper')
+        record_compaction(stats)
+        timed = TimedTranscript.from_whisper(result)
+        return whisper_text, (pack_timing(timed) if len(timed) else None)
+    finally:
+        # 캐시 pin 해제 (파일은 재변환에 대비해 남겨 두고 용량 초과 시 LRU로 삭제)
+        from services.audio_cache import audio_cache
+        if audio_cache.owns(audio_file):
+            audio_cache.release(audio_file)
+        else:
+            try:
+                os.remove(audio_file)
+                log.info(f"임시 오디오 파일 삭제: {audio_file}")
+            except:
+                pass
+
+
+def transcribe_video_audio(video_url: str, video_data: Optional[Dict] = None) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    오디오 다운로드 + Whisper 변환 (자막이 없을 때만, 실패하면 None)
+    video_data(get_video_info 결과)가 있으면 언어 힌트 / 길이로 Whisper 언어·모델 결정
+    자막 확인 뒤 마지막 단계 → 자막 출처 지표(whisper / none)는 여기서 집계
+    """
+    with track_stage('youtube', 'audio_download'):
+        audio_file = download_audio(video_url)
+    
+    result = None
+    if audio_file and os.path.exists(audio_file):
+        video_data = video_data or {}
+        result = transcribe_downloaded_audio(
+            audio_file, language=language_hint(video_data), duration=video_data.get('duration')
+        )
+    if result:
+        log.success("Whisper로 처리 완료!")
+        TRANSCRIPT_SOURCE.inc(source='whisper')
+    else:
+        log.error("자막도 없고 Whisper도 실패")
+        TRANSCRIPT_SOURCE.inc(source='none')
+    return result
+
+
+def process_youtube_video(video_url: str, use_whisper: bool = True, video_info: Optional[Dict] = None) -> Dict:
     """
     YouTube 비디오 전체 처리 (하이브리드 방식)
-    - 비디오 정보 추출
+    - 비디오 정보 추출 (video_info(get_video_info 결과)가 있으면 생략)
     - 자막 다운로드 (우선)
     - 자막 없으면 Whisper 사용
     """
@@ -206,48 +442,40 @@ def process_youtube_video(video_url: str, use_whisper: bool = True) -> Dict:
         raise ValueError("유효하지 않은 YouTube URL입니다")
     
     # 비디오 정보 가져오기
-    video_info = get_video_info(video_url)
+    if video_info is not None:
+        video_info = dict(video_info)
+    else:
+        with track_stage('youtube', 'video_info'):
+            video_info = get_video_info(video_url)
     
     # 1단계: 자막 시도 (빠르고 무료)
-    print("[INFO] 1단계: 자막 확인 중...")
-    transcript = get_transcript(video_id)
+    log.info("1단계: 자막 확인 중...")
+    with track_stage('youtube', 'transcript'):
+        subtitle = get_transcript_with_timing(video_id)
     
-    if transcript:
-        print("[SUCCESS] 자막으로 처리 완료! (빠름)")
-        video_info['transcript'] = transcript
+    if subtitle:
+        log.success("자막으로 처리 완료! (빠름)")
+        TRANSCRIPT_SOURCE.inc(source='subtitle')
+        video_info['transcript'], video_info['timed_transcript'] = subtitle
         video_info['has_transcript'] = True
         video_info['source'] = 'subtitle'
         return video_info
     
-    # 2단계: 자막 없으면 Whisper 사용 (느리지만 확실)
+    # 2단계: 자막 없으면 Whisper 사용 (느리지만 확실, 실패 로그 / 지표는 transcribe_video_audio에서)
+    # use_whisper=False: 호출한 쪽이 Whisper 한도를 따로 받아서 transcribe_video_audio 호출
     if use_whisper:
-        print("[INFO] 2단계: 자막 없음. Whisper로 음성 인식 시작...")
-        
-        # 오디오 다운로드
-        audio_file = download_audio(video_url)
+        log.info("2단계: 자막 없음. Whisper로 음성 인식 시작...")
+        FALLBACKS.inc(pipeline='youtube', from_stage='subtitle', to_stage='whisper')
+        whisper = transcribe_video_audio(video_url, video_info)
         
-        if audio_file and os.path.exists(audio_file):
-            # Whisper로 변환
-            from services.whisper_service import transcribe_audio_auto_detect
-            
-            whisper_text = transcribe_audio_auto_detect(audio_file)
-            
-            # 오디오 파일 삭제 (정리)
-            try:
-                os.remove(audio_file)
-                print(f"[INFO] 임시 오디오 파일 삭제: {audio_file}")
-            except:
-                pass
-            
-            if whisper_text:
-                print("[SUCCESS] Whisper로 처리 완료!")
-                video_info['transcript'] = whisper_text
-                video_info['has_transcript'] = True
-                video_info['source'] = 'whisper'
-                return video_info
-    
-    # 둘 다 실패
-    print("[ERROR] 자막도 없고 Whisper도 실패")
+        if whisper:
+            video_info['transcript'], video_info['timed_transcript'] = whisper
+            video_info['has_transcript'] = True
+            video_info['source'] = 'whisper'
+            return video_info
+    else:
+        log.info("자막 없음 (Whisper는 호출한 쪽에서 처리)")
+    
     video_info['transcript'] = None
     video_info['has_transcript'] = False
     video_info['source'] = 'none'
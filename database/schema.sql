@@ -45,6 +45,49 @@ CREATE TABLE IF NOT EXISTS youtube_summaries (
   created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- 4-1. youtube_transcripts 테이블 (압축된 자막, 요약과 분리 저장)
+-- data: 세그먼트 블록 압축 컨테이너 (base64), id = youtube_summaries.id
+-- timing: 세그먼트별 시작 시각 / 길이 + 원문 (TimedTranscript, 압축 + base64, 없을 수 있음)
+CREATE TABLE IF NOT EXISTS youtube_transcripts (
+  id UUID PRIMARY KEY REFERENCES youtube_summaries(id) ON DELETE CASCADE,
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  codec TEXT NOT NULL, -- 'gzip' or 'zstd'
+  content_hash TEXT NOT NULL, -- 원문 sha256
+  segment_count INTEGER NOT NULL,
+  raw_size INTEGER NOT NULL,
+  compressed_size INTEGER NOT NULL,
+  data TEXT NOT NULL,
+  timing TEXT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+-- 기존 테이블에 컬럼 추가 (이미 있으면 무시)
+ALTER TABLE youtube_transcripts ADD COLUMN IF NOT EXISTS timing TEXT;
+
+-- 4-2. transcript_digests 테이블 (자막 구간별 압축 노트, 다시 요약할 때 재사용)
+-- id = sha256(프롬프트 버전 + 구간 원문): 구간 내용에서만 결정되므로 사용자 간 공유 (서버 키로만 접근)
+CREATE TABLE IF NOT EXISTS transcript_digests (
+  id TEXT PRIMARY KEY,
+  digest TEXT NOT NULL,
+  source_tokens INTEGER,
+  digest_tokens INTEGER,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- 4-3. content_fingerprints 테이블 (웹 / PDF 본문 MinHash 서명 + 요약, 거의 같은 본문이면 요약 재사용)
+-- id = sha256(종류 + 정규화한 본문), bands = LSH 밴드 키 (겹치는 행이 후보), 사용자 간 공유 (서버 키로만 접근)
+CREATE TABLE IF NOT EXISTS content_fingerprints (
+  id TEXT PRIMARY KEY,
+  kind TEXT NOT NULL, -- 'web' or 'pdf'
+  source_url TEXT, -- 정규화한 URL (웹)
+  title TEXT,
+  summary TEXT NOT NULL,
+  key_points TEXT[],
+  meta JSONB,
+  signature TEXT NOT NULL, -- MinHash (base64)
+  bands TEXT[] NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- 5. embeddings 테이블 (Vector 검색용)
 CREATE TABLE IF NOT EXISTS embeddings (
   id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -87,6 +130,11 @@ CREATE INDEX IF NOT EXISTS idx_notes_folder_id ON notes(folder_id);
 CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes(created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_youtube_user_id ON youtube_summaries(user_id);
 CREATE INDEX IF NOT EXISTS idx_youtube_created_at ON youtube_summaries(created_at DESC);
+-- 목록 keyset 페이지네이션용 (user_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC)
+CREATE INDEX IF NOT EXISTS idx_youtube_user_created ON youtube_summaries(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_youtube_transcripts_hash ON youtube_transcripts(content_hash);
+CREATE INDEX IF NOT EXISTS idx_content_fingerprints_bands ON content_fingerprints USING gin (bands);
+CREATE INDEX IF NOT EXISTS idx_content_fingerprints_url ON content_fingerprints(source_url, created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_embeddings_user_id ON embeddings(user_id);
 CREATE INDEX IF NOT EXISTS idx_embeddings_content_type ON embeddings(content_type);
 
@@ -98,6 +146,10 @@ USING hnsw (embedding vector_cosine_ops);
 ALTER TABLE folders ENABLE ROW LEVEL SECURITY;
 ALTER TABLE notes ENABLE ROW LEVEL SECURITY;
 ALTER TABLE youtube_summaries ENABLE ROW LEVEL SECURITY;
+ALTER TABLE youtube_transcripts ENABLE ROW LEVEL SECURITY;
+-- 정책 없음: service role(백엔드)만 접근
+ALTER TABLE transcript_digests ENABLE ROW LEVEL SECURITY;
+ALTER TABLE content_fingerprints ENABLE ROW LEVEL SECURITY;
 ALTER TABLE embeddings ENABLE ROW LEVEL SECURITY;
 ALTER TABLE user_documents ENABLE ROW LEVEL SECURITY;
 ALTER TABLE user_preferences ENABLE ROW LEVEL SECURITY;
@@ -150,6 +202,19 @@ CREATE POLICY "Users can delete their own youtube summaries"
   ON youtube_summaries FOR DELETE 
   USING (auth.uid() = user_id);
 
+-- youtube_transcripts 정책
+CREATE POLICY "Users can view their own youtube transcripts" 
+  ON youtube_transcripts FOR SELECT 
+  USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can insert their own youtube transcripts" 
+  ON youtube_transcripts FOR INSERT 
+  WITH CHECK (auth.uid() = user_id);
+
+CREATE POLICY "Users can delete their own youtube transcripts" 
+  ON youtube_transcripts FOR DELETE 
+  USING (auth.uid() = user_id);
+
 -- embeddings 정책
 CREATE POLICY "Users can view their own embeddings" 
   ON embeddings FOR SELECT 
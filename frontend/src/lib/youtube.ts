@@ -62,17 +62,28 @@ export async function getYoutubeVideoInfo(videoUrl: string) {
 
 /**
  * 사용자의 YouTube 요약 목록 가져오기
+ * - 기본은 id, title, thumbnail_url, created_at만 반환 (fields로 추가 컬럼 요청)
+ * - nextCursor가 있으면 다음 페이지 요청 시 cursor로 전달
  */
-export async function getUserYoutubeSummaries(userId: string, limit: number = 20) {
-  const response = await fetch(
-    `${BACKEND_URL}/api/youtube/summaries?user_id=${userId}&limit=${limit}`
-  )
+export async function getUserYoutubeSummaries(
+  userId: string,
+  limit: number = 20,
+  options: { cursor?: string; fields?: string[] } = {}
+) {
+  const params = new URLSearchParams({ user_id: userId, limit: String(limit) })
+  if (options.cursor) params.set('cursor', options.cursor)
+  if (options.fields?.length) params.set('fields', options.fields.join(','))
+
+  const response = await fetch(`${BACKEND_URL}/api/youtube/summaries?${params}`)
 
   if (!response.ok) {
     throw new Error('요약 목록 가져오기 실패')
   }
 
-  return response.json()
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get('X-Next-Cursor'),
+  }
 }
 
 /**
@@ -88,6 +99,27 @@ export async function getYoutubeSummary(summaryId: string) {
   return response.json()
 }
 
+/**
+ * YouTube 요약의 자막 가져오기 (세그먼트 범위 지정 가능)
+ */
+export async function getYoutubeTranscript(
+  summaryId: string,
+  range?: { start: number; end: number }
+) {
+  const headers: HeadersInit = {}
+  if (range) headers['Range'] = `segments=${range.start}-${range.end - 1}`
+
+  const response = await fetch(`${BACKEND_URL}/api/youtube/summaries/${summaryId}/transcript`, {
+    headers,
+  })
+
+  if (!response.ok) {
+    throw new Error('자막을 찾을 수 없습니다')
+  }
+
+  return response.json()
+}
+
 /**
  * YouTube 요약 삭제
  */